@@ -0,0 +1,596 @@
+"""Asyncio counterparts of the operations in auction.operations.
+
+The functions in this module mirror the blocking operations on a single
+auction, including pull refunds, settling and relisting, but take an
+AsyncAlgodClient and must be awaited. Because waiting for a round does not
+block the event loop, a single loop can drive many auctions and bidders at once.
+The batch operations, such as closeAuctions and sweepRefunds, and the options
+for sharing params and state between operations are only available in the
+blocking API.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib import parse
+import asyncio
+import base64
+import json
+import ssl
+
+from algosdk import constants, encoding, error
+from algosdk.future import transaction
+
+from .account import Account
+from .operations import (
+    getContracts as getCompiledContracts,
+    makeCreateAuctionTxn,
+    makeSetupAuctionTxns,
+    makeBidTxns,
+    makeCloseAuctionTxn,
+    makeRefundTxn,
+    makeSettleAuctionTxn,
+    makeRelistAuctionTxns,
+)
+from .util import PendingTxnResponse, decodeState
+
+API_VERSION_PATH_PREFIX = "/v2"
+
+Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class AsyncAlgodClient:
+    """A non-blocking algod client.
+
+    This implements the subset of AlgodClient used by the auction operations
+    on top of asyncio streams. HTTP/1.1 keep-alive connections are reused
+    between requests, and at most maxConnections requests are in flight at once.
+
+    Args:
+        algod_token: The algod API token.
+        algod_address: The algod address, e.g. "http://localhost:4001".
+        headers (optional): Extra headers to send with every request.
+        maxConnections (optional): The maximum number of concurrent connections
+            to algod. Defaults to 10.
+    """
+
+    def __init__(
+        self,
+        algod_token: str,
+        algod_address: str,
+        headers: Optional[Dict[str, str]] = None,
+        maxConnections: int = 10,
+    ) -> None:
+        self.algod_token = algod_token
+        self.algod_address = algod_address
+        self.headers = headers
+
+        url = parse.urlsplit(algod_address)
+        self.host = url.hostname or "localhost"
+        self.useTLS = url.scheme == "https"
+        self.port = url.port or (443 if self.useTLS else 80)
+        self.basePath = url.path.rstrip("/")
+
+        self.maxConnections = maxConnections
+        self.idle: List[Connection] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def connect(self) -> Connection:
+        if len(self.idle) > 0:
+            return self.idle.pop()
+        sslContext = ssl.create_default_context() if self.useTLS else None
+        return await asyncio.open_connection(self.host, self.port, ssl=sslContext)
+
+    async def close(self) -> None:
+        """Close all idle connections."""
+        idle, self.idle = self.idle, []
+        for _, writer in idle:
+            writer.close()
+        for _, writer in idle:
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def readResponse(
+        self, reader: asyncio.StreamReader
+    ) -> Tuple[int, bytes, bool]:
+        statusLine = await reader.readline()
+        if not statusLine:
+            raise ConnectionResetError("Connection closed by algod")
+        version, code = statusLine.split(b" ", 2)[:2]
+
+        responseHeaders: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            responseHeaders[name.strip().lower()] = value.strip()
+
+        keepAlive = (
+            version == b"HTTP/1.1"
+            and responseHeaders.get("connection", "").lower() != "close"
+        )
+
+        if responseHeaders.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    # skip trailers
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            body = b"".join(chunks)
+        elif "content-length" in responseHeaders:
+            body = await reader.readexactly(int(responseHeaders["content-length"]))
+        else:
+            body = await reader.read()
+            keepAlive = False
+
+        return int(code), body, keepAlive
+
+    async def algod_request(
+        self,
+        method: str,
+        requrl: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        response_format: str = "json",
+    ) -> Any:
+        header: Dict[str, str] = {}
+
+        if self.headers:
+            header.update(self.headers)
+
+        if headers:
+            header.update(headers)
+
+        if requrl not in constants.no_auth:
+            header[constants.algod_auth_header] = self.algod_token
+
+        if requrl not in constants.unversioned_paths:
+            requrl = API_VERSION_PATH_PREFIX + requrl
+        if params:
+            requrl = requrl + "?" + parse.urlencode(params)
+
+        body = data if data is not None else b""
+        header["Host"] = self.host
+        header["Connection"] = "keep-alive"
+        header["Content-Length"] = str(len(body))
+
+        request = "{} {} HTTP/1.1\r\n".format(method, self.basePath + requrl)
+        request += "".join("{}: {}\r\n".format(k, v) for k, v in header.items())
+        requestBytes = request.encode("latin-1") + b"\r\n" + body
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.maxConnections)
+
+        async with self._semaphore:
+            # a request on an idle keep-alive connection is retried once on a
+            # new connection if algod had already closed it, like
+            # transport.PooledAlgodClient does
+            for attempt in range(2):
+                retryable = len(self.idle) > 0 and attempt == 0
+                connection = await self.connect()
+                reader, writer = connection
+
+                try:
+                    writer.write(requestBytes)
+                    await writer.drain()
+                except ConnectionError:
+                    writer.close()
+                    if retryable:
+                        continue
+                    raise
+                except BaseException:
+                    writer.close()
+                    raise
+
+                try:
+                    code, responseBody, keepAlive = await self.readResponse(reader)
+                except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+                    writer.close()
+                    # the request may have been processed, for instance a
+                    # submitted transaction, so only retry reads
+                    if retryable and method == "GET":
+                        continue
+                    raise
+                except BaseException:
+                    writer.close()
+                    raise
+                break
+
+        if keepAlive:
+            self.idle.append(connection)
+        else:
+            connection[1].close()
+
+        if code < 200 or code >= 300:
+            message = responseBody.decode("utf-8", "replace")
+            try:
+                message = json.loads(message)["message"]
+            except (ValueError, KeyError, TypeError):
+                pass
+            raise error.AlgodHTTPError(message, code)
+
+        if response_format == "json":
+            try:
+                return json.loads(responseBody) if len(responseBody) > 0 else None
+            except ValueError as e:
+                raise error.AlgodResponseError(
+                    "Failed to parse JSON response from algod"
+                ) from e
+        return responseBody
+
+    async def health(self) -> Any:
+        return await self.algod_request("GET", "/health")
+
+    async def status(self) -> Dict[str, Any]:
+        return await self.algod_request("GET", "/status")
+
+    async def status_after_block(self, block_num: int) -> Dict[str, Any]:
+        return await self.algod_request(
+            "GET", "/status/wait-for-block-after/" + str(block_num)
+        )
+
+    async def block_info(self, block: int, response_format: str = "json") -> Any:
+        return await self.algod_request(
+            "GET",
+            "/blocks/" + str(block),
+            {"format": response_format},
+            response_format=response_format,
+        )
+
+    async def account_info(self, address: str) -> Dict[str, Any]:
+        return await self.algod_request("GET", "/accounts/" + address)
+
+    async def application_info(self, application_id: int) -> Dict[str, Any]:
+        return await self.algod_request("GET", "/applications/" + str(application_id))
+
+    async def pending_transaction_info(self, transaction_id: str) -> Dict[str, Any]:
+        return await self.algod_request(
+            "GET", "/transactions/pending/" + transaction_id, {"format": "json"}
+        )
+
+    async def suggested_params(self) -> transaction.SuggestedParams:
+        res = await self.algod_request("GET", "/transactions/params")
+
+        return transaction.SuggestedParams(
+            res["fee"],
+            res["last-round"],
+            res["last-round"] + 1000,
+            res["genesis-hash"],
+            res["genesis-id"],
+            False,
+            res["consensus-version"],
+            res["min-fee"],
+        )
+
+    async def send_raw_transaction(self, txn: Union[str, bytes]) -> str:
+        response = await self.algod_request(
+            "POST",
+            "/transactions",
+            data=base64.b64decode(txn),
+            headers={"Content-Type": "application/x-binary"},
+        )
+        return response["txId"]
+
+    async def send_transaction(self, txn: Any) -> str:
+        return await self.send_raw_transaction(encoding.msgpack_encode(txn))
+
+    async def send_transactions(self, txns: List[Any]) -> str:
+        serialized = b"".join(
+            base64.b64decode(encoding.msgpack_encode(txn)) for txn in txns
+        )
+        return await self.send_raw_transaction(base64.b64encode(serialized))
+
+    async def compile(self, source: str) -> Dict[str, Any]:
+        return await self.algod_request(
+            "POST",
+            "/teal/compile",
+            data=source.encode("utf-8"),
+            headers={"Content-Type": "application/x-binary"},
+        )
+
+
+async def waitForTransaction(
+    client: AsyncAlgodClient, txID: str, timeout: int = 10
+) -> PendingTxnResponse:
+    lastStatus = await client.status()
+    lastRound = lastStatus["last-round"]
+    startRound = lastRound
+
+    while lastRound < startRound + timeout:
+        pending_txn = await client.pending_transaction_info(txID)
+
+        if pending_txn.get("confirmed-round", 0) > 0:
+            return PendingTxnResponse(pending_txn)
+
+        if pending_txn["pool-error"]:
+            raise Exception("Pool error: {}".format(pending_txn["pool-error"]))
+
+        lastStatus = await client.status_after_block(lastRound + 1)
+
+        lastRound += 1
+
+    raise Exception(
+        "Transaction {} not confirmed after {} rounds".format(txID, timeout)
+    )
+
+
+async def getAppGlobalState(
+    client: AsyncAlgodClient, appID: int
+) -> Dict[bytes, Union[int, bytes]]:
+    appInfo = await client.application_info(appID)
+    return decodeState(appInfo["params"]["global-state"])
+
+
+async def getContracts(pullRefunds: bool = False) -> Tuple[bytes, bytes]:
+    """Get the compiled TEAL contracts for the auction.
+
+    The contracts are assembled in-process, so unlike the blocking version this
+    never needs to wait on algod. Compiling and reading the program cache run
+    in the default executor, so the event loop is not blocked.
+
+    Args:
+        pullRefunds (optional): Get the contracts of auctions with pull
+            refunds. Defaults to False.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None, getCompiledContracts, None, None, pullRefunds
+    )
+
+
+async def createAuctionApp(
+    client: AsyncAlgodClient,
+    sender: Account,
+    seller: str,
+    nftID: int,
+    startTime: int,
+    endTime: int,
+    reserve: int,
+    minBidIncrement: int,
+    pullRefunds: bool = False,
+) -> int:
+    """Create a new auction.
+
+    See auction.operations.createAuctionApp for a description of the arguments.
+
+    Returns:
+        The ID of the newly created auction app.
+    """
+    approval, clear = await getContracts(pullRefunds)
+
+    txn = makeCreateAuctionTxn(
+        sender=sender.getAddress(),
+        seller=seller,
+        nftID=nftID,
+        startTime=startTime,
+        endTime=endTime,
+        reserve=reserve,
+        minBidIncrement=minBidIncrement,
+        approval=approval,
+        clear=clear,
+        suggestedParams=await client.suggested_params(),
+        pullRefunds=pullRefunds,
+    )
+
+    signedTxn = txn.sign(sender.getPrivateKey())
+
+    await client.send_transaction(signedTxn)
+
+    response = await waitForTransaction(client, signedTxn.get_txid())
+    assert response.applicationIndex is not None and response.applicationIndex > 0
+    return response.applicationIndex
+
+
+async def setupAuctionApp(
+    client: AsyncAlgodClient,
+    appID: int,
+    funder: Account,
+    nftHolder: Account,
+    nftID: int,
+    nftAmount: int,
+) -> None:
+    """Finish setting up an auction.
+
+    See auction.operations.setupAuctionApp for a description of the arguments.
+    """
+    fundAppTxn, setupTxn, fundNftTxn = makeSetupAuctionTxns(
+        appID=appID,
+        funder=funder.getAddress(),
+        nftHolder=nftHolder.getAddress(),
+        nftID=nftID,
+        nftAmount=nftAmount,
+        suggestedParams=await client.suggested_params(),
+    )
+
+    signedFundAppTxn = fundAppTxn.sign(funder.getPrivateKey())
+    signedSetupTxn = setupTxn.sign(funder.getPrivateKey())
+    signedFundNftTxn = fundNftTxn.sign(nftHolder.getPrivateKey())
+
+    await client.send_transactions([signedFundAppTxn, signedSetupTxn, signedFundNftTxn])
+
+    await waitForTransaction(client, signedFundAppTxn.get_txid())
+
+
+async def placeBid(
+    client: AsyncAlgodClient, appID: int, bidder: Account, bidAmount: int
+) -> None:
+    """Place a bid on an active auction.
+
+    See auction.operations.placeBid for a description of the arguments.
+    """
+    appGlobalState, suggestedParams = await asyncio.gather(
+        getAppGlobalState(client, appID), client.suggested_params()
+    )
+
+    payTxn, appCallTxn = makeBidTxns(
+        appID=appID,
+        bidder=bidder.getAddress(),
+        bidAmount=bidAmount,
+        appGlobalState=appGlobalState,
+        suggestedParams=suggestedParams,
+    )
+
+    signedPayTxn = payTxn.sign(bidder.getPrivateKey())
+    signedAppCallTxn = appCallTxn.sign(bidder.getPrivateKey())
+
+    await client.send_transactions([signedPayTxn, signedAppCallTxn])
+
+    await waitForTransaction(client, appCallTxn.get_txid())
+
+
+async def closeAuction(client: AsyncAlgodClient, appID: int, closer: Account) -> None:
+    """Close an auction.
+
+    See auction.operations.closeAuction for a description of the arguments.
+    """
+    appGlobalState, suggestedParams = await asyncio.gather(
+        getAppGlobalState(client, appID), client.suggested_params()
+    )
+
+    deleteTxn = makeCloseAuctionTxn(
+        appID=appID,
+        closer=closer.getAddress(),
+        appGlobalState=appGlobalState,
+        suggestedParams=suggestedParams,
+    )
+    signedDeleteTxn = deleteTxn.sign(closer.getPrivateKey())
+
+    await client.send_transaction(signedDeleteTxn)
+
+    await waitForTransaction(client, signedDeleteTxn.get_txid())
+
+
+async def optInToAuction(client: AsyncAlgodClient, appID: int, bidder: Account) -> None:
+    """Opt into an auction with pull refunds.
+
+    See auction.operations.optInToAuction for a description of the arguments.
+    """
+    txn = transaction.ApplicationOptInTxn(
+        sender=bidder.getAddress(),
+        index=appID,
+        sp=await client.suggested_params(),
+    )
+    signedTxn = txn.sign(bidder.getPrivateKey())
+
+    await client.send_transaction(signedTxn)
+
+    await waitForTransaction(client, signedTxn.get_txid())
+
+
+async def getRefundCredit(client: AsyncAlgodClient, appID: int, bidder: str) -> int:
+    """Get the credit a bidder can claim from an auction with pull refunds.
+
+    See auction.operations.getRefundCredit for a description of the arguments
+    and the result.
+    """
+    accountInfo, appGlobalState = await asyncio.gather(
+        client.account_info(bidder), getAppGlobalState(client, appID)
+    )
+    localStates = accountInfo.get("apps-local-state", [])
+    localState = next((state for state in localStates if state["id"] == appID), None)
+    if localState is None:
+        return 0
+    deposit = decodeState(localState.get("key-value", [])).get(b"deposit", 0)
+
+    if appGlobalState[b"bid_account"] == encoding.decode_address(bidder):
+        deposit -= appGlobalState.get(b"bid_amount", 0)
+    return deposit
+
+
+async def claimRefund(client: AsyncAlgodClient, appID: int, bidder: Account) -> int:
+    """Claim the credit of a bidder who was outbid in an auction with pull
+    refunds.
+
+    See auction.operations.claimRefund for a description of the arguments.
+
+    Returns:
+        The amount that was refunded. If this is 0, nothing was sent.
+    """
+    credit, suggestedParams = await asyncio.gather(
+        getRefundCredit(client, appID, bidder.getAddress()), client.suggested_params()
+    )
+    if credit == 0:
+        return 0
+
+    txn = makeRefundTxn(
+        appID=appID,
+        sender=bidder.getAddress(),
+        bidders=[],
+        suggestedParams=suggestedParams,
+    )
+    signedTxn = txn.sign(bidder.getPrivateKey())
+
+    await client.send_transaction(signedTxn)
+
+    await waitForTransaction(client, signedTxn.get_txid())
+    return credit
+
+
+async def settleAuction(client: AsyncAlgodClient, appID: int, closer: Account) -> None:
+    """Settle an auction so that it can be relisted.
+
+    See auction.operations.settleAuction for a description of the arguments.
+    """
+    appGlobalState, suggestedParams = await asyncio.gather(
+        getAppGlobalState(client, appID), client.suggested_params()
+    )
+
+    if appGlobalState[b"end"] == 0:
+        raise Exception("Auction {} has already been settled".format(appID))
+
+    settleTxn = makeSettleAuctionTxn(
+        appID=appID,
+        closer=closer.getAddress(),
+        appGlobalState=appGlobalState,
+        suggestedParams=suggestedParams,
+    )
+    signedSettleTxn = settleTxn.sign(closer.getPrivateKey())
+
+    await client.send_transaction(signedSettleTxn)
+
+    await waitForTransaction(client, signedSettleTxn.get_txid())
+
+
+async def relistAuction(
+    client: AsyncAlgodClient,
+    appID: int,
+    sender: Account,
+    nftHolder: Account,
+    nftID: int,
+    nftAmount: int,
+    startTime: int,
+    endTime: int,
+    reserve: int,
+    minBidIncrement: int,
+) -> None:
+    """Start a new auction in the app of a settled auction.
+
+    See auction.operations.relistAuction for a description of the arguments.
+    """
+    relistTxn, setupTxn, fundNftTxn = makeRelistAuctionTxns(
+        appID=appID,
+        sender=sender.getAddress(),
+        nftHolder=nftHolder.getAddress(),
+        nftID=nftID,
+        nftAmount=nftAmount,
+        startTime=startTime,
+        endTime=endTime,
+        reserve=reserve,
+        minBidIncrement=minBidIncrement,
+        suggestedParams=await client.suggested_params(),
+    )
+
+    signedRelistTxn = relistTxn.sign(sender.getPrivateKey())
+    signedSetupTxn = setupTxn.sign(sender.getPrivateKey())
+    signedFundNftTxn = fundNftTxn.sign(nftHolder.getPrivateKey())
+
+    await client.send_transactions([signedRelistTxn, signedSetupTxn, signedFundNftTxn])
+
+    await waitForTransaction(client, signedRelistTxn.get_txid())
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from algosdk import error
+
+from . import aio
+from .aio import AsyncAlgodClient, getContracts, waitForTransaction
+
+
+class FakeAlgod:
+    """A minimal HTTP server that answers the algod requests made by
+    waitForTransaction."""
+
+    def __init__(self) -> None:
+        self.round = 10
+        # the round in which the known transaction confirms
+        self.confirmAfter = 12
+        self.requests = []
+        self.connections = 0
+        # if set, each connection is closed after one request without telling
+        # the client, like an idle timeout would
+        self.closeAfterRequest = False
+
+    def respond(self, path: str):
+        if path == "/v2/status":
+            return 200, {"last-round": self.round}
+        if path.startswith("/v2/status/wait-for-block-after/"):
+            self.round = int(path.rsplit("/", 1)[1]) + 1
+            return 200, {"last-round": self.round}
+        if path == "/v2/transactions":
+            return 200, {"txId": "submitted"}
+        if path.startswith("/v2/transactions/pending/known"):
+            if self.round >= self.confirmAfter:
+                return 200, {"pool-error": "", "txn": {}, "confirmed-round": 12}
+            return 200, {"pool-error": "", "txn": {}}
+        return 404, {"message": "not found: " + path}
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        while True:
+            requestLine = await reader.readline()
+            if not requestLine:
+                break
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode().partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            path = requestLine.split()[1].decode().split("?")[0]
+            self.requests.append(path)
+
+            code, body = self.respond(path)
+            payload = json.dumps(body).encode()
+            writer.write(
+                b"HTTP/1.1 %d X\r\nContent-Length: %d\r\n\r\n" % (code, len(payload))
+                + payload
+            )
+            await writer.drain()
+            if self.closeAfterRequest:
+                break
+        writer.close()
+
+
+async def withFakeAlgod(fake: FakeAlgod, test):
+    server = await asyncio.start_server(fake.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    client = AsyncAlgodClient("token", "http://127.0.0.1:{}".format(port))
+    try:
+        return await test(client)
+    finally:
+        await client.close()
+        server.close()
+        await server.wait_closed()
+
+
+def test_waitForTransaction():
+    fake = FakeAlgod()
+
+    response = asyncio.run(
+        withFakeAlgod(fake, lambda client: waitForTransaction(client, "known"))
+    )
+
+    assert response.confirmedRound == 12
+    assert fake.requests == [
+        "/v2/status",
+        "/v2/transactions/pending/known",
+        "/v2/status/wait-for-block-after/11",
+        "/v2/transactions/pending/known",
+    ]
+    # all requests share a single keep-alive connection
+    assert fake.connections == 1
+
+
+def test_waitForTransaction_concurrent():
+    fake = FakeAlgod()
+
+    async def test(client):
+        return await asyncio.gather(
+            *(waitForTransaction(client, "known") for _ in range(20))
+        )
+
+    responses = asyncio.run(withFakeAlgod(fake, test))
+
+    assert all(response.confirmedRound == 12 for response in responses)
+
+
+def test_algod_request_error():
+    fake = FakeAlgod()
+
+    with pytest.raises(error.AlgodHTTPError) as e:
+        asyncio.run(withFakeAlgod(fake, lambda client: client.application_info(1)))
+
+    assert e.value.code == 404
+    assert str(e.value) == "not found: /v2/applications/1"
+
+
+def test_retry_on_closed_connection():
+    fake = FakeAlgod()
+    fake.closeAfterRequest = True
+
+    async def test(client):
+        await client.status()
+        # the idle connection is now stale
+        await asyncio.sleep(0.05)
+        status = await client.status()
+
+        await asyncio.sleep(0.05)
+        with pytest.raises((ConnectionError, asyncio.IncompleteReadError)):
+            await client.algod_request("POST", "/transactions", data=b"txn")
+        return status
+
+    assert asyncio.run(withFakeAlgod(fake, test)) == {"last-round": 10}
+    # the read was retried on a new connection, but the submission failed on
+    # the stale one and was not resent, since algod may have accepted it
+    assert fake.requests == ["/v2/status", "/v2/status"]
+    assert fake.connections == 2
+
+
+def test_getContracts(monkeypatch):
+    calls = []
+
+    def getCompiledContracts(client, cache, pullRefunds):
+        calls.append((threading.get_ident(), client, pullRefunds))
+        return b"approval", b"clear"
+
+    monkeypatch.setattr(aio, "getCompiledContracts", getCompiledContracts)
+
+    async def test():
+        return threading.get_ident(), await getContracts(pullRefunds=True)
+
+    loopThread, contracts = asyncio.run(test())
+
+    assert contracts == (b"approval", b"clear")
+    # the contracts are compiled off the event loop, without algod
+    assert len(calls) == 1
+    assert calls[0][0] != loopThread
+    assert calls[0][1:] == (None, True)
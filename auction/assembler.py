@@ -0,0 +1,787 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+from base64 import b64decode, b32decode
+
+from algosdk import encoding
+
+# the first TEAL version where the assembler builds its own constant blocks
+OPTIMIZE_CONSTANTS_VERSION = 4
+# the first TEAL version where pushint and pushbytes exist
+PUSH_CONSTANTS_VERSION = 3
+# the first TEAL version that allows branching backwards
+BACKWARD_BRANCH_VERSION = 4
+
+MAX_VERSION = 5
+
+
+class OpSpec(NamedTuple):
+    opcode: int
+    version: int
+    # the kind of each immediate argument of the op, see assembleOp
+    immediates: Tuple[str, ...] = ()
+    cost: int = 1
+
+
+OPS: Dict[str, OpSpec] = {
+    "err": OpSpec(0x00, 1),
+    "sha256": OpSpec(0x01, 1, cost=35),
+    "keccak256": OpSpec(0x02, 1, cost=130),
+    "sha512_256": OpSpec(0x03, 1, cost=45),
+    "ed25519verify": OpSpec(0x04, 1, cost=1900),
+    "ecdsa_verify": OpSpec(0x05, 5, ("curve",), cost=1700),
+    "ecdsa_pk_decompress": OpSpec(0x06, 5, ("curve",), cost=650),
+    "ecdsa_pk_recover": OpSpec(0x07, 5, ("curve",), cost=2000),
+    "+": OpSpec(0x08, 1),
+    "-": OpSpec(0x09, 1),
+    "/": OpSpec(0x0A, 1),
+    "*": OpSpec(0x0B, 1),
+    "<": OpSpec(0x0C, 1),
+    ">": OpSpec(0x0D, 1),
+    "<=": OpSpec(0x0E, 1),
+    ">=": OpSpec(0x0F, 1),
+    "&&": OpSpec(0x10, 1),
+    "||": OpSpec(0x11, 1),
+    "==": OpSpec(0x12, 1),
+    "!=": OpSpec(0x13, 1),
+    "!": OpSpec(0x14, 1),
+    "len": OpSpec(0x15, 1),
+    "itob": OpSpec(0x16, 1),
+    "btoi": OpSpec(0x17, 1),
+    "%": OpSpec(0x18, 1),
+    "|": OpSpec(0x19, 1),
+    "&": OpSpec(0x1A, 1),
+    "^": OpSpec(0x1B, 1),
+    "~": OpSpec(0x1C, 1),
+    "mulw": OpSpec(0x1D, 1),
+    "addw": OpSpec(0x1E, 2),
+    "divmodw": OpSpec(0x1F, 4, cost=20),
+    "intcblock": OpSpec(0x20, 1, ("intcblock",)),
+    "intc": OpSpec(0x21, 1, ("uint8",)),
+    "intc_0": OpSpec(0x22, 1),
+    "intc_1": OpSpec(0x23, 1),
+    "intc_2": OpSpec(0x24, 1),
+    "intc_3": OpSpec(0x25, 1),
+    "bytecblock": OpSpec(0x26, 1, ("bytecblock",)),
+    "bytec": OpSpec(0x27, 1, ("uint8",)),
+    "bytec_0": OpSpec(0x28, 1),
+    "bytec_1": OpSpec(0x29, 1),
+    "bytec_2": OpSpec(0x2A, 1),
+    "bytec_3": OpSpec(0x2B, 1),
+    "arg": OpSpec(0x2C, 1, ("uint8",)),
+    "arg_0": OpSpec(0x2D, 1),
+    "arg_1": OpSpec(0x2E, 1),
+    "arg_2": OpSpec(0x2F, 1),
+    "arg_3": OpSpec(0x30, 1),
+    "txn": OpSpec(0x31, 1, ("txnfield",)),
+    "global": OpSpec(0x32, 1, ("globalfield",)),
+    "gtxn": OpSpec(0x33, 1, ("uint8", "txnfield")),
+    "load": OpSpec(0x34, 1, ("uint8",)),
+    "store": OpSpec(0x35, 1, ("uint8",)),
+    "txna": OpSpec(0x36, 2, ("txnfield", "uint8")),
+    "gtxna": OpSpec(0x37, 2, ("uint8", "txnfield", "uint8")),
+    "gtxns": OpSpec(0x38, 3, ("txnfield",)),
+    "gtxnsa": OpSpec(0x39, 3, ("txnfield", "uint8")),
+    "gload": OpSpec(0x3A, 4, ("uint8", "uint8")),
+    "gloads": OpSpec(0x3B, 4, ("uint8",)),
+    "gaid": OpSpec(0x3C, 4, ("uint8",)),
+    "gaids": OpSpec(0x3D, 4),
+    "loads": OpSpec(0x3E, 5),
+    "stores": OpSpec(0x3F, 5),
+    "bnz": OpSpec(0x40, 1, ("label",)),
+    "bz": OpSpec(0x41, 2, ("label",)),
+    "b": OpSpec(0x42, 2, ("label",)),
+    "return": OpSpec(0x43, 2),
+    "assert": OpSpec(0x44, 3),
+    "pop": OpSpec(0x48, 1),
+    "dup": OpSpec(0x49, 1),
+    "dup2": OpSpec(0x4A, 2),
+    "dig": OpSpec(0x4B, 3, ("uint8",)),
+    "swap": OpSpec(0x4C, 3),
+    "select": OpSpec(0x4D, 3),
+    "cover": OpSpec(0x4E, 5, ("uint8",)),
+    "uncover": OpSpec(0x4F, 5, ("uint8",)),
+    "concat": OpSpec(0x50, 2),
+    "substring": OpSpec(0x51, 2, ("uint8", "uint8")),
+    "substring3": OpSpec(0x52, 2),
+    "getbit": OpSpec(0x53, 3),
+    "setbit": OpSpec(0x54, 3),
+    "getbyte": OpSpec(0x55, 3),
+    "setbyte": OpSpec(0x56, 3),
+    "extract": OpSpec(0x57, 5, ("uint8", "uint8")),
+    "extract3": OpSpec(0x58, 5),
+    "extract_uint16": OpSpec(0x59, 5),
+    "extract_uint32": OpSpec(0x5A, 5),
+    "extract_uint64": OpSpec(0x5B, 5),
+    "balance": OpSpec(0x60, 2),
+    "app_opted_in": OpSpec(0x61, 2),
+    "app_local_get": OpSpec(0x62, 2),
+    "app_local_get_ex": OpSpec(0x63, 2),
+    "app_global_get": OpSpec(0x64, 2),
+    "app_global_get_ex": OpSpec(0x65, 2),
+    "app_local_put": OpSpec(0x66, 2),
+    "app_global_put": OpSpec(0x67, 2),
+    "app_local_del": OpSpec(0x68, 2),
+    "app_global_del": OpSpec(0x69, 2),
+    "asset_holding_get": OpSpec(0x70, 2, ("assetholdingfield",)),
+    "asset_params_get": OpSpec(0x71, 2, ("assetparamsfield",)),
+    "app_params_get": OpSpec(0x72, 5, ("appparamsfield",)),
+    "min_balance": OpSpec(0x78, 3),
+    "pushbytes": OpSpec(0x80, 3, ("bytes",)),
+    "pushint": OpSpec(0x81, 3, ("varuint",)),
+    "callsub": OpSpec(0x88, 4, ("label",)),
+    "retsub": OpSpec(0x89, 4),
+    "shl": OpSpec(0x90, 4),
+    "shr": OpSpec(0x91, 4),
+    "sqrt": OpSpec(0x92, 4, cost=4),
+    "bitlen": OpSpec(0x93, 4),
+    "exp": OpSpec(0x94, 4),
+    "expw": OpSpec(0x95, 4, cost=10),
+    "b+": OpSpec(0xA0, 4, cost=10),
+    "b-": OpSpec(0xA1, 4, cost=10),
+    "b/": OpSpec(0xA2, 4, cost=20),
+    "b*": OpSpec(0xA3, 4, cost=20),
+    "b<": OpSpec(0xA4, 4),
+    "b>": OpSpec(0xA5, 4),
+    "b<=": OpSpec(0xA6, 4),
+    "b>=": OpSpec(0xA7, 4),
+    "b==": OpSpec(0xA8, 4),
+    "b!=": OpSpec(0xA9, 4),
+    "b%": OpSpec(0xAA, 4, cost=20),
+    "b|": OpSpec(0xAB, 4, cost=6),
+    "b&": OpSpec(0xAC, 4, cost=6),
+    "b^": OpSpec(0xAD, 4, cost=6),
+    "b~": OpSpec(0xAE, 4, cost=4),
+    "bzero": OpSpec(0xAF, 4),
+    "log": OpSpec(0xB0, 5),
+    "itxn_begin": OpSpec(0xB1, 5),
+    "itxn_field": OpSpec(0xB2, 5, ("txnfield",)),
+    "itxn_submit": OpSpec(0xB3, 5),
+    "itxn": OpSpec(0xB4, 5, ("txnfield",)),
+    "itxna": OpSpec(0xB5, 5, ("txnfield", "uint8")),
+    "txnas": OpSpec(0xC0, 5, ("txnfield",)),
+    "gtxnas": OpSpec(0xC1, 5, ("uint8", "txnfield")),
+    "gtxnsas": OpSpec(0xC2, 5, ("txnfield",)),
+    "args": OpSpec(0xC3, 5),
+}
+
+OPS_BY_OPCODE: Dict[int, str] = {spec.opcode: name for name, spec in OPS.items()}
+
+TXN_FIELDS: List[str] = [
+    "Sender",
+    "Fee",
+    "FirstValid",
+    "FirstValidTime",
+    "LastValid",
+    "Note",
+    "Lease",
+    "Receiver",
+    "Amount",
+    "CloseRemainderTo",
+    "VotePK",
+    "SelectionPK",
+    "VoteFirst",
+    "VoteLast",
+    "VoteKeyDilution",
+    "Type",
+    "TypeEnum",
+    "XferAsset",
+    "AssetAmount",
+    "AssetSender",
+    "AssetReceiver",
+    "AssetCloseTo",
+    "GroupIndex",
+    "TxID",
+    "ApplicationID",
+    "OnCompletion",
+    "ApplicationArgs",
+    "NumAppArgs",
+    "Accounts",
+    "NumAccounts",
+    "ApprovalProgram",
+    "ClearStateProgram",
+    "RekeyTo",
+    "ConfigAsset",
+    "ConfigAssetTotal",
+    "ConfigAssetDecimals",
+    "ConfigAssetDefaultFrozen",
+    "ConfigAssetUnitName",
+    "ConfigAssetName",
+    "ConfigAssetURL",
+    "ConfigAssetMetadataHash",
+    "ConfigAssetManager",
+    "ConfigAssetReserve",
+    "ConfigAssetFreeze",
+    "ConfigAssetClawback",
+    "FreezeAsset",
+    "FreezeAssetAccount",
+    "FreezeAssetFrozen",
+    "Assets",
+    "NumAssets",
+    "Applications",
+    "NumApplications",
+    "GlobalNumUint",
+    "GlobalNumByteSlice",
+    "LocalNumUint",
+    "LocalNumByteSlice",
+    "ExtraProgramPages",
+    "Nonparticipation",
+    "Logs",
+    "NumLogs",
+    "CreatedAssetID",
+    "CreatedApplicationID",
+]
+
+GLOBAL_FIELDS: List[str] = [
+    "MinTxnFee",
+    "MinBalance",
+    "MaxTxnLife",
+    "ZeroAddress",
+    "GroupSize",
+    "LogicSigVersion",
+    "Round",
+    "LatestTimestamp",
+    "CurrentApplicationID",
+    "CreatorAddress",
+    "CurrentApplicationAddress",
+    "GroupID",
+]
+
+ASSET_HOLDING_FIELDS: List[str] = ["AssetBalance", "AssetFrozen"]
+
+ASSET_PARAMS_FIELDS: List[str] = [
+    "AssetTotal",
+    "AssetDecimals",
+    "AssetDefaultFrozen",
+    "AssetUnitName",
+    "AssetName",
+    "AssetURL",
+    "AssetMetadataHash",
+    "AssetManager",
+    "AssetReserve",
+    "AssetFreeze",
+    "AssetClawback",
+    "AssetCreator",
+]
+
+APP_PARAMS_FIELDS: List[str] = [
+    "AppApprovalProgram",
+    "AppClearStateProgram",
+    "AppGlobalNumUint",
+    "AppGlobalNumByteSlice",
+    "AppLocalNumUint",
+    "AppLocalNumByteSlice",
+    "AppExtraProgramPages",
+    "AppCreator",
+    "AppAddress",
+]
+
+CURVES: List[str] = ["Secp256k1"]
+
+FIELD_TABLES: Dict[str, List[str]] = {
+    "txnfield": TXN_FIELDS,
+    "globalfield": GLOBAL_FIELDS,
+    "assetholdingfield": ASSET_HOLDING_FIELDS,
+    "assetparamsfield": ASSET_PARAMS_FIELDS,
+    "appparamsfield": APP_PARAMS_FIELDS,
+    "curve": CURVES,
+}
+
+# named constants accepted by the int pseudo-op
+NAMED_INTS: Dict[str, int] = {
+    # OnComplete values
+    "NoOp": 0,
+    "OptIn": 1,
+    "CloseOut": 2,
+    "ClearState": 3,
+    "UpdateApplication": 4,
+    "DeleteApplication": 5,
+    # TypeEnum values
+    "unknown": 0,
+    "pay": 1,
+    "keyreg": 2,
+    "acfg": 3,
+    "axfer": 4,
+    "afrz": 5,
+    "appl": 6,
+}
+
+
+def encodeUvarint(value: int) -> bytes:
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def tokenizeLine(line: str) -> List[str]:
+    """Split a line of TEAL into tokens, keeping string literals intact and
+    dropping comments."""
+    tokens: List[str] = []
+    current = ""
+    inString = False
+    i = 0
+    while i < len(line):
+        c = line[i]
+        if inString:
+            current += c
+            if c == "\\" and i + 1 < len(line):
+                current += line[i + 1]
+                i += 1
+            elif c == '"':
+                inString = False
+        elif c == '"':
+            current += c
+            inString = True
+        elif line.startswith("//", i):
+            break
+        elif c.isspace():
+            if current:
+                tokens.append(current)
+                current = ""
+        else:
+            current += c
+        i += 1
+
+    if inString:
+        raise Exception("Unterminated string literal: {}".format(line))
+
+    if current:
+        tokens.append(current)
+
+    return tokens
+
+
+def parseStringLiteral(literal: str) -> bytes:
+    body = literal[1:-1]
+    out = bytearray()
+    i = 0
+    while i < len(body):
+        c = body[i]
+        if c != "\\":
+            out += c.encode("utf-8")
+            i += 1
+            continue
+
+        if i + 1 >= len(body):
+            raise Exception("Invalid escape sequence in {}".format(literal))
+        escaped = body[i + 1]
+        if escaped == "n":
+            out.append(ord("\n"))
+        elif escaped == "r":
+            out.append(ord("\r"))
+        elif escaped == "t":
+            out.append(ord("\t"))
+        elif escaped == "\\":
+            out.append(ord("\\"))
+        elif escaped == '"':
+            out.append(ord('"'))
+        elif escaped == "x" and i + 3 < len(body):
+            out.append(int(body[i + 2 : i + 4], 16))
+            i += 2
+        else:
+            raise Exception("Invalid escape sequence in {}".format(literal))
+        i += 2
+    return bytes(out)
+
+
+def parseBytes(args: List[str]) -> Tuple[bytes, int]:
+    """Parse a byte array literal from the start of args.
+
+    Returns:
+        The decoded bytes and the number of arguments consumed.
+    """
+    if len(args) == 0:
+        raise Exception("Missing byte array literal")
+
+    arg = args[0]
+    for prefix, decoder in (
+        ("base64", b64decode),
+        ("b64", b64decode),
+        ("base32", decodeBase32),
+        ("b32", decodeBase32),
+    ):
+        if arg.startswith(prefix + "(") and arg.endswith(")"):
+            return decoder(arg[len(prefix) + 1 : -1]), 1
+        if arg == prefix:
+            if len(args) < 2:
+                raise Exception("Missing value for {}".format(prefix))
+            return decoder(args[1]), 2
+
+    if arg.startswith("0x"):
+        return bytes.fromhex(arg[2:]), 1
+
+    if arg.startswith('"') and arg.endswith('"') and len(arg) >= 2:
+        return parseStringLiteral(arg), 1
+
+    raise Exception("Invalid byte array literal: {}".format(arg))
+
+
+def decodeBase32(value: str) -> bytes:
+    value = value.rstrip("=")
+    return b32decode(value + "=" * (-len(value) % 8))
+
+
+def parseInt(arg: str) -> int:
+    if arg in NAMED_INTS:
+        return NAMED_INTS[arg]
+
+    lowered = arg.lower()
+    if lowered.startswith("0x"):
+        value = int(arg[2:], 16)
+    elif lowered.startswith("0b"):
+        value = int(arg[2:], 2)
+    elif lowered.startswith("0o"):
+        value = int(arg[2:], 8)
+    elif len(arg) > 1 and arg.startswith("0"):
+        # like Go's strconv.ParseUint, a leading zero means octal
+        value = int(arg[1:], 8)
+    else:
+        value = int(arg, 10)
+
+    if value < 0 or value >= 2 ** 64:
+        raise Exception("Integer out of range: {}".format(arg))
+    return value
+
+
+class Instruction:
+    """One assembled line of a program, before constants and labels are
+    resolved."""
+
+    def __init__(
+        self,
+        line: int,
+        code: bytes = b"",
+        constant: Optional[Union[int, bytes]] = None,
+        label: Optional[str] = None,
+    ) -> None:
+        self.line = line
+        # the fully encoded instruction, or its opcode if it refers to a label
+        self.code = code
+        # the value of an int or byte pseudo-op, encoded once constant blocks are known
+        self.constant = constant
+        # the target of a branch or callsub
+        self.label = label
+
+
+class Assembly:
+    def __init__(self, version: int) -> None:
+        self.version = version
+        self.instructions: List[Instruction] = []
+        self.labels: Dict[str, int] = {}
+        self.explicitIntc: Optional[List[int]] = None
+        self.explicitBytec: Optional[List[bytes]] = None
+
+
+def assembleOp(
+    assembly: Assembly, lineNumber: int, name: str, args: List[str]
+) -> Instruction:
+    # pseudo-ops that produce constants
+    if name == "int":
+        if len(args) != 1:
+            raise Exception("int expects 1 argument on line {}".format(lineNumber))
+        return Instruction(lineNumber, constant=parseInt(args[0]))
+
+    if name == "byte":
+        value, consumed = parseBytes(args)
+        if consumed != len(args):
+            raise Exception("byte expects 1 argument on line {}".format(lineNumber))
+        return Instruction(lineNumber, constant=value)
+
+    if name == "addr":
+        if len(args) != 1:
+            raise Exception("addr expects 1 argument on line {}".format(lineNumber))
+        return Instruction(lineNumber, constant=encoding.decode_address(args[0]))
+
+    # txn, gtxn and gtxns with an extra array index are shorthand for their "a" forms
+    if name == "txn" and len(args) == 2:
+        name = "txna"
+    elif name == "gtxn" and len(args) == 3:
+        name = "gtxna"
+    elif name == "gtxns" and len(args) == 2:
+        name = "gtxnsa"
+
+    spec = OPS.get(name)
+    if spec is None:
+        raise Exception("Unknown opcode {} on line {}".format(name, lineNumber))
+    if spec.version > assembly.version:
+        raise Exception(
+            "{} requires TEAL version {} on line {}".format(
+                name, spec.version, lineNumber
+            )
+        )
+
+    code = bytearray([spec.opcode])
+
+    if spec.immediates == ("label",):
+        if len(args) != 1:
+            raise Exception("{} expects a label on line {}".format(name, lineNumber))
+        return Instruction(lineNumber, code=bytes(code), label=args[0])
+
+    if spec.immediates == ("intcblock",):
+        values = [parseInt(arg) for arg in args]
+        assembly.explicitIntc = values
+        code += encodeUvarint(len(values))
+        for value in values:
+            code += encodeUvarint(value)
+        return Instruction(lineNumber, code=bytes(code))
+
+    if spec.immediates == ("bytecblock",):
+        byteValues: List[bytes] = []
+        remaining = args
+        while len(remaining) > 0:
+            value, consumed = parseBytes(remaining)
+            byteValues.append(value)
+            remaining = remaining[consumed:]
+        assembly.explicitBytec = byteValues
+        code += encodeUvarint(len(byteValues))
+        for value in byteValues:
+            code += encodeUvarint(len(value)) + value
+        return Instruction(lineNumber, code=bytes(code))
+
+    if spec.immediates == ("bytes",):
+        value, consumed = parseBytes(args)
+        if consumed != len(args):
+            raise Exception("{} expects 1 argument on line {}".format(name, lineNumber))
+        code += encodeUvarint(len(value)) + value
+        return Instruction(lineNumber, code=bytes(code))
+
+    if len(args) != len(spec.immediates):
+        raise Exception(
+            "{} expects {} arguments on line {}".format(
+                name, len(spec.immediates), lineNumber
+            )
+        )
+
+    for kind, arg in zip(spec.immediates, args):
+        if kind == "varuint":
+            code += encodeUvarint(parseInt(arg))
+        elif kind == "uint8":
+            value = parseInt(arg)
+            if value > 0xFF:
+                raise Exception(
+                    "{} argument too large on line {}".format(name, lineNumber)
+                )
+            code.append(value)
+        else:
+            table = FIELD_TABLES[kind]
+            if arg not in table:
+                raise Exception(
+                    "Unknown field {} for {} on line {}".format(arg, name, lineNumber)
+                )
+            code.append(table.index(arg))
+
+    return Instruction(lineNumber, code=bytes(code))
+
+
+def parse(teal: str) -> Assembly:
+    assembly: Optional[Assembly] = None
+
+    for lineNumber, line in enumerate(teal.splitlines(), start=1):
+        tokens = tokenizeLine(line)
+        if len(tokens) == 0:
+            continue
+
+        if tokens[0] == "#pragma":
+            if len(tokens) != 3 or tokens[1] != "version":
+                raise Exception("Invalid pragma on line {}".format(lineNumber))
+            if assembly is not None:
+                raise Exception(
+                    "#pragma version is only allowed before instructions, line {}".format(
+                        lineNumber
+                    )
+                )
+            version = parseInt(tokens[2])
+            if version < 1 or version > MAX_VERSION:
+                raise Exception("Unsupported TEAL version: {}".format(version))
+            assembly = Assembly(version)
+            continue
+
+        if assembly is None:
+            assembly = Assembly(1)
+
+        if tokens[0].endswith(":"):
+            label = tokens[0][:-1]
+            if label in assembly.labels:
+                raise Exception(
+                    "Duplicate label {} on line {}".format(label, lineNumber)
+                )
+            assembly.labels[label] = len(assembly.instructions)
+            tokens = tokens[1:]
+            if len(tokens) == 0:
+                continue
+
+        assembly.instructions.append(
+            assembleOp(assembly, lineNumber, tokens[0], tokens[1:])
+        )
+
+    if assembly is None:
+        assembly = Assembly(1)
+
+    return assembly
+
+
+def buildConstantBlock(
+    refs: List[Union[int, bytes]], optimize: bool
+) -> List[Union[int, bytes]]:
+    """Determine the constant block for a list of constant references.
+
+    This mirrors algod's assembler: constants start out in order of first use.
+    When optimizing, they are then stably sorted from most to least frequently
+    used, and constants that are only used once are left out of the block
+    entirely so they can be pushed inline instead.
+    """
+    order: List[Union[int, bytes]] = []
+    freqs: Dict[Union[int, bytes], int] = {}
+    for value in refs:
+        if value not in freqs:
+            order.append(value)
+            freqs[value] = 0
+        freqs[value] += 1
+
+    if not optimize:
+        return order
+
+    # sorted() is stable, so constants with the same frequency keep first use order
+    ordered = sorted(order, key=lambda value: freqs[value], reverse=True)
+    return [value for value in ordered if freqs[value] > 1]
+
+
+def encodeIntConstant(
+    value: int, block: List[int], version: int, explicit: bool
+) -> bytes:
+    if value not in block:
+        if explicit or version < PUSH_CONSTANTS_VERSION:
+            raise Exception("int {} is missing from the intcblock".format(value))
+        return bytes([OPS["pushint"].opcode]) + encodeUvarint(value)
+
+    index = block.index(value)
+    if index < 4:
+        return bytes([OPS["intc_0"].opcode + index])
+    return bytes([OPS["intc"].opcode, index])
+
+
+def encodeByteConstant(
+    value: bytes, block: List[bytes], version: int, explicit: bool
+) -> bytes:
+    if value not in block:
+        if explicit or version < PUSH_CONSTANTS_VERSION:
+            raise Exception("byte {!r} is missing from the bytecblock".format(value))
+        return bytes([OPS["pushbytes"].opcode]) + encodeUvarint(len(value)) + value
+
+    index = block.index(value)
+    if index < 4:
+        return bytes([OPS["bytec_0"].opcode + index])
+    return bytes([OPS["bytec"].opcode, index])
+
+
+def assemble(teal: str) -> bytes:
+    """Assemble TEAL source into program bytes without contacting algod.
+
+    The output is identical to the result of algod's /v2/teal/compile endpoint
+    for the same source, including the intcblock and bytecblock that the
+    assembler generates for int and byte pseudo-ops.
+
+    Args:
+        teal: The TEAL source code to assemble.
+
+    Returns:
+        The assembled program.
+    """
+    return assembleWithLabels(teal)[0]
+
+
+def assembleWithLabels(teal: str) -> Tuple[bytes, Dict[str, int]]:
+    """Assemble TEAL source like assemble, and also get the location of each
+    label in the program.
+
+    Args:
+        teal: The TEAL source code to assemble.
+
+    Returns:
+        A tuple of the assembled program and a dictionary from each label to
+        the offset in the program of the instruction after it.
+    """
+    assembly = parse(teal)
+    version = assembly.version
+
+    intRefs: List[int] = []
+    byteRefs: List[bytes] = []
+    for instruction in assembly.instructions:
+        if isinstance(instruction.constant, int):
+            intRefs.append(instruction.constant)
+        elif isinstance(instruction.constant, bytes):
+            byteRefs.append(instruction.constant)
+
+    optimize = version >= OPTIMIZE_CONSTANTS_VERSION
+
+    intc: List[int]
+    if assembly.explicitIntc is not None:
+        intc = assembly.explicitIntc
+    else:
+        intc = buildConstantBlock(intRefs, optimize)  # type: ignore
+
+    bytec: List[bytes]
+    if assembly.explicitBytec is not None:
+        bytec = assembly.explicitBytec
+    else:
+        bytec = buildConstantBlock(byteRefs, optimize)  # type: ignore
+
+    for instruction in assembly.instructions:
+        if isinstance(instruction.constant, int):
+            instruction.code = encodeIntConstant(
+                instruction.constant, intc, version, assembly.explicitIntc is not None
+            )
+        elif isinstance(instruction.constant, bytes):
+            instruction.code = encodeByteConstant(
+                instruction.constant, bytec, version, assembly.explicitBytec is not None
+            )
+
+    # branch instructions are always an opcode followed by a 2 byte offset
+    offsets: List[int] = []
+    pc = 0
+    for instruction in assembly.instructions:
+        offsets.append(pc)
+        pc += len(instruction.code) + (2 if instruction.label is not None else 0)
+    offsets.append(pc)
+
+    program = bytearray()
+    for i, instruction in enumerate(assembly.instructions):
+        program += instruction.code
+        if instruction.label is None:
+            continue
+
+        if instruction.label not in assembly.labels:
+            raise Exception(
+                "Reference to undefined label {} on line {}".format(
+                    instruction.label, instruction.line
+                )
+            )
+        target = offsets[assembly.labels[instruction.label]]
+        offset = target - offsets[i + 1]
+        if offset < 0 and version < BACKWARD_BRANCH_VERSION:
+            raise Exception(
+                "Backward branches are not supported in TEAL version {}, line {}".format(
+                    version, instruction.line
+                )
+            )
+        if offset < -0x8000 or offset > 0x7FFF:
+            raise Exception("Branch too far on line {}".format(instruction.line))
+        program += (offset & 0xFFFF).to_bytes(2, "big")
+
+    prefix = bytearray(encodeUvarint(version))
+    if len(intc) > 0 and assembly.explicitIntc is None:
+        prefix.append(OPS["intcblock"].opcode)
+        prefix += encodeUvarint(len(intc))
+        for value in intc:
+            prefix += encodeUvarint(value)
+    if len(bytec) > 0 and assembly.explicitBytec is None:
+        prefix.append(OPS["bytecblock"].opcode)
+        prefix += encodeUvarint(len(bytec))
+        for byteValue in bytec:
+            prefix += encodeUvarint(len(byteValue)) + byteValue
+
+    labels = {
+        label: len(prefix) + offsets[index] for label, index in assembly.labels.items()
+    }
+    return bytes(prefix + program), labels
@@ -0,0 +1,169 @@
+from base64 import b64decode
+
+import pytest
+
+from pyteal import compileTeal, Mode
+
+from .assembler import assemble, assembleWithLabels
+from .contracts import approval_program, clear_state_program
+from .testing.golden import GOLDEN_PROGRAMS, getTeal, loadGolden
+
+
+def test_assemble_clear_state_program():
+    teal = compileTeal(clear_state_program(), mode=Mode.Application, version=5)
+
+    # the result of algod's compile endpoint for the same source
+    assert assemble(teal) == b64decode("BYEBQw==")
+
+
+def test_assemble_constant_blocks():
+    teal = """#pragma version 5
+int 7
+int 1
+int 1
+int NoOp
+int 7
+byte "a"
+byte 0x61
+byte base64(Yg==)
+"""
+    expected = bytes(
+        [
+            0x05,
+            # intcblock 7 1, sorted by frequency then first use
+            0x20,
+            0x02,
+            0x07,
+            0x01,
+            # bytecblock "a"
+            0x26,
+            0x01,
+            0x01,
+            ord("a"),
+            0x22,  # intc_0
+            0x23,  # intc_1
+            0x23,  # intc_1
+            0x81,  # pushint 0, it is only used once
+            0x00,
+            0x22,  # intc_0
+            0x28,  # bytec_0
+            0x28,  # bytec_0
+            0x80,  # pushbytes "b", it is only used once
+            0x01,
+            ord("b"),
+        ]
+    )
+
+    assert assemble(teal) == expected
+
+
+def test_assemble_branches():
+    teal = """#pragma version 5
+b end
+start:
+callsub sub
+end:
+bnz start
+sub:
+retsub
+"""
+    expected = bytes(
+        [
+            0x05,
+            0x42,  # b end
+            0x00,
+            0x03,
+            0x88,  # callsub sub
+            0x00,
+            0x03,
+            0x40,  # bnz start
+            0xFF,
+            0xFA,
+            0x89,  # retsub
+        ]
+    )
+
+    assert assemble(teal) == expected
+
+
+def test_assemble_fields():
+    teal = """#pragma version 5
+txn ApplicationArgs 1
+gtxns Amount
+global LatestTimestamp
+asset_holding_get AssetBalance
+itxn_field AssetCloseTo
+"""
+    expected = bytes([0x05, 0x36, 0x1A, 0x01, 0x38, 0x08, 0x32, 0x07, 0x70, 0x00])
+    expected += bytes([0xB2, 0x15])
+
+    assert assemble(teal) == expected
+
+
+def test_assemble_without_constant_optimization():
+    teal = """#pragma version 2
+int 9
+int 9
+int 8
+"""
+    expected = bytes([0x02, 0x20, 0x02, 0x09, 0x08, 0x22, 0x22, 0x23])
+
+    assert assemble(teal) == expected
+
+
+def test_assemble_approval_program():
+    teal = compileTeal(approval_program(), mode=Mode.Application, version=5)
+    program = assemble(teal)
+
+    assert program[0] == 5
+    assert assemble(teal) == program
+
+
+@pytest.mark.parametrize("name", list(GOLDEN_PROGRAMS))
+def test_assemble_matches_algod(name):
+    golden = loadGolden(name)
+    assert golden is not None, (
+        "no golden output recorded for {}, record it with "
+        "python -m auction.testing.golden".format(name)
+    )
+    teal, expected = golden
+    assert getTeal(name) == teal, (
+        "the recorded TEAL of {} is out of date, record it again with "
+        "python -m auction.testing.golden".format(name)
+    )
+
+    assert assemble(teal) == expected
+
+
+def test_assemble_errors():
+    with pytest.raises(Exception):
+        assemble("#pragma version 5\nb missing\n")
+
+    with pytest.raises(Exception):
+        assemble("#pragma version 5\nnot_an_op\n")
+
+    with pytest.raises(Exception):
+        assemble("#pragma version 3\ncallsub sub\nsub:\nretsub\n")
+
+    with pytest.raises(Exception):
+        assemble("#pragma version 3\nstart:\nint 1\nbnz start\n")
+
+
+def test_assemble_with_labels():
+    teal = """#pragma version 5
+int 1
+bnz skip
+err
+skip:
+callsub sub0
+int 1
+return
+sub0: // noop
+retsub
+"""
+    program, labels = assembleWithLabels(teal)
+    assert program == assemble(teal)
+    # the version and intcblock come first
+    assert program[labels["skip"]] == 0x88
+    assert program[labels["sub0"]] == 0x89
+    assert labels["skip"] < labels["sub0"]
@@ -0,0 +1,70 @@
+from typing import Dict, Optional
+from collections import Counter
+from time import sleep
+import threading
+
+from ..testing.simulator import Ledger, SimulatedAlgodClient
+
+
+def getRoute(method: str, requrl: str) -> str:
+    """Get the name of an algod route, without the parameters in its path.
+
+    For instance, "GET /accounts/{address}" for a request to
+    "/accounts/ABC...".
+    """
+    parts = requrl.strip("/").split("/")
+    if parts[:2] == ["status", "wait-for-block-after"]:
+        parts = ["status", "wait-for-block-after", "{round}"]
+    elif parts[:2] == ["transactions", "pending"] and len(parts) > 2:
+        parts = ["transactions", "pending", "{txid}"]
+    elif parts[0] == "accounts" and len(parts) > 1:
+        parts = ["accounts", "{address}"] + parts[2:]
+    elif parts[0] in ("applications", "assets", "blocks") and len(parts) > 1:
+        parts = [parts[0], "{id}"] + parts[2:]
+    return "{} /{}".format(method, "/".join(parts))
+
+
+class LatencyAlgodClient(SimulatedAlgodClient):
+    """A simulated algod client that adds a fixed delay to every request and
+    counts the requests it serves.
+
+    Requests are delayed before they reach the ledger, which stands in for the
+    network round trip to a real node.
+
+    Args:
+        latency (optional): The delay added to each request, in seconds.
+            Defaults to 0.
+        ledger (optional): The ledger to use. Defaults to a new Ledger.
+    """
+
+    def __init__(self, latency: float = 0, ledger: Optional[Ledger] = None) -> None:
+        super().__init__(ledger)
+        self.latency = latency
+
+        self.countsLock = threading.Lock()
+        self.counts: Counter = Counter()
+
+    def algod_request(
+        self,
+        method,
+        requrl,
+        params=None,
+        data=None,
+        headers=None,
+        response_format="json",
+    ):
+        with self.countsLock:
+            self.counts[getRoute(method, requrl)] += 1
+        if self.latency > 0:
+            sleep(self.latency)
+        return super().algod_request(
+            method, requrl, params, data, headers, response_format
+        )
+
+    def takeCounts(self) -> Dict[str, int]:
+        """Get the number of requests to each route since the last call, and
+        reset the counts."""
+        with self.countsLock:
+            counts = dict(self.counts)
+            self.counts.clear()
+        return counts
@@ -0,0 +1,565 @@
+"""Measure the size of the auction contracts and the opcode cost of each branch
+of their approval programs.
+
+Runs auctions through every path of the contract, and through the main paths
+of the contracts of auctions with pull refunds and multi-lot auctions, against
+the simulated ledger. Reports the size of the TEAL source and the compiled
+programs, the opcode cost of the approval program for each branch, and how much
+of that cost is spent in each subroutine.
+
+Usage:
+    python -m auction.benchmarks.cost [--budget FILE] [--save-baseline FILE]
+        [--baseline FILE]
+
+The results are checked against the budget in contract_budget.json, or the
+file given by --budget, and the command exits with status 1 if a program or a
+branch goes over it. Raise the budget deliberately when a change to the
+contract needs more room.
+
+With --baseline, the results are shown next to a baseline saved by an earlier
+run with --save-baseline, and the command also exits with status 1 if a program
+got bigger or a branch got more expensive.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+import argparse
+import json
+import os
+import re
+import sys
+
+from algosdk.v2client.algod import AlgodClient
+from pyteal import Expr, compileTeal, Mode
+
+from ..account import Account
+from ..assembler import assembleWithLabels
+from ..contracts import approval_program, multi_lot_approval_program
+from ..lots import (
+    AuctionLot,
+    createMultiLotAuctionApp,
+    addAuctionLots,
+    placeLotBid,
+    closeMultiLotAuction,
+    getMultiLotContracts,
+)
+from ..operations import (
+    createAuctionApp,
+    setupAuctionApp,
+    placeBid,
+    closeAuction,
+    settleAuction,
+    relistAuction,
+    optInToAuction,
+    claimRefund,
+    getContracts,
+)
+from ..testing.evaluator import DecodedOp, Evaluation
+from ..testing.resources import createDummyAsset, optInToAsset
+from ..testing.simulator import Ledger, SimulatedAlgodClient
+
+BRANCHES = (
+    "create",
+    "setup",
+    "bid",
+    "bid with refund",
+    "close with winner",
+    "close below reserve",
+    "close without bids",
+    "close before start",
+    "settle with winner",
+    "relist",
+    "pull refunds opt in",
+    "pull refunds bid",
+    "pull refunds outbid",
+    "pull refunds claim",
+    "pull refunds close",
+    "multi-lot create",
+    "multi-lot add lot",
+    "multi-lot bid",
+    "multi-lot bid with refund",
+    "multi-lot close with winner",
+)
+
+START_TIME = 1_600_000_000
+
+BUDGET_PATH = os.path.join(os.path.dirname(__file__), "contract_budget.json")
+
+# the label PyTeal gives a subroutine, followed by the name of its function
+SUBROUTINE_LABEL = re.compile(r"^(\S+):\s*//\s*(\w+)")
+
+# the approval programs that are measured, by the prefix of their size keys
+PROGRAMS: Dict[str, Callable[[], Expr]] = {
+    "approval": lambda: approval_program(),
+    "pullRefundsApproval": lambda: approval_program(pull_refunds=True),
+    "multiLotApproval": lambda: multi_lot_approval_program(),
+}
+
+# the sizes in the results, and how they are labeled
+SIZE_KEYS = (
+    "approvalTealSize",
+    "approvalSize",
+    "pullRefundsApprovalTealSize",
+    "pullRefundsApprovalSize",
+    "multiLotApprovalTealSize",
+    "multiLotApprovalSize",
+    "clearStateSize",
+    "pullRefundsClearStateSize",
+)
+SIZE_NAMES = (
+    "approval TEAL",
+    "approval",
+    "pull refunds approval TEAL",
+    "pull refunds approval",
+    "multi-lot approval TEAL",
+    "multi-lot approval",
+    "clear state",
+    "pull refunds clear state",
+)
+
+T = TypeVar("T")
+
+
+def getSubroutines(teal: str) -> Dict[int, str]:
+    """Get the name of the subroutine that starts at each offset of the program
+    assembled from TEAL source produced by PyTeal."""
+    _, labels = assembleWithLabels(teal)
+    subroutines: Dict[int, str] = dict()
+    for line in teal.splitlines():
+        match = SUBROUTINE_LABEL.match(line)
+        if match is not None and match.group(1) in labels:
+            subroutines[labels[match.group(1)]] = match.group(2)
+    return subroutines
+
+
+class CostTracer:
+    """Records the cost of the programs evaluated by a simulated ledger, and
+    the part of it spent in each subroutine.
+
+    Args:
+        subroutines: The name of the subroutine that starts at each offset of
+            each program, by the program bytes, see getSubroutines.
+    """
+
+    def __init__(self, subroutines: Dict[bytes, Dict[int, str]]) -> None:
+        self.subroutines = subroutines
+        self.evaluations: List[Evaluation] = []
+        # the subroutines being executed by the current evaluation
+        self.calls: List[str] = []
+        self.subroutineCosts: Dict[str, int] = dict()
+
+    def __call__(self, evaluation: Evaluation, pc: int, op: DecodedOp) -> None:
+        if len(self.evaluations) == 0 or self.evaluations[-1] is not evaluation:
+            self.evaluations.append(evaluation)
+            self.calls = []
+
+        # a callsub counts towards its caller and a retsub towards the
+        # subroutine it returns from
+        if len(self.calls) > 0:
+            name = self.calls[-1]
+            self.subroutineCosts[name] = self.subroutineCosts.get(name, 0) + op.cost
+        if op.name == "callsub":
+            subroutines = self.subroutines.get(evaluation.program.bytes, {})
+            self.calls.append(subroutines.get(op.immediates[0], "unknown"))
+        elif op.name == "retsub" and len(self.calls) > 0:
+            self.calls.pop()
+
+    def take(self) -> Tuple[int, Dict[str, int]]:
+        """Get the total cost of the programs evaluated since the last call, and
+        the cost of each subroutine."""
+        cost = sum(evaluation.cost for evaluation in self.evaluations)
+        subroutineCosts = self.subroutineCosts
+        self.evaluations = []
+        self.subroutineCosts = dict()
+        return cost, subroutineCosts
+
+
+class CostBenchmark:
+    """Runs auctions through each branch of the approval programs and records
+    the cost of each."""
+
+    def __init__(self) -> None:
+        self.teals = {
+            name: compileTeal(program(), mode=Mode.Application, version=5)
+            for name, program in PROGRAMS.items()
+        }
+        self.tracer = CostTracer(
+            {
+                assembleWithLabels(teal)[0]: getSubroutines(teal)
+                for teal in self.teals.values()
+            }
+        )
+        self.ledger = Ledger(timestamp=START_TIME, tracer=self.tracer)
+        self.client: AlgodClient = SimulatedAlgodClient(self.ledger)
+        self.costs: Dict[str, int] = dict()
+        self.subroutineCosts: Dict[str, Dict[str, int]] = dict()
+
+    def measure(self, name: Optional[str], operation: Callable[[], T]) -> T:
+        self.tracer.take()
+        result = operation()
+        cost, subroutineCosts = self.tracer.take()
+        if name is not None:
+            self.costs[name] = cost
+            self.subroutineCosts[name] = subroutineCosts
+        return result
+
+    def createAuction(
+        self, reserve: int, measure: bool
+    ) -> Tuple[int, Account, List[Account]]:
+        client = self.client
+        ledger = self.ledger
+
+        creator = ledger.createAccount()
+        seller = ledger.createAccount()
+        bidders = [ledger.createAccount(), ledger.createAccount()]
+        nftID = createDummyAsset(client, 1, seller)
+        for bidder in bidders:
+            optInToAsset(client, nftID, bidder)
+
+        startTime = ledger.now() + 10
+        appID = self.measure(
+            "create" if measure else None,
+            lambda: createAuctionApp(
+                client=client,
+                sender=creator,
+                seller=seller.getAddress(),
+                nftID=nftID,
+                startTime=startTime,
+                endTime=startTime + 60,
+                reserve=reserve,
+                minBidIncrement=100_000,
+            ),
+        )
+        self.measure(
+            "setup" if measure else None,
+            lambda: setupAuctionApp(
+                client=client,
+                appID=appID,
+                funder=creator,
+                nftHolder=seller,
+                nftID=nftID,
+                nftAmount=1,
+            ),
+        )
+        return appID, seller, bidders
+
+    def runPullRefunds(self) -> None:
+        client = self.client
+        ledger = self.ledger
+
+        seller = ledger.createAccount()
+        bidders = [ledger.createAccount(), ledger.createAccount()]
+        nftID = createDummyAsset(client, 1, seller)
+        startTime = ledger.now() + 10
+        appID = createAuctionApp(
+            client=client,
+            sender=seller,
+            seller=seller.getAddress(),
+            nftID=nftID,
+            startTime=startTime,
+            endTime=startTime + 60,
+            reserve=1_000_000,
+            minBidIncrement=100_000,
+            pullRefunds=True,
+        )
+        setupAuctionApp(
+            client=client,
+            appID=appID,
+            funder=seller,
+            nftHolder=seller,
+            nftID=nftID,
+            nftAmount=1,
+        )
+        for bidder in bidders:
+            optInToAsset(client, nftID, bidder)
+        self.measure(
+            "pull refunds opt in", lambda: optInToAuction(client, appID, bidders[0])
+        )
+        optInToAuction(client, appID, bidders[1])
+
+        ledger.advanceTime(15)
+        self.measure(
+            "pull refunds bid",
+            lambda: placeBid(client, appID, bidders[0], 1_000_000),
+        )
+        self.measure(
+            "pull refunds outbid",
+            lambda: placeBid(client, appID, bidders[1], 1_100_000),
+        )
+        self.measure(
+            "pull refunds claim", lambda: claimRefund(client, appID, bidders[0])
+        )
+        ledger.advanceTime(60)
+        self.measure("pull refunds close", lambda: closeAuction(client, appID, seller))
+
+    def runMultiLot(self) -> None:
+        client = self.client
+        ledger = self.ledger
+
+        creator = ledger.createAccount()
+        seller = ledger.createAccount()
+        bidders = [ledger.createAccount(), ledger.createAccount()]
+        nftID = createDummyAsset(client, 1, seller)
+        for bidder in bidders:
+            optInToAsset(client, nftID, bidder)
+
+        startTime = ledger.now() + 10
+        appID = self.measure(
+            "multi-lot create",
+            lambda: createMultiLotAuctionApp(
+                client=client,
+                sender=creator,
+                seller=seller.getAddress(),
+                startTime=startTime,
+                endTime=startTime + 60,
+                lotCount=1,
+            ),
+        )
+        self.measure(
+            "multi-lot add lot",
+            lambda: addAuctionLots(
+                client=client,
+                appID=appID,
+                sender=seller,
+                lots=[
+                    AuctionLot(
+                        nftHolder=seller,
+                        nftID=nftID,
+                        nftAmount=1,
+                        reserve=1_000_000,
+                        minBidIncrement=100_000,
+                    )
+                ],
+            ),
+        )
+
+        ledger.advanceTime(15)
+        self.measure(
+            "multi-lot bid",
+            lambda: placeLotBid(client, appID, 0, bidders[0], 1_000_000),
+        )
+        self.measure(
+            "multi-lot bid with refund",
+            lambda: placeLotBid(client, appID, 0, bidders[1], 1_100_000),
+        )
+        ledger.advanceTime(60)
+        self.measure(
+            "multi-lot close with winner",
+            lambda: closeMultiLotAuction(client, appID, seller),
+        )
+
+    def run(self) -> Dict[str, Any]:
+        """Run the benchmark.
+
+        Returns:
+            The results, which can be saved as a baseline.
+        """
+        client = self.client
+        ledger = self.ledger
+
+        appID, seller, bidders = self.createAuction(1_000_000, True)
+        ledger.advanceTime(15)
+        self.measure(
+            "bid",
+            lambda: placeBid(client, appID, bidders[0], 1_000_000),
+        )
+        self.measure(
+            "bid with refund",
+            lambda: placeBid(client, appID, bidders[1], 1_100_000),
+        )
+        ledger.advanceTime(60)
+        self.measure("close with winner", lambda: closeAuction(client, appID, seller))
+
+        appID, seller, bidders = self.createAuction(5_000_000, False)
+        ledger.advanceTime(15)
+        placeBid(client, appID, bidders[0], 1_000_000)
+        ledger.advanceTime(60)
+        self.measure("close below reserve", lambda: closeAuction(client, appID, seller))
+
+        appID, seller, _ = self.createAuction(1_000_000, False)
+        ledger.advanceTime(75)
+        self.measure("close without bids", lambda: closeAuction(client, appID, seller))
+
+        appID, seller, _ = self.createAuction(1_000_000, False)
+        self.measure("close before start", lambda: closeAuction(client, appID, seller))
+
+        appID, seller, bidders = self.createAuction(1_000_000, False)
+        ledger.advanceTime(15)
+        placeBid(client, appID, bidders[0], 1_000_000)
+        ledger.advanceTime(60)
+        self.measure("settle with winner", lambda: settleAuction(client, appID, seller))
+        nftID = createDummyAsset(client, 1, seller)
+        startTime = ledger.now() + 10
+        self.measure(
+            "relist",
+            lambda: relistAuction(
+                client=client,
+                appID=appID,
+                sender=seller,
+                nftHolder=seller,
+                nftID=nftID,
+                nftAmount=1,
+                startTime=startTime,
+                endTime=startTime + 60,
+                reserve=1_000_000,
+                minBidIncrement=100_000,
+            ),
+        )
+
+        self.runPullRefunds()
+        self.runMultiLot()
+
+        approval, clearState = getContracts(client)
+        pullRefundsApproval, pullRefundsClearState = getContracts(
+            client, pullRefunds=True
+        )
+        multiLotApproval, _ = getMultiLotContracts(client)
+        programs = {
+            "approval": approval,
+            "pullRefundsApproval": pullRefundsApproval,
+            "multiLotApproval": multiLotApproval,
+        }
+
+        results: Dict[str, Any] = dict()
+        for name, program in programs.items():
+            teal = self.teals[name]
+            if program != assembleWithLabels(teal)[0]:
+                raise Exception(
+                    "The deployed {} program does not match its TEAL".format(name)
+                )
+            results[name + "TealSize"] = len(teal.encode())
+            results[name + "Size"] = len(program)
+
+        return {
+            **results,
+            "clearStateSize": len(clearState),
+            "pullRefundsClearStateSize": len(pullRefundsClearState),
+            "branches": {name: self.costs[name] for name in BRANCHES},
+            "subroutines": {
+                name: dict(sorted(self.subroutineCosts[name].items()))
+                for name in BRANCHES
+            },
+        }
+
+
+def loadBudget(path: str = BUDGET_PATH) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compareToBudget(results: Dict[str, Any], budget: Dict[str, Any]) -> List[str]:
+    """Check benchmark results against a budget, which has the form of the
+    results but only needs the sizes and branches that are limited.
+
+    Returns:
+        A description of each limit that was exceeded. Empty if there are none.
+    """
+    overruns: List[str] = []
+    for key in SIZE_KEYS:
+        if key in budget and results[key] > budget[key]:
+            overruns.append(
+                "{} is {} bytes, over the budget of {}".format(
+                    key, results[key], budget[key]
+                )
+            )
+    for name, limit in budget.get("branches", {}).items():
+        if results["branches"][name] > limit:
+            overruns.append(
+                "{} costs {}, over the budget of {}".format(
+                    name, results["branches"][name], limit
+                )
+            )
+    return overruns
+
+
+def compareToBaseline(results: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Compare benchmark results to a baseline.
+
+    Returns:
+        A description of each regression. Empty if there are none.
+    """
+    regressions: List[str] = []
+    for key in SIZE_KEYS:
+        if key in baseline and results[key] > baseline[key]:
+            regressions.append(
+                "{} went from {} to {} bytes".format(key, baseline[key], results[key])
+            )
+    for name, cost in results["branches"].items():
+        previous = baseline["branches"].get(name)
+        if previous is not None and cost > previous:
+            regressions.append(
+                "{} cost went from {} to {}".format(name, previous, cost)
+            )
+    return regressions
+
+
+def formatResults(
+    results: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None
+) -> str:
+    def header(name: str, unit: str) -> str:
+        line = "{:<28}{:>8}".format(name, unit)
+        if baseline is not None:
+            line += "{:>10}{:>9}".format("baseline", "change")
+        return line
+
+    def row(name: str, current: int, previous: Optional[int]) -> str:
+        line = "{:<28}{:>8}".format(name, current)
+        if previous is not None:
+            line += "{:>10}{:>+9}".format(previous, current - previous)
+        return line
+
+    lines = [header("program", "bytes")]
+    for key, name in zip(SIZE_KEYS, SIZE_NAMES):
+        previous = baseline.get(key) if baseline is not None else None
+        lines.append(row(name, results[key], previous))
+
+    lines.append(header("branch", "cost"))
+    for name, cost in results["branches"].items():
+        previous = baseline["branches"].get(name) if baseline is not None else None
+        lines.append(row(name, cost, previous))
+        for subroutine, subroutineCost in results["subroutines"][name].items():
+            lines.append("    {:<24}{:>8}".format(subroutine, subroutineCost))
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Measure the size and opcode cost of the auction contract."
+    )
+    parser.add_argument(
+        "--budget",
+        default=BUDGET_PATH,
+        help="check the results against this budget, defaults to the stored budget",
+    )
+    parser.add_argument("--save-baseline", help="save the results to this file")
+    parser.add_argument("--baseline", help="compare the results to this file")
+    args = parser.parse_args(argv)
+
+    results = CostBenchmark().run()
+    failed = False
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print(formatResults(results, baseline))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if baseline is not None:
+        regressions = compareToBaseline(results, baseline)
+        for regression in regressions:
+            print("regression: " + regression)
+        failed = failed or len(regressions) > 0
+
+    overruns = compareToBudget(results, loadBudget(args.budget))
+    for overrun in overruns:
+        print("over budget: " + overrun)
+    failed = failed or len(overruns) > 0
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from ..testing.evaluator import APP_CALL_BUDGET
+from .cost import (
+    BRANCHES,
+    CostBenchmark,
+    compareToBaseline,
+    compareToBudget,
+    formatResults,
+    loadBudget,
+    main,
+)
+
+
+@pytest.fixture(autouse=True)
+def contractCache(tmp_path, monkeypatch):
+    monkeypatch.setenv("AUCTION_CONTRACT_CACHE", str(tmp_path))
+
+
+def test_cost():
+    results = CostBenchmark().run()
+
+    branches = results["branches"]
+    assert list(branches.keys()) == list(BRANCHES)
+    for cost in branches.values():
+        assert 0 < cost <= APP_CALL_BUDGET
+    assert branches["bid"] < branches["bid with refund"]
+    assert branches["close with winner"] < branches["close below reserve"]
+    assert branches["multi-lot bid"] < branches["multi-lot bid with refund"]
+    for name in ("approval", "pullRefundsApproval", "multiLotApproval"):
+        assert results[name + "TealSize"] > results[name + "Size"]
+    assert results["approvalSize"] > results["clearStateSize"] > 0
+    assert results["pullRefundsApprovalSize"] > results["pullRefundsClearStateSize"]
+
+    subroutines = results["subroutines"]
+    assert subroutines["bid"] == {}
+    assert list(subroutines["bid with refund"].keys()) == ["repayPreviousLeadBidder"]
+    assert set(subroutines["close below reserve"].keys()) == {
+        "closeNFTTo",
+        "repayPreviousLeadBidder",
+        "closeAccountTo",
+        "logClose",
+    }
+    # an outbid bidder of an auction with pull refunds is credited, and only
+    # repaid once they claim their credit
+    assert subroutines["pull refunds outbid"] == {}
+    assert "refundCredit" in subroutines["pull refunds claim"]
+    for name in BRANCHES:
+        assert sum(subroutines[name].values()) < branches[name]
+
+    assert compareToBaseline(results, results) == []
+
+    cheaper = json.loads(json.dumps(results))
+    cheaper["approvalSize"] -= 1
+    cheaper["branches"]["bid"] -= 1
+    assert len(compareToBaseline(results, cheaper)) == 2
+
+    # the contract must stay within the stored budget
+    assert compareToBudget(results, loadBudget()) == []
+    assert compareToBudget(results, {"approvalSize": 1, "branches": {"bid": 1}}) == [
+        "approvalSize is {} bytes, over the budget of 1".format(
+            results["approvalSize"]
+        ),
+        "bid costs {}, over the budget of 1".format(branches["bid"]),
+    ]
+
+    formatted = formatResults(results, cheaper)
+    assert "baseline" in formatted
+    for name in BRANCHES:
+        assert name in formatted
+
+
+def test_main(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    assert main(["--save-baseline", str(baseline)]) == 0
+    assert main(["--baseline", str(baseline)]) == 0
+
+    saved = json.loads(baseline.read_text())
+    saved["branches"]["create"] -= 1
+    baseline.write_text(json.dumps(saved))
+    assert main(["--baseline", str(baseline)]) == 1
+
+    budget = tmp_path / "budget.json"
+    budget.write_text(json.dumps({"branches": {"setup": 1}}))
+    assert main(["--budget", str(budget)]) == 1
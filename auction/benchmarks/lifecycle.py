@@ -0,0 +1,275 @@
+"""Measure the latency and RPC usage of the auction operations.
+
+Runs the full lifecycle of an auction, from createAuctionApp to closeAuction,
+against a simulated algod that adds a fixed latency to every request, and
+reports the wall time and the number of RPCs of each operation.
+
+Usage:
+    python -m auction.benchmarks.lifecycle [--iterations N] [--latency SECONDS]
+        [--save-baseline FILE] [--baseline FILE] [--tolerance FRACTION]
+
+With --baseline, the results are compared to a baseline saved by an earlier run
+with --save-baseline, and the command exits with status 1 if any operation got
+slower by more than the tolerance or issues more RPCs than before.
+"""
+
+from typing import Any, Callable, Dict, List, Sequence, TypeVar
+from time import perf_counter
+import argparse
+import json
+import math
+import sys
+
+from ..operations import createAuctionApp, setupAuctionApp, placeBid, closeAuction
+from ..testing.resources import createDummyAsset, optInToAsset
+from ..testing.simulator import Ledger
+from .client import LatencyAlgodClient
+
+OPERATIONS = ("createAuctionApp", "setupAuctionApp", "placeBid", "closeAuction")
+
+START_TIME = 1_600_000_000
+
+T = TypeVar("T")
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Get a percentile of a list of values with the nearest-rank method."""
+    ordered = sorted(values)
+    rank = max(math.ceil(fraction * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class OperationStats:
+    def __init__(self) -> None:
+        self.times: List[float] = []
+        self.rpcs: List[int] = []
+        self.routes: Dict[str, int] = dict()
+
+    def add(self, seconds: float, counts: Dict[str, int]) -> None:
+        self.times.append(seconds)
+        self.rpcs.append(sum(counts.values()))
+        for route, count in counts.items():
+            self.routes[route] = self.routes.get(route, 0) + count
+
+    def summary(self) -> Dict[str, Any]:
+        runs = len(self.times)
+        return {
+            "runs": runs,
+            "mean": sum(self.times) / runs,
+            "p50": percentile(self.times, 0.5),
+            "p99": percentile(self.times, 0.99),
+            "rpcs": sum(self.rpcs) / runs,
+            "routes": {
+                route: count / runs for route, count in sorted(self.routes.items())
+            },
+        }
+
+
+class LifecycleBenchmark:
+    """Runs auctions from start to finish and records how each operation
+    performs.
+
+    Args:
+        latency (optional): The delay added to each algod request, in seconds.
+            Defaults to 0.
+    """
+
+    def __init__(self, latency: float = 0) -> None:
+        self.latency = latency
+        self.ledger = Ledger(timestamp=START_TIME)
+        self.client = LatencyAlgodClient(latency, self.ledger)
+        self.stats: Dict[str, OperationStats] = {
+            name: OperationStats() for name in OPERATIONS
+        }
+
+    def measure(self, name: str, operation: Callable[[], T]) -> T:
+        self.client.takeCounts()
+        start = perf_counter()
+        result = operation()
+        elapsed = perf_counter() - start
+        self.stats[name].add(elapsed, self.client.takeCounts())
+        return result
+
+    def runAuction(self) -> None:
+        client = self.client
+        ledger = self.ledger
+
+        creator = ledger.createAccount()
+        seller = ledger.createAccount()
+        bidders = [ledger.createAccount(), ledger.createAccount()]
+        nftID = createDummyAsset(client, 1, seller)
+        optInToAsset(client, nftID, bidders[-1])
+
+        startTime = ledger.now() + 10
+        endTime = startTime + 60
+
+        appID = self.measure(
+            "createAuctionApp",
+            lambda: createAuctionApp(
+                client=client,
+                sender=creator,
+                seller=seller.getAddress(),
+                nftID=nftID,
+                startTime=startTime,
+                endTime=endTime,
+                reserve=1_000_000,
+                minBidIncrement=100_000,
+            ),
+        )
+
+        self.measure(
+            "setupAuctionApp",
+            lambda: setupAuctionApp(
+                client=client,
+                appID=appID,
+                funder=creator,
+                nftHolder=seller,
+                nftID=nftID,
+                nftAmount=1,
+            ),
+        )
+
+        ledger.advanceTime(10)
+        for i, bidder in enumerate(bidders):
+            self.measure(
+                "placeBid",
+                lambda: placeBid(
+                    client=client,
+                    appID=appID,
+                    bidder=bidder,
+                    bidAmount=1_000_000 + i * 100_000,
+                ),
+            )
+
+        ledger.advanceTime(60)
+        self.measure("closeAuction", lambda: closeAuction(client, appID, seller))
+
+    def run(self, iterations: int, warmup: int = 1) -> Dict[str, Any]:
+        """Run the benchmark.
+
+        Args:
+            iterations: The number of auctions to measure.
+            warmup (optional): The number of auctions to run first without
+                measuring them, so one-time costs like compiling the contracts
+                are left out. Defaults to 1.
+
+        Returns:
+            The results, which can be saved as a baseline.
+        """
+        for _ in range(warmup):
+            self.runAuction()
+        self.stats = {name: OperationStats() for name in OPERATIONS}
+
+        for _ in range(iterations):
+            self.runAuction()
+
+        return {
+            "latency": self.latency,
+            "operations": {name: stats.summary() for name, stats in self.stats.items()},
+        }
+
+
+def compareToBaseline(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """Compare benchmark results to a baseline.
+
+    Returns:
+        A description of each regression. Empty if there are none.
+    """
+    regressions: List[str] = []
+    if results["latency"] != baseline["latency"]:
+        regressions.append(
+            "latency {} does not match the baseline latency {}".format(
+                results["latency"], baseline["latency"]
+            )
+        )
+        return regressions
+
+    for name, current in results["operations"].items():
+        previous = baseline["operations"].get(name)
+        if previous is None:
+            continue
+        for key in ("p50", "p99"):
+            if current[key] > previous[key] * (1 + tolerance):
+                regressions.append(
+                    "{} {} went from {:.2f}ms to {:.2f}ms".format(
+                        name, key, previous[key] * 1000, current[key] * 1000
+                    )
+                )
+        if current["rpcs"] > previous["rpcs"]:
+            regressions.append(
+                "{} RPCs went from {:g} to {:g}".format(
+                    name, previous["rpcs"], current["rpcs"]
+                )
+            )
+    return regressions
+
+
+def formatResults(results: Dict[str, Any]) -> str:
+    lines = [
+        "latency per request: {:g}ms".format(results["latency"] * 1000),
+        "{:<18}{:>6}{:>12}{:>12}{:>12}{:>8}".format(
+            "operation", "runs", "mean (ms)", "p50 (ms)", "p99 (ms)", "rpcs"
+        ),
+    ]
+    for name, summary in results["operations"].items():
+        lines.append(
+            "{:<18}{:>6}{:>12.2f}{:>12.2f}{:>12.2f}{:>8g}".format(
+                name,
+                summary["runs"],
+                summary["mean"] * 1000,
+                summary["p50"] * 1000,
+                summary["p99"] * 1000,
+                summary["rpcs"],
+            )
+        )
+        for route, count in summary["routes"].items():
+            lines.append("    {:<44}{:>8g}".format(route, count))
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the latency and RPC usage of the auction operations."
+    )
+    parser.add_argument(
+        "--iterations", type=int, default=20, help="number of auctions to measure"
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.002,
+        help="delay added to each algod request, in seconds",
+    )
+    parser.add_argument("--save-baseline", help="save the results to this file")
+    parser.add_argument("--baseline", help="compare the results to this file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed slowdown relative to the baseline, as a fraction",
+    )
+    args = parser.parse_args(argv)
+
+    results = LifecycleBenchmark(args.latency).run(args.iterations)
+    print(formatResults(results))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compareToBaseline(results, baseline, args.tolerance)
+        for regression in regressions:
+            print("regression: " + regression)
+        if len(regressions) > 0:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from .client import getRoute
+from .lifecycle import LifecycleBenchmark, compareToBaseline, main, percentile
+
+
+@pytest.fixture(autouse=True)
+def contractCache(tmp_path, monkeypatch):
+    monkeypatch.setenv("AUCTION_CONTRACT_CACHE", str(tmp_path))
+
+
+def test_getRoute():
+    assert getRoute("GET", "/status/wait-for-block-after/12") == (
+        "GET /status/wait-for-block-after/{round}"
+    )
+    assert getRoute("GET", "/accounts/ABC") == "GET /accounts/{address}"
+    assert getRoute("GET", "/applications/5") == "GET /applications/{id}"
+    assert getRoute("POST", "/transactions") == "POST /transactions"
+
+
+def test_percentile():
+    values = [5, 1, 4, 2, 3]
+    assert percentile(values, 0.5) == 3
+    assert percentile(values, 0.99) == 5
+    assert percentile([7], 0.99) == 7
+
+
+def test_lifecycle():
+    results = LifecycleBenchmark().run(iterations=2)
+
+    operations = results["operations"]
+    assert list(operations.keys()) == [
+        "createAuctionApp",
+        "setupAuctionApp",
+        "placeBid",
+        "closeAuction",
+    ]
+    assert operations["createAuctionApp"]["runs"] == 2
+    assert operations["placeBid"]["runs"] == 4
+    for summary in operations.values():
+        assert summary["rpcs"] > 0
+        assert summary["routes"]["POST /transactions"] == 1
+        assert 0 < summary["p50"] <= summary["p99"]
+
+    assert compareToBaseline(results, results, 0) == []
+
+    slower = json.loads(json.dumps(results))
+    slower["operations"]["placeBid"]["p50"] *= 2
+    slower["operations"]["placeBid"]["rpcs"] += 1
+    assert len(compareToBaseline(slower, results, 0.2)) == 2
+
+
+def test_main(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    assert main(["--iterations", "1", "--save-baseline", str(baseline)]) == 0
+
+    saved = json.loads(baseline.read_text())
+    assert saved["latency"] == 0.002
+
+    assert (
+        main(["--iterations", "1", "--latency", "0", "--baseline", str(baseline)]) == 1
+    )
@@ -0,0 +1,72 @@
+from typing import List, Dict, Any, Set
+from base64 import b32encode, b64decode
+
+import msgpack
+
+from algosdk.v2client.algod import AlgodClient
+from algosdk import constants, encoding
+
+
+def getBlock(client: AlgodClient, round: int) -> Dict[str, Any]:
+    """Get a block in its canonical msgpack form.
+
+    Unlike the JSON form of a block, the msgpack form keeps addresses and byte
+    arrays as raw bytes, which makes it possible to recompute transaction IDs.
+
+    Args:
+        client: An algod client.
+        round: The round of the block.
+
+    Returns:
+        The decoded block header, including its "txns" list. Each entry of that
+        list is a transaction in the form it is stored in a block.
+    """
+    return decodeBlock(client.block_info(round, response_format="msgpack"))
+
+
+def decodeBlock(raw: bytes) -> Dict[str, Any]:
+    """Decode a block from the msgpack response of block_info. See getBlock."""
+    response = msgpack.unpackb(
+        raw, raw=False, strict_map_key=False, unicode_errors="surrogateescape"
+    )
+    return response["block"]
+
+
+def getBlockTxn(
+    block: Dict[str, Any], signedTxnInBlock: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Restore the fields of a transaction that are left out when it is stored
+    in a block."""
+    txn = dict(signedTxnInBlock["txn"])
+    if signedTxnInBlock.get("hgi"):
+        txn["gen"] = block["gen"]
+    # all current consensus versions require the genesis hash
+    txn["gh"] = block["gh"]
+    return txn
+
+
+def getTxnID(txn: Dict[str, Any]) -> str:
+    """Compute the ID of a transaction in its msgpack dictionary form."""
+    encoded = b64decode(encoding.msgpack_encode(txn))
+    digest = encoding.checksum(constants.txid_prefix + encoded)
+    return b32encode(digest).decode().strip("=")
+
+
+def getBlockTxnIDs(block: Dict[str, Any]) -> List[str]:
+    """Get the IDs of all top level transactions in a block."""
+    return [getTxnID(getBlockTxn(block, stib)) for stib in block.get("txns", [])]
+
+
+def getPoolTxnIDs(client: AlgodClient) -> Set[str]:
+    """Get the IDs of every transaction in the transaction pool of a node, with
+    a single request."""
+    response = msgpack.unpackb(
+        client.pending_transactions(0, response_format="msgpack"),
+        raw=False,
+        strict_map_key=False,
+        unicode_errors="surrogateescape",
+    )
+    return set(
+        getTxnID(signedTxn["txn"])
+        for signedTxn in response.get("top-transactions") or []
+    )
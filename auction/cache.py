@@ -0,0 +1,73 @@
+from typing import Optional
+import os
+import hashlib
+import tempfile
+
+try:
+    from importlib.metadata import version, PackageNotFoundError
+except ImportError:  # pragma: no cover
+    version = None  # type: ignore
+
+CACHE_DIR_ENV = "AUCTION_CONTRACT_CACHE"
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "auction-demo")
+
+
+def getPyTealVersion() -> str:
+    if version is None:
+        return "unknown"
+    try:
+        return version("pyteal")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+class ProgramCache:
+    """A content-addressed, on-disk cache of compiled TEAL programs.
+
+    Entries are keyed by the hash of the TEAL source together with the TEAL
+    version and the installed pyteal version, so any change to a contract (or
+    to the compiler that produced its TEAL) results in a different key and the
+    stale entry is never read. Entries are written atomically, which makes it
+    safe for many processes to share the same cache directory.
+    """
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        if directory is None:
+            directory = os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR)
+        self.directory = directory
+        self.pytealVersion = getPyTealVersion()
+
+    def key(self, teal: str, tealVersion: int) -> str:
+        digest = hashlib.sha256()
+        digest.update(
+            "pyteal={};teal={};".format(self.pytealVersion, tealVersion).encode()
+        )
+        digest.update(teal.encode("utf-8"))
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".bin")
+
+    def get(self, teal: str, tealVersion: int) -> Optional[bytes]:
+        try:
+            with open(self.path(self.key(teal, tealVersion)), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, teal: str, tealVersion: int, program: bytes) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmpPath = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(program)
+                # rename is atomic, so concurrent readers see either nothing or the full entry
+                os.replace(tmpPath, self.path(self.key(teal, tealVersion)))
+            except BaseException:
+                os.unlink(tmpPath)
+                raise
+        except OSError:
+            # the cache is only an optimization, failing to write it is not an error
+            pass
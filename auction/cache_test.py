@@ -0,0 +1,46 @@
+from base64 import b64encode
+
+from pyteal import Approve, Int, Return
+
+from .cache import ProgramCache
+from .util import fullyCompileContract
+
+
+class CompileCountingClient:
+    def __init__(self) -> None:
+        self.compiles = 0
+
+    def compile(self, source: str):
+        self.compiles += 1
+        return {"result": b64encode(b"program:" + source.encode()).decode()}
+
+
+def test_fullyCompileContract_cache(tmp_path):
+    client = CompileCountingClient()
+
+    first = fullyCompileContract(client, Approve(), ProgramCache(str(tmp_path)))
+    assert client.compiles == 1
+
+    # a new cache object simulates a new process sharing the same directory
+    second = fullyCompileContract(client, Approve(), ProgramCache(str(tmp_path)))
+    assert client.compiles == 1
+    assert second == first
+
+
+def test_fullyCompileContract_cache_invalidation(tmp_path):
+    client = CompileCountingClient()
+    cache = ProgramCache(str(tmp_path))
+
+    first = fullyCompileContract(client, Approve(), cache)
+    second = fullyCompileContract(client, Return(Int(0)), cache)
+
+    assert client.compiles == 2
+    assert first != second
+
+
+def test_ProgramCache_key():
+    cache = ProgramCache("unused")
+
+    assert cache.key("int 1", 5) == cache.key("int 1", 5)
+    assert cache.key("int 1", 5) != cache.key("int 0", 5)
+    assert cache.key("int 1", 5) != cache.key("int 1", 4)
@@ -0,0 +1,255 @@
+from typing import List, Optional, Sequence
+from collections import OrderedDict
+from time import monotonic
+import threading
+
+import msgpack
+
+from algosdk.v2client.algod import AlgodClient
+from algosdk import error
+
+from .blocks import getTxnID
+from .tracing import measuredRequest
+
+# the number of submitted transactions whose node is remembered
+MAX_PINNED_TXNS = 10_000
+
+
+class AlgodNode:
+    def __init__(self, client: AlgodClient) -> None:
+        self.client = client
+        # the latest round the node is known to have reached
+        self.round = 0
+        # the monotonic time until which the node is skipped after an error
+        self.failedUntil = 0.0
+
+    def __repr__(self) -> str:
+        return "AlgodNode({})".format(self.client.algod_address)
+
+
+def isNodeFailure(e: Exception) -> bool:
+    """Check if an error means the node is unavailable, as opposed to the node
+    rejecting the request itself."""
+    if isinstance(e, error.AlgodHTTPError):
+        return e.code is None or e.code >= 500
+    return True
+
+
+def isDuplicateSubmission(e: Exception) -> bool:
+    """Check if a node rejected submitted transactions because it already has
+    them, in its ledger or in its transaction pool."""
+    if not isinstance(e, error.AlgodHTTPError) or isNodeFailure(e):
+        return False
+    message = str(e)
+    return "already in ledger" in message or "already in pool" in message
+
+
+def getSubmittedTxIDs(data: bytes) -> List[str]:
+    """Get the IDs of the signed transactions in the body of a POST to
+    /transactions."""
+    unpacker = msgpack.Unpacker(
+        raw=False, strict_map_key=False, unicode_errors="surrogateescape"
+    )
+    unpacker.feed(data)
+    return [getTxnID(signedTxn["txn"]) for signedTxn in unpacker]
+
+
+class AlgodClientPool(AlgodClient):
+    """An algod client that spreads requests across several algod nodes.
+
+    Reads go to the nodes in turn, skipping nodes that are more than maxLag
+    rounds behind the most advanced node. A node that fails to answer a request
+    is skipped for failureCooldown seconds and the request is retried on the
+    next node; requests that a node rejects, such as an invalid transaction,
+    are not retried.
+
+    A submission that a node fails to answer may still have been accepted by
+    it, so when it is retried on the next node and rejected because that node
+    already has the transactions, the submission counts as a success. Signed
+    transactions have unique IDs, so retrying them never applies them twice.
+
+    A submitted transaction is pinned to the node that accepted it, so polling
+    its status with pending_transaction_info asks the same node while it is
+    available. A thread that submitted a transaction also prefers that node for
+    its next requests, so its reads reflect its own writes.
+
+    A background thread started with the first request checks the status of
+    every node each probeInterval seconds, which is how lagging and failed
+    nodes are brought back into rotation.
+
+    The pool can be passed as the client argument of every operation in
+    auction.operations.
+
+    Args:
+        clients: The clients of each node.
+        maxLag (optional): The number of rounds a node can be behind before it
+            is skipped. Defaults to 2.
+        failureCooldown (optional): The number of seconds a failed node is
+            skipped for. Defaults to 5.
+        probeInterval (optional): The number of seconds between checks of the
+            status of each node. Defaults to 1.
+    """
+
+    def __init__(
+        self,
+        clients: Sequence[AlgodClient],
+        maxLag: int = 2,
+        failureCooldown: float = 5,
+        probeInterval: float = 1,
+    ) -> None:
+        if len(clients) == 0:
+            raise Exception("At least one algod client is required")
+
+        first = clients[0]
+        super().__init__(first.algod_token, first.algod_address, first.headers)
+
+        self.nodes = [AlgodNode(client) for client in clients]
+        self.maxLag = maxLag
+        self.failureCooldown = failureCooldown
+        self.probeInterval = probeInterval
+
+        self.lock = threading.Lock()
+        self.nextIndex = 0
+        self.pinned: "OrderedDict[str, AlgodNode]" = OrderedDict()
+        self.local = threading.local()
+
+        self.startLock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def latestRound(self) -> int:
+        return max(node.round for node in self.nodes)
+
+    def candidates(
+        self, preferred: Optional[AlgodNode] = None, pinned: Optional[AlgodNode] = None
+    ) -> List[AlgodNode]:
+        """Get the nodes to try for a request, in order.
+
+        The preferred node goes first unless it lags behind or has failed. The
+        pinned node goes first unless it has failed.
+        """
+        now = monotonic()
+        with self.lock:
+            latest = self.latestRound()
+            available = [node for node in self.nodes if node.failedUntil <= now]
+            current = [node for node in available if latest - node.round <= self.maxLag]
+
+            ordered: List[AlgodNode] = []
+            if len(current) > 0:
+                start = self.nextIndex % len(current)
+                self.nextIndex += 1
+                ordered = current[start:] + current[:start]
+                if preferred in ordered:
+                    ordered.remove(preferred)
+                    ordered.insert(0, preferred)
+            if pinned in available:
+                if pinned in ordered:
+                    ordered.remove(pinned)
+                ordered.insert(0, pinned)  # type: ignore
+
+        # lagging and failed nodes are a last resort, so a request only fails if
+        # no node can answer it
+        ordered += [node for node in available if node not in ordered]
+        ordered += [node for node in self.nodes if node not in ordered]
+        return ordered
+
+    def observeRound(self, node: AlgodNode, response) -> None:
+        if isinstance(response, dict) and "last-round" in response:
+            with self.lock:
+                node.round = max(node.round, response["last-round"])
+
+    def markFailed(self, node: AlgodNode) -> None:
+        with self.lock:
+            node.failedUntil = monotonic() + self.failureCooldown
+
+    def pin(self, txIDs: List[str], node: AlgodNode) -> None:
+        with self.lock:
+            for txID in txIDs:
+                self.pinned[txID] = node
+                self.pinned.move_to_end(txID)
+            while len(self.pinned) > MAX_PINNED_TXNS:
+                self.pinned.popitem(last=False)
+
+    def algod_request(
+        self,
+        method,
+        requrl,
+        params=None,
+        data=None,
+        headers=None,
+        response_format="json",
+    ):
+        self.start()
+
+        isSubmit = method == "POST" and requrl == "/transactions"
+        preferred: Optional[AlgodNode] = getattr(self.local, "node", None)
+        pinned: Optional[AlgodNode] = None
+        if requrl.startswith("/transactions/pending/"):
+            with self.lock:
+                # only the node that accepted a transaction is sure to know it
+                pinned = self.pinned.get(requrl.split("/")[3])
+
+        lastError: Optional[Exception] = None
+        for node in self.candidates(preferred, pinned):
+            try:
+                response = measuredRequest(
+                    node.client, method, requrl, params, data, headers, response_format
+                )
+            except Exception as e:
+                if isSubmit and lastError is not None and isDuplicateSubmission(e):
+                    # a node that failed to answer had accepted the transactions
+                    # after all, and they reached this node too
+                    txIDs = getSubmittedTxIDs(data)
+                    self.pin(txIDs, node)
+                    self.local.node = node
+                    return {"txId": txIDs[0]}
+                if not isNodeFailure(e):
+                    raise
+                self.markFailed(node)
+                lastError = e
+                continue
+
+            self.observeRound(node, response)
+            if isSubmit:
+                self.pin(getSubmittedTxIDs(data), node)
+                self.local.node = node
+            return response
+
+        assert lastError is not None
+        raise lastError
+
+    def probe(self) -> None:
+        """Check the status of every node."""
+        for node in self.nodes:
+            try:
+                status = node.client.status()
+            except Exception:
+                self.markFailed(node)
+                continue
+            with self.lock:
+                node.round = max(node.round, status["last-round"])
+                node.failedUntil = 0
+
+    def follow(self) -> None:
+        while not self.stopped.is_set():
+            self.probe()
+            self.stopped.wait(self.probeInterval)
+
+    def start(self) -> None:
+        """Start checking the status of the nodes in the background. This is
+        done automatically by the first request."""
+        if self.thread is not None:
+            return
+        with self.startLock:
+            if self.thread is not None:
+                return
+            # learn the round of every node before choosing one
+            self.probe()
+            self.thread = threading.Thread(
+                target=self.follow, name="AlgodClientPool", daemon=True
+            )
+            self.thread.start()
+
+    def stop(self) -> None:
+        """Stop checking the status of the nodes in the background."""
+        self.stopped.set()
@@ -0,0 +1,221 @@
+from collections import Counter
+from urllib.error import URLError
+
+import pytest
+
+from algosdk.error import AlgodHTTPError
+from algosdk.future import transaction
+
+from .clientpool import AlgodClientPool
+from .operations import createAuctionApp, setupAuctionApp, placeBid, closeAuction
+from .testing.resources import createDummyAsset, optInToAsset
+from .testing.simulator import Ledger, SimulatedAlgodClient
+from .util import getBalances
+
+START_TIME = 1_600_000_000
+
+
+@pytest.fixture(autouse=True)
+def contractCache(tmp_path, monkeypatch):
+    monkeypatch.setenv("AUCTION_CONTRACT_CACHE", str(tmp_path))
+
+
+class FakeNode(SimulatedAlgodClient):
+    def __init__(self, ledger: Ledger) -> None:
+        super().__init__(ledger)
+        self.down = False
+        # if set, requests are handled but the response is lost
+        self.timesOut = False
+        # the number of rounds this node reports being behind the ledger
+        self.lag = 0
+        self.requests: Counter = Counter()
+
+    def algod_request(self, method, requrl, *args, **kwargs):
+        self.requests[requrl] += 1
+        if self.down:
+            raise URLError("connection refused")
+        response = super().algod_request(method, requrl, *args, **kwargs)
+        if self.timesOut:
+            raise URLError("timed out")
+        if isinstance(response, dict) and "last-round" in response:
+            response["last-round"] = max(response["last-round"] - self.lag, 0)
+        return response
+
+
+def makePool(count: int, ledger: Ledger = None):
+    ledger = ledger if ledger is not None else Ledger(timestamp=START_TIME)
+    for _ in range(5):
+        ledger.newBlock()
+    nodes = [FakeNode(ledger) for _ in range(count)]
+    # a long probe interval keeps the background thread out of the way
+    pool = AlgodClientPool(nodes, probeInterval=60)
+    return pool, nodes, ledger
+
+
+def test_spreads_reads():
+    pool, nodes, _ = makePool(3)
+
+    for _ in range(6):
+        pool.versions()
+
+    assert [node.requests["/versions"] for node in nodes] == [2, 2, 2]
+    pool.stop()
+
+
+def test_skips_lagging_nodes():
+    pool, nodes, _ = makePool(3)
+    pool.stop()
+    nodes[1].lag = 5
+    pool.probe()
+
+    for _ in range(6):
+        pool.versions()
+
+    assert [node.requests["/versions"] for node in nodes] == [3, 0, 3]
+
+    nodes[1].lag = 0
+    pool.probe()
+    pool.versions()
+    pool.versions()
+    assert nodes[1].requests["/versions"] == 1
+
+
+def test_fails_over():
+    pool, nodes, _ = makePool(2)
+    pool.stop()
+    pool.start()
+    nodes[0].down = True
+    before = nodes[0].requests["/status"]
+
+    for _ in range(4):
+        assert pool.status()["last-round"] == 5
+
+    # the failed node is tried once, then skipped until it recovers
+    assert nodes[0].requests["/status"] - before == 1
+
+    nodes[0].down = False
+    pool.probe()
+    pool.versions()
+    pool.versions()
+    assert nodes[0].requests["/versions"] == 1
+
+
+def test_all_nodes_down():
+    pool, nodes, _ = makePool(2)
+    pool.stop()
+    for node in nodes:
+        node.down = True
+
+    with pytest.raises(URLError):
+        pool.status()
+
+
+def test_rejections_are_not_retried():
+    pool, nodes, _ = makePool(2)
+    pool.stop()
+
+    with pytest.raises(AlgodHTTPError) as e:
+        pool.application_info(1)
+
+    assert e.value.code == 404
+    assert sum(node.requests["/applications/1"] for node in nodes) == 1
+
+
+def test_pins_submitted_txns():
+    pool, nodes, ledger = makePool(3)
+    pool.stop()
+
+    sender = ledger.genesisAccounts[0]
+    txn = transaction.PaymentTxn(
+        sender=sender.getAddress(),
+        receiver=sender.getAddress(),
+        amt=0,
+        sp=pool.suggested_params(),
+    )
+    signedTxn = txn.sign(sender.getPrivateKey())
+    txID = pool.send_transaction(signedTxn)
+
+    submitNode = next(node for node in nodes if node.requests["/transactions"] == 1)
+    # the submitting node lags, but still knows the transaction best
+    submitNode.lag = 5
+    pool.probe()
+
+    for _ in range(3):
+        assert pool.pending_transaction_info(txID)["confirmed-round"] > 0
+    assert submitNode.requests["/transactions/pending/" + txID] == 3
+
+
+def test_submit_timeout():
+    pool, nodes, ledger = makePool(2)
+    pool.stop()
+
+    sender = ledger.genesisAccounts[0]
+    receiver = ledger.createAccount()
+    txn = transaction.PaymentTxn(
+        sender=sender.getAddress(),
+        receiver=receiver.getAddress(),
+        amt=100_000,
+        sp=pool.suggested_params(),
+    )
+    signedTxn = txn.sign(sender.getPrivateKey())
+
+    # the first node applies the transaction, but its answer never arrives
+    pool.local.node = pool.nodes[0]
+    nodes[0].timesOut = True
+    assert pool.send_transaction(signedTxn) == txn.get_txid()
+    nodes[0].timesOut = False
+
+    # the second node saw the duplicate, so the payment was made once
+    assert [node.requests["/transactions"] for node in nodes] == [1, 1]
+    assert getBalances(pool, receiver.getAddress())[0] == 100_100_000
+
+    # the node that knows the transaction answers for it
+    nodes[0].down = True
+    pool.pending_transaction_info(txn.get_txid())
+    assert nodes[1].requests["/transactions/pending/" + txn.get_txid()] == 1
+
+    # without a failed attempt, a duplicate is rejected as usual
+    nodes[0].down = False
+    pool.probe()
+    pool.local.node = pool.nodes[0]
+    with pytest.raises(AlgodHTTPError, match="already in ledger"):
+        pool.send_transaction(signedTxn)
+
+
+def test_operations():
+    ledger = Ledger(timestamp=START_TIME)
+    pool, nodes, _ = makePool(3, ledger)
+
+    creator = ledger.createAccount()
+    seller = ledger.createAccount()
+    bidder = ledger.createAccount()
+    nftID = createDummyAsset(pool, 1, seller)
+    optInToAsset(pool, nftID, bidder)
+
+    appID = createAuctionApp(
+        client=pool,
+        sender=creator,
+        seller=seller.getAddress(),
+        nftID=nftID,
+        startTime=START_TIME + 10,
+        endTime=START_TIME + 70,
+        reserve=1_000_000,
+        minBidIncrement=100_000,
+    )
+    nodes[0].down = True
+    setupAuctionApp(
+        client=pool,
+        appID=appID,
+        funder=creator,
+        nftHolder=seller,
+        nftID=nftID,
+        nftAmount=1,
+    )
+    ledger.advanceTime(15)
+    placeBid(client=pool, appID=appID, bidder=bidder, bidAmount=1_000_000)
+    ledger.advanceTime(60)
+    closeAuction(pool, appID, seller)
+
+    assert getBalances(pool, bidder.getAddress())[nftID] == 1
+    assert all(sum(node.requests.values()) > 0 for node in nodes)
+    pool.stop()
@@ -1,17 +1,20 @@
 from pyteal import *
 
 
-def approval_program():
-    seller_key = Bytes("seller")
-    nft_id_key = Bytes("nft_id")
-    start_time_key = Bytes("start")
-    end_time_key = Bytes("end")
-    reserve_amount_key = Bytes("reserve_amount")
-    min_bid_increment_key = Bytes("min_bid_inc")
-    num_bids_key = Bytes("num_bids")
-    lead_bid_amount_key = Bytes("bid_amount")
-    lead_bid_account_key = Bytes("bid_account")
+def escrow_subroutines():
+    """Define the subroutines both auction programs use to pay out of their
+    escrow account.
 
+    They are defined again for each program because PyTeal allocates the scratch
+    slots of a subroutine while compiling it, so sharing one definition between
+    compilations would change the compiled program.
+    """
+    # the first byte of the log record of a refund, see auction.logs for the
+    # full format
+    refund_log_tag = Bytes("base16", "04")
+
+    # inner transactions have a fee of 0, so their fees must be paid through fee
+    # pooling by the app call that sends them
     @Subroutine(TealType.none)
     def closeNFTTo(assetID: Expr, account: Expr) -> Expr:
         asset_holding = AssetHolding.balance(
@@ -27,6 +30,7 @@ def approval_program():
                             TxnField.type_enum: TxnType.AssetTransfer,
                             TxnField.xfer_asset: assetID,
                             TxnField.asset_close_to: account,
+                            TxnField.fee: Int(0),
                         }
                     ),
                     InnerTxnBuilder.Submit(),
@@ -41,11 +45,13 @@ def approval_program():
             InnerTxnBuilder.SetFields(
                 {
                     TxnField.type_enum: TxnType.Payment,
-                    TxnField.amount: prevLeadBidAmount - Global.min_txn_fee(),
+                    TxnField.amount: prevLeadBidAmount,
                     TxnField.receiver: prevLeadBidder,
+                    TxnField.fee: Int(0),
                 }
             ),
             InnerTxnBuilder.Submit(),
+            Log(Concat(refund_log_tag, prevLeadBidder, Itob(prevLeadBidAmount))),
         )
 
     @Subroutine(TealType.none)
@@ -57,27 +63,85 @@ def approval_program():
                     {
                         TxnField.type_enum: TxnType.Payment,
                         TxnField.close_remainder_to: account,
+                        TxnField.fee: Int(0),
                     }
                 ),
                 InnerTxnBuilder.Submit(),
             )
         )
 
-    on_create_start_time = Btoi(Txn.application_args[2])
-    on_create_end_time = Btoi(Txn.application_args[3])
+    return closeNFTTo, repayPreviousLeadBidder, closeAccountTo
+
+
+def approval_program(pull_refunds: bool = False):
+    """The approval program of an auction.
+
+    With pull_refunds, an outbid lead bid is not repaid right away. It is kept as
+    credit in the local state of its bidder, who claims it later with a refund
+    call, so a bid does not depend on who the current lead bidder is.
+
+    An auction that is over can be settled instead of deleted. Settling pays out
+    the auction but keeps the app and its funded escrow account, and a settled
+    auction can be relisted with a new NFT, times and reserve.
+    """
+    seller_key = Bytes("seller")
+    nft_id_key = Bytes("nft_id")
+    start_time_key = Bytes("start")
+    end_time_key = Bytes("end")
+    reserve_amount_key = Bytes("reserve_amount")
+    min_bid_increment_key = Bytes("min_bid_inc")
+    num_bids_key = Bytes("num_bids")
+    lead_bid_amount_key = Bytes("bid_amount")
+    lead_bid_account_key = Bytes("bid_account")
+    # the total credit of all bidders, only used with pull_refunds
+    owed_key = Bytes("owed")
+    # the local state of a bidder: everything they have paid in and not been
+    # refunded, including their lead bid if they are the lead bidder
+    deposit_key = Bytes("deposit")
+
+    closeNFTTo, repayPreviousLeadBidder, closeAccountTo = escrow_subroutines()
+
+    # the first byte of each log record, see auction.logs for the full format
+    create_log_tag = Bytes("base16", "01")
+    setup_log_tag = Bytes("base16", "02")
+    bid_log_tag = Bytes("base16", "03")
+    close_log_tag = Bytes("base16", "05")
+
+    @Subroutine(TealType.none)
+    def logClose(winner: Expr, winningBidAmount: Expr) -> Expr:
+        return Log(Concat(close_log_tag, winner, Itob(winningBidAmount)))
+
+    # values that a branch reads several times are kept in scratch space, which
+    # is cheaper than reading them again
+    on_create_start_time = ScratchVar(TealType.uint64)
+    on_create_end_time = ScratchVar(TealType.uint64)
     on_create = Seq(
+        on_create_start_time.store(Btoi(Txn.application_args[2])),
+        on_create_end_time.store(Btoi(Txn.application_args[3])),
+        Assert(
+            And(
+                Global.latest_timestamp() < on_create_start_time.load(),
+                on_create_start_time.load() < on_create_end_time.load(),
+                # TODO: should we impose a maximum auction length?
+            )
+        ),
         App.globalPut(seller_key, Txn.application_args[0]),
         App.globalPut(nft_id_key, Btoi(Txn.application_args[1])),
-        App.globalPut(start_time_key, on_create_start_time),
-        App.globalPut(end_time_key, on_create_end_time),
+        App.globalPut(start_time_key, on_create_start_time.load()),
+        App.globalPut(end_time_key, on_create_end_time.load()),
         App.globalPut(reserve_amount_key, Btoi(Txn.application_args[4])),
         App.globalPut(min_bid_increment_key, Btoi(Txn.application_args[5])),
         App.globalPut(lead_bid_account_key, Global.zero_address()),
-        Assert(
-            And(
-                Global.latest_timestamp() < on_create_start_time,
-                on_create_start_time < on_create_end_time,
-                # TODO: should we impose a maximum auction length?
+        *([App.globalPut(owed_key, Int(0))] if pull_refunds else []),
+        Log(
+            Concat(
+                create_log_tag,
+                Txn.application_args[0],
+                Itob(Btoi(Txn.application_args[1])),
+                Itob(on_create_start_time.load()),
+                Itob(on_create_end_time.load()),
+                Itob(Btoi(Txn.application_args[4])),
+                Itob(Btoi(Txn.application_args[5])),
             )
         ),
         Approve(),
@@ -93,17 +157,46 @@ def approval_program():
                 TxnField.type_enum: TxnType.AssetTransfer,
                 TxnField.xfer_asset: App.globalGet(nft_id_key),
                 TxnField.asset_receiver: Global.current_application_address(),
+                TxnField.fee: Int(0),
             }
         ),
         InnerTxnBuilder.Submit(),
+        Log(Concat(setup_log_tag, Itob(App.globalGet(nft_id_key)))),
         Approve(),
     )
 
-    on_bid_txn_index = Txn.group_index() - Int(1)
+    on_bid_txn_index = ScratchVar(TealType.uint64)
+    on_bid_payment = Gtxn[on_bid_txn_index.load()]
+    on_bid_amount = ScratchVar(TealType.uint64)
     on_bid_nft_holding = AssetHolding.balance(
         Global.current_application_address(), App.globalGet(nft_id_key)
     )
+    if pull_refunds:
+        on_bid_outbid = Seq(
+            # the previous lead bid becomes credit of its bidder. There is no
+            # lead bid before the first bid, so this adds 0
+            App.globalPut(
+                owed_key,
+                App.globalGet(owed_key) + App.globalGet(lead_bid_amount_key),
+            ),
+            App.localPut(
+                Txn.sender(),
+                deposit_key,
+                App.localGet(Txn.sender(), deposit_key) + on_bid_amount.load(),
+            ),
+        )
+    else:
+        on_bid_outbid = If(
+            App.globalGet(lead_bid_account_key) != Global.zero_address()
+        ).Then(
+            repayPreviousLeadBidder(
+                App.globalGet(lead_bid_account_key),
+                App.globalGet(lead_bid_amount_key),
+            )
+        )
     on_bid = Seq(
+        on_bid_txn_index.store(Txn.group_index() - Int(1)),
+        on_bid_amount.store(on_bid_payment.amount()),
         on_bid_nft_holding,
         Assert(
             And(
@@ -115,121 +208,632 @@ def approval_program():
                 # the auction has not ended
                 Global.latest_timestamp() < App.globalGet(end_time_key),
                 # the actual bid payment is before the app call
-                Gtxn[on_bid_txn_index].type_enum() == TxnType.Payment,
-                Gtxn[on_bid_txn_index].sender() == Txn.sender(),
-                Gtxn[on_bid_txn_index].receiver()
-                == Global.current_application_address(),
-                Gtxn[on_bid_txn_index].amount() >= Global.min_txn_fee(),
+                on_bid_payment.type_enum() == TxnType.Payment,
+                on_bid_payment.sender() == Txn.sender(),
+                on_bid_payment.receiver() == Global.current_application_address(),
+                on_bid_amount.load() >= Global.min_txn_fee(),
             )
         ),
         If(
-            Gtxn[on_bid_txn_index].amount()
+            on_bid_amount.load()
             >= App.globalGet(lead_bid_amount_key) + App.globalGet(min_bid_increment_key)
         ).Then(
             Seq(
-                If(App.globalGet(lead_bid_account_key) != Global.zero_address()).Then(
-                    repayPreviousLeadBidder(
-                        App.globalGet(lead_bid_account_key),
-                        App.globalGet(lead_bid_amount_key),
+                on_bid_outbid,
+                App.globalPut(lead_bid_amount_key, on_bid_amount.load()),
+                # the sender of the bid payment is the sender of this call
+                App.globalPut(lead_bid_account_key, Txn.sender()),
+                App.globalPut(num_bids_key, App.globalGet(num_bids_key) + Int(1)),
+                Log(
+                    Concat(
+                        bid_log_tag,
+                        Txn.sender(),
+                        Itob(on_bid_amount.load()),
+                        Itob(App.globalGet(num_bids_key)),
                     )
                 ),
-                App.globalPut(lead_bid_amount_key, Gtxn[on_bid_txn_index].amount()),
-                App.globalPut(lead_bid_account_key, Gtxn[on_bid_txn_index].sender()),
-                App.globalPut(num_bids_key, App.globalGet(num_bids_key) + Int(1)),
                 Approve(),
             )
         ),
         Reject(),
     )
 
+    @Subroutine(TealType.none)
+    def refundCredit(account: Expr) -> Expr:
+        credit = ScratchVar(TealType.uint64)
+        return Seq(
+            # the lead bid of the lead bidder is not credit
+            credit.store(
+                App.localGet(account, deposit_key)
+                - If(
+                    account == App.globalGet(lead_bid_account_key),
+                    App.globalGet(lead_bid_amount_key),
+                    Int(0),
+                )
+            ),
+            If(credit.load() > Int(0)).Then(
+                Seq(
+                    App.localPut(
+                        account,
+                        deposit_key,
+                        App.localGet(account, deposit_key) - credit.load(),
+                    ),
+                    App.globalPut(owed_key, App.globalGet(owed_key) - credit.load()),
+                    repayPreviousLeadBidder(account, credit.load()),
+                )
+            ),
+        )
+
+    on_refund_index = ScratchVar(TealType.uint64)
+    on_refund = Seq(
+        # without other accounts the sender claims their own credit, which is
+        # account 0. Otherwise the credit of each of the other accounts is
+        # refunded
+        For(
+            on_refund_index.store(Txn.accounts.length() > Int(0)),
+            on_refund_index.load() <= Txn.accounts.length(),
+            on_refund_index.store(on_refund_index.load() + Int(1)),
+        ).Do(
+            If(
+                App.optedIn(
+                    Txn.accounts[on_refund_index.load()],
+                    Global.current_application_id(),
+                )
+            ).Then(refundCredit(Txn.accounts[on_refund_index.load()]))
+        ),
+        Approve(),
+    )
+
+    on_close_out = Seq(
+        # the lead bidder must stay opted in, so that their bid can become
+        # credit if they are outbid
+        Assert(Txn.sender() != App.globalGet(lead_bid_account_key)),
+        refundCredit(Txn.sender()),
+        Approve(),
+    )
+
+    sender_is_seller_or_creator = Or(
+        Txn.sender() == App.globalGet(seller_key),
+        Txn.sender() == Global.creator_address(),
+    )
+
+    if pull_refunds:
+        # the winning bid is no longer part of the winner's deposit
+        on_settle_winner_paid = App.localPut(
+            App.globalGet(lead_bid_account_key),
+            deposit_key,
+            App.localGet(App.globalGet(lead_bid_account_key), deposit_key)
+            - App.globalGet(lead_bid_amount_key),
+        )
+        # the lead bid becomes credit of its bidder
+        on_settle_repay = App.globalPut(
+            owed_key, App.globalGet(owed_key) + App.globalGet(lead_bid_amount_key)
+        )
+    else:
+        on_settle_winner_paid = Seq()
+        on_settle_repay = repayPreviousLeadBidder(
+            App.globalGet(lead_bid_account_key), App.globalGet(lead_bid_amount_key)
+        )
+
+    # settling pays out an auction like deleting it does, but keeps the app and
+    # its escrow account so that the auction can be relisted. A settled auction
+    # has a start and end time of 0
+    on_settle = Seq(
+        If(Global.latest_timestamp() < App.globalGet(start_time_key))
+        .Then(Assert(sender_is_seller_or_creator))
+        .ElseIf(Global.latest_timestamp() < App.globalGet(end_time_key))
+        .Then(Reject())
+        .ElseIf(App.globalGet(end_time_key) == Int(0))
+        .Then(Reject()),
+        If(
+            And(
+                App.globalGet(lead_bid_account_key) != Global.zero_address(),
+                App.globalGet(lead_bid_amount_key) >= App.globalGet(reserve_amount_key),
+            )
+        )
+        .Then(
+            Seq(
+                closeNFTTo(
+                    App.globalGet(nft_id_key), App.globalGet(lead_bid_account_key)
+                ),
+                # pay the seller the winning bid, and keep the rest of the funds
+                InnerTxnBuilder.Begin(),
+                InnerTxnBuilder.SetFields(
+                    {
+                        TxnField.type_enum: TxnType.Payment,
+                        TxnField.amount: App.globalGet(lead_bid_amount_key),
+                        TxnField.receiver: App.globalGet(seller_key),
+                        TxnField.fee: Int(0),
+                    }
+                ),
+                InnerTxnBuilder.Submit(),
+                on_settle_winner_paid,
+                logClose(
+                    App.globalGet(lead_bid_account_key),
+                    App.globalGet(lead_bid_amount_key),
+                ),
+            )
+        )
+        .Else(
+            Seq(
+                If(App.globalGet(lead_bid_account_key) != Global.zero_address()).Then(
+                    on_settle_repay
+                ),
+                closeNFTTo(App.globalGet(nft_id_key), App.globalGet(seller_key)),
+                logClose(Global.zero_address(), Int(0)),
+            )
+        ),
+        App.globalPut(start_time_key, Int(0)),
+        App.globalPut(end_time_key, Int(0)),
+        App.globalPut(lead_bid_amount_key, Int(0)),
+        App.globalPut(lead_bid_account_key, Global.zero_address()),
+        App.globalPut(num_bids_key, Int(0)),
+        Approve(),
+    )
+
+    on_relist_start_time = ScratchVar(TealType.uint64)
+    on_relist_end_time = ScratchVar(TealType.uint64)
+    on_relist = Seq(
+        on_relist_start_time.store(Btoi(Txn.application_args[2])),
+        on_relist_end_time.store(Btoi(Txn.application_args[3])),
+        Assert(
+            And(
+                # the auction has been settled
+                App.globalGet(end_time_key) == Int(0),
+                sender_is_seller_or_creator,
+                Global.latest_timestamp() < on_relist_start_time.load(),
+                on_relist_start_time.load() < on_relist_end_time.load(),
+            )
+        ),
+        App.globalPut(nft_id_key, Btoi(Txn.application_args[1])),
+        App.globalPut(start_time_key, on_relist_start_time.load()),
+        App.globalPut(end_time_key, on_relist_end_time.load()),
+        App.globalPut(reserve_amount_key, Btoi(Txn.application_args[4])),
+        App.globalPut(min_bid_increment_key, Btoi(Txn.application_args[5])),
+        # a relisted auction is logged like a new one
+        Log(
+            Concat(
+                create_log_tag,
+                App.globalGet(seller_key),
+                Itob(Btoi(Txn.application_args[1])),
+                Itob(on_relist_start_time.load()),
+                Itob(on_relist_end_time.load()),
+                Itob(Btoi(Txn.application_args[4])),
+                Itob(Btoi(Txn.application_args[5])),
+            )
+        ),
+        Approve(),
+    )
+
     on_call_method = Txn.application_args[0]
     on_call = Cond(
-        [on_call_method == Bytes("setup"), on_setup],
+        # bids are the most common call, so they are checked first
         [on_call_method == Bytes("bid"), on_bid],
+        [on_call_method == Bytes("setup"), on_setup],
+        [on_call_method == Bytes("settle"), on_settle],
+        [on_call_method == Bytes("relist"), on_relist],
+        *([[on_call_method == Bytes("refund"), on_refund]] if pull_refunds else []),
     )
 
+    on_delete_seller = ScratchVar(TealType.bytes)
+    on_delete_lead_bid_account = ScratchVar(TealType.bytes)
+    on_delete_sender_is_seller_or_creator = Or(
+        Txn.sender() == on_delete_seller.load(),
+        Txn.sender() == Global.creator_address(),
+    )
     on_delete = Seq(
-        If(Global.latest_timestamp() < App.globalGet(start_time_key)).Then(
+        on_delete_seller.store(App.globalGet(seller_key)),
+        # every outbid bidder must have been refunded before the escrow account
+        # is closed
+        *([Assert(App.globalGet(owed_key) == Int(0))] if pull_refunds else []),
+        If(Global.latest_timestamp() < App.globalGet(start_time_key))
+        .Then(
+            # the auction has not yet started, it's ok to delete if the sender is
+            # either the seller or the auction creator. No bids can have been
+            # placed yet.
+            Assert(on_delete_sender_is_seller_or_creator)
+        )
+        .ElseIf(Global.latest_timestamp() < App.globalGet(end_time_key))
+        .Then(
+            # the auction is still running
+            Reject()
+        )
+        .ElseIf(App.globalGet(end_time_key) == Int(0))
+        .Then(
+            # the auction has been settled, so only its remaining funds are left.
+            # Only the seller or the auction creator may delete it, since they
+            # may want to relist it instead
             Seq(
-                # the auction has not yet started, it's ok to delete
-                Assert(
-                    Or(
-                        # sender must either be the seller or the auction creator
-                        Txn.sender() == App.globalGet(seller_key),
-                        Txn.sender() == Global.creator_address(),
-                    )
-                ),
-                # if the auction contract account has opted into the nft, close it out
-                closeNFTTo(App.globalGet(nft_id_key), App.globalGet(seller_key)),
-                # if the auction contract still has funds, send them all to the seller
-                closeAccountTo(App.globalGet(seller_key)),
+                Assert(on_delete_sender_is_seller_or_creator),
+                closeAccountTo(on_delete_seller.load()),
                 Approve(),
             )
-        ),
-        If(App.globalGet(end_time_key) <= Global.latest_timestamp()).Then(
+        )
+        .Else(
             Seq(
-                # the auction has ended, pay out assets
-                If(App.globalGet(lead_bid_account_key) != Global.zero_address())
-                .Then(
+                # the auction has ended, so it may have a lead bidder
+                on_delete_lead_bid_account.store(App.globalGet(lead_bid_account_key)),
+                If(on_delete_lead_bid_account.load() != Global.zero_address()).Then(
                     If(
                         App.globalGet(lead_bid_amount_key)
                         >= App.globalGet(reserve_amount_key)
                     )
                     .Then(
-                        # the auction was successful: send lead bid account the nft
-                        closeNFTTo(
-                            App.globalGet(nft_id_key),
-                            App.globalGet(lead_bid_account_key),
-                        )
-                    )
-                    .Else(
                         Seq(
-                            # the auction was not successful because the reserve was not met: return
-                            # the nft to the seller and repay the lead bidder
+                            # the auction was successful: send lead bid account
+                            # the nft
                             closeNFTTo(
-                                App.globalGet(nft_id_key), App.globalGet(seller_key)
+                                App.globalGet(nft_id_key),
+                                on_delete_lead_bid_account.load(),
                             ),
-                            repayPreviousLeadBidder(
-                                App.globalGet(lead_bid_account_key),
+                            # send remaining funds to the seller
+                            closeAccountTo(on_delete_seller.load()),
+                            logClose(
+                                on_delete_lead_bid_account.load(),
                                 App.globalGet(lead_bid_amount_key),
                             ),
+                            Approve(),
                         )
                     )
-                )
-                .Else(
-                    # the auction was not successful because no bids were placed: return the nft to the seller
-                    closeNFTTo(App.globalGet(nft_id_key), App.globalGet(seller_key))
+                    .Else(
+                        # the auction was not successful because the reserve was
+                        # not met: repay the lead bidder
+                        repayPreviousLeadBidder(
+                            on_delete_lead_bid_account.load(),
+                            App.globalGet(lead_bid_amount_key),
+                        )
+                    )
+                ),
+            )
+        ),
+        # there is no winner: return the nft to the seller and send remaining
+        # funds to the seller
+        closeNFTTo(App.globalGet(nft_id_key), on_delete_seller.load()),
+        closeAccountTo(on_delete_seller.load()),
+        logClose(Global.zero_address(), Int(0)),
+        Approve(),
+    )
+
+    # updating the app is rejected because no branch matches it, and so are
+    # opting in and closing out without pull_refunds
+    program = Cond(
+        [Txn.application_id() == Int(0), on_create],
+        [Txn.on_completion() == OnComplete.NoOp, on_call],
+        [Txn.on_completion() == OnComplete.DeleteApplication, on_delete],
+        *(
+            [
+                [Txn.on_completion() == OnComplete.OptIn, Approve()],
+                [Txn.on_completion() == OnComplete.CloseOut, on_close_out],
+            ]
+            if pull_refunds
+            else []
+        ),
+    )
+
+    return program
+
+
+def multi_lot_approval_program():
+    seller_key = Bytes("seller")
+    start_time_key = Bytes("start")
+    end_time_key = Bytes("end")
+    lot_count_key = Bytes("lot_count")
+    open_lots_key = Bytes("open_lots")
+
+    closeNFTTo, repayPreviousLeadBidder, closeAccountTo = escrow_subroutines()
+
+    # each lot is a single byte slice under the key "lot" followed by its 8 byte
+    # index. It holds the NFT ID, reserve, minimum bid increment, lead bid
+    # amount and number of bids as 8 byte integers, then the lead bid account
+    lot_key_prefix = Bytes("lot")
+
+    # the first byte of each log record, see auction.logs for the full format
+    lot_log_tag = Bytes("base16", "06")
+    lot_bid_log_tag = Bytes("base16", "07")
+    lot_close_log_tag = Bytes("base16", "08")
+
+    def lotNFTID(lot: Expr) -> Expr:
+        return ExtractUint64(lot, Int(0))
+
+    def lotReserve(lot: Expr) -> Expr:
+        return ExtractUint64(lot, Int(8))
+
+    def lotMinBidIncrement(lot: Expr) -> Expr:
+        return ExtractUint64(lot, Int(16))
+
+    def lotBidAmount(lot: Expr) -> Expr:
+        return ExtractUint64(lot, Int(24))
+
+    def lotNumBids(lot: Expr) -> Expr:
+        return ExtractUint64(lot, Int(32))
+
+    def lotBidAccount(lot: Expr) -> Expr:
+        return Extract(lot, Int(40), Int(32))
+
+    sender_is_seller_or_creator = Or(
+        Txn.sender() == App.globalGet(seller_key),
+        Txn.sender() == Global.creator_address(),
+    )
+
+    # before the auction starts, only the seller or the creator may make changes.
+    # Once it has started, nothing may be changed until it has ended
+    assert_not_running = (
+        If(Global.latest_timestamp() < App.globalGet(start_time_key))
+        .Then(Assert(sender_is_seller_or_creator))
+        .ElseIf(Global.latest_timestamp() < App.globalGet(end_time_key))
+        .Then(Reject())
+    )
+
+    on_create_start_time = ScratchVar(TealType.uint64)
+    on_create_end_time = ScratchVar(TealType.uint64)
+    on_create = Seq(
+        on_create_start_time.store(Btoi(Txn.application_args[1])),
+        on_create_end_time.store(Btoi(Txn.application_args[2])),
+        Assert(
+            And(
+                Global.latest_timestamp() < on_create_start_time.load(),
+                on_create_start_time.load() < on_create_end_time.load(),
+            )
+        ),
+        App.globalPut(seller_key, Txn.application_args[0]),
+        App.globalPut(start_time_key, on_create_start_time.load()),
+        App.globalPut(end_time_key, on_create_end_time.load()),
+        Approve(),
+    )
+
+    on_add_lot_index = ScratchVar(TealType.uint64)
+    on_add_lot_nft_id = ScratchVar(TealType.uint64)
+    on_add_lot_terms = ScratchVar(TealType.bytes)
+    on_add_lot_nft_holding = AssetHolding.balance(
+        Global.current_application_address(), on_add_lot_nft_id.load()
+    )
+    on_add_lot = Seq(
+        Assert(
+            And(
+                Global.latest_timestamp() < App.globalGet(start_time_key),
+                sender_is_seller_or_creator,
+            )
+        ),
+        on_add_lot_index.store(App.globalGet(lot_count_key)),
+        on_add_lot_nft_id.store(Btoi(Txn.application_args[1])),
+        on_add_lot_terms.store(
+            Concat(
+                Itob(on_add_lot_nft_id.load()),
+                Itob(Btoi(Txn.application_args[2])),
+                Itob(Btoi(Txn.application_args[3])),
+            )
+        ),
+        # each lot must be a different NFT, since closing a lot sends all of the
+        # escrow's holding of its NFT
+        on_add_lot_nft_holding,
+        Assert(Not(on_add_lot_nft_holding.hasValue())),
+        InnerTxnBuilder.Begin(),
+        InnerTxnBuilder.SetFields(
+            {
+                TxnField.type_enum: TxnType.AssetTransfer,
+                TxnField.xfer_asset: on_add_lot_nft_id.load(),
+                TxnField.asset_receiver: Global.current_application_address(),
+                TxnField.fee: Int(0),
+            }
+        ),
+        InnerTxnBuilder.Submit(),
+        # the global state schema limits the number of lots
+        App.globalPut(
+            Concat(lot_key_prefix, Itob(on_add_lot_index.load())),
+            Concat(on_add_lot_terms.load(), BytesZero(Int(16)), Global.zero_address()),
+        ),
+        App.globalPut(lot_count_key, on_add_lot_index.load() + Int(1)),
+        App.globalPut(open_lots_key, App.globalGet(open_lots_key) + Int(1)),
+        Log(
+            Concat(lot_log_tag, Itob(on_add_lot_index.load()), on_add_lot_terms.load())
+        ),
+        Approve(),
+    )
+
+    on_bid_lot_key = ScratchVar(TealType.bytes)
+    on_bid_lot = ScratchVar(TealType.bytes)
+    on_bid_txn_index = ScratchVar(TealType.uint64)
+    on_bid_payment = Gtxn[on_bid_txn_index.load()]
+    on_bid_amount = ScratchVar(TealType.uint64)
+    on_bid_number = ScratchVar(TealType.uint64)
+    on_bid_nft_holding = AssetHolding.balance(
+        Global.current_application_address(), lotNFTID(on_bid_lot.load())
+    )
+    on_bid = Seq(
+        on_bid_lot_key.store(Concat(lot_key_prefix, Txn.application_args[1])),
+        on_bid_lot.store(App.globalGet(on_bid_lot_key.load())),
+        on_bid_txn_index.store(Txn.group_index() - Int(1)),
+        on_bid_amount.store(on_bid_payment.amount()),
+        on_bid_nft_holding,
+        Assert(
+            And(
+                # the NFT of the lot has been deposited
+                on_bid_nft_holding.hasValue(),
+                on_bid_nft_holding.value() > Int(0),
+                # the auction has started
+                App.globalGet(start_time_key) <= Global.latest_timestamp(),
+                # the auction has not ended
+                Global.latest_timestamp() < App.globalGet(end_time_key),
+                # the actual bid payment is before the app call
+                on_bid_payment.type_enum() == TxnType.Payment,
+                on_bid_payment.sender() == Txn.sender(),
+                on_bid_payment.receiver() == Global.current_application_address(),
+                on_bid_amount.load() >= Global.min_txn_fee(),
+            )
+        ),
+        If(
+            on_bid_amount.load()
+            >= lotBidAmount(on_bid_lot.load()) + lotMinBidIncrement(on_bid_lot.load())
+        ).Then(
+            Seq(
+                If(lotBidAccount(on_bid_lot.load()) != Global.zero_address()).Then(
+                    repayPreviousLeadBidder(
+                        lotBidAccount(on_bid_lot.load()),
+                        lotBidAmount(on_bid_lot.load()),
+                    )
+                ),
+                on_bid_number.store(lotNumBids(on_bid_lot.load()) + Int(1)),
+                App.globalPut(
+                    on_bid_lot_key.load(),
+                    Concat(
+                        Extract(on_bid_lot.load(), Int(0), Int(24)),
+                        Itob(on_bid_amount.load()),
+                        Itob(on_bid_number.load()),
+                        # the sender of the bid payment is the sender of this call
+                        Txn.sender(),
+                    ),
+                ),
+                Log(
+                    Concat(
+                        lot_bid_log_tag,
+                        Txn.application_args[1],
+                        Txn.sender(),
+                        Itob(on_bid_amount.load()),
+                        Itob(on_bid_number.load()),
+                    )
                 ),
-                # send remaining funds to the seller
-                closeAccountTo(App.globalGet(seller_key)),
                 Approve(),
             )
         ),
         Reject(),
     )
 
+    on_settle_lot_key = ScratchVar(TealType.bytes)
+    on_settle_lot = ScratchVar(TealType.bytes)
+    on_settle_winner = ScratchVar(TealType.bytes)
+    on_settle_amount = ScratchVar(TealType.uint64)
+    on_settle_winner_holding = AssetHolding.balance(
+        lotBidAccount(on_settle_lot.load()), lotNFTID(on_settle_lot.load())
+    )
+    on_settle = Seq(
+        assert_not_running,
+        on_settle_lot_key.store(Concat(lot_key_prefix, Txn.application_args[1])),
+        on_settle_lot.store(App.globalGet(on_settle_lot_key.load())),
+        on_settle_winner.store(Global.zero_address()),
+        on_settle_amount.store(Int(0)),
+        If(lotBidAccount(on_settle_lot.load()) != Global.zero_address()).Then(
+            If(lotBidAmount(on_settle_lot.load()) >= lotReserve(on_settle_lot.load()))
+            .Then(
+                Seq(
+                    on_settle_winner_holding,
+                    If(on_settle_winner_holding.hasValue())
+                    .Then(
+                        Seq(
+                            # the lot was sold: pay its proceeds to the seller
+                            on_settle_winner.store(lotBidAccount(on_settle_lot.load())),
+                            on_settle_amount.store(lotBidAmount(on_settle_lot.load())),
+                            InnerTxnBuilder.Begin(),
+                            InnerTxnBuilder.SetFields(
+                                {
+                                    TxnField.type_enum: TxnType.Payment,
+                                    TxnField.amount: on_settle_amount.load(),
+                                    TxnField.receiver: App.globalGet(seller_key),
+                                    TxnField.fee: Int(0),
+                                }
+                            ),
+                            InnerTxnBuilder.Submit(),
+                        )
+                    )
+                    .Else(
+                        Seq(
+                            # the winner is not opted in to the NFT and cannot
+                            # receive it. Only the seller or the creator may
+                            # settle the lot then, returning the NFT to the
+                            # seller and repaying the winner
+                            Assert(sender_is_seller_or_creator),
+                            repayPreviousLeadBidder(
+                                lotBidAccount(on_settle_lot.load()),
+                                lotBidAmount(on_settle_lot.load()),
+                            ),
+                        )
+                    ),
+                )
+            )
+            .Else(
+                # the reserve was not met: repay the lead bidder
+                repayPreviousLeadBidder(
+                    lotBidAccount(on_settle_lot.load()),
+                    lotBidAmount(on_settle_lot.load()),
+                )
+            )
+        ),
+        # send the NFT to the winner, or return it to the seller if there is none
+        closeNFTTo(
+            lotNFTID(on_settle_lot.load()),
+            If(
+                on_settle_winner.load() == Global.zero_address(),
+                App.globalGet(seller_key),
+                on_settle_winner.load(),
+            ),
+        ),
+        App.globalDel(on_settle_lot_key.load()),
+        App.globalPut(open_lots_key, App.globalGet(open_lots_key) - Int(1)),
+        Log(
+            Concat(
+                lot_close_log_tag,
+                Txn.application_args[1],
+                on_settle_winner.load(),
+                Itob(on_settle_amount.load()),
+            )
+        ),
+        Approve(),
+    )
+
+    on_call_method = Txn.application_args[0]
+    on_call = Cond(
+        [on_call_method == Bytes("bid"), on_bid],
+        [on_call_method == Bytes("add_lot"), on_add_lot],
+        [on_call_method == Bytes("settle"), on_settle],
+    )
+
+    on_delete = Seq(
+        assert_not_running,
+        # every lot must have been settled, which paid its proceeds to the seller
+        Assert(App.globalGet(open_lots_key) == Int(0)),
+        # send the remaining funds to the seller
+        closeAccountTo(App.globalGet(seller_key)),
+        Approve(),
+    )
+
     program = Cond(
         [Txn.application_id() == Int(0), on_create],
         [Txn.on_completion() == OnComplete.NoOp, on_call],
-        [
-            Txn.on_completion() == OnComplete.DeleteApplication,
-            on_delete,
-        ],
-        [
-            Or(
-                Txn.on_completion() == OnComplete.OptIn,
-                Txn.on_completion() == OnComplete.CloseOut,
-                Txn.on_completion() == OnComplete.UpdateApplication,
-            ),
-            Reject(),
-        ],
+        [Txn.on_completion() == OnComplete.DeleteApplication, on_delete],
     )
 
     return program
 
 
-def clear_state_program():
-    return Approve()
+def clear_state_program(pull_refunds: bool = False):
+    if not pull_refunds:
+        return Approve()
+
+    lead_bid_amount_key = Bytes("bid_amount")
+    lead_bid_account_key = Bytes("bid_account")
+    owed_key = Bytes("owed")
+    deposit_key = Bytes("deposit")
+
+    # a bidder that clears their local state forfeits their credit, and their
+    # lead bid if they are the lead bidder. Both go to the seller when the
+    # auction is closed
+    is_lead_bidder = Txn.sender() == App.globalGet(lead_bid_account_key)
+    return Seq(
+        App.globalPut(
+            owed_key,
+            App.globalGet(owed_key)
+            - (
+                App.localGet(Txn.sender(), deposit_key)
+                - If(is_lead_bidder, App.globalGet(lead_bid_amount_key), Int(0))
+            ),
+        ),
+        If(is_lead_bidder).Then(
+            Seq(
+                App.globalPut(lead_bid_account_key, Global.zero_address()),
+                App.globalPut(lead_bid_amount_key, Int(0)),
+            )
+        ),
+        Approve(),
+    )
 
 
 if __name__ == "__main__":
@@ -237,6 +841,12 @@ if __name__ == "__main__":
         compiled = compileTeal(approval_program(), mode=Mode.Application, version=5)
         f.write(compiled)
 
+    with open("auction_multi_lot_approval.teal", "w") as f:
+        compiled = compileTeal(
+            multi_lot_approval_program(), mode=Mode.Application, version=5
+        )
+        f.write(compiled)
+
     with open("auction_clear_state.teal", "w") as f:
         compiled = compileTeal(clear_state_program(), mode=Mode.Application, version=5)
         f.write(compiled)
@@ -0,0 +1,471 @@
+"""Typed events for the lifecycle of auctions, read from the block stream.
+
+AuctionEventFollower and AsyncAuctionEventFollower read blocks one round after
+another and yield an event for every change to the auctions they follow:
+
+    for event in AuctionEventFollower(client, startRound=round):
+        if isinstance(event, BidPlaced):
+            ...
+
+Events are only read from algod when the consumer asks for the next one, so a
+slow consumer never builds up a backlog in memory. The events of a round are
+yielded together, and nextRound only moves past a round once all of its events
+have been consumed, so a follower created with startRound=nextRound resumes
+without missing events. Events of a round that was partly consumed are yielded
+again.
+"""
+
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Union,
+)
+
+from algosdk.v2client.algod import AlgodClient
+from algosdk import encoding, error
+
+from .aio import AsyncAlgodClient, getContracts as getAsyncContracts
+from .blocks import decodeBlock, getBlock, getBlockTxn, getTxnID
+from .logs import BidLog, CloseLog, RefundLog, decodeLogs
+from .operations import getApprovalPrograms
+from .state import CLOSE_OUT_ON_COMPLETE, DELETE_APPLICATION_ON_COMPLETE
+
+
+class AuctionCreated(NamedTuple):
+    appID: int
+    round: int
+    txID: str
+    creator: str
+    seller: str
+    nftID: int
+    startTime: int
+    endTime: int
+    reserve: int
+    minBidIncrement: int
+
+
+class AuctionSetUp(NamedTuple):
+    appID: int
+    round: int
+    txID: str
+    funder: str
+    nftID: int
+
+
+class BidPlaced(NamedTuple):
+    appID: int
+    round: int
+    txID: str
+    bidder: str
+    amount: int
+
+
+class BidRefunded(NamedTuple):
+    """A previous lead bidder was repaid their bid, either because they were
+    outbid or because the auction closed without meeting its reserve. In an
+    auction with pull refunds, this is when a bidder's credit is paid out, by
+    a refund call or by closing out of the auction."""
+
+    appID: int
+    round: int
+    txID: str
+    bidder: str
+    refund: int
+
+
+class AuctionClosed(NamedTuple):
+    """An auction was deleted, or settled if settled is True. nftReceiver is
+    the account the NFT went to, which is the winning bidder if the auction was
+    successful, and proceedsReceiver is the account the remaining funds went
+    to, or the winning bid when the auction was settled. Either is None if
+    there was nothing to send."""
+
+    appID: int
+    round: int
+    txID: str
+    closer: str
+    nftReceiver: Optional[str]
+    proceedsReceiver: Optional[str]
+    settled: bool = False
+
+
+class AuctionRelisted(NamedTuple):
+    """A settled auction was started again with a new NFT, times and
+    reserve."""
+
+    appID: int
+    round: int
+    txID: str
+    relister: str
+    nftID: int
+    startTime: int
+    endTime: int
+    reserve: int
+    minBidIncrement: int
+
+
+AuctionEvent = Union[
+    AuctionCreated,
+    AuctionSetUp,
+    BidPlaced,
+    BidRefunded,
+    AuctionClosed,
+    AuctionRelisted,
+]
+
+
+def btoi(value: bytes) -> int:
+    return int.from_bytes(value, "big")
+
+
+class AuctionEventDecoder:
+    """Turns blocks into auction events.
+
+    Args:
+        approvalPrograms: The compiled approval programs of the auctions, such
+            as the programs of auctions with and without pull refunds.
+        appIDs (optional): The auctions to decode events for. If not given,
+            every auction that uses one of the approval programs is followed,
+            including auctions created later.
+    """
+
+    def __init__(
+        self, approvalPrograms: Iterable[bytes], appIDs: Optional[Iterable[int]] = None
+    ) -> None:
+        self.approvalPrograms = set(approvalPrograms)
+        self.appIDs = set(appIDs) if appIDs is not None else None
+        # whether each app seen so far is an auction, when following all auctions
+        self.known: Dict[int, bool] = dict()
+
+    def isFollowed(self, appID: int) -> Optional[bool]:
+        """Check if events of an app are decoded. None if that is not known
+        yet; see unknownApps."""
+        if self.appIDs is not None:
+            return appID in self.appIDs
+        return self.known.get(appID)
+
+    def unknownApps(self, block: Dict[str, Any]) -> List[int]:
+        """Get the apps called in a block that may be auctions created before
+        the follower started. Their approval programs must be given to learn()
+        before the block is decoded."""
+        unknown: List[int] = []
+        for stib in block.get("txns", []):
+            txn = stib["txn"]
+            appID = txn.get("apid", 0)
+            if (
+                txn.get("type") == "appl"
+                and appID != 0
+                and self.isFollowed(appID) is None
+                and appID not in unknown
+            ):
+                unknown.append(appID)
+        return unknown
+
+    def learn(self, appID: int, approvalProgram: Optional[bytes]) -> None:
+        """Record the approval program of an app, or None if the app no longer
+        exists."""
+        self.known[appID] = approvalProgram in self.approvalPrograms
+
+    def decode(self, block: Dict[str, Any]) -> List[AuctionEvent]:
+        round = block["rnd"]
+        events: List[AuctionEvent] = []
+
+        for stib in block.get("txns", []):
+            txn = stib["txn"]
+            if txn.get("type") != "appl":
+                continue
+
+            appID = txn.get("apid", 0)
+            if appID == 0:
+                if txn.get("apap") not in self.approvalPrograms:
+                    continue
+                appID = stib["apid"]
+                if self.appIDs is not None and appID not in self.appIDs:
+                    continue
+                self.known[appID] = True
+            elif not self.isFollowed(appID):
+                continue
+
+            txID = getTxnID(getBlockTxn(block, stib))
+            sender = encoding.encode_address(txn["snd"])
+            args: List[bytes] = txn.get("apaa", [])
+            delta = stib.get("dt", {})
+
+            if txn.get("apid", 0) == 0:
+                events.append(
+                    AuctionCreated(
+                        appID=appID,
+                        round=round,
+                        txID=txID,
+                        creator=sender,
+                        seller=encoding.encode_address(args[0]),
+                        nftID=btoi(args[1]),
+                        startTime=btoi(args[2]),
+                        endTime=btoi(args[3]),
+                        reserve=btoi(args[4]),
+                        minBidIncrement=btoi(args[5]),
+                    )
+                )
+                continue
+
+            if txn.get("apan", 0) == DELETE_APPLICATION_ON_COMPLETE:
+                nftReceiver: Optional[str] = None
+                proceedsReceiver: Optional[str] = None
+                for inner in delta.get("itx", []):
+                    innerTxn = inner["txn"]
+                    if innerTxn.get("type") == "axfer" and "aclose" in innerTxn:
+                        nftReceiver = encoding.encode_address(innerTxn["aclose"])
+                    elif innerTxn.get("type") == "pay" and "close" in innerTxn:
+                        proceedsReceiver = encoding.encode_address(innerTxn["close"])
+                    elif innerTxn.get("type") == "pay":
+                        events.append(self.refund(appID, round, txID, innerTxn))
+                events.append(
+                    AuctionClosed(
+                        appID=appID,
+                        round=round,
+                        txID=txID,
+                        closer=sender,
+                        nftReceiver=nftReceiver,
+                        proceedsReceiver=proceedsReceiver,
+                    )
+                )
+                continue
+
+            if txn.get("apan", 0) == CLOSE_OUT_ON_COMPLETE:
+                # a bidder leaving an auction with pull refunds claims their
+                # credit
+                events += self.refundsFromLogs(appID, round, txID, delta)
+                continue
+
+            method = args[0] if len(args) > 0 else b""
+            if method == b"setup":
+                events.append(
+                    AuctionSetUp(
+                        appID=appID,
+                        round=round,
+                        txID=txID,
+                        funder=sender,
+                        nftID=txn.get("apas", [0])[0],
+                    )
+                )
+            elif method == b"relist":
+                events.append(
+                    AuctionRelisted(
+                        appID=appID,
+                        round=round,
+                        txID=txID,
+                        relister=sender,
+                        nftID=btoi(args[1]),
+                        startTime=btoi(args[2]),
+                        endTime=btoi(args[3]),
+                        reserve=btoi(args[4]),
+                        minBidIncrement=btoi(args[5]),
+                    )
+                )
+            elif method == b"settle":
+                # a payment is the winning bid if the auction had a winner, and
+                # a refund of the lead bid otherwise
+                hasWinner = any(
+                    isinstance(log, CloseLog) and log.winner is not None
+                    for log in decodeLogs(delta.get("lg", []))
+                )
+                nftReceiver = None
+                proceedsReceiver = None
+                for inner in delta.get("itx", []):
+                    innerTxn = inner["txn"]
+                    if innerTxn.get("type") == "axfer" and "aclose" in innerTxn:
+                        nftReceiver = encoding.encode_address(innerTxn["aclose"])
+                    elif innerTxn.get("type") == "pay" and hasWinner:
+                        proceedsReceiver = encoding.encode_address(innerTxn["rcv"])
+                    elif innerTxn.get("type") == "pay":
+                        events.append(self.refund(appID, round, txID, innerTxn))
+                events.append(
+                    AuctionClosed(
+                        appID=appID,
+                        round=round,
+                        txID=txID,
+                        closer=sender,
+                        nftReceiver=nftReceiver,
+                        proceedsReceiver=proceedsReceiver,
+                        settled=True,
+                    )
+                )
+            elif method == b"refund":
+                events += self.refundsFromLogs(appID, round, txID, delta)
+            elif method == b"bid":
+                # an accepted bid is logged, even if it leaves the lead bid
+                # amount as it was, which a minimum bid increment of 0 allows
+                bidLogs = [
+                    log
+                    for log in decodeLogs(delta.get("lg", []))
+                    if isinstance(log, BidLog)
+                ]
+                if len(bidLogs) == 0:
+                    continue
+                for inner in delta.get("itx", []):
+                    if inner["txn"].get("type") == "pay":
+                        events.append(self.refund(appID, round, txID, inner["txn"]))
+                events.append(
+                    BidPlaced(
+                        appID=appID,
+                        round=round,
+                        txID=txID,
+                        bidder=bidLogs[0].bidder,
+                        amount=bidLogs[0].amount,
+                    )
+                )
+
+        return events
+
+    def refund(
+        self, appID: int, round: int, txID: str, innerTxn: Dict[str, Any]
+    ) -> BidRefunded:
+        return BidRefunded(
+            appID=appID,
+            round=round,
+            txID=txID,
+            bidder=encoding.encode_address(innerTxn["rcv"]),
+            refund=innerTxn.get("amt", 0),
+        )
+
+    def refundsFromLogs(
+        self, appID: int, round: int, txID: str, delta: Dict[str, Any]
+    ) -> List[AuctionEvent]:
+        """Get the refunds of a call from its refund log records, which name
+        each bidder paid out along with the amount."""
+        return [
+            BidRefunded(
+                appID=appID,
+                round=round,
+                txID=txID,
+                bidder=log.receiver,
+                refund=log.amount,
+            )
+            for log in decodeLogs(delta.get("lg", []))
+            if isinstance(log, RefundLog)
+        ]
+
+
+def getApprovalProgram(appInfo: Dict[str, Any]) -> bytes:
+    return encoding.base64.b64decode(appInfo["params"]["approval-program"])
+
+
+class AuctionEventFollower:
+    """Yields the events of auctions as new blocks are confirmed.
+
+    Args:
+        client: An algod client.
+        appIDs (optional): The auctions to follow. If not given, every auction
+            that uses an approval program of auction.contracts is followed.
+        startRound (optional): The first round to read. Defaults to the round
+            after the latest one.
+        stopRound (optional): If given, iteration ends after this round.
+            Otherwise it never ends.
+    """
+
+    def __init__(
+        self,
+        client: AlgodClient,
+        appIDs: Optional[Iterable[int]] = None,
+        startRound: Optional[int] = None,
+        stopRound: Optional[int] = None,
+    ) -> None:
+        self.client = client
+        self.decoder = AuctionEventDecoder(getApprovalPrograms(client), appIDs)
+        self.nextRound = (
+            startRound if startRound is not None else client.status()["last-round"] + 1
+        )
+        self.stopRound = stopRound
+
+    def readBlock(self, round: int) -> Dict[str, Any]:
+        status = self.client.status()
+        while status["last-round"] < round:
+            status = self.client.status_after_block(status["last-round"])
+        return getBlock(self.client, round)
+
+    def learnApps(self, block: Dict[str, Any]) -> None:
+        for appID in self.decoder.unknownApps(block):
+            try:
+                appInfo = self.client.application_info(appID)
+            except error.AlgodHTTPError as e:
+                if e.code != 404:
+                    raise
+                # a deleted app, which may have been an auction
+                self.decoder.learn(appID, None)
+                continue
+            self.decoder.learn(appID, getApprovalProgram(appInfo))
+
+    def __iter__(self) -> Iterator[AuctionEvent]:
+        while self.stopRound is None or self.nextRound <= self.stopRound:
+            block = self.readBlock(self.nextRound)
+            self.learnApps(block)
+            for event in self.decoder.decode(block):
+                yield event
+            self.nextRound += 1
+
+
+class AsyncAuctionEventFollower:
+    """The asyncio counterpart of AuctionEventFollower, for use with async for.
+
+    The first round defaults to the round after the latest one when iteration
+    starts. See AuctionEventFollower for a description of the arguments.
+    """
+
+    def __init__(
+        self,
+        client: AsyncAlgodClient,
+        appIDs: Optional[Iterable[int]] = None,
+        startRound: Optional[int] = None,
+        stopRound: Optional[int] = None,
+    ) -> None:
+        self.client = client
+        self.appIDs = appIDs
+        # created once iteration starts, since the contracts are compiled
+        # without blocking the event loop
+        self.decoder: Optional[AuctionEventDecoder] = None
+        self.nextRound = startRound
+        self.stopRound = stopRound
+
+    async def readBlock(self, round: int) -> Dict[str, Any]:
+        status = await self.client.status()
+        while status["last-round"] < round:
+            status = await self.client.status_after_block(status["last-round"])
+        raw = await self.client.block_info(round, response_format="msgpack")
+        return decodeBlock(raw)
+
+    async def learnApps(
+        self, decoder: AuctionEventDecoder, block: Dict[str, Any]
+    ) -> None:
+        for appID in decoder.unknownApps(block):
+            try:
+                appInfo = await self.client.application_info(appID)
+            except error.AlgodHTTPError as e:
+                if e.code != 404:
+                    raise
+                decoder.learn(appID, None)
+                continue
+            decoder.learn(appID, getApprovalProgram(appInfo))
+
+    async def __aiter__(self) -> AsyncIterator[AuctionEvent]:
+        if self.decoder is None:
+            approvalPrograms = [
+                (await getAsyncContracts())[0],
+                (await getAsyncContracts(pullRefunds=True))[0],
+            ]
+            self.decoder = AuctionEventDecoder(approvalPrograms, self.appIDs)
+        decoder = self.decoder
+        if self.nextRound is None:
+            self.nextRound = (await self.client.status())["last-round"] + 1
+
+        while self.stopRound is None or self.nextRound <= self.stopRound:
+            block = await self.readBlock(self.nextRound)
+            await self.learnApps(decoder, block)
+            for event in decoder.decode(block):
+                yield event
+            self.nextRound += 1
@@ -0,0 +1,421 @@
+import asyncio
+
+import pytest
+
+from algosdk.error import AlgodHTTPError
+from algosdk.future import transaction
+
+from .events import (
+    AuctionCreated,
+    AuctionSetUp,
+    BidPlaced,
+    BidRefunded,
+    AuctionClosed,
+    AuctionRelisted,
+    AuctionEventFollower,
+    AsyncAuctionEventFollower,
+)
+from .operations import (
+    createAuctionApp,
+    setupAuctionApp,
+    placeBid,
+    closeAuction,
+    settleAuction,
+    relistAuction,
+    optInToAuction,
+    claimRefund,
+)
+from .testing.resources import createDummyAsset, optInToAsset
+from .testing.simulator import Ledger, SimulatedAlgodClient
+
+START_TIME = 1_600_000_000
+
+
+@pytest.fixture(autouse=True)
+def contractCache(tmp_path, monkeypatch):
+    monkeypatch.setenv("AUCTION_CONTRACT_CACHE", str(tmp_path))
+
+
+def runAuction(
+    client,
+    ledger,
+    reserve=1_000_000,
+    settle=False,
+    minBidIncrement=100_000,
+    secondBid=1_200_000,
+):
+    creator = ledger.createAccount()
+    seller = ledger.createAccount()
+    bidder1 = ledger.createAccount()
+    bidder2 = ledger.createAccount()
+    nftID = createDummyAsset(client, 1, seller)
+    optInToAsset(client, nftID, bidder2)
+
+    appID = createAuctionApp(
+        client=client,
+        sender=creator,
+        seller=seller.getAddress(),
+        nftID=nftID,
+        startTime=ledger.now() + 10,
+        endTime=ledger.now() + 70,
+        reserve=reserve,
+        minBidIncrement=minBidIncrement,
+    )
+    setupAuctionApp(
+        client=client,
+        appID=appID,
+        funder=creator,
+        nftHolder=seller,
+        nftID=nftID,
+        nftAmount=1,
+    )
+    ledger.advanceTime(15)
+    placeBid(client=client, appID=appID, bidder=bidder1, bidAmount=1_000_000)
+    placeBid(client=client, appID=appID, bidder=bidder2, bidAmount=secondBid)
+    ledger.advanceTime(60)
+    if settle:
+        settleAuction(client, appID, seller)
+    else:
+        closeAuction(client, appID, seller)
+    return appID, nftID, creator, seller, bidder1, bidder2
+
+
+def test_follow_auction():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+    startRound = ledger.round + 1
+
+    appID, nftID, creator, seller, bidder1, bidder2 = runAuction(client, ledger)
+    follower = AuctionEventFollower(
+        client, startRound=startRound, stopRound=ledger.round
+    )
+    events = list(follower)
+
+    assert [type(event) for event in events] == [
+        AuctionCreated,
+        AuctionSetUp,
+        BidPlaced,
+        BidRefunded,
+        BidPlaced,
+        AuctionClosed,
+    ]
+    assert all(event.appID == appID for event in events)
+    assert [event.round for event in events] == sorted(event.round for event in events)
+
+    created = events[0]
+    assert created.creator == creator.getAddress()
+    assert created.seller == seller.getAddress()
+    assert created.nftID == nftID
+    assert created.reserve == 1_000_000
+    assert created.endTime - created.startTime == 60
+
+    assert events[1].nftID == nftID
+    assert (events[2].bidder, events[2].amount) == (bidder1.getAddress(), 1_000_000)
+    assert events[3].bidder == bidder1.getAddress()
+    assert events[3].refund == 1_000_000
+    assert events[3].txID == events[4].txID
+    assert (events[4].bidder, events[4].amount) == (bidder2.getAddress(), 1_200_000)
+
+    closed = events[5]
+    assert closed.closer == seller.getAddress()
+    assert closed.nftReceiver == bidder2.getAddress()
+    assert closed.proceedsReceiver == seller.getAddress()
+
+    assert follower.nextRound == ledger.round + 1
+
+
+def test_reserve_not_met():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+    startRound = ledger.round + 1
+
+    appID, _, _, seller, _, bidder2 = runAuction(client, ledger, reserve=5_000_000)
+    events = list(
+        AuctionEventFollower(client, startRound=startRound, stopRound=ledger.round)
+    )
+
+    refund, closed = events[-2:]
+    assert isinstance(refund, BidRefunded)
+    assert refund.bidder == bidder2.getAddress()
+    assert isinstance(closed, AuctionClosed)
+    assert closed.nftReceiver == seller.getAddress()
+
+
+def test_zero_bid_increment():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+    startRound = ledger.round + 1
+
+    # the second bid takes the lead without changing the lead bid amount
+    appID, _, _, _, bidder1, bidder2 = runAuction(
+        client, ledger, minBidIncrement=0, secondBid=1_000_000
+    )
+    events = list(
+        AuctionEventFollower(client, startRound=startRound, stopRound=ledger.round)
+    )
+
+    bids = [event for event in events if isinstance(event, BidPlaced)]
+    assert [(bid.bidder, bid.amount) for bid in bids] == [
+        (bidder1.getAddress(), 1_000_000),
+        (bidder2.getAddress(), 1_000_000),
+    ]
+
+
+def test_settle_and_relist():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+    startRound = ledger.round + 1
+
+    appID, _, _, seller, bidder1, bidder2 = runAuction(client, ledger, settle=True)
+    nftID = createDummyAsset(client, 1, seller)
+    relistAuction(
+        client=client,
+        appID=appID,
+        sender=seller,
+        nftHolder=seller,
+        nftID=nftID,
+        nftAmount=1,
+        startTime=ledger.now() + 10,
+        endTime=ledger.now() + 70,
+        reserve=5_000_000,
+        minBidIncrement=100_000,
+    )
+    ledger.advanceTime(15)
+    placeBid(client=client, appID=appID, bidder=bidder1, bidAmount=1_000_000)
+    ledger.advanceTime(60)
+    settleAuction(client, appID, seller)
+
+    events = list(
+        AuctionEventFollower(client, startRound=startRound, stopRound=ledger.round)
+    )
+    assert [type(event) for event in events[5:]] == [
+        AuctionClosed,
+        AuctionRelisted,
+        AuctionSetUp,
+        BidPlaced,
+        BidRefunded,
+        AuctionClosed,
+    ]
+    settled, relisted, setUp, _, refund, unsold = events[5:]
+
+    assert settled.settled
+    assert settled.nftReceiver == bidder2.getAddress()
+    assert settled.proceedsReceiver == seller.getAddress()
+
+    assert relisted.relister == seller.getAddress()
+    assert (relisted.nftID, relisted.reserve) == (nftID, 5_000_000)
+    assert relisted.endTime - relisted.startTime == 60
+    assert setUp.nftID == nftID
+
+    assert (refund.bidder, refund.refund) == (bidder1.getAddress(), 1_000_000)
+    assert unsold.settled
+    assert unsold.nftReceiver == seller.getAddress()
+    assert unsold.proceedsReceiver is None
+
+
+def runPullRefundAuction(client, ledger):
+    seller = ledger.createAccount()
+    bidders = [ledger.createAccount() for _ in range(3)]
+    nftID = createDummyAsset(client, 1, seller)
+
+    appID = createAuctionApp(
+        client=client,
+        sender=seller,
+        seller=seller.getAddress(),
+        nftID=nftID,
+        startTime=ledger.now() + 10,
+        endTime=ledger.now() + 70,
+        reserve=1_000_000,
+        minBidIncrement=100_000,
+        pullRefunds=True,
+    )
+    setupAuctionApp(
+        client=client,
+        appID=appID,
+        funder=seller,
+        nftHolder=seller,
+        nftID=nftID,
+        nftAmount=1,
+    )
+    for bidder in bidders:
+        optInToAsset(client, nftID, bidder)
+        optInToAuction(client, appID, bidder)
+    ledger.advanceTime(15)
+    for i, bidder in enumerate(bidders):
+        placeBid(
+            client=client, appID=appID, bidder=bidder, bidAmount=1_000_000 + i * 100_000
+        )
+
+    # the first bidder claims their credit, and the second closes out of the
+    # auction, which pays out their credit too
+    claimRefund(client, appID, bidders[0])
+    closeOutTxn = transaction.ApplicationCloseOutTxn(
+        bidders[1].getAddress(), client.suggested_params(), appID
+    )
+    closeOutTxn.fee = 2 * 1_000
+    client.send_transaction(closeOutTxn.sign(bidders[1].getPrivateKey()))
+    ledger.newBlock()
+
+    ledger.advanceTime(60)
+    closeAuction(client, appID, seller)
+    return appID, seller, bidders
+
+
+def test_follow_pull_refund_auction():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+    startRound = ledger.round + 1
+
+    appID, seller, bidders = runPullRefundAuction(client, ledger)
+    events = list(
+        AuctionEventFollower(client, startRound=startRound, stopRound=ledger.round)
+    )
+
+    # outbid bidders are not refunded when they are outbid, but once they claim
+    # their credit
+    assert [type(event) for event in events] == [
+        AuctionCreated,
+        AuctionSetUp,
+        BidPlaced,
+        BidPlaced,
+        BidPlaced,
+        BidRefunded,
+        BidRefunded,
+        AuctionClosed,
+    ]
+    assert all(event.appID == appID for event in events)
+    assert [(event.bidder, event.refund) for event in events[5:7]] == [
+        (bidders[0].getAddress(), 1_000_000),
+        (bidders[1].getAddress(), 1_100_000),
+    ]
+    assert events[5].txID != events[6].txID
+    assert events[7].nftReceiver == bidders[2].getAddress()
+    assert events[7].proceedsReceiver == seller.getAddress()
+
+    async def collect():
+        follower = AsyncAuctionEventFollower(
+            AsyncClient(client), startRound=startRound, stopRound=ledger.round
+        )
+        return [event async for event in follower]
+
+    assert asyncio.run(collect()) == events
+
+
+def test_app_ids_and_resume():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+    startRound = ledger.round + 1
+
+    app1 = runAuction(client, ledger)[0]
+    app2 = runAuction(client, ledger)[0]
+
+    follower = AuctionEventFollower(
+        client, appIDs=[app2], startRound=startRound, stopRound=ledger.round
+    )
+    iterator = iter(follower)
+    first = next(iterator)
+    assert isinstance(first, AuctionCreated)
+    assert first.appID == app2
+    iterator.close()
+
+    # a follower that resumes from nextRound sees the rest of the events
+    assert follower.nextRound == first.round
+    resumed = AuctionEventFollower(
+        client, appIDs=[app2], startRound=follower.nextRound, stopRound=ledger.round
+    )
+    events = list(resumed)
+    assert events[0] == first
+    assert len(events) == 6
+    assert all(event.appID == app2 for event in events)
+    assert app1 != app2
+
+
+def test_existing_auctions():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+
+    seller = ledger.createAccount()
+    bidder = ledger.createAccount()
+    nftID = createDummyAsset(client, 1, seller)
+    appID = createAuctionApp(
+        client=client,
+        sender=seller,
+        seller=seller.getAddress(),
+        nftID=nftID,
+        startTime=ledger.now() + 10,
+        endTime=ledger.now() + 70,
+        reserve=1_000_000,
+        minBidIncrement=100_000,
+    )
+    setupAuctionApp(
+        client=client,
+        appID=appID,
+        funder=seller,
+        nftHolder=seller,
+        nftID=nftID,
+        nftAmount=1,
+    )
+
+    # the auction was created before the follower started
+    startRound = ledger.round + 1
+    ledger.advanceTime(15)
+    placeBid(client=client, appID=appID, bidder=bidder, bidAmount=1_000_000)
+
+    events = list(
+        AuctionEventFollower(client, startRound=startRound, stopRound=ledger.round)
+    )
+    assert [type(event) for event in events] == [BidPlaced]
+    assert events[0].appID == appID
+
+
+class AsyncClient:
+    """Exposes the requests AsyncAuctionEventFollower makes as coroutines."""
+
+    def __init__(self, client: SimulatedAlgodClient) -> None:
+        self.client = client
+
+    async def status(self):
+        return self.client.status()
+
+    async def status_after_block(self, block_num):
+        return self.client.status_after_block(block_num)
+
+    async def block_info(self, block, response_format="json"):
+        return self.client.block_info(block, response_format=response_format)
+
+    async def application_info(self, application_id):
+        return self.client.application_info(application_id)
+
+
+def test_async_follower():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+    startRound = ledger.round + 1
+    appID = runAuction(client, ledger)[0]
+
+    async def collect():
+        follower = AsyncAuctionEventFollower(
+            AsyncClient(client), startRound=startRound, stopRound=ledger.round
+        )
+        return [event async for event in follower]
+
+    events = asyncio.run(collect())
+    assert events == list(
+        AuctionEventFollower(client, startRound=startRound, stopRound=ledger.round)
+    )
+    assert all(event.appID == appID for event in events)
+
+
+def test_deleted_app_is_not_followed():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+    appID = runAuction(client, ledger)[0]
+
+    with pytest.raises(AlgodHTTPError):
+        client.application_info(appID)
+
+    # the close call of an auction created before startRound is not decoded
+    events = list(
+        AuctionEventFollower(client, startRound=ledger.round, stopRound=ledger.round)
+    )
+    assert events == []
@@ -0,0 +1,460 @@
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+import sqlite3
+import threading
+
+from algosdk.v2client.algod import AlgodClient
+from algosdk import encoding
+
+from .blocks import getBlock, getBlockTxn, getTxnID
+from .operations import getApprovalPrograms
+from .state import (
+    DELETE_APPLICATION_ON_COMPLETE,
+    AuctionState,
+    applyBlockStateDelta,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoint (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    round INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS auctions (
+    app_id INTEGER NOT NULL,
+    listed_round INTEGER NOT NULL,
+    creator TEXT NOT NULL,
+    seller TEXT NOT NULL,
+    nft_id INTEGER NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    reserve INTEGER NOT NULL,
+    min_bid_inc INTEGER NOT NULL,
+    num_bids INTEGER NOT NULL,
+    bid_amount INTEGER NOT NULL,
+    bid_account TEXT,
+    created_round INTEGER NOT NULL,
+    setup_round INTEGER,
+    settled_round INTEGER,
+    deleted_round INTEGER,
+    PRIMARY KEY (app_id, listed_round)
+);
+CREATE INDEX IF NOT EXISTS auctions_by_end ON auctions (deleted_round, end);
+CREATE INDEX IF NOT EXISTS auctions_by_seller ON auctions (seller);
+CREATE INDEX IF NOT EXISTS auctions_by_nft ON auctions (nft_id);
+CREATE TABLE IF NOT EXISTS bids (
+    txid TEXT PRIMARY KEY,
+    app_id INTEGER NOT NULL,
+    listed_round INTEGER NOT NULL,
+    round INTEGER NOT NULL,
+    intra INTEGER NOT NULL,
+    bidder TEXT NOT NULL,
+    amount INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bids_by_app ON bids (app_id, listed_round, round, intra);
+"""
+
+AUCTION_COLUMNS = (
+    "app_id, listed_round, creator, seller, nft_id, start, end, reserve, "
+    "min_bid_inc, num_bids, bid_amount, bid_account, created_round, setup_round, "
+    "settled_round, deleted_round"
+)
+
+
+class IndexedAuction(NamedTuple):
+    """An auction as recorded by the indexer. Addresses are encoded, and
+    bidAccount is None if there are no bids. setupRound, settledRound and
+    deletedRound are None until the auction is set up, settled or deleted.
+
+    An app that is settled and relisted holds one auction per listing.
+    listedRound is the round in which the app was created for its first
+    listing, and the round in which it was relisted for later ones. A settled
+    auction keeps the outcome it had when it was settled."""
+
+    appID: int
+    listedRound: int
+    creator: str
+    seller: str
+    nftID: int
+    startTime: int
+    endTime: int
+    reserve: int
+    minBidIncrement: int
+    numBids: int
+    bidAmount: int
+    bidAccount: Optional[str]
+    createdRound: int
+    setupRound: Optional[int]
+    settledRound: Optional[int]
+    deletedRound: Optional[int]
+
+
+class IndexedBid(NamedTuple):
+    appID: int
+    listedRound: int
+    txID: str
+    round: int
+    bidder: str
+    amount: int
+
+
+class AuctionIndexer:
+    """Keeps a local SQLite index of auctions and their bids.
+
+    The indexer reads blocks in order and records every app created with an
+    auction approval program, with or without pull refunds, along with the
+    setup, bid, settle, relist and delete calls made to those apps. The last indexed round is stored with the index, so an
+    indexer opened on an existing database resumes where it left off.
+
+    Blocks are indexed by catchUp(), or by the background thread started with
+    start().
+
+    Args:
+        client: An algod client.
+        path (optional): The path of the SQLite database. Defaults to an
+            in-memory database.
+        startRound (optional): The first round to index if the database is new.
+            Defaults to the round after the latest one, since auctions created
+            before it are not known to the indexer.
+        approvalPrograms (optional): The compiled approval programs of the
+            auctions to index. Defaults to the programs of auction.contracts,
+            with and without pull refunds.
+    """
+
+    def __init__(
+        self,
+        client: AlgodClient,
+        path: str = ":memory:",
+        startRound: Optional[int] = None,
+        approvalPrograms: Optional[Iterable[bytes]] = None,
+    ) -> None:
+        self.client = client
+        self.approvalPrograms = set(
+            approvalPrograms
+            if approvalPrograms is not None
+            else getApprovalPrograms(client)
+        )
+
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+        with self.db:
+            row = self.db.execute("SELECT round FROM checkpoint").fetchone()
+            if row is None:
+                if startRound is None:
+                    startRound = client.status()["last-round"] + 1
+                self.db.execute(
+                    "INSERT INTO checkpoint (id, round) VALUES (0, ?)",
+                    (startRound - 1,),
+                )
+
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def close(self) -> None:
+        self.stop()
+        with self.lock:
+            self.db.close()
+
+    @property
+    def round(self) -> int:
+        """The last round that has been indexed."""
+        with self.lock:
+            return self.db.execute("SELECT round FROM checkpoint").fetchone()[0]
+
+    def loadState(self, appID: int, listedRound: int) -> AuctionState:
+        row = self.db.execute(
+            "SELECT seller, nft_id, start, end, reserve, min_bid_inc, num_bids, "
+            "bid_amount, bid_account FROM auctions WHERE app_id = ? AND "
+            "listed_round = ?",
+            (appID, listedRound),
+        ).fetchone()
+        return AuctionState(
+            seller=encoding.decode_address(row[0]),
+            nftID=row[1],
+            start=row[2],
+            end=row[3],
+            reserve=row[4],
+            minBidIncrement=row[5],
+            numBids=row[6],
+            bidAmount=row[7],
+            bidAccount=(
+                encoding.decode_address(row[8]) if row[8] is not None else bytes(32)
+            ),
+        )
+
+    def saveState(self, appID: int, listedRound: int, state: AuctionState) -> None:
+        self.db.execute(
+            "UPDATE auctions SET seller = ?, nft_id = ?, start = ?, end = ?, "
+            "reserve = ?, min_bid_inc = ?, num_bids = ?, bid_amount = ?, "
+            "bid_account = ? WHERE app_id = ? AND listed_round = ?",
+            (
+                state.sellerAddress,
+                state.nftID,
+                state.start,
+                state.end,
+                state.reserve,
+                state.minBidIncrement,
+                state.numBids,
+                state.bidAmount,
+                state.bidAccountAddress,
+                appID,
+                listedRound,
+            ),
+        )
+
+    def insertListing(
+        self,
+        appID: int,
+        listedRound: int,
+        creator: str,
+        createdRound: int,
+        state: AuctionState,
+    ) -> None:
+        self.db.execute(
+            "INSERT OR REPLACE INTO auctions ({}) VALUES "
+            "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, NULL, NULL)".format(
+                AUCTION_COLUMNS
+            ),
+            (
+                appID,
+                listedRound,
+                creator,
+                state.sellerAddress,
+                state.nftID,
+                state.start,
+                state.end,
+                state.reserve,
+                state.minBidIncrement,
+                state.numBids,
+                state.bidAmount,
+                state.bidAccountAddress,
+                createdRound,
+            ),
+        )
+
+    def indexTxn(self, block: Dict[str, Any], intra: int, stib: Dict[str, Any]) -> None:
+        txn = stib["txn"]
+        if txn.get("type") != "appl":
+            return
+
+        round = block["rnd"]
+        delta = stib.get("dt", {}).get("gd")
+        appID = txn.get("apid", 0)
+
+        if appID == 0:
+            if txn.get("apap") not in self.approvalPrograms:
+                return
+            values = AuctionState().toState()
+            applyBlockStateDelta(values, delta)
+            state = AuctionState.fromState(values)
+            self.insertListing(
+                stib["apid"], round, encoding.encode_address(txn["snd"]), round, state
+            )
+            return
+
+        latest = self.db.execute(
+            "SELECT listed_round, creator, created_round, settled_round "
+            "FROM auctions WHERE app_id = ? ORDER BY listed_round DESC LIMIT 1",
+            (appID,),
+        ).fetchone()
+        if latest is None:
+            return
+        listedRound, creator, createdRound, settledRound = latest
+
+        if txn.get("apan", 0) == DELETE_APPLICATION_ON_COMPLETE:
+            self.db.execute(
+                "UPDATE auctions SET deleted_round = ? WHERE app_id = ? AND "
+                "listed_round = ?",
+                (round, appID, listedRound),
+            )
+            return
+
+        args = txn.get("apaa", [])
+        method = args[0] if len(args) > 0 else b""
+        if method == b"relist":
+            # a relisted auction starts like a new one, with the same seller
+            seller = self.loadState(appID, listedRound).seller
+            values = AuctionState(seller=seller).toState()
+            applyBlockStateDelta(values, delta)
+            state = AuctionState.fromState(values)
+            self.insertListing(appID, round, creator, createdRound, state)
+            return
+
+        if settledRound is not None:
+            # a settled auction keeps its outcome until it is relisted
+            return
+
+        if method == b"settle":
+            self.db.execute(
+                "UPDATE auctions SET settled_round = ? WHERE app_id = ? AND "
+                "listed_round = ?",
+                (round, appID, listedRound),
+            )
+            return
+
+        existing = self.loadState(appID, listedRound)
+        values = existing.toState()
+        applyBlockStateDelta(values, delta)
+        state = AuctionState.fromState(values)
+        self.saveState(appID, listedRound, state)
+
+        if method == b"setup":
+            self.db.execute(
+                "UPDATE auctions SET setup_round = ? WHERE app_id = ? AND "
+                "listed_round = ?",
+                (round, appID, listedRound),
+            )
+        elif method == b"bid" and state.numBids > existing.numBids:
+            self.db.execute(
+                "INSERT OR REPLACE INTO bids (txid, app_id, listed_round, round, "
+                "intra, bidder, amount) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    getTxnID(getBlockTxn(block, stib)),
+                    appID,
+                    listedRound,
+                    round,
+                    intra,
+                    encoding.encode_address(txn["snd"]),
+                    state.bidAmount,
+                ),
+            )
+
+    def indexBlock(self, block: Dict[str, Any]) -> None:
+        """Index a block, as returned by blocks.getBlock. Blocks must be indexed
+        in order; blocks that have already been indexed are ignored."""
+        round = block["rnd"]
+        with self.lock, self.db:
+            checkpoint = self.db.execute("SELECT round FROM checkpoint").fetchone()[0]
+            if round <= checkpoint:
+                return
+            if round != checkpoint + 1:
+                raise Exception(
+                    "Expected block {}, got block {}".format(checkpoint + 1, round)
+                )
+
+            for intra, stib in enumerate(block.get("txns", [])):
+                self.indexTxn(block, intra, stib)
+
+            self.db.execute("UPDATE checkpoint SET round = ?", (round,))
+
+    def catchUp(self, lastRound: Optional[int] = None) -> int:
+        """Index every block up to a round.
+
+        Args:
+            lastRound (optional): The last round to index. Defaults to the
+                latest round.
+
+        Returns:
+            The last indexed round.
+        """
+        if lastRound is None:
+            lastRound = self.client.status()["last-round"]
+        for round in range(self.round + 1, lastRound + 1):
+            self.indexBlock(getBlock(self.client, round))
+        return self.round
+
+    def follow(self) -> None:
+        while not self.stopped.is_set():
+            try:
+                status = self.client.status_after_block(self.round)
+                self.catchUp(status["last-round"])
+            except Exception:
+                # try again later, the checkpoint makes this safe
+                self.stopped.wait(1)
+
+    def start(self) -> None:
+        """Start indexing new blocks in the background."""
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(
+                target=self.follow, name="AuctionIndexer", daemon=True
+            )
+            self.thread.start()
+
+    def stop(self) -> None:
+        """Stop indexing new blocks in the background."""
+        self.stopped.set()
+
+    def queryAuctions(self, where: str, params: tuple) -> List[IndexedAuction]:
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT {} FROM auctions WHERE {}".format(AUCTION_COLUMNS, where),
+                params,
+            ).fetchall()
+        return [IndexedAuction(*row) for row in rows]
+
+    def getAuction(
+        self, appID: int, listedRound: Optional[int] = None
+    ) -> Optional[IndexedAuction]:
+        """Get an auction.
+
+        Args:
+            appID: The app ID of the auction.
+            listedRound (optional): The round in which the auction was listed.
+                Defaults to the latest listing of the app.
+        """
+        if listedRound is None:
+            auctions = self.queryAuctions(
+                "app_id = ? ORDER BY listed_round DESC LIMIT 1", (appID,)
+            )
+        else:
+            auctions = self.queryAuctions(
+                "app_id = ? AND listed_round = ?", (appID, listedRound)
+            )
+        return auctions[0] if len(auctions) > 0 else None
+
+    def getListings(self, appID: int) -> List[IndexedAuction]:
+        """Get every auction listed in an app, in the order they were listed."""
+        return self.queryAuctions("app_id = ? ORDER BY listed_round", (appID,))
+
+    def getActiveAuctions(
+        self, now: int, endingWithin: Optional[int] = None, limit: int = -1
+    ) -> List[IndexedAuction]:
+        """Get the auctions that have been set up, have not been deleted, and
+        have not ended, in the order they end.
+
+        Args:
+            now: The current UNIX timestamp.
+            endingWithin (optional): Only include auctions that end within this
+                many seconds of now.
+            limit (optional): The maximum number of auctions to return.
+        """
+        latest = now + endingWithin if endingWithin is not None else 2 ** 63 - 1
+        return self.queryAuctions(
+            "deleted_round IS NULL AND settled_round IS NULL AND setup_round IS "
+            "NOT NULL AND end > ? AND end <= ? ORDER BY end, app_id LIMIT ?",
+            (now, latest, limit),
+        )
+
+    def getAuctionsBySeller(self, seller: str) -> List[IndexedAuction]:
+        """Get every auction of a seller, in the order they were created."""
+        return self.queryAuctions("seller = ? ORDER BY app_id, listed_round", (seller,))
+
+    def getAuctionsByNFT(self, nftID: int) -> List[IndexedAuction]:
+        """Get every auction of an NFT, in the order they were created."""
+        return self.queryAuctions("nft_id = ? ORDER BY app_id, listed_round", (nftID,))
+
+    def getBids(
+        self, appID: int, listedRound: Optional[int] = None
+    ) -> List[IndexedBid]:
+        """Get the bids of an auction, in the order they were placed.
+
+        Args:
+            appID: The app ID of the auction.
+            listedRound (optional): The round in which the auction was listed.
+                Defaults to the latest listing of the app.
+        """
+        with self.lock:
+            if listedRound is None:
+                row = self.db.execute(
+                    "SELECT MAX(listed_round) FROM auctions WHERE app_id = ?",
+                    (appID,),
+                ).fetchone()
+                listedRound = row[0]
+            rows = self.db.execute(
+                "SELECT app_id, listed_round, txid, round, bidder, amount FROM bids "
+                "WHERE app_id = ? AND listed_round = ? ORDER BY round, intra",
+                (appID, listedRound),
+            ).fetchall()
+        return [IndexedBid(*row) for row in rows]
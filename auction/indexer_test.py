@@ -0,0 +1,265 @@
+import pytest
+
+from .events_test import runPullRefundAuction
+from .indexer import AuctionIndexer
+from .operations import (
+    createAuctionApp,
+    setupAuctionApp,
+    placeBid,
+    closeAuction,
+    settleAuction,
+    relistAuction,
+)
+from .testing.resources import createDummyAsset, optInToAsset
+from .testing.simulator import Ledger, SimulatedAlgodClient
+
+START_TIME = 1_600_000_000
+
+
+@pytest.fixture(autouse=True)
+def contractCache(tmp_path, monkeypatch):
+    monkeypatch.setenv("AUCTION_CONTRACT_CACHE", str(tmp_path))
+
+
+def createAuction(client, ledger, seller, startOffset, duration):
+    creator = ledger.createAccount()
+    nftID = createDummyAsset(client, 1, seller)
+
+    appID = createAuctionApp(
+        client=client,
+        sender=creator,
+        seller=seller.getAddress(),
+        nftID=nftID,
+        startTime=ledger.now() + startOffset,
+        endTime=ledger.now() + startOffset + duration,
+        reserve=1_000_000,
+        minBidIncrement=100_000,
+    )
+    setupAuctionApp(
+        client=client,
+        appID=appID,
+        funder=creator,
+        nftHolder=seller,
+        nftID=nftID,
+        nftAmount=1,
+    )
+    return appID, nftID, creator
+
+
+def test_index_auctions(tmp_path):
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+    path = str(tmp_path / "index.sqlite")
+
+    indexer = AuctionIndexer(client, path)
+
+    seller1 = ledger.createAccount()
+    seller2 = ledger.createAccount()
+    app1, nft1, creator1 = createAuction(client, ledger, seller1, 10, 100)
+    app2, nft2, _ = createAuction(client, ledger, seller1, 10, 50)
+    app3, _, _ = createAuction(client, ledger, seller2, 10, 500)
+
+    # a round that was indexed is not indexed again
+    assert indexer.catchUp(ledger.round - 1) == ledger.round - 1
+    indexer.close()
+
+    ledger.advanceTime(15)
+    bidder1 = ledger.createAccount()
+    bidder2 = ledger.createAccount()
+    optInToAsset(client, nft1, bidder2)
+    placeBid(client=client, appID=app1, bidder=bidder1, bidAmount=1_000_000)
+    placeBid(client=client, appID=app1, bidder=bidder2, bidAmount=1_200_000)
+    with pytest.raises(Exception):
+        placeBid(client=client, appID=app1, bidder=bidder1, bidAmount=1_250_000)
+
+    indexer = AuctionIndexer(client, path)
+    assert indexer.catchUp() == ledger.round
+
+    auction = indexer.getAuction(app1)
+    assert auction is not None
+    assert auction.creator == creator1.getAddress()
+    assert auction.seller == seller1.getAddress()
+    assert auction.nftID == nft1
+    assert auction.reserve == 1_000_000
+    assert auction.numBids == 2
+    assert auction.bidAmount == 1_200_000
+    assert auction.bidAccount == bidder2.getAddress()
+    assert auction.setupRound is not None
+    assert auction.deletedRound is None
+
+    bids = indexer.getBids(app1)
+    assert [(bid.bidder, bid.amount) for bid in bids] == [
+        (bidder1.getAddress(), 1_000_000),
+        (bidder2.getAddress(), 1_200_000),
+    ]
+    assert bids[0].round < bids[1].round
+
+    now = ledger.now()
+    active = indexer.getActiveAuctions(now)
+    assert [a.appID for a in active] == [app2, app1, app3]
+    endingSoon = indexer.getActiveAuctions(now, endingWithin=200)
+    assert [a.appID for a in endingSoon] == [app2, app1]
+    assert [a.appID for a in indexer.getActiveAuctions(now, limit=1)] == [app2]
+
+    assert [a.appID for a in indexer.getAuctionsBySeller(seller1.getAddress())] == [
+        app1,
+        app2,
+    ]
+    assert [a.appID for a in indexer.getAuctionsByNFT(nft2)] == [app2]
+
+    ledger.advanceTime(100)
+    closeAuction(client, app1, seller1)
+    indexer.catchUp()
+
+    assert indexer.getAuction(app1).deletedRound == ledger.round
+    assert [a.appID for a in indexer.getActiveAuctions(ledger.now())] == [app3]
+    indexer.close()
+
+
+def test_index_pull_refund_auction():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+
+    indexer = AuctionIndexer(client)
+    appID, seller, bidders = runPullRefundAuction(client, ledger)
+    indexer.catchUp()
+
+    # opting in, claiming credit and closing out leave the auction as it was
+    auction = indexer.getAuction(appID)
+    assert auction is not None
+    assert auction.seller == seller.getAddress()
+    assert auction.numBids == 3
+    assert auction.bidAccount == bidders[2].getAddress()
+    assert auction.setupRound is not None
+    assert auction.deletedRound == ledger.round
+    assert [(bid.bidder, bid.amount) for bid in indexer.getBids(appID)] == [
+        (bidder.getAddress(), 1_000_000 + i * 100_000)
+        for i, bidder in enumerate(bidders)
+    ]
+    indexer.close()
+
+
+def test_index_settled_and_relisted_auction():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+
+    indexer = AuctionIndexer(client)
+    seller = ledger.createAccount()
+    appID, nft1, creator = createAuction(client, ledger, seller, 10, 100)
+    nft2 = createDummyAsset(client, 1, seller)
+    bidders = [ledger.createAccount() for _ in range(2)]
+    for bidder in bidders:
+        optInToAsset(client, nft1, bidder)
+        optInToAsset(client, nft2, bidder)
+
+    ledger.advanceTime(15)
+    placeBid(client=client, appID=appID, bidder=bidders[0], bidAmount=1_000_000)
+    placeBid(client=client, appID=appID, bidder=bidders[1], bidAmount=1_200_000)
+    ledger.advanceTime(100)
+    settleAuction(client, appID, seller)
+    indexer.catchUp()
+    settledRound = ledger.round
+
+    first = indexer.getAuction(appID)
+    assert first is not None
+    assert first.settledRound == settledRound
+    assert first.deletedRound is None
+    assert indexer.getActiveAuctions(ledger.now()) == []
+
+    relistAuction(
+        client=client,
+        appID=appID,
+        sender=seller,
+        nftHolder=seller,
+        nftID=nft2,
+        nftAmount=1,
+        startTime=ledger.now() + 10,
+        endTime=ledger.now() + 110,
+        reserve=2_000_000,
+        minBidIncrement=100_000,
+    )
+    relistedRound = ledger.round
+    ledger.advanceTime(15)
+    placeBid(client=client, appID=appID, bidder=bidders[0], bidAmount=2_000_000)
+    indexer.catchUp()
+
+    second = indexer.getAuction(appID)
+    assert second is not None
+    assert second.listedRound == relistedRound
+    assert second.creator == creator.getAddress()
+    assert second.seller == seller.getAddress()
+    assert second.nftID == nft2
+    assert second.reserve == 2_000_000
+    assert second.numBids == 1
+    assert second.bidAccount == bidders[0].getAddress()
+    assert second.setupRound == relistedRound
+    assert second.settledRound is None
+    assert [a.listedRound for a in indexer.getActiveAuctions(ledger.now())] == [
+        relistedRound
+    ]
+
+    # the first listing keeps its outcome and its bids
+    assert indexer.getListings(appID) == [first, second]
+    assert first.nftID == nft1
+    assert first.numBids == 2
+    assert first.bidAmount == 1_200_000
+    assert first.bidAccount == bidders[1].getAddress()
+    assert [
+        (bid.bidder, bid.amount) for bid in indexer.getBids(appID, first.listedRound)
+    ] == [
+        (bidders[0].getAddress(), 1_000_000),
+        (bidders[1].getAddress(), 1_200_000),
+    ]
+    assert [(bid.bidder, bid.amount) for bid in indexer.getBids(appID)] == [
+        (bidders[0].getAddress(), 2_000_000)
+    ]
+    assert indexer.getAuctionsByNFT(nft1) == [first]
+    assert indexer.getAuctionsByNFT(nft2) == [second]
+    assert indexer.getAuctionsBySeller(seller.getAddress()) == [first, second]
+
+    ledger.advanceTime(100)
+    settleAuction(client, appID, seller)
+    closeAuction(client, appID, seller)
+    indexer.catchUp()
+
+    assert indexer.getAuction(appID).deletedRound == ledger.round
+    assert indexer.getAuction(appID, first.listedRound) == first
+    indexer.close()
+
+
+def test_start_round():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+
+    seller = ledger.createAccount()
+    before, _, _ = createAuction(client, ledger, seller, 10, 100)
+
+    indexer = AuctionIndexer(client)
+    after, _, _ = createAuction(client, ledger, seller, 10, 100)
+    indexer.catchUp()
+
+    assert indexer.getAuction(before) is None
+    assert indexer.getAuction(after) is not None
+
+    full = AuctionIndexer(client, startRound=1)
+    full.catchUp()
+    assert full.getAuction(before) is not None
+
+
+def test_follow():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+
+    indexer = AuctionIndexer(client)
+    indexer.start()
+
+    seller = ledger.createAccount()
+    appID, _, _ = createAuction(client, ledger, seller, 10, 100)
+
+    for _ in range(100):
+        if indexer.round >= ledger.round:
+            break
+        ledger.waitForBlockAfter(ledger.round)
+
+    assert indexer.getAuction(appID) is not None
+    indexer.close()
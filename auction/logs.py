@@ -0,0 +1,166 @@
+"""Decoders for the records the auction contract logs.
+
+Every record starts with a one byte tag, followed by fixed-width fields.
+Addresses are 32 raw bytes and integers are 8 byte big-endian values:
+
+    create  0x01 seller, nftID, startTime, endTime, reserve, minBidIncrement
+    setup   0x02 nftID
+    bid     0x03 bidder, amount, bidNumber
+    refund  0x04 receiver, amount
+    close   0x05 winner, winningBidAmount
+
+A refund is logged whenever a lead bidder is repaid their bid, and in an auction
+with pull refunds whenever the credit of a bidder is paid out. The winner of a
+close record is the zero address if the NFT went back to the seller.
+
+The multi-lot auction contract logs refunds in the same way, and these records
+for its lots, where lot is the 8 byte index of the lot:
+
+    lot       0x06 lot, nftID, reserve, minBidIncrement
+    lot bid   0x07 lot, bidder, amount, bidNumber
+    lot close 0x08 lot, winner, winningBidAmount
+"""
+
+from typing import Iterable, List, NamedTuple, Optional, Union
+import struct
+
+from algosdk import encoding
+
+from .state import ZERO_ADDRESS
+
+CREATE_LOG_TAG = 0x01
+SETUP_LOG_TAG = 0x02
+BID_LOG_TAG = 0x03
+REFUND_LOG_TAG = 0x04
+CLOSE_LOG_TAG = 0x05
+LOT_LOG_TAG = 0x06
+LOT_BID_LOG_TAG = 0x07
+LOT_CLOSE_LOG_TAG = 0x08
+
+
+class CreateLog(NamedTuple):
+    seller: str
+    nftID: int
+    startTime: int
+    endTime: int
+    reserve: int
+    minBidIncrement: int
+
+
+class SetupLog(NamedTuple):
+    nftID: int
+
+
+class BidLog(NamedTuple):
+    bidder: str
+    amount: int
+    bidNumber: int
+
+
+class RefundLog(NamedTuple):
+    receiver: str
+    amount: int
+
+
+class CloseLog(NamedTuple):
+    """winner is None if the auction had no winner."""
+
+    winner: Optional[str]
+    winningBidAmount: int
+
+
+class LotLog(NamedTuple):
+    lot: int
+    nftID: int
+    reserve: int
+    minBidIncrement: int
+
+
+class LotBidLog(NamedTuple):
+    lot: int
+    bidder: str
+    amount: int
+    bidNumber: int
+
+
+class LotCloseLog(NamedTuple):
+    """winner is None if the lot had no winner, including when its lead bidder
+    could not receive the NFT and was repaid instead."""
+
+    lot: int
+    winner: Optional[str]
+    winningBidAmount: int
+
+
+AuctionLog = Union[
+    CreateLog,
+    SetupLog,
+    BidLog,
+    RefundLog,
+    CloseLog,
+    LotLog,
+    LotBidLog,
+    LotCloseLog,
+]
+
+LOG_FORMATS = {
+    CREATE_LOG_TAG: struct.Struct(">32sQQQQQ"),
+    SETUP_LOG_TAG: struct.Struct(">Q"),
+    BID_LOG_TAG: struct.Struct(">32sQQ"),
+    REFUND_LOG_TAG: struct.Struct(">32sQ"),
+    CLOSE_LOG_TAG: struct.Struct(">32sQ"),
+    LOT_LOG_TAG: struct.Struct(">QQQQ"),
+    LOT_BID_LOG_TAG: struct.Struct(">Q32sQQ"),
+    LOT_CLOSE_LOG_TAG: struct.Struct(">Q32sQ"),
+}
+
+
+def decodeWinner(address: bytes) -> Optional[str]:
+    return encoding.encode_address(address) if address != ZERO_ADDRESS else None
+
+
+def decodeLog(log: bytes) -> AuctionLog:
+    """Decode a record logged by the auction contract.
+
+    Args:
+        log: The raw bytes of the log, as found in PendingTxnResponse.logs or
+            in the "lg" field of the apply data of a block transaction.
+
+    Returns:
+        The decoded record.
+    """
+    if len(log) == 0 or log[0] not in LOG_FORMATS:
+        raise Exception("Not an auction log: {!r}".format(log))
+
+    tag = log[0]
+    fmt = LOG_FORMATS[tag]
+    if len(log) != 1 + fmt.size:
+        raise Exception(
+            "Expected {} bytes for auction log {}, got {}".format(
+                1 + fmt.size, tag, len(log)
+            )
+        )
+    fields = fmt.unpack_from(log, 1)
+
+    if tag == CREATE_LOG_TAG:
+        return CreateLog(encoding.encode_address(fields[0]), *fields[1:])
+    if tag == SETUP_LOG_TAG:
+        return SetupLog(*fields)
+    if tag == BID_LOG_TAG:
+        return BidLog(encoding.encode_address(fields[0]), *fields[1:])
+    if tag == REFUND_LOG_TAG:
+        return RefundLog(encoding.encode_address(fields[0]), *fields[1:])
+    if tag == CLOSE_LOG_TAG:
+        return CloseLog(decodeWinner(fields[0]), fields[1])
+    if tag == LOT_LOG_TAG:
+        return LotLog(*fields)
+    if tag == LOT_BID_LOG_TAG:
+        return LotBidLog(fields[0], encoding.encode_address(fields[1]), *fields[2:])
+
+    return LotCloseLog(fields[0], decodeWinner(fields[1]), fields[2])
+
+
+def decodeLogs(logs: Iterable[bytes]) -> List[AuctionLog]:
+    """Decode every record logged by a call to the auction contract, in the
+    order they were logged."""
+    return [decodeLog(log) for log in logs]
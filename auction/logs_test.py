@@ -0,0 +1,155 @@
+import pytest
+
+from algosdk import encoding
+
+from .blocks import getBlock, getBlockTxn, getTxnID
+from .logs import (
+    CreateLog,
+    SetupLog,
+    BidLog,
+    RefundLog,
+    CloseLog,
+    decodeLog,
+    decodeLogs,
+)
+from .operations import createAuctionApp, setupAuctionApp, placeBid, closeAuction
+from .testing.resources import createDummyAsset, optInToAsset
+from .testing.simulator import Ledger, SimulatedAlgodClient
+from .util import PendingTxnResponse
+
+START_TIME = 1_600_000_000
+
+
+@pytest.fixture(autouse=True)
+def contractCache(tmp_path, monkeypatch):
+    monkeypatch.setenv("AUCTION_CONTRACT_CACHE", str(tmp_path))
+
+
+def getAppLogs(client, appID, firstRound, lastRound):
+    """Get the logs of each call to an app, read through pending_transaction_info."""
+    logs = []
+    for round in range(firstRound, lastRound + 1):
+        block = getBlock(client, round)
+        for stib in block.get("txns", []):
+            txn = stib["txn"]
+            if txn.get("type") != "appl":
+                continue
+            if appID not in (txn.get("apid"), stib.get("apid")):
+                continue
+            txID = getTxnID(getBlockTxn(block, stib))
+            response = PendingTxnResponse(client.pending_transaction_info(txID))
+            logs.append(response.logs)
+    return logs
+
+
+def test_decode_log():
+    address = encoding.encode_address(bytes(range(32)))
+    raw = bytes([0x03]) + bytes(range(32)) + (5).to_bytes(8, "big") + bytes(7) + b"\x02"
+    assert decodeLog(raw) == BidLog(bidder=address, amount=5, bidNumber=2)
+
+    assert decodeLog(bytes([0x05]) + bytes(40)) == CloseLog(None, 0)
+
+    with pytest.raises(Exception):
+        decodeLog(b"")
+    with pytest.raises(Exception):
+        decodeLog(b"\x09" + bytes(8))
+    with pytest.raises(Exception):
+        decodeLog(raw[:-1])
+
+
+def test_auction_logs():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+    firstRound = ledger.round + 1
+
+    creator = ledger.createAccount()
+    seller = ledger.createAccount()
+    bidder1 = ledger.createAccount()
+    bidder2 = ledger.createAccount()
+    nftID = createDummyAsset(client, 1, seller)
+    optInToAsset(client, nftID, bidder2)
+
+    startTime = ledger.now() + 10
+    appID = createAuctionApp(
+        client=client,
+        sender=creator,
+        seller=seller.getAddress(),
+        nftID=nftID,
+        startTime=startTime,
+        endTime=startTime + 60,
+        reserve=1_000_000,
+        minBidIncrement=100_000,
+    )
+    setupAuctionApp(
+        client=client,
+        appID=appID,
+        funder=creator,
+        nftHolder=seller,
+        nftID=nftID,
+        nftAmount=1,
+    )
+    ledger.advanceTime(15)
+    placeBid(client=client, appID=appID, bidder=bidder1, bidAmount=1_000_000)
+    placeBid(client=client, appID=appID, bidder=bidder2, bidAmount=1_200_000)
+    ledger.advanceTime(60)
+    closeAuction(client, appID, seller)
+
+    calls = [
+        decodeLogs(logs) for logs in getAppLogs(client, appID, firstRound, ledger.round)
+    ]
+    assert calls == [
+        [
+            CreateLog(
+                seller=seller.getAddress(),
+                nftID=nftID,
+                startTime=startTime,
+                endTime=startTime + 60,
+                reserve=1_000_000,
+                minBidIncrement=100_000,
+            )
+        ],
+        [SetupLog(nftID=nftID)],
+        [BidLog(bidder=bidder1.getAddress(), amount=1_000_000, bidNumber=1)],
+        [
+            RefundLog(receiver=bidder1.getAddress(), amount=1_000_000),
+            BidLog(bidder=bidder2.getAddress(), amount=1_200_000, bidNumber=2),
+        ],
+        [CloseLog(winner=bidder2.getAddress(), winningBidAmount=1_200_000)],
+    ]
+
+
+def test_reserve_not_met_logs():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+
+    seller = ledger.createAccount()
+    bidder = ledger.createAccount()
+    nftID = createDummyAsset(client, 1, seller)
+    appID = createAuctionApp(
+        client=client,
+        sender=seller,
+        seller=seller.getAddress(),
+        nftID=nftID,
+        startTime=ledger.now() + 10,
+        endTime=ledger.now() + 70,
+        reserve=5_000_000,
+        minBidIncrement=100_000,
+    )
+    setupAuctionApp(
+        client=client,
+        appID=appID,
+        funder=seller,
+        nftHolder=seller,
+        nftID=nftID,
+        nftAmount=1,
+    )
+    ledger.advanceTime(15)
+    placeBid(client=client, appID=appID, bidder=bidder, bidAmount=1_000_000)
+    ledger.advanceTime(60)
+    closeAuction(client, appID, seller)
+
+    closeLogs = getAppLogs(client, appID, ledger.round, ledger.round)[0]
+    assert decodeLogs(closeLogs) == [
+        RefundLog(receiver=bidder.getAddress(), amount=1_000_000),
+        CloseLog(winner=None, winningBidAmount=0),
+    ]
@@ -0,0 +1,491 @@
+"""Operations for multi-lot auctions.
+
+A multi-lot auction is a single application that auctions several NFTs, each
+with its own reserve, minimum bid increment and lead bid. All lots of an auction
+share a seller, a start time and an end time, and one escrow account holds all
+of their NFTs and bids. This saves creating, funding and deleting an app for
+every NFT of a large drop.
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+import struct
+
+from algosdk.v2client.algod import AlgodClient
+from algosdk.future import transaction
+from algosdk.logic import get_application_address
+from algosdk import encoding
+
+from .account import Account
+from .cache import ProgramCache
+from .contracts import multi_lot_approval_program, clear_state_program
+from .operations import (
+    MAX_GROUP_SIZE,
+    chunks,
+    sendGroupsAndWait,
+    withInnerTxnFees,
+)
+from .params import SuggestedParamsProvider, getSuggestedParams
+from .state import ZERO_ADDRESS
+from .tracing import traced
+from .util import (
+    waitForTransaction,
+    fullyCompileContract,
+    getAppGlobalState,
+)
+
+MULTI_LOT_APPROVAL_PROGRAM = b""
+MULTI_LOT_CLEAR_STATE_PROGRAM = b""
+
+# the global state of an auction holds 5 values besides its lots, and an app can
+# have at most 64 global values
+MAX_LOTS = 59
+
+# the layout of the byte slice that holds the state of a lot
+LOT_FORMAT = struct.Struct(">QQQQQ32s")
+
+
+def getMultiLotContracts(
+    client: Optional[AlgodClient], cache: Optional[ProgramCache] = None
+) -> Tuple[bytes, bytes]:
+    """Get the compiled TEAL contracts for multi-lot auctions.
+
+    See operations.getContracts for how the programs are compiled and cached.
+
+    Returns:
+        A tuple of 2 byte strings. The first is the approval program, and the
+        second is the clear state program.
+    """
+    global MULTI_LOT_APPROVAL_PROGRAM
+    global MULTI_LOT_CLEAR_STATE_PROGRAM
+
+    if len(MULTI_LOT_APPROVAL_PROGRAM) == 0:
+        if cache is None:
+            cache = ProgramCache()
+        MULTI_LOT_APPROVAL_PROGRAM = fullyCompileContract(
+            client, multi_lot_approval_program(), cache
+        )
+        MULTI_LOT_CLEAR_STATE_PROGRAM = fullyCompileContract(
+            client, clear_state_program(), cache
+        )
+
+    return MULTI_LOT_APPROVAL_PROGRAM, MULTI_LOT_CLEAR_STATE_PROGRAM
+
+
+def getLotKey(lot: int) -> bytes:
+    """Get the global state key that holds a lot."""
+    return b"lot" + lot.to_bytes(8, "big")
+
+
+class LotState(NamedTuple):
+    """The state of a lot that has not been settled yet."""
+
+    nftID: int
+    reserve: int
+    minBidIncrement: int
+    bidAmount: int
+    numBids: int
+    # None if there have been no bids
+    bidAccount: Optional[str]
+
+
+def getLots(appGlobalState: Dict[bytes, Union[int, bytes]]) -> Dict[int, LotState]:
+    """Decode the lots of a multi-lot auction.
+
+    Args:
+        appGlobalState: The global state of the auction.
+
+    Returns:
+        A dictionary from the index of each lot that has not been settled yet
+        to its state, in order of index.
+    """
+    lots: Dict[int, LotState] = dict()
+    for lot in range(appGlobalState.get(b"lot_count", 0)):
+        value = appGlobalState.get(getLotKey(lot))
+        if not isinstance(value, bytes):
+            # the lot has been settled
+            continue
+        *fields, bidAccount = LOT_FORMAT.unpack(value)
+        lots[lot] = LotState(
+            *fields,
+            bidAccount=encoding.encode_address(bidAccount)
+            if bidAccount != ZERO_ADDRESS
+            else None,
+        )
+    return lots
+
+
+@traced
+def createMultiLotAuctionApp(
+    client: AlgodClient,
+    sender: Account,
+    seller: str,
+    startTime: int,
+    endTime: int,
+    lotCount: int,
+    paramsProvider: Optional[SuggestedParamsProvider] = None,
+) -> int:
+    """Create a new multi-lot auction.
+
+    Args:
+        client: An algod client.
+        sender: The account that will create the auction application.
+        seller: The address of the seller, who receives the proceeds of the
+            auction and any NFT that is not sold.
+        startTime: A UNIX timestamp representing the start time of the auction.
+            This must be greater than the current UNIX timestamp.
+        endTime: A UNIX timestamp representing the end time of the auction. This
+            must be greater than startTime.
+        lotCount: The maximum number of lots the auction can hold, at most 59.
+            The creator's minimum balance grows with this number.
+        paramsProvider (optional): A provider of suggested params to share
+            between operations. If not given, params are fetched from the
+            client.
+
+    Returns:
+        The ID of the newly created auction app.
+    """
+    if not 0 < lotCount <= MAX_LOTS:
+        raise Exception(
+            "An auction can have between 1 and {} lots, got {}".format(
+                MAX_LOTS, lotCount
+            )
+        )
+
+    approval, clear = getMultiLotContracts(client)
+
+    txn = transaction.ApplicationCreateTxn(
+        sender=sender.getAddress(),
+        on_complete=transaction.OnComplete.NoOpOC,
+        approval_program=approval,
+        clear_program=clear,
+        global_schema=transaction.StateSchema(
+            num_uints=4, num_byte_slices=1 + lotCount
+        ),
+        local_schema=transaction.StateSchema(num_uints=0, num_byte_slices=0),
+        app_args=[
+            encoding.decode_address(seller),
+            startTime.to_bytes(8, "big"),
+            endTime.to_bytes(8, "big"),
+        ],
+        sp=getSuggestedParams(client, paramsProvider),
+    )
+    signedTxn = txn.sign(sender.getPrivateKey())
+
+    client.send_transaction(signedTxn)
+
+    response = waitForTransaction(client, signedTxn.get_txid())
+    assert response.applicationIndex is not None and response.applicationIndex > 0
+    return response.applicationIndex
+
+
+class AuctionLot(NamedTuple):
+    """A lot to add to a multi-lot auction.
+
+    nftHolder is the account holding the NFT, and nftAmount is the amount of it
+    being auctioned. If the auction ends without a bid of at least reserve, the
+    lead bidder is repaid and the NFT goes to the seller. A new bid must be at
+    least minBidIncrement more than the lead bid.
+    """
+
+    nftHolder: Account
+    nftID: int
+    nftAmount: int
+    reserve: int
+    minBidIncrement: int
+
+
+@traced
+def addAuctionLots(
+    client: AlgodClient,
+    appID: int,
+    sender: Account,
+    lots: Sequence[AuctionLot],
+    paramsProvider: Optional[SuggestedParamsProvider] = None,
+) -> List[int]:
+    """Add lots to a multi-lot auction that has not started yet.
+
+    For each group of up to 7 lots, this funds the escrow account, opts it into
+    the NFT of each lot, and sends it each NFT, all in one atomic transaction
+    group. The escrow account needs 0.1 Algos for each lot, plus 0.1 Algos for
+    its own minimum balance when the first lot is added.
+
+    Args:
+        client: An algod client.
+        appID: The app ID of the auction.
+        sender: The account adding the lots and providing the funding for the
+            escrow account. This must be the seller or the auction creator.
+        lots: The lots to add. Each lot must be a different NFT.
+        paramsProvider (optional): A provider of suggested params to share
+            between operations. If not given, params are fetched from the
+            client.
+
+    Returns:
+        The index of each lot in the auction, in the same order as lots.
+    """
+    appAddr = get_application_address(appID)
+    suggestedParams = getSuggestedParams(client, paramsProvider)
+    lotCount = getAppGlobalState(client, appID).get(b"lot_count", 0)
+
+    groups: List[List[transaction.SignedTransaction]] = []
+    # the funding payment and two transactions for each lot
+    for chunk in chunks(lots, (MAX_GROUP_SIZE - 1) // 2):
+        fundingAmount = 100_000 * len(chunk)
+        if lotCount == 0 and len(groups) == 0:
+            # min account balance
+            fundingAmount += 100_000
+
+        txns: List[transaction.Transaction] = [
+            transaction.PaymentTxn(
+                sender=sender.getAddress(),
+                receiver=appAddr,
+                amt=fundingAmount,
+                sp=suggestedParams,
+            )
+        ]
+        signers: List[Account] = [sender]
+        for lot in chunk:
+            txns.append(
+                transaction.ApplicationCallTxn(
+                    sender=sender.getAddress(),
+                    index=appID,
+                    on_complete=transaction.OnComplete.NoOpOC,
+                    app_args=[
+                        b"add_lot",
+                        lot.nftID.to_bytes(8, "big"),
+                        lot.reserve.to_bytes(8, "big"),
+                        lot.minBidIncrement.to_bytes(8, "big"),
+                    ],
+                    foreign_assets=[lot.nftID],
+                    # the app opts into the NFT with an inner transaction
+                    sp=withInnerTxnFees(suggestedParams, 1),
+                )
+            )
+            txns.append(
+                transaction.AssetTransferTxn(
+                    sender=lot.nftHolder.getAddress(),
+                    receiver=appAddr,
+                    index=lot.nftID,
+                    amt=lot.nftAmount,
+                    sp=suggestedParams,
+                )
+            )
+            signers += [sender, lot.nftHolder]
+
+        transaction.assign_group_id(txns)
+        groups.append(
+            [txn.sign(signer.getPrivateKey()) for txn, signer in zip(txns, signers)]
+        )
+
+    results = sendGroupsAndWait(client, groups)
+
+    errors: List[str] = []
+    for group in groups:
+        result = results[group[0].get_txid()]
+        if isinstance(result, Exception):
+            errors.append(str(result))
+
+    if len(errors) > 0:
+        raise Exception(
+            "Failed to add {} lots to auction {}: {}".format(
+                len(lots), appID, "; ".join(errors)
+            )
+        )
+
+    return list(range(lotCount, lotCount + len(lots)))
+
+
+def makeLotBidTxns(
+    appID: int,
+    lot: int,
+    bidder: str,
+    bidAmount: int,
+    appGlobalState: Dict[bytes, Union[int, bytes]],
+    suggestedParams: transaction.SuggestedParams,
+) -> List[transaction.Transaction]:
+    """Build the unsigned, grouped transactions that place a bid on a lot.
+
+    Both transactions must be signed by the bidder. See placeLotBid for a
+    description of the arguments.
+
+    Args:
+        appGlobalState: The current global state of the auction, used to find
+            the NFT and the previous lead bidder of the lot.
+    """
+    lots = getLots(appGlobalState)
+    if lot not in lots:
+        raise Exception("Auction {} has no open lot {}".format(appID, lot))
+    prevBidLeader = lots[lot].bidAccount
+
+    payTxn = transaction.PaymentTxn(
+        sender=bidder,
+        receiver=get_application_address(appID),
+        amt=bidAmount,
+        sp=suggestedParams,
+    )
+
+    appCallTxn = transaction.ApplicationCallTxn(
+        sender=bidder,
+        index=appID,
+        on_complete=transaction.OnComplete.NoOpOC,
+        app_args=[b"bid", lot.to_bytes(8, "big")],
+        foreign_assets=[lots[lot].nftID],
+        # must include the previous lead bidder here so the app can refund that bidder's payment
+        accounts=[prevBidLeader] if prevBidLeader is not None else [],
+        # the previous lead bidder is refunded with an inner transaction
+        sp=withInnerTxnFees(suggestedParams, 1 if prevBidLeader is not None else 0),
+    )
+
+    return transaction.assign_group_id([payTxn, appCallTxn])
+
+
+@traced
+def placeLotBid(
+    client: AlgodClient,
+    appID: int,
+    lot: int,
+    bidder: Account,
+    bidAmount: int,
+    paramsProvider: Optional[SuggestedParamsProvider] = None,
+) -> None:
+    """Place a bid on a lot of an active multi-lot auction.
+
+    Args:
+        client: An Algod client.
+        appID: The app ID of the auction.
+        lot: The index of the lot.
+        bidder: The account providing the bid.
+        bidAmount: The amount of the bid.
+        paramsProvider (optional): A provider of suggested params to share
+            between operations. If not given, params are fetched from the
+            client.
+    """
+    payTxn, appCallTxn = makeLotBidTxns(
+        appID=appID,
+        lot=lot,
+        bidder=bidder.getAddress(),
+        bidAmount=bidAmount,
+        appGlobalState=getAppGlobalState(client, appID),
+        suggestedParams=getSuggestedParams(client, paramsProvider),
+    )
+
+    signedPayTxn = payTxn.sign(bidder.getPrivateKey())
+    signedAppCallTxn = appCallTxn.sign(bidder.getPrivateKey())
+
+    client.send_transactions([signedPayTxn, signedAppCallTxn])
+
+    waitForTransaction(client, appCallTxn.get_txid())
+
+
+def makeCloseMultiLotAuctionTxns(
+    appID: int,
+    closer: str,
+    appGlobalState: Dict[bytes, Union[int, bytes]],
+    suggestedParams: transaction.SuggestedParams,
+) -> List[transaction.Transaction]:
+    """Build the unsigned transactions that settle every open lot of an auction
+    and then delete it.
+
+    The transactions are not grouped. See closeMultiLotAuction for a
+    description of the arguments.
+
+    Args:
+        appGlobalState: The current global state of the auction, used to find
+            the seller and the NFT and lead bidder of each lot.
+    """
+    seller = encoding.encode_address(appGlobalState[b"seller"])
+
+    txns: List[transaction.Transaction] = []
+    for lot, state in getLots(appGlobalState).items():
+        accounts = [seller]
+        # the app closes out of the NFT
+        innerTxnCount = 1
+        if state.bidAccount is not None:
+            accounts.append(state.bidAccount)
+            # the app either pays the winning bid to the seller or repays the
+            # lead bidder
+            innerTxnCount += 1
+
+        txns.append(
+            transaction.ApplicationCallTxn(
+                sender=closer,
+                index=appID,
+                on_complete=transaction.OnComplete.NoOpOC,
+                app_args=[b"settle", lot.to_bytes(8, "big")],
+                accounts=accounts,
+                foreign_assets=[state.nftID],
+                sp=withInnerTxnFees(suggestedParams, innerTxnCount),
+            )
+        )
+
+    txns.append(
+        transaction.ApplicationDeleteTxn(
+            sender=closer,
+            index=appID,
+            accounts=[seller],
+            # the app sends its remaining funds to the seller
+            sp=withInnerTxnFees(suggestedParams, 1),
+        )
+    )
+    return txns
+
+
+@traced
+def closeMultiLotAuction(
+    client: AlgodClient,
+    appID: int,
+    closer: Account,
+    paramsProvider: Optional[SuggestedParamsProvider] = None,
+) -> None:
+    """Settle every lot of a multi-lot auction and close it.
+
+    This action can only happen before an auction has begun, in which case it is
+    cancelled, or after an auction has ended.
+
+    Each lot that received a bid of at least its reserve sends its NFT to the
+    lead bidder and pays the winning bid to the seller. The NFT of every other
+    lot goes back to the seller, and its lead bidder, if any, is repaid. All
+    remaining funds are then transferred to the seller.
+
+    If a winner is not opted in to the NFT of their lot, only the seller or the
+    auction creator can settle it. The NFT then goes back to the seller and the
+    winner is repaid their bid.
+
+    The settle calls are packed into atomic groups of up to 16, with the delete
+    call at the end of the last group, and the groups are submitted back to back.
+
+    Args:
+        client: An Algod client.
+        appID: The app ID of the auction.
+        closer: The account initiating the close transactions. This must be
+            either the seller or auction creator if you wish to close the
+            auction before it starts. Otherwise, this can be any account.
+        paramsProvider (optional): A provider of suggested params to share
+            between operations. If not given, params are fetched from the
+            client.
+    """
+    txns = makeCloseMultiLotAuctionTxns(
+        appID=appID,
+        closer=closer.getAddress(),
+        appGlobalState=getAppGlobalState(client, appID),
+        suggestedParams=getSuggestedParams(client, paramsProvider),
+    )
+
+    groups: List[List[transaction.SignedTransaction]] = []
+    for chunk in chunks(txns, MAX_GROUP_SIZE):
+        group = list(chunk)
+        if len(group) > 1:
+            transaction.assign_group_id(group)
+        groups.append([txn.sign(closer.getPrivateKey()) for txn in group])
+
+    results = sendGroupsAndWait(client, groups)
+
+    errors: List[str] = []
+    for group in groups:
+        result = results[group[0].get_txid()]
+        if isinstance(result, Exception):
+            errors.append(str(result))
+
+    if len(errors) > 0:
+        raise Exception(
+            "Failed to close auction {}: {}".format(appID, "; ".join(errors))
+        )
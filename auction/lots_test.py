@@ -0,0 +1,286 @@
+import pytest
+
+from algosdk.error import AlgodHTTPError
+from algosdk.logic import get_application_address
+
+from .logs import LotBidLog, LotCloseLog, RefundLog, decodeLogs
+from .lots import (
+    MAX_LOTS,
+    AuctionLot,
+    LotState,
+    getLots,
+    createMultiLotAuctionApp,
+    addAuctionLots,
+    makeLotBidTxns,
+    placeLotBid,
+    makeCloseMultiLotAuctionTxns,
+    closeMultiLotAuction,
+)
+from .params import getSuggestedParams
+from .testing.resources import createDummyAsset, optInToAsset
+from .testing.simulator import Ledger, SimulatedAlgodClient
+from .util import getAppGlobalState, getBalances, waitForTransaction
+
+START_TIME = 1_600_000_000
+
+
+@pytest.fixture(autouse=True)
+def contractCache(tmp_path, monkeypatch):
+    monkeypatch.setenv("AUCTION_CONTRACT_CACHE", str(tmp_path))
+
+
+def createLots(client, ledger, creator, seller, count, lotCount=None):
+    nftIDs = [createDummyAsset(client, 1, seller) for _ in range(count)]
+    appID = createMultiLotAuctionApp(
+        client=client,
+        sender=creator,
+        seller=seller.getAddress(),
+        startTime=ledger.now() + 10,
+        endTime=ledger.now() + 70,
+        lotCount=lotCount or count,
+    )
+    lots = addAuctionLots(
+        client=client,
+        appID=appID,
+        sender=seller,
+        lots=[
+            AuctionLot(
+                nftHolder=seller,
+                nftID=nftID,
+                nftAmount=1,
+                reserve=1_000_000,
+                minBidIncrement=100_000,
+            )
+            for nftID in nftIDs
+        ],
+    )
+    return appID, nftIDs, lots
+
+
+def test_multi_lot_auction():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+
+    creator = ledger.createAccount()
+    seller = ledger.createAccount()
+    bidder1 = ledger.createAccount()
+    bidder2 = ledger.createAccount()
+
+    # more lots than fit in one group
+    appID, nftIDs, lots = createLots(client, ledger, creator, seller, 9)
+    appAddr = get_application_address(appID)
+
+    assert lots == list(range(9))
+    assert getLots(getAppGlobalState(client, appID)) == {
+        lot: LotState(
+            nftID=nftID,
+            reserve=1_000_000,
+            minBidIncrement=100_000,
+            bidAmount=0,
+            numBids=0,
+            bidAccount=None,
+        )
+        for lot, nftID in zip(lots, nftIDs)
+    }
+    assert getBalances(client, appAddr) == {
+        0: 100_000 + 9 * 100_000,
+        **{nftID: 1 for nftID in nftIDs},
+    }
+
+    for nftID in nftIDs[:2]:
+        optInToAsset(client, nftID, bidder2)
+
+    ledger.advanceTime(15)
+    # lot 0 is won by bidder2, lot 1 does not meet its reserve and the rest get
+    # no bids
+    placeLotBid(client, appID, 0, bidder1, 1_000_000)
+
+    payTxn, appCallTxn = makeLotBidTxns(
+        appID=appID,
+        lot=0,
+        bidder=bidder2.getAddress(),
+        bidAmount=1_200_000,
+        appGlobalState=getAppGlobalState(client, appID),
+        suggestedParams=getSuggestedParams(client),
+    )
+    client.send_transactions(
+        [
+            payTxn.sign(bidder2.getPrivateKey()),
+            appCallTxn.sign(bidder2.getPrivateKey()),
+        ]
+    )
+    response = waitForTransaction(client, appCallTxn.get_txid())
+    assert decodeLogs(response.logs) == [
+        RefundLog(receiver=bidder1.getAddress(), amount=1_000_000),
+        LotBidLog(lot=0, bidder=bidder2.getAddress(), amount=1_200_000, bidNumber=2),
+    ]
+
+    placeLotBid(client, appID, 1, bidder2, 500_000)
+    with pytest.raises(Exception):
+        # below the minimum increment
+        placeLotBid(client, appID, 1, bidder1, 550_000)
+
+    openLots = getLots(getAppGlobalState(client, appID))
+    assert openLots[0].bidAccount == bidder2.getAddress()
+    assert (openLots[0].bidAmount, openLots[0].numBids) == (1_200_000, 2)
+    assert (openLots[1].bidAmount, openLots[1].numBids) == (500_000, 1)
+
+    bidder2AlgosBefore = getBalances(client, bidder2.getAddress())[0]
+    sellerAlgosBefore = getBalances(client, seller.getAddress())[0]
+
+    ledger.advanceTime(60)
+    closer = ledger.createAccount()
+    closeMultiLotAuction(client, appID, closer)
+
+    with pytest.raises(AlgodHTTPError):
+        client.application_info(appID)
+
+    assert getBalances(client, appAddr)[0] == 0
+
+    bidder2Balances = getBalances(client, bidder2.getAddress())
+    # bidder2 won lot 0 and was repaid their bid on lot 1
+    assert bidder2Balances[nftIDs[0]] == 1
+    assert bidder2Balances[nftIDs[1]] == 0
+    assert bidder2Balances[0] - bidder2AlgosBefore == 500_000
+
+    sellerBalances = getBalances(client, seller.getAddress())
+    assert sellerBalances[nftIDs[0]] == 0
+    for nftID in nftIDs[1:]:
+        assert sellerBalances[nftID] == 1
+    # the seller receives the winning bid and the funding of the escrow account
+    assert sellerBalances[0] - sellerAlgosBefore == 1_200_000 + 10 * 100_000
+
+
+def test_settle_pays_seller():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+
+    creator = ledger.createAccount()
+    seller = ledger.createAccount()
+    bidder = ledger.createAccount()
+    appID, nftIDs, _ = createLots(client, ledger, creator, seller, 2)
+
+    optInToAsset(client, nftIDs[0], bidder)
+    ledger.advanceTime(15)
+    placeLotBid(client, appID, 0, bidder, 1_000_000)
+    ledger.advanceTime(60)
+
+    closer = ledger.createAccount()
+    sellerAlgosBefore = getBalances(client, seller.getAddress())[0]
+    settleTxn = makeCloseMultiLotAuctionTxns(
+        appID=appID,
+        closer=closer.getAddress(),
+        appGlobalState=getAppGlobalState(client, appID),
+        suggestedParams=getSuggestedParams(client),
+    )[0]
+    client.send_transaction(settleTxn.sign(closer.getPrivateKey()))
+    response = waitForTransaction(client, settleTxn.get_txid())
+
+    # the winning bid is paid as soon as its lot is settled
+    assert decodeLogs(response.logs) == [
+        LotCloseLog(lot=0, winner=bidder.getAddress(), winningBidAmount=1_000_000)
+    ]
+    assert getBalances(client, seller.getAddress())[0] - sellerAlgosBefore == 1_000_000
+    assert getBalances(client, bidder.getAddress())[nftIDs[0]] == 1
+
+
+def test_winner_not_opted_in():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+
+    creator = ledger.createAccount()
+    seller = ledger.createAccount()
+    bidder = ledger.createAccount()
+    appID, nftIDs, _ = createLots(client, ledger, creator, seller, 1)
+
+    ledger.advanceTime(15)
+    placeLotBid(client, appID, 0, bidder, 1_000_000)
+    ledger.advanceTime(60)
+
+    # the winner cannot receive the NFT, so only the seller or creator can settle
+    closer = ledger.createAccount()
+    with pytest.raises(Exception):
+        closeMultiLotAuction(client, appID, closer)
+    assert len(getLots(getAppGlobalState(client, appID))) == 1
+
+    bidderAlgosBefore = getBalances(client, bidder.getAddress())[0]
+    closeMultiLotAuction(client, appID, seller)
+
+    with pytest.raises(AlgodHTTPError):
+        client.application_info(appID)
+    assert getBalances(client, seller.getAddress())[nftIDs[0]] == 1
+    assert getBalances(client, bidder.getAddress())[0] - bidderAlgosBefore == 1_000_000
+
+
+def test_cancel_before_start():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+
+    creator = ledger.createAccount()
+    seller = ledger.createAccount()
+    appID, nftIDs, _ = createLots(client, ledger, creator, seller, 2)
+
+    other = ledger.createAccount()
+    with pytest.raises(Exception):
+        closeMultiLotAuction(client, appID, other)
+
+    closeMultiLotAuction(client, appID, creator)
+
+    with pytest.raises(AlgodHTTPError):
+        client.application_info(appID)
+
+    sellerBalances = getBalances(client, seller.getAddress())
+    for nftID in nftIDs:
+        assert sellerBalances[nftID] == 1
+
+
+def test_close_while_running():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+
+    creator = ledger.createAccount()
+    seller = ledger.createAccount()
+    appID, _, _ = createLots(client, ledger, creator, seller, 1)
+
+    ledger.advanceTime(15)
+    with pytest.raises(Exception):
+        closeMultiLotAuction(client, appID, seller)
+
+    assert len(getLots(getAppGlobalState(client, appID))) == 1
+
+
+def test_lot_limits():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+
+    creator = ledger.createAccount()
+    seller = ledger.createAccount()
+
+    with pytest.raises(Exception):
+        createMultiLotAuctionApp(
+            client=client,
+            sender=creator,
+            seller=seller.getAddress(),
+            startTime=ledger.now() + 10,
+            endTime=ledger.now() + 70,
+            lotCount=MAX_LOTS + 1,
+        )
+
+    appID, nftIDs, _ = createLots(client, ledger, creator, seller, 1)
+    nftID = createDummyAsset(client, 1, seller)
+
+    # the schema has no room for another lot
+    with pytest.raises(Exception):
+        addAuctionLots(
+            client, appID, seller, [AuctionLot(seller, nftID, 1, 1_000_000, 100_000)]
+        )
+
+    # the same NFT cannot be auctioned twice
+    appID, nftIDs, _ = createLots(client, ledger, creator, seller, 1, lotCount=2)
+    with pytest.raises(Exception):
+        addAuctionLots(
+            client,
+            appID,
+            seller,
+            [AuctionLot(seller, nftIDs[0], 0, 1_000_000, 100_000)],
+        )
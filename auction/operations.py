@@ -1,29 +1,88 @@
-from typing import Tuple, List
+from typing import (
+    Tuple,
+    List,
+    Optional,
+    Dict,
+    Union,
+    NamedTuple,
+    Sequence,
+    TypeVar,
+    cast,
+)
+from concurrent.futures import Future, ThreadPoolExecutor
+from copy import copy
 
 from algosdk.v2client.algod import AlgodClient
 from algosdk.future import transaction
 from algosdk.logic import get_application_address
-from algosdk import account, encoding
+from algosdk import account, constants, encoding, error
 
 from pyteal import compileTeal, Mode
 
 from .account import Account
+from .cache import ProgramCache
 from .contracts import approval_program, clear_state_program
+from .params import SuggestedParamsProvider, getSuggestedParams
+from .state import AuctionStateCache
+from .tracing import traced
 from .util import (
+    PendingTxnResponse,
     waitForTransaction,
+    waitForTransactions,
     fullyCompileContract,
     getAppGlobalState,
+    getLastBlockTimestamp,
+    decodeState,
 )
+from .watcher import ConfirmationWatcher
 
 APPROVAL_PROGRAM = b""
 CLEAR_STATE_PROGRAM = b""
 
+PULL_REFUND_APPROVAL_PROGRAM = b""
+PULL_REFUND_CLEAR_STATE_PROGRAM = b""
+
+# the maximum number of transactions in an atomic group
+MAX_GROUP_SIZE = 16
+
+# the number of requests closeAuctions makes at the same time
+DEFAULT_CLOSE_CONCURRENCY = 8
+
+# the number of groups createAuctionApps and setupAuctionApps submit at the same
+# time
+DEFAULT_SUBMIT_CONCURRENCY = 8
+
+# the number of other accounts an app call can refer to, and so the number of
+# bidders a single refund call can pay out
+MAX_REFUNDS_PER_CALL = 4
+
+# works out why bids submitted with submitBid were rejected. This takes algod
+# requests, which must not hold up the thread of a ConfirmationWatcher
+BID_REJECTION_EXECUTOR = ThreadPoolExecutor(
+    max_workers=4, thread_name_prefix="BidRejection"
+)
+
 
-def getContracts(client: AlgodClient) -> Tuple[bytes, bytes]:
+def getContracts(
+    client: Optional[AlgodClient],
+    cache: Optional[ProgramCache] = None,
+    pullRefunds: bool = False,
+) -> Tuple[bytes, bytes]:
     """Get the compiled TEAL contracts for the auction.
 
+    Compiled programs are kept in memory for the lifetime of the process and in
+    an on-disk cache shared by all processes, so only the first process to see a
+    given version of the contracts needs to ask algod to compile them.
+
     Args:
         client: An algod client that has the ability to compile TEAL programs.
+            If None, the programs are assembled in-process instead, which does
+            not require a node.
+        cache (optional): The on-disk program cache to use. Defaults to the
+            directory named by the AUCTION_CONTRACT_CACHE environment variable,
+            or ~/.cache/auction-demo if it is not set.
+        pullRefunds (optional): Get the contracts of auctions with pull
+            refunds. See createAuctionApp. Defaults to False.
 
     Returns:
         A tuple of 2 byte strings. The first is the approval program, and the
@@ -31,14 +90,181 @@ def getContracts(client: AlgodClient) -> Tuple[bytes, bytes]:
     """
     global APPROVAL_PROGRAM
     global CLEAR_STATE_PROGRAM
+    global PULL_REFUND_APPROVAL_PROGRAM
+    global PULL_REFUND_CLEAR_STATE_PROGRAM
+
+    if pullRefunds:
+        if len(PULL_REFUND_APPROVAL_PROGRAM) == 0:
+            if cache is None:
+                cache = ProgramCache()
+            PULL_REFUND_APPROVAL_PROGRAM = fullyCompileContract(
+                client, approval_program(pull_refunds=True), cache
+            )
+            PULL_REFUND_CLEAR_STATE_PROGRAM = fullyCompileContract(
+                client, clear_state_program(pull_refunds=True), cache
+            )
+        return PULL_REFUND_APPROVAL_PROGRAM, PULL_REFUND_CLEAR_STATE_PROGRAM
 
     if len(APPROVAL_PROGRAM) == 0:
-        APPROVAL_PROGRAM = fullyCompileContract(client, approval_program())
-        CLEAR_STATE_PROGRAM = fullyCompileContract(client, clear_state_program())
+        if cache is None:
+            cache = ProgramCache()
+        APPROVAL_PROGRAM = fullyCompileContract(client, approval_program(), cache)
+        CLEAR_STATE_PROGRAM = fullyCompileContract(client, clear_state_program(), cache)
 
     return APPROVAL_PROGRAM, CLEAR_STATE_PROGRAM
 
 
+def getApprovalPrograms(client: Optional[AlgodClient]) -> List[bytes]:
+    """Get the compiled approval programs of auctions with and without pull
+    refunds, which is how apps are recognized as auctions. See getContracts."""
+    return [getContracts(client)[0], getContracts(client, pullRefunds=True)[0]]
+
+
+T = TypeVar("T")
+
+
+def chunks(items: Sequence[T], size: int) -> List[Sequence[T]]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def withInnerTxnFees(
+    suggestedParams: transaction.SuggestedParams, innerTxnCount: int
+) -> transaction.SuggestedParams:
+    """Get params for an app call that pays the fees of the inner transactions
+    it sends through fee pooling.
+
+    The auction contract sets the fee of its inner transactions to 0, so the app
+    call must pay the minimum fee once for itself and once for each inner
+    transaction.
+
+    Args:
+        suggestedParams: The suggested params to start from.
+        innerTxnCount: The number of inner transactions the app call sends.
+
+    Returns:
+        A copy of the params with a flat fee.
+    """
+    minFee = suggestedParams.min_fee
+    if minFee is None:
+        minFee = constants.min_txn_fee
+
+    # without a flat fee, the fee of the params is a fee per byte
+    ownFee = suggestedParams.fee if suggestedParams.flat_fee else 0
+
+    params = copy(suggestedParams)
+    params.flat_fee = True
+    params.fee = max(ownFee, minFee) + minFee * innerTxnCount
+    return params
+
+
+def sendGroups(
+    client: AlgodClient,
+    groups: List[List[transaction.SignedTransaction]],
+    concurrency: int = 1,
+) -> List[Optional[Exception]]:
+    """Submit many transaction groups without waiting for them to be confirmed.
+
+    Args:
+        client: An algod client.
+        groups: The groups to submit.
+        concurrency (optional): The number of groups to submit at the same
+            time. Defaults to 1, which submits them back to back.
+
+    Returns:
+        A list with one entry for each group, in the same order. Each entry is
+        None if the group was accepted, or the Exception it was rejected with.
+    """
+
+    def send(group: List[transaction.SignedTransaction]) -> Optional[Exception]:
+        try:
+            client.send_transactions(group)
+        except Exception as e:
+            return e
+        return None
+
+    if concurrency <= 1 or len(groups) <= 1:
+        return [send(group) for group in groups]
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(send, groups))
+
+
+def sendGroupsAndWait(
+    client: AlgodClient,
+    groups: List[List[transaction.SignedTransaction]],
+    concurrency: int = 1,
+) -> Dict[str, Union[PendingTxnResponse, Exception]]:
+    """Submit many transaction groups and wait for all of them. See sendGroups
+    for the concurrency argument.
+
+    Returns:
+        A dictionary from the ID of each transaction to its PendingTxnResponse,
+        or to an Exception if its group could not be submitted or confirmed.
+    """
+    results: Dict[str, Union[PendingTxnResponse, Exception]] = dict()
+    submitted: List[str] = []
+
+    for group, sendError in zip(groups, sendGroups(client, groups, concurrency)):
+        if sendError is not None:
+            for signedTxn in group:
+                results[signedTxn.get_txid()] = sendError
+            continue
+        submitted += [signedTxn.get_txid() for signedTxn in group]
+
+    if len(submitted) > 0:
+        for txID, result in zip(submitted, waitForTransactions(client, submitted)):
+            results[txID] = result
+
+    return results
+
+
+def makeCreateAuctionTxn(
+    sender: str,
+    seller: str,
+    nftID: int,
+    startTime: int,
+    endTime: int,
+    reserve: int,
+    minBidIncrement: int,
+    approval: bytes,
+    clear: bytes,
+    suggestedParams: transaction.SuggestedParams,
+    pullRefunds: bool = False,
+) -> transaction.ApplicationCreateTxn:
+    """Build the unsigned transaction that creates an auction.
+
+    See createAuctionApp for a description of the arguments.
+    """
+    if pullRefunds:
+        # the total credit owed to bidders, and the deposit of each bidder
+        globalSchema = transaction.StateSchema(num_uints=8, num_byte_slices=2)
+        localSchema = transaction.StateSchema(num_uints=1, num_byte_slices=0)
+    else:
+        globalSchema = transaction.StateSchema(num_uints=7, num_byte_slices=2)
+        localSchema = transaction.StateSchema(num_uints=0, num_byte_slices=0)
+
+    app_args = [
+        encoding.decode_address(seller),
+        nftID.to_bytes(8, "big"),
+        startTime.to_bytes(8, "big"),
+        endTime.to_bytes(8, "big"),
+        reserve.to_bytes(8, "big"),
+        minBidIncrement.to_bytes(8, "big"),
+    ]
+
+    return transaction.ApplicationCreateTxn(
+        sender=sender,
+        on_complete=transaction.OnComplete.NoOpOC,
+        approval_program=approval,
+        clear_program=clear,
+        global_schema=globalSchema,
+        local_schema=localSchema,
+        app_args=app_args,
+        sp=suggestedParams,
+    )
+
+
+@traced
 def createAuctionApp(
     client: AlgodClient,
     sender: Account,
@@ -48,6 +274,8 @@ def createAuctionApp(
     endTime: int,
     reserve: int,
     minBidIncrement: int,
+    paramsProvider: Optional[SuggestedParamsProvider] = None,
+    pullRefunds: bool = False,
 ) -> int:
     """Create a new auction.
 
@@ -67,33 +295,35 @@ def createAuctionApp(
             the NFT will return to the seller.
         minBidIncrement: The minimum different required between a new bid and
             the current leading bid.
+        paramsProvider (optional): A provider of suggested params to share
+            between operations. If not given, params are fetched from the
+            client.
+        pullRefunds (optional): If True, a bidder who is outbid is not repaid
+            right away. Their bid is kept as credit that they claim with
+            claimRefund, or that anyone pays out with sweepRefunds, so a bid
+            does not depend on the current lead bidder. Bidders must opt into
+            the auction with optInToAuction before bidding, and all credit must
+            be paid out before the auction can be closed. A bidder that clears
+            their local state forfeits their credit to the seller. Defaults to
+            False.
 
     Returns:
         The ID of the newly created auction app.
     """
-    approval, clear = getContracts(client)
+    approval, clear = getContracts(client, pullRefunds=pullRefunds)
 
-    globalSchema = transaction.StateSchema(num_uints=7, num_byte_slices=2)
-    localSchema = transaction.StateSchema(num_uints=0, num_byte_slices=0)
-
-    app_args = [
-        encoding.decode_address(seller),
-        nftID.to_bytes(8, "big"),
-        startTime.to_bytes(8, "big"),
-        endTime.to_bytes(8, "big"),
-        reserve.to_bytes(8, "big"),
-        minBidIncrement.to_bytes(8, "big"),
-    ]
-
-    txn = transaction.ApplicationCreateTxn(
+    txn = makeCreateAuctionTxn(
         sender=sender.getAddress(),
-        on_complete=transaction.OnComplete.NoOpOC,
-        approval_program=approval,
-        clear_program=clear,
-        global_schema=globalSchema,
-        local_schema=localSchema,
-        app_args=app_args,
-        sp=client.suggested_params(),
+        seller=seller,
+        nftID=nftID,
+        startTime=startTime,
+        endTime=endTime,
+        reserve=reserve,
+        minBidIncrement=minBidIncrement,
+        approval=approval,
+        clear=clear,
+        suggestedParams=getSuggestedParams(client, paramsProvider),
+        pullRefunds=pullRefunds,
     )
 
     signedTxn = txn.sign(sender.getPrivateKey())
@@ -105,71 +335,182 @@ def createAuctionApp(
     return response.applicationIndex
 
 
-def setupAuctionApp(
-    client: AlgodClient,
-    appID: int,
-    funder: Account,
-    nftHolder: Account,
-    nftID: int,
-    nftAmount: int,
-) -> None:
-    """Finish setting up an auction.
+class AuctionParams(NamedTuple):
+    """The parameters of an auction to create. See createAuctionApp for a
+    description of each field."""
 
-    This operation funds the app auction escrow account, opts that account into
-    the NFT, and sends the NFT to the escrow account, all in one atomic
-    transaction group. The auction must not have started yet.
+    seller: str
+    nftID: int
+    startTime: int
+    endTime: int
+    reserve: int
+    minBidIncrement: int
 
-    The escrow account requires a total of 0.203 Algos for funding. See the code
-    below for a breakdown of this amount.
+
+@traced
+def createAuctionApps(
+    client: AlgodClient,
+    sender: Account,
+    auctions: Sequence[AuctionParams],
+    paramsProvider: Optional[SuggestedParamsProvider] = None,
+    concurrency: int = DEFAULT_SUBMIT_CONCURRENCY,
+) -> List[int]:
+    """Create many auctions at once.
+
+    The create transactions are packed into atomic groups of up to 16, the
+    groups are submitted concurrently, and then they are confirmed together.
 
     Args:
         client: An algod client.
-        appID: The app ID of the auction.
-        funder: The account providing the funding for the escrow account.
-        nftHolder: The account holding the NFT.
-        nftID: The NFT ID.
-        nftAmount: The NFT amount being auctioned. Some NFTs has a total supply
-            of 1, while others are fractional NFTs with a greater total supply,
-            so use a value that makes sense for the NFT being auctioned.
+        sender: The account that will create the auction applications.
+        auctions: The parameters of each auction to create.
+        paramsProvider (optional): A provider of suggested params to share
+            between operations. If not given, params are fetched from the
+            client.
+        concurrency (optional): The number of groups to submit at the same
+            time. Defaults to 8.
+
+    Returns:
+        The IDs of the newly created auction apps, in the same order as
+        auctions.
     """
-    appAddr = get_application_address(appID)
+    approval, clear = getContracts(client)
+    suggestedParams = getSuggestedParams(client, paramsProvider)
+
+    groups: List[List[transaction.SignedTransaction]] = []
+    for chunk in chunks(auctions, MAX_GROUP_SIZE):
+        txns: List[transaction.Transaction] = [
+            makeCreateAuctionTxn(
+                sender=sender.getAddress(),
+                seller=auction.seller,
+                nftID=auction.nftID,
+                startTime=auction.startTime,
+                endTime=auction.endTime,
+                reserve=auction.reserve,
+                minBidIncrement=auction.minBidIncrement,
+                approval=approval,
+                clear=clear,
+                suggestedParams=suggestedParams,
+            )
+            for auction in chunk
+        ]
+        if len(txns) > 1:
+            transaction.assign_group_id(txns)
+        groups.append([txn.sign(sender.getPrivateKey()) for txn in txns])
+
+    results = sendGroupsAndWait(client, groups, concurrency)
+
+    appIDs: List[int] = []
+    errors: List[str] = []
+    for group in groups:
+        for signedTxn in group:
+            result = results[signedTxn.get_txid()]
+            if isinstance(result, Exception):
+                errors.append(str(result))
+            else:
+                assert result.applicationIndex is not None
+                appIDs.append(result.applicationIndex)
 
-    suggestedParams = client.suggested_params()
+    if len(errors) > 0:
+        raise Exception(
+            "Failed to create {} of {} auctions (created: {}): {}".format(
+                len(errors), len(auctions), appIDs, "; ".join(dict.fromkeys(errors))
+            )
+        )
+
+    return appIDs
+
+
+def makeSetupAuctionTxns(
+    appID: int,
+    funder: str,
+    nftHolder: str,
+    nftID: int,
+    nftAmount: int,
+    suggestedParams: transaction.SuggestedParams,
+) -> List[transaction.Transaction]:
+    """Build the unsigned, grouped transactions that set up an auction.
+
+    The first two transactions must be signed by the funder and the last one by
+    the NFT holder. See setupAuctionApp for a description of the arguments.
+    """
+    appAddr = get_application_address(appID)
 
     fundingAmount = (
         # min account balance
         100_000
         # additional min balance to opt into NFT
         + 100_000
-        # 3 * min txn fee
-        + 3 * 1_000
     )
 
     fundAppTxn = transaction.PaymentTxn(
-        sender=funder.getAddress(),
+        sender=funder,
         receiver=appAddr,
         amt=fundingAmount,
         sp=suggestedParams,
     )
 
     setupTxn = transaction.ApplicationCallTxn(
-        sender=funder.getAddress(),
+        sender=funder,
         index=appID,
         on_complete=transaction.OnComplete.NoOpOC,
         app_args=[b"setup"],
         foreign_assets=[nftID],
-        sp=suggestedParams,
+        # the app opts into the NFT with an inner transaction
+        sp=withInnerTxnFees(suggestedParams, 1),
     )
 
     fundNftTxn = transaction.AssetTransferTxn(
-        sender=nftHolder.getAddress(),
+        sender=nftHolder,
         receiver=appAddr,
         index=nftID,
         amt=nftAmount,
         sp=suggestedParams,
     )
 
-    transaction.assign_group_id([fundAppTxn, setupTxn, fundNftTxn])
+    return transaction.assign_group_id([fundAppTxn, setupTxn, fundNftTxn])
+
+
+@traced
+def setupAuctionApp(
+    client: AlgodClient,
+    appID: int,
+    funder: Account,
+    nftHolder: Account,
+    nftID: int,
+    nftAmount: int,
+    paramsProvider: Optional[SuggestedParamsProvider] = None,
+) -> None:
+    """Finish setting up an auction.
+
+    This operation funds the app auction escrow account, opts that account into
+    the NFT, and sends the NFT to the escrow account, all in one atomic
+    transaction group. The auction must not have started yet.
+
+    The escrow account requires a total of 0.203 Algos for funding. See the code
+    in makeSetupAuctionTxns for a breakdown of this amount.
+
+    Args:
+        client: An algod client.
+        appID: The app ID of the auction.
+        funder: The account providing the funding for the escrow account.
+        nftHolder: The account holding the NFT.
+        nftID: The NFT ID.
+        nftAmount: The NFT amount being auctioned. Some NFTs has a total supply
+            of 1, while others are fractional NFTs with a greater total supply,
+            so use a value that makes sense for the NFT being auctioned.
+        paramsProvider (optional): A provider of suggested params to share
+            between operations. If not given, params are fetched from the
+            client.
+    """
+    fundAppTxn, setupTxn, fundNftTxn = makeSetupAuctionTxns(
+        appID=appID,
+        funder=funder.getAddress(),
+        nftHolder=nftHolder.getAddress(),
+        nftID=nftID,
+        nftAmount=nftAmount,
+        suggestedParams=getSuggestedParams(client, paramsProvider),
+    )
 
     signedFundAppTxn = fundAppTxn.sign(funder.getPrivateKey())
     signedSetupTxn = setupTxn.sign(funder.getPrivateKey())
@@ -180,57 +521,603 @@ def setupAuctionApp(
     waitForTransaction(client, signedFundAppTxn.get_txid())
 
 
-def placeBid(client: AlgodClient, appID: int, bidder: Account, bidAmount: int) -> None:
-    """Place a bid on an active auction.
+class AuctionSetup(NamedTuple):
+    """The details of an auction to set up. See setupAuctionApp for a
+    description of each field."""
+
+    appID: int
+    nftHolder: Account
+    nftID: int
+    nftAmount: int
+
+
+@traced
+def setupAuctionApps(
+    client: AlgodClient,
+    funder: Account,
+    setups: Sequence[AuctionSetup],
+    paramsProvider: Optional[SuggestedParamsProvider] = None,
+    concurrency: int = DEFAULT_SUBMIT_CONCURRENCY,
+) -> None:
+    """Finish setting up many auctions at once.
+
+    The three transactions that set up each auction are packed into atomic
+    groups holding up to 5 auctions, the groups are submitted concurrently, and
+    then they are confirmed together. Note that if setting up one auction fails,
+    the other auctions in its group are not set up either.
 
     Args:
-        client: An Algod client.
-        appID: The app ID of the auction.
-        bidder: The account providing the bid.
-        bidAmount: The amount of the bid.
+        client: An algod client.
+        funder: The account providing the funding for every escrow account.
+        setups: The auctions to set up.
+        paramsProvider (optional): A provider of suggested params to share
+            between operations. If not given, params are fetched from the
+            client.
+        concurrency (optional): The number of groups to submit at the same
+            time. Defaults to 8.
+    """
+    suggestedParams = getSuggestedParams(client, paramsProvider)
+
+    groups: List[List[transaction.SignedTransaction]] = []
+    for chunk in chunks(setups, MAX_GROUP_SIZE // 3):
+        txns: List[transaction.Transaction] = []
+        signers: List[Account] = []
+        for setup in chunk:
+            txns += makeSetupAuctionTxns(
+                appID=setup.appID,
+                funder=funder.getAddress(),
+                nftHolder=setup.nftHolder.getAddress(),
+                nftID=setup.nftID,
+                nftAmount=setup.nftAmount,
+                suggestedParams=suggestedParams,
+            )
+            signers += [funder, funder, setup.nftHolder]
+
+        for txn in txns:
+            txn.group = None
+        transaction.assign_group_id(txns)
+        groups.append(
+            [txn.sign(signer.getPrivateKey()) for txn, signer in zip(txns, signers)]
+        )
+
+    results = sendGroupsAndWait(client, groups, concurrency)
+
+    failed: List[int] = []
+    errors: List[str] = []
+    for chunk, group in zip(chunks(setups, MAX_GROUP_SIZE // 3), groups):
+        result = results[group[0].get_txid()]
+        if isinstance(result, Exception):
+            failed += [setup.appID for setup in chunk]
+            errors.append(str(result))
+
+    if len(failed) > 0:
+        raise Exception(
+            "Failed to set up auctions {}: {}".format(failed, "; ".join(errors))
+        )
+
+
+def getAuctionGlobalState(
+    client: AlgodClient, appID: int, stateCache: Optional[AuctionStateCache] = None
+) -> Dict[bytes, Union[int, bytes]]:
+    if stateCache is not None:
+        return stateCache.get(appID)
+    return getAppGlobalState(client, appID)
+
+
+def makeBidTxns(
+    appID: int,
+    bidder: str,
+    bidAmount: int,
+    appGlobalState: Dict[bytes, Union[int, bytes]],
+    suggestedParams: transaction.SuggestedParams,
+) -> List[transaction.Transaction]:
+    """Build the unsigned, grouped transactions that place a bid.
+
+    Both transactions must be signed by the bidder. See placeBid for a
+    description of the arguments.
+
+    Args:
+        appGlobalState: The current global state of the auction, used to find
+            the NFT and the previous lead bidder. With pull refunds only the
+            NFT is used, which never changes, so the state may be out of date.
     """
     appAddr = get_application_address(appID)
-    appGlobalState = getAppGlobalState(client, appID)
 
     nftID = appGlobalState[b"nft_id"]
 
-    if any(appGlobalState[b"bid_account"]):
+    if b"owed" in appGlobalState:
+        # with pull refunds, the previous lead bid becomes credit instead of
+        # being repaid
+        prevBidLeader = None
+    elif any(appGlobalState[b"bid_account"]):
         # if "bid_account" is not the zero address
         prevBidLeader = encoding.encode_address(appGlobalState[b"bid_account"])
     else:
         prevBidLeader = None
 
-    suggestedParams = client.suggested_params()
-
     payTxn = transaction.PaymentTxn(
-        sender=bidder.getAddress(),
+        sender=bidder,
         receiver=appAddr,
         amt=bidAmount,
         sp=suggestedParams,
     )
 
     appCallTxn = transaction.ApplicationCallTxn(
-        sender=bidder.getAddress(),
+        sender=bidder,
         index=appID,
         on_complete=transaction.OnComplete.NoOpOC,
         app_args=[b"bid"],
         foreign_assets=[nftID],
         # must include the previous lead bidder here to the app can refund that bidder's payment
         accounts=[prevBidLeader] if prevBidLeader is not None else [],
-        sp=suggestedParams,
+        # the previous lead bidder is refunded with an inner transaction
+        sp=withInnerTxnFees(suggestedParams, 1 if prevBidLeader is not None else 0),
+    )
+
+    return transaction.assign_group_id([payTxn, appCallTxn])
+
+
+@traced
+def placeBid(
+    client: AlgodClient,
+    appID: int,
+    bidder: Account,
+    bidAmount: int,
+    paramsProvider: Optional[SuggestedParamsProvider] = None,
+    stateCache: Optional[AuctionStateCache] = None,
+) -> None:
+    """Place a bid on an active auction.
+
+    Args:
+        client: An Algod client.
+        appID: The app ID of the auction.
+        bidder: The account providing the bid.
+        bidAmount: The amount of the bid.
+        paramsProvider (optional): A provider of suggested params to share
+            between operations. If not given, params are fetched from the
+            client.
+        stateCache (optional): A cache of auction state to read the current
+            state of the auction from. If not given, the state is fetched from
+            the client.
+    """
+    appGlobalState = getAuctionGlobalState(client, appID, stateCache)
+
+    payTxn, appCallTxn = makeBidTxns(
+        appID=appID,
+        bidder=bidder.getAddress(),
+        bidAmount=bidAmount,
+        appGlobalState=appGlobalState,
+        suggestedParams=getSuggestedParams(client, paramsProvider),
     )
 
-    transaction.assign_group_id([payTxn, appCallTxn])
+    signedPayTxn = payTxn.sign(bidder.getPrivateKey())
+    signedAppCallTxn = appCallTxn.sign(bidder.getPrivateKey())
+
+    try:
+        client.send_transactions([signedPayTxn, signedAppCallTxn])
+
+        response = waitForTransaction(client, appCallTxn.get_txid())
+    except Exception:
+        if stateCache is not None:
+            # the cached state may have been out of date
+            stateCache.invalidate(appID)
+        raise
+
+    if stateCache is not None:
+        stateCache.applyResponse(appID, response)
+
+
+class BidRejectedError(Exception):
+    """A bid was not accepted by the auction."""
+
+
+class OutbidError(BidRejectedError):
+    """The bid is lower than the current lead bid plus the minimum increment."""
+
+
+class AuctionNotStartedError(BidRejectedError):
+    """The auction has not started yet."""
+
+
+class AuctionEndedError(BidRejectedError):
+    """The auction has ended or no longer exists."""
+
+
+class BidPoolError(BidRejectedError):
+    """The transaction pool rejected the bid for a reason other than the auction
+    contract, for example because the bidder cannot afford it."""
+
+
+def classifyBidRejection(
+    client: AlgodClient,
+    appID: int,
+    bidAmount: int,
+    cause: Exception,
+    stateCache: Optional[AuctionStateCache] = None,
+) -> BidRejectedError:
+    """Work out why a bid was rejected by looking at the current state of its
+    auction."""
+    if stateCache is not None:
+        # the cached state may have been out of date
+        stateCache.invalidate(appID)
+
+    message = str(cause)
+    rejected: BidRejectedError
+    try:
+        appGlobalState = getAppGlobalState(client, appID)
+        _, timestamp = getLastBlockTimestamp(client)
+    except error.AlgodHTTPError as e:
+        if e.code == 404:
+            rejected = AuctionEndedError("The auction no longer exists")
+        else:
+            rejected = BidRejectedError(message)
+        rejected.__cause__ = cause
+        return rejected
+    except Exception:
+        rejected = BidRejectedError(message)
+        rejected.__cause__ = cause
+        return rejected
+
+    leadBid = appGlobalState.get(b"bid_amount", 0)
+    minBidIncrement = appGlobalState[b"min_bid_inc"]
+
+    if appGlobalState[b"end"] <= timestamp:
+        rejected = AuctionEndedError("The auction has ended")
+    elif timestamp < appGlobalState[b"start"]:
+        rejected = AuctionNotStartedError("The auction has not started")
+    elif bidAmount < leadBid + minBidIncrement:
+        rejected = OutbidError(
+            "The bid must be at least {}".format(leadBid + minBidIncrement)
+        )
+    elif "logic eval" in message or "rejected by ApprovalProgram" in message:
+        rejected = BidRejectedError(message)
+    else:
+        rejected = BidPoolError(message)
+
+    rejected.__cause__ = cause
+    return rejected
+
+
+@traced
+def submitBid(
+    client: AlgodClient,
+    appID: int,
+    bidder: Account,
+    bidAmount: int,
+    watcher: ConfirmationWatcher,
+    paramsProvider: Optional[SuggestedParamsProvider] = None,
+    stateCache: Optional[AuctionStateCache] = None,
+) -> "Future[PendingTxnResponse]":
+    """Place a bid on an active auction without waiting for it to be confirmed.
+
+    This returns as soon as the bid has been submitted, so many bids on many
+    auctions can be in flight at once.
+
+    Args:
+        client: An Algod client.
+        appID: The app ID of the auction.
+        bidder: The account providing the bid.
+        bidAmount: The amount of the bid.
+        watcher: The watcher that waits for the bid to be confirmed.
+        paramsProvider (optional): A provider of suggested params to share
+            between operations. If not given, params are fetched from the
+            client.
+        stateCache (optional): A cache of auction state to read the current
+            state of the auction from. If not given, the state is fetched from
+            the client.
+
+    Returns:
+        A future that resolves to the response of the confirmed app call. If the
+        bid is rejected, the future raises a BidRejectedError instead: an
+        OutbidError, AuctionNotStartedError, AuctionEndedError or BidPoolError
+        when the reason is known.
+    """
+    result: "Future[PendingTxnResponse]" = Future()
+
+    appGlobalState = getAuctionGlobalState(client, appID, stateCache)
+
+    minBid = appGlobalState.get(b"bid_amount", 0) + appGlobalState[b"min_bid_inc"]
+    if bidAmount < minBid:
+        # don't pay for a bid that the contract will reject
+        result.set_exception(OutbidError("The bid must be at least {}".format(minBid)))
+        return result
+
+    payTxn, appCallTxn = makeBidTxns(
+        appID=appID,
+        bidder=bidder.getAddress(),
+        bidAmount=bidAmount,
+        appGlobalState=appGlobalState,
+        suggestedParams=getSuggestedParams(client, paramsProvider),
+    )
 
     signedPayTxn = payTxn.sign(bidder.getPrivateKey())
     signedAppCallTxn = appCallTxn.sign(bidder.getPrivateKey())
 
-    client.send_transactions([signedPayTxn, signedAppCallTxn])
+    try:
+        client.send_transactions([signedPayTxn, signedAppCallTxn])
+    except Exception as e:
+        result.set_exception(
+            classifyBidRejection(client, appID, bidAmount, e, stateCache)
+        )
+        return result
+
+    def reject(cause: BaseException) -> None:
+        try:
+            rejected = classifyBidRejection(
+                client, appID, bidAmount, cast(Exception, cause), stateCache
+            )
+        except Exception as e:
+            rejected = BidRejectedError(str(e))
+            rejected.__cause__ = cause
+        result.set_exception(rejected)
+
+    def onConfirmation(confirmation: "Future[PendingTxnResponse]") -> None:
+        # this runs on the thread of the watcher, so it must not wait on algod
+        e = confirmation.exception()
+        if e is not None:
+            BID_REJECTION_EXECUTOR.submit(reject, e)
+            return
+
+        response = confirmation.result()
+        if stateCache is not None:
+            stateCache.applyResponse(appID, response)
+        result.set_result(response)
+
+    watcher.watch(signedAppCallTxn.get_txid()).add_done_callback(onConfirmation)
+
+    return result
+
+
+@traced
+def optInToAuction(
+    client: AlgodClient,
+    appID: int,
+    bidder: Account,
+    paramsProvider: Optional[SuggestedParamsProvider] = None,
+) -> None:
+    """Opt into an auction with pull refunds, which a bidder must do before
+    their first bid on it.
+
+    Args:
+        client: An algod client.
+        appID: The app ID of the auction.
+        bidder: The account that will bid.
+        paramsProvider (optional): A provider of suggested params to share
+            between operations. If not given, params are fetched from the
+            client.
+    """
+    txn = transaction.ApplicationOptInTxn(
+        sender=bidder.getAddress(),
+        index=appID,
+        sp=getSuggestedParams(client, paramsProvider),
+    )
+    signedTxn = txn.sign(bidder.getPrivateKey())
+
+    client.send_transaction(signedTxn)
+
+    waitForTransaction(client, signedTxn.get_txid())
+
+
+def getRefundCredit(
+    client: AlgodClient,
+    appID: int,
+    bidder: str,
+    appGlobalState: Optional[Dict[bytes, Union[int, bytes]]] = None,
+) -> int:
+    """Get the credit a bidder can claim from an auction with pull refunds.
+
+    Args:
+        client: An algod client.
+        appID: The app ID of the auction.
+        bidder: The address of the bidder.
+        appGlobalState (optional): The current global state of the auction. If
+            not given, it is fetched from the client.
+
+    Returns:
+        Everything the bidder has paid into the auction and not been refunded,
+        except for their lead bid if they are the lead bidder. 0 if the bidder
+        has not opted into the auction.
+    """
+    localStates = client.account_info(bidder).get("apps-local-state", [])
+    localState = next((state for state in localStates if state["id"] == appID), None)
+    if localState is None:
+        return 0
+    deposit = decodeState(localState.get("key-value", [])).get(b"deposit", 0)
+
+    if appGlobalState is None:
+        appGlobalState = getAppGlobalState(client, appID)
+    if appGlobalState[b"bid_account"] == encoding.decode_address(bidder):
+        deposit -= appGlobalState.get(b"bid_amount", 0)
+    return deposit
+
+
+def makeRefundTxn(
+    appID: int,
+    sender: str,
+    bidders: Sequence[str],
+    suggestedParams: transaction.SuggestedParams,
+) -> transaction.ApplicationNoOpTxn:
+    """Build the unsigned transaction that pays out the credit of bidders in an
+    auction with pull refunds.
+
+    Args:
+        appID: The app ID of the auction.
+        sender: The address of the sender. If bidders is empty, the sender
+            claims their own credit.
+        bidders: The addresses of up to 4 bidders, each with credit to pay out.
+        suggestedParams: The suggested params to use.
+    """
+    return transaction.ApplicationNoOpTxn(
+        sender=sender,
+        index=appID,
+        app_args=[b"refund"],
+        accounts=list(bidders),
+        # each bidder is paid with an inner transaction
+        sp=withInnerTxnFees(suggestedParams, max(len(bidders), 1)),
+    )
+
+
+@traced
+def claimRefund(
+    client: AlgodClient,
+    appID: int,
+    bidder: Account,
+    paramsProvider: Optional[SuggestedParamsProvider] = None,
+) -> int:
+    """Claim the credit of a bidder who was outbid in an auction with pull
+    refunds.
+
+    Args:
+        client: An algod client.
+        appID: The app ID of the auction.
+        bidder: The bidder claiming their credit.
+        paramsProvider (optional): A provider of suggested params to share
+            between operations. If not given, params are fetched from the
+            client.
+
+    Returns:
+        The amount that was refunded. If this is 0, nothing was sent.
+    """
+    credit = getRefundCredit(client, appID, bidder.getAddress())
+    if credit == 0:
+        return 0
+
+    txn = makeRefundTxn(
+        appID=appID,
+        sender=bidder.getAddress(),
+        bidders=[],
+        suggestedParams=getSuggestedParams(client, paramsProvider),
+    )
+    signedTxn = txn.sign(bidder.getPrivateKey())
+
+    client.send_transaction(signedTxn)
+
+    waitForTransaction(client, signedTxn.get_txid())
+    return credit
+
+
+@traced
+def sweepRefunds(
+    client: AlgodClient,
+    appID: int,
+    sender: Account,
+    bidders: Sequence[str],
+    paramsProvider: Optional[SuggestedParamsProvider] = None,
+) -> Dict[str, int]:
+    """Pay out the credit of many bidders in an auction with pull refunds.
+
+    The credit of each bidder is read first, and bidders without credit are
+    skipped. The others are refunded by calls that each pay out up to 4
+    bidders, packed into atomic groups of up to 16 calls that are submitted
+    back to back and then confirmed together.
+
+    Args:
+        client: An algod client.
+        appID: The app ID of the auction.
+        sender: The account that sends the refund calls and pays their fees.
+        bidders: The addresses of the bidders to refund, for example every
+            account that has bid on the auction.
+        paramsProvider (optional): A provider of suggested params to share
+            between operations. If not given, params are fetched from the
+            client.
+
+    Returns:
+        A dictionary from the address of each bidder that was refunded to the
+        amount they received.
+    """
+    appGlobalState = getAppGlobalState(client, appID)
+    credits: Dict[str, int] = dict()
+    for bidder in dict.fromkeys(bidders):
+        credit = getRefundCredit(client, appID, bidder, appGlobalState)
+        if credit > 0:
+            credits[bidder] = credit
 
-    waitForTransaction(client, appCallTxn.get_txid())
+    suggestedParams = getSuggestedParams(client, paramsProvider)
+    txns = [
+        makeRefundTxn(
+            appID=appID,
+            sender=sender.getAddress(),
+            bidders=chunk,
+            suggestedParams=suggestedParams,
+        )
+        for chunk in chunks(list(credits.keys()), MAX_REFUNDS_PER_CALL)
+    ]
+
+    groups: List[List[transaction.SignedTransaction]] = []
+    for chunk in chunks(txns, MAX_GROUP_SIZE):
+        group = list(chunk)
+        if len(group) > 1:
+            transaction.assign_group_id(group)
+        groups.append([txn.sign(sender.getPrivateKey()) for txn in group])
+
+    results = sendGroupsAndWait(client, groups)
+
+    errors: List[str] = []
+    for group in groups:
+        result = results[group[0].get_txid()]
+        if isinstance(result, Exception):
+            errors.append(str(result))
+
+    if len(errors) > 0:
+        raise Exception(
+            "Failed to refund bidders of auction {}: {}".format(
+                appID, "; ".join(errors)
+            )
+        )
+
+    return credits
+
+
+def makeCloseAuctionTxn(
+    appID: int,
+    closer: str,
+    appGlobalState: Dict[bytes, Union[int, bytes]],
+    suggestedParams: transaction.SuggestedParams,
+) -> transaction.ApplicationDeleteTxn:
+    """Build the unsigned transaction that closes an auction.
+
+    See closeAuction for a description of the arguments.
+
+    Args:
+        appGlobalState: The current global state of the auction, used to find
+            the NFT, the seller and the lead bidder.
+    """
+    nftID = appGlobalState[b"nft_id"]
+
+    accounts: List[str] = [encoding.encode_address(appGlobalState[b"seller"])]
+
+    if appGlobalState[b"end"] == 0:
+        # a settled auction only sends its remaining funds to the seller
+        innerTxnCount = 1
+    else:
+        # the app closes out of the NFT and sends its remaining funds to the
+        # seller
+        innerTxnCount = 2
 
+    if any(appGlobalState[b"bid_account"]):
+        # if "bid_account" is not the zero address
+        accounts.append(encoding.encode_address(appGlobalState[b"bid_account"]))
+        if appGlobalState.get(b"bid_amount", 0) < appGlobalState[b"reserve_amount"]:
+            # the lead bidder is repaid because the reserve was not met
+            innerTxnCount += 1
 
-def closeAuction(client: AlgodClient, appID: int, closer: Account):
+    return transaction.ApplicationDeleteTxn(
+        sender=closer,
+        index=appID,
+        accounts=accounts,
+        foreign_assets=[nftID],
+        sp=withInnerTxnFees(suggestedParams, innerTxnCount),
+    )
+
+
+@traced
+def closeAuction(
+    client: AlgodClient,
+    appID: int,
+    closer: Account,
+    paramsProvider: Optional[SuggestedParamsProvider] = None,
+    stateCache: Optional[AuctionStateCache] = None,
+):
     """Close an auction.
 
     This action can only happen before an auction has begun, in which case it is
@@ -241,32 +1128,390 @@ def closeAuction(client: AlgodClient, appID: int, closer: Account):
     transferred to the seller. If the auction was not successful, the NFT and
     all funds are transferred to the seller.
 
+    An auction with pull refunds can only be closed once every outbid bidder
+    has been refunded, see sweepRefunds.
+
     Args:
         client: An Algod client.
         appID: The app ID of the auction.
         closer: The account initiating the close transaction. This must be
             either the seller or auction creator if you wish to close the
             auction before it starts. Otherwise, this can be any account.
+        paramsProvider (optional): A provider of suggested params to share
+            between operations. If not given, params are fetched from the
+            client.
+        stateCache (optional): A cache of auction state to read the current
+            state of the auction from. If not given, the state is fetched from
+            the client.
     """
-    appGlobalState = getAppGlobalState(client, appID)
+    appGlobalState = getAuctionGlobalState(client, appID, stateCache)
+
+    if appGlobalState.get(b"owed", 0) > 0:
+        raise Exception(
+            "Auction {} still owes refunds to outbid bidders, see sweepRefunds".format(
+                appID
+            )
+        )
+
+    deleteTxn = makeCloseAuctionTxn(
+        appID=appID,
+        closer=closer.getAddress(),
+        appGlobalState=appGlobalState,
+        suggestedParams=getSuggestedParams(client, paramsProvider),
+    )
+    signedDeleteTxn = deleteTxn.sign(closer.getPrivateKey())
+
+    try:
+        client.send_transaction(signedDeleteTxn)
+
+        waitForTransaction(client, signedDeleteTxn.get_txid())
+    finally:
+        if stateCache is not None:
+            # the auction is gone, or the cached state may have been out of date
+            stateCache.invalidate(appID)
+
+
+@traced
+def closeAuctions(
+    client: AlgodClient,
+    appIDs: Sequence[int],
+    closer: Account,
+    paramsProvider: Optional[SuggestedParamsProvider] = None,
+    stateCache: Optional[AuctionStateCache] = None,
+    concurrency: int = DEFAULT_CLOSE_CONCURRENCY,
+) -> Dict[int, Union[PendingTxnResponse, Exception]]:
+    """Close many auctions at once.
+
+    The state of every auction is read concurrently, and auctions that are
+    still running are reported without submitting anything for them. The
+    delete calls for the other auctions are packed into atomic groups of up to
+    16, the groups are submitted concurrently, and then they are confirmed
+    together. If a group is rejected because one of its auctions cannot be
+    closed, each auction of the group is submitted again on its own, so the
+    others are still closed.
+
+    See closeAuction for what closing an auction does.
+
+    Args:
+        client: An algod client.
+        appIDs: The app IDs of the auctions.
+        closer: The account initiating the close transactions. See
+            closeAuction.
+        paramsProvider (optional): A provider of suggested params to share
+            between operations. If not given, params are fetched from the
+            client.
+        stateCache (optional): A cache of auction state to read the current
+            state of the auctions from. If not given, the state is fetched from
+            the client.
+        concurrency (optional): The number of requests to make at the same
+            time. Defaults to 8.
+
+    Returns:
+        A dictionary from each app ID to the PendingTxnResponse of the
+        transaction that closed it, or to an Exception if it could not be
+        closed.
+    """
+    results: Dict[int, Union[PendingTxnResponse, Exception]] = dict()
+    appIDs = list(dict.fromkeys(appIDs))
+
+    def readState(appID: int) -> Union[Dict[bytes, Union[int, bytes]], Exception]:
+        try:
+            return getAuctionGlobalState(client, appID, stateCache)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+        states = list(executor.map(readState, appIDs))
+    _, timestamp = getLastBlockTimestamp(client)
+    suggestedParams = getSuggestedParams(client, paramsProvider)
+
+    txns: Dict[int, transaction.ApplicationDeleteTxn] = dict()
+    for appID, state in zip(appIDs, states):
+        if isinstance(state, Exception):
+            results[appID] = state
+        elif state[b"start"] <= timestamp < state[b"end"]:
+            results[appID] = Exception("Auction {} has not ended".format(appID))
+        elif state.get(b"owed", 0) > 0:
+            results[appID] = Exception(
+                "Auction {} still owes refunds to outbid bidders, see "
+                "sweepRefunds".format(appID)
+            )
+        else:
+            txns[appID] = makeCloseAuctionTxn(
+                appID=appID,
+                closer=closer.getAddress(),
+                appGlobalState=state,
+                suggestedParams=suggestedParams,
+            )
+
+    def sign(chunk: Sequence[int]) -> List[transaction.SignedTransaction]:
+        group = [txns[appID] for appID in chunk]
+        for txn in group:
+            txn.group = None
+        if len(group) > 1:
+            transaction.assign_group_id(group)
+        return [txn.sign(closer.getPrivateKey()) for txn in group]
+
+    submitted: Dict[str, int] = dict()
+    retry: List[int] = []
+    grouped = chunks(list(txns.keys()), MAX_GROUP_SIZE)
+    groups = [sign(chunk) for chunk in grouped]
+    for chunk, group, sendError in zip(
+        grouped, groups, sendGroups(client, groups, concurrency)
+    ):
+        if sendError is None:
+            for appID, signedTxn in zip(chunk, group):
+                submitted[signedTxn.get_txid()] = appID
+        elif len(chunk) > 1:
+            retry += chunk
+        else:
+            results[chunk[0]] = sendError
+
+    singles = [sign([appID]) for appID in retry]
+    for appID, group, sendError in zip(
+        retry, singles, sendGroups(client, singles, concurrency)
+    ):
+        if sendError is None:
+            submitted[group[0].get_txid()] = appID
+        else:
+            results[appID] = sendError
+
+    txIDs = list(submitted.keys())
+    if len(txIDs) > 0:
+        for txID, result in zip(txIDs, waitForTransactions(client, txIDs)):
+            results[submitted[txID]] = result
+
+    if stateCache is not None:
+        for appID in appIDs:
+            # the auctions are gone, or the cached state may have been out of date
+            stateCache.invalidate(appID)
+
+    return {appID: results[appID] for appID in appIDs}
+
+
+def makeSettleAuctionTxn(
+    appID: int,
+    closer: str,
+    appGlobalState: Dict[bytes, Union[int, bytes]],
+    suggestedParams: transaction.SuggestedParams,
+) -> transaction.ApplicationCallTxn:
+    """Build the unsigned transaction that settles an auction.
 
+    See settleAuction for a description of the arguments.
+
+    Args:
+        appGlobalState: The current global state of the auction, used to find
+            the NFT, the seller and the lead bidder.
+    """
     nftID = appGlobalState[b"nft_id"]
 
     accounts: List[str] = [encoding.encode_address(appGlobalState[b"seller"])]
 
+    # the app closes out of the NFT
+    innerTxnCount = 1
+
     if any(appGlobalState[b"bid_account"]):
         # if "bid_account" is not the zero address
         accounts.append(encoding.encode_address(appGlobalState[b"bid_account"]))
+        if appGlobalState.get(b"bid_amount", 0) >= appGlobalState[b"reserve_amount"]:
+            # the seller is paid the winning bid
+            innerTxnCount += 1
+        elif b"owed" not in appGlobalState:
+            # the lead bidder is repaid because the reserve was not met. With
+            # pull refunds the lead bid becomes credit instead
+            innerTxnCount += 1
 
-    deleteTxn = transaction.ApplicationDeleteTxn(
-        sender=closer.getAddress(),
+    return transaction.ApplicationCallTxn(
+        sender=closer,
         index=appID,
+        on_complete=transaction.OnComplete.NoOpOC,
+        app_args=[b"settle"],
         accounts=accounts,
         foreign_assets=[nftID],
-        sp=client.suggested_params(),
+        sp=withInnerTxnFees(suggestedParams, innerTxnCount),
     )
-    signedDeleteTxn = deleteTxn.sign(closer.getPrivateKey())
 
-    client.send_transaction(signedDeleteTxn)
 
-    waitForTransaction(client, signedDeleteTxn.get_txid())
+@traced
+def settleAuction(
+    client: AlgodClient,
+    appID: int,
+    closer: Account,
+    paramsProvider: Optional[SuggestedParamsProvider] = None,
+    stateCache: Optional[AuctionStateCache] = None,
+) -> None:
+    """Settle an auction so that it can be relisted.
+
+    Settling pays out an auction like closing it does, except that the app is
+    not deleted and its escrow account keeps the funding it was set up with. If
+    the auction was successful, the NFT is transferred to the winning bidder
+    and the winning bid to the seller. Otherwise the NFT goes back to the
+    seller and the lead bidder, if any, is repaid. A settled auction can be
+    relisted with relistAuction, or closed with closeAuction to delete it.
+
+    Like closing, this can only happen before an auction has begun or after it
+    has ended.
+
+    Args:
+        client: An Algod client.
+        appID: The app ID of the auction.
+        closer: The account initiating the settle transaction. This must be
+            either the seller or auction creator if you wish to settle the
+            auction before it starts. Otherwise, this can be any account.
+        paramsProvider (optional): A provider of suggested params to share
+            between operations. If not given, params are fetched from the
+            client.
+        stateCache (optional): A cache of auction state to read the current
+            state of the auction from. If not given, the state is fetched from
+            the client.
+    """
+    appGlobalState = getAuctionGlobalState(client, appID, stateCache)
+
+    if appGlobalState[b"end"] == 0:
+        raise Exception("Auction {} has already been settled".format(appID))
+
+    settleTxn = makeSettleAuctionTxn(
+        appID=appID,
+        closer=closer.getAddress(),
+        appGlobalState=appGlobalState,
+        suggestedParams=getSuggestedParams(client, paramsProvider),
+    )
+    signedSettleTxn = settleTxn.sign(closer.getPrivateKey())
+
+    try:
+        client.send_transaction(signedSettleTxn)
+
+        waitForTransaction(client, signedSettleTxn.get_txid())
+    finally:
+        if stateCache is not None:
+            stateCache.invalidate(appID)
+
+
+def makeRelistAuctionTxns(
+    appID: int,
+    sender: str,
+    nftHolder: str,
+    nftID: int,
+    nftAmount: int,
+    startTime: int,
+    endTime: int,
+    reserve: int,
+    minBidIncrement: int,
+    suggestedParams: transaction.SuggestedParams,
+) -> List[transaction.Transaction]:
+    """Build the unsigned, grouped transactions that relist a settled auction.
+
+    The first two transactions must be signed by the sender and the last one by
+    the NFT holder. See relistAuction for a description of the arguments.
+    """
+    appAddr = get_application_address(appID)
+
+    relistTxn = transaction.ApplicationCallTxn(
+        sender=sender,
+        index=appID,
+        on_complete=transaction.OnComplete.NoOpOC,
+        app_args=[
+            b"relist",
+            nftID.to_bytes(8, "big"),
+            startTime.to_bytes(8, "big"),
+            endTime.to_bytes(8, "big"),
+            reserve.to_bytes(8, "big"),
+            minBidIncrement.to_bytes(8, "big"),
+        ],
+        sp=suggestedParams,
+    )
+
+    # the escrow account is still funded, so the new NFT is set up without a
+    # funding payment
+    setupTxn = transaction.ApplicationCallTxn(
+        sender=sender,
+        index=appID,
+        on_complete=transaction.OnComplete.NoOpOC,
+        app_args=[b"setup"],
+        foreign_assets=[nftID],
+        # the app opts into the NFT with an inner transaction
+        sp=withInnerTxnFees(suggestedParams, 1),
+    )
+
+    fundNftTxn = transaction.AssetTransferTxn(
+        sender=nftHolder,
+        receiver=appAddr,
+        index=nftID,
+        amt=nftAmount,
+        sp=suggestedParams,
+    )
+
+    return transaction.assign_group_id([relistTxn, setupTxn, fundNftTxn])
+
+
+@traced
+def relistAuction(
+    client: AlgodClient,
+    appID: int,
+    sender: Account,
+    nftHolder: Account,
+    nftID: int,
+    nftAmount: int,
+    startTime: int,
+    endTime: int,
+    reserve: int,
+    minBidIncrement: int,
+    paramsProvider: Optional[SuggestedParamsProvider] = None,
+    stateCache: Optional[AuctionStateCache] = None,
+) -> None:
+    """Start a new auction in the app of a settled auction.
+
+    This operation sets the new NFT, times and reserve of the auction, opts the
+    escrow account into the NFT, and sends the NFT to the escrow account, all in
+    one atomic transaction group. It reuses the app ID and the funded escrow
+    account of the settled auction, so no new app is created and no funding is
+    needed. The seller stays the same. See settleAuction.
+
+    Args:
+        client: An algod client.
+        appID: The app ID of the settled auction.
+        sender: The account relisting the auction. This must be either the
+            seller or the auction creator.
+        nftHolder: The account holding the NFT.
+        nftID: The ID of the NFT being auctioned.
+        nftAmount: The NFT amount being auctioned. See setupAuctionApp.
+        startTime: A UNIX timestamp representing the start time of the auction.
+            This must be greater than the current UNIX timestamp.
+        endTime: A UNIX timestamp representing the end time of the auction. This
+            must be greater than startTime.
+        reserve: The reserve amount of the auction. If the auction ends without
+            a bid that is equal to or greater than this amount, the auction will
+            fail, meaning the bid amount will be refunded to the lead bidder and
+            the NFT will return to the seller.
+        minBidIncrement: The minimum different required between a new bid and
+            the current leading bid.
+        paramsProvider (optional): A provider of suggested params to share
+            between operations. If not given, params are fetched from the
+            client.
+        stateCache (optional): A cache of auction state that is invalidated for
+            the auction once it has been relisted.
+    """
+    relistTxn, setupTxn, fundNftTxn = makeRelistAuctionTxns(
+        appID=appID,
+        sender=sender.getAddress(),
+        nftHolder=nftHolder.getAddress(),
+        nftID=nftID,
+        nftAmount=nftAmount,
+        startTime=startTime,
+        endTime=endTime,
+        reserve=reserve,
+        minBidIncrement=minBidIncrement,
+        suggestedParams=getSuggestedParams(client, paramsProvider),
+    )
+
+    signedRelistTxn = relistTxn.sign(sender.getPrivateKey())
+    signedSetupTxn = setupTxn.sign(sender.getPrivateKey())
+    signedFundNftTxn = fundNftTxn.sign(nftHolder.getPrivateKey())
+
+    try:
+        client.send_transactions([signedRelistTxn, signedSetupTxn, signedFundNftTxn])
+
+        waitForTransaction(client, signedRelistTxn.get_txid())
+    finally:
+        if stateCache is not None:
+            stateCache.invalidate(appID)
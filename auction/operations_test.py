@@ -1,14 +1,39 @@
+from concurrent.futures import Future
 from time import time, sleep
+import threading
 
 import pytest
 
 from algosdk import account, encoding
+from algosdk.future import transaction
 from algosdk.logic import get_application_address
 
-from .operations import createAuctionApp, setupAuctionApp, placeBid, closeAuction
+from .operations import (
+    AuctionParams,
+    AuctionSetup,
+    createAuctionApp,
+    createAuctionApps,
+    setupAuctionApp,
+    setupAuctionApps,
+    placeBid,
+    closeAuction,
+    closeAuctions,
+    optInToAuction,
+    getRefundCredit,
+    claimRefund,
+    sweepRefunds,
+    makeBidTxns,
+    settleAuction,
+    relistAuction,
+    submitBid,
+    OutbidError,
+)
+from . import operations
 from .util import getBalances, getAppGlobalState, getLastBlockTimestamp
 from .testing.setup import getAlgodClient
 from .testing.resources import getTemporaryAccount, optInToAsset, createDummyAsset
+from .testing.simulator import Ledger, SimulatedAlgodClient
+from .util import PendingTxnResponse
 
 
 def test_create():
@@ -96,7 +121,7 @@ def test_setup():
     assert actualState == expectedState
 
     actualBalances = getBalances(client, get_application_address(appID))
-    expectedBalances = {0: 2 * 100_000 + 2 * 1_000, nftID: nftAmount}
+    expectedBalances = {0: 2 * 100_000, nftID: nftAmount}
 
     assert actualBalances == expectedBalances
 
@@ -204,7 +229,7 @@ def test_first_bid():
     assert actualState == expectedState
 
     actualBalances = getBalances(client, get_application_address(appID))
-    expectedBalances = {0: 2 * 100_000 + 2 * 1_000 + bidAmount, nftID: nftAmount}
+    expectedBalances = {0: 2 * 100_000 + bidAmount, nftID: nftAmount}
 
     assert actualBalances == expectedBalances
 
@@ -283,14 +308,14 @@ def test_second_bid():
     assert actualState == expectedState
 
     actualAppBalances = getBalances(client, get_application_address(appID))
-    expectedAppBalances = {0: 2 * 100_000 + 2 * 1_000 + bid2Amount, nftID: nftAmount}
+    expectedAppBalances = {0: 2 * 100_000 + bid2Amount, nftID: nftAmount}
 
     assert actualAppBalances == expectedAppBalances
 
     bidder1AlgosAfter = getBalances(client, bidder1.getAddress())[0]
 
-    # bidder1 should receive a refund of their bid, minus the txn fee
-    assert bidder1AlgosAfter - bidder1AlgosBefore >= bid1Amount - 1_000
+    # bidder1 should receive a refund of their whole bid
+    assert bidder1AlgosAfter - bidder1AlgosBefore == bid1Amount
 
 
 def test_close_before_start():
@@ -448,8 +473,8 @@ def test_close_reserve_not_met():
 
     bidderAlgosAfter = getBalances(client, bidder.getAddress())[0]
 
-    # bidder should receive a refund of their bid, minus the txn fee
-    assert bidderAlgosAfter - bidderAlgosBefore >= bidAmount - 1_000
+    # bidder should receive a refund of their whole bid
+    assert bidderAlgosAfter - bidderAlgosBefore == bidAmount
 
     sellerNftBalance = getBalances(client, seller.getAddress())[nftID]
     assert sellerNftBalance == nftAmount
@@ -523,3 +548,536 @@ def test_close_reserve_met():
     # seller should receive the bid amount, minus the txn fee
     assert actualSellerBalances[0] >= sellerAlgosBefore + bidAmount - 1_000
     assert actualSellerBalances[nftID] == 0
+
+
+@pytest.fixture
+def contractCache(tmp_path, monkeypatch):
+    monkeypatch.setenv("AUCTION_CONTRACT_CACHE", str(tmp_path))
+
+
+def test_close_many(contractCache):
+    ledger = Ledger(timestamp=1_600_000_000)
+    client = SimulatedAlgodClient(ledger)
+
+    seller = ledger.createAccount()
+    bidder = ledger.createAccount()
+
+    def createAuction(duration, reserve=1_000_000):
+        nftID = createDummyAsset(client, 1, seller)
+        optInToAsset(client, nftID, bidder)
+        appID = createAuctionApp(
+            client=client,
+            sender=seller,
+            seller=seller.getAddress(),
+            nftID=nftID,
+            startTime=ledger.now() + 10,
+            endTime=ledger.now() + 10 + duration,
+            reserve=reserve,
+            minBidIncrement=100_000,
+        )
+        setupAuctionApp(
+            client=client,
+            appID=appID,
+            funder=seller,
+            nftHolder=seller,
+            nftID=nftID,
+            nftAmount=1,
+        )
+        return appID, nftID
+
+    ended = [createAuction(20) for _ in range(18)]
+    running = createAuction(1_000)
+    # the NFT can't be sent to a winner who opted out, so closing this fails
+    optedOut, optedOutNFT = createAuction(20)
+
+    ledger.advanceTime(15)
+    winning, winningNFT = ended[0]
+    placeBid(client=client, appID=winning, bidder=bidder, bidAmount=1_000_000)
+    placeBid(client=client, appID=optedOut, bidder=bidder, bidAmount=1_000_000)
+    client.send_transaction(
+        transaction.AssetTransferTxn(
+            sender=bidder.getAddress(),
+            sp=client.suggested_params(),
+            receiver=seller.getAddress(),
+            amt=0,
+            index=optedOutNFT,
+            close_assets_to=seller.getAddress(),
+        ).sign(bidder.getPrivateKey())
+    )
+
+    ledger.advanceTime(20)
+    ledger.newBlock()
+
+    appIDs = [appID for appID, _ in ended] + [running[0], optedOut, 999_999]
+    results = closeAuctions(client, appIDs, seller)
+
+    assert list(results.keys()) == appIDs
+    for appID, _ in ended:
+        assert isinstance(results[appID], PendingTxnResponse)
+        with pytest.raises(Exception):
+            client.application_info(appID)
+    assert "has not ended" in str(results[running[0]])
+    assert isinstance(results[optedOut], Exception)
+    assert isinstance(results[999_999], Exception)
+
+    assert getBalances(client, bidder.getAddress())[winningNFT] == 1
+    client.application_info(running[0])
+    client.application_info(optedOut)
+
+
+class SlowSubmitClient(SimulatedAlgodClient):
+    """Records the threads that submit transaction groups, taking long enough
+    that groups submitted concurrently overlap."""
+
+    def __init__(self, ledger: Ledger) -> None:
+        super().__init__(ledger)
+        self.submitThreads = set()
+
+    def send_transactions(self, txns, **kwargs):
+        self.submitThreads.add(threading.current_thread())
+        sleep(0.05)
+        return super().send_transactions(txns, **kwargs)
+
+
+def test_create_and_setup_many(contractCache):
+    ledger = Ledger(timestamp=1_600_000_000)
+    client = SlowSubmitClient(ledger)
+
+    seller = ledger.createAccount(1_000_000_000)
+    nftIDs = [createDummyAsset(client, 1, seller) for _ in range(20)]
+    startTime = ledger.now() + 10
+
+    # more auctions than fit in one group
+    appIDs = createAuctionApps(
+        client,
+        seller,
+        [
+            AuctionParams(
+                seller=seller.getAddress(),
+                nftID=nftID,
+                startTime=startTime,
+                endTime=startTime + 60,
+                reserve=1_000_000,
+                minBidIncrement=100_000,
+            )
+            for nftID in nftIDs
+        ],
+    )
+    assert len(appIDs) == len(set(appIDs)) == 20
+    for appID, nftID in zip(appIDs, nftIDs):
+        assert getAppGlobalState(client, appID)[b"nft_id"] == nftID
+
+    client.submitThreads.clear()
+    setupAuctionApps(
+        client,
+        seller,
+        [
+            AuctionSetup(appID=appID, nftHolder=seller, nftID=nftID, nftAmount=1)
+            for appID, nftID in zip(appIDs, nftIDs)
+        ],
+    )
+    # the 4 setup groups were submitted at the same time
+    assert len(client.submitThreads) > 1
+    for appID, nftID in zip(appIDs, nftIDs):
+        assert getBalances(client, get_application_address(appID))[nftID] == 1
+
+
+def test_setup_many_rejected_group(contractCache):
+    ledger = Ledger(timestamp=1_600_000_000)
+    client = SimulatedAlgodClient(ledger)
+
+    seller = ledger.createAccount(1_000_000_000)
+    other = ledger.createAccount()
+    nftIDs = [createDummyAsset(client, 1, seller) for _ in range(10)]
+    startTime = ledger.now() + 10
+    appIDs = createAuctionApps(
+        client,
+        seller,
+        [
+            AuctionParams(
+                seller=seller.getAddress(),
+                nftID=nftID,
+                startTime=startTime,
+                endTime=startTime + 60,
+                reserve=1_000_000,
+                minBidIncrement=100_000,
+            )
+            for nftID in nftIDs
+        ],
+        concurrency=1,
+    )
+
+    # the holder of the last NFT does not have it, which rejects the second
+    # group of 5 auctions as a whole
+    setups = [
+        AuctionSetup(appID=appID, nftHolder=seller, nftID=nftID, nftAmount=1)
+        for appID, nftID in zip(appIDs, nftIDs)
+    ]
+    setups[-1] = setups[-1]._replace(nftHolder=other)
+    with pytest.raises(Exception, match="Failed to set up auctions") as e:
+        setupAuctionApps(client, seller, setups)
+
+    assert str(appIDs[5:]) in str(e.value)
+    for appID, nftID in zip(appIDs[:5], nftIDs[:5]):
+        assert getBalances(client, get_application_address(appID))[nftID] == 1
+    for appID in appIDs[5:]:
+        assert getBalances(client, get_application_address(appID)) == {0: 0}
+
+    # creating auctions that would start in the past is rejected too
+    with pytest.raises(Exception, match="Failed to create 17 of 17 auctions"):
+        createAuctionApps(
+            client,
+            seller,
+            [
+                AuctionParams(
+                    seller=seller.getAddress(),
+                    nftID=nftIDs[0],
+                    startTime=ledger.now() - 10,
+                    endTime=ledger.now() + 60 + i,
+                    reserve=1_000_000,
+                    minBidIncrement=100_000,
+                )
+                for i in range(17)
+            ],
+        )
+
+
+def createPullRefundAuction(client, ledger, seller, bidders, reserve=1_000_000):
+    nftID = createDummyAsset(client, 1, seller)
+    appID = createAuctionApp(
+        client=client,
+        sender=seller,
+        seller=seller.getAddress(),
+        nftID=nftID,
+        startTime=ledger.now() + 10,
+        endTime=ledger.now() + 70,
+        reserve=reserve,
+        minBidIncrement=100_000,
+        pullRefunds=True,
+    )
+    setupAuctionApp(
+        client=client,
+        appID=appID,
+        funder=seller,
+        nftHolder=seller,
+        nftID=nftID,
+        nftAmount=1,
+    )
+    for bidder in bidders:
+        optInToAsset(client, nftID, bidder)
+        optInToAuction(client, appID, bidder)
+    ledger.advanceTime(15)
+    return appID, nftID
+
+
+def test_pull_refunds(contractCache):
+    ledger = Ledger(timestamp=1_600_000_000)
+    client = SimulatedAlgodClient(ledger)
+
+    seller = ledger.createAccount()
+    bidders = [ledger.createAccount() for _ in range(6)]
+    appID, nftID = createPullRefundAuction(client, ledger, seller, bidders)
+    appAddr = get_application_address(appID)
+
+    # a bid built from state read before the first bid is still accepted, since
+    # it does not refer to the lead bidder
+    staleState = getAppGlobalState(client, appID)
+    for i, bidder in enumerate(bidders):
+        placeBid(client, appID, bidder, 1_000_000 + i * 100_000)
+    payTxn, appCallTxn = makeBidTxns(
+        appID=appID,
+        bidder=bidders[0].getAddress(),
+        bidAmount=2_000_000,
+        appGlobalState=staleState,
+        suggestedParams=client.suggested_params(),
+    )
+    assert appCallTxn.accounts is None or len(appCallTxn.accounts) == 0
+    client.send_transactions(
+        [
+            payTxn.sign(bidders[0].getPrivateKey()),
+            appCallTxn.sign(bidders[0].getPrivateKey()),
+        ]
+    )
+    ledger.newBlock()
+
+    state = getAppGlobalState(client, appID)
+    assert state[b"bid_account"] == encoding.decode_address(bidders[0].getAddress())
+    assert state[b"owed"] == sum(1_000_000 + i * 100_000 for i in range(6))
+    # bidders[0] is leading, but their first bid is credit
+    assert getRefundCredit(client, appID, bidders[0].getAddress()) == 1_000_000
+
+    bidder1AlgosBefore = getBalances(client, bidders[1].getAddress())[0]
+    assert claimRefund(client, appID, bidders[1]) == 1_100_000
+    assert claimRefund(client, appID, bidders[1]) == 0
+    bidder1AlgosAfter = getBalances(client, bidders[1].getAddress())[0]
+    assert bidder1AlgosAfter - bidder1AlgosBefore == 1_100_000 - 2 * 1_000
+
+    ledger.advanceTime(60)
+    ledger.newBlock()
+    with pytest.raises(Exception, match="owes refunds"):
+        closeAuction(client, appID, seller)
+
+    sweeper = ledger.createAccount()
+    refunded = sweepRefunds(
+        client, appID, sweeper, [bidder.getAddress() for bidder in bidders]
+    )
+    assert refunded == {
+        bidders[0].getAddress(): 1_000_000,
+        **{bidders[i].getAddress(): 1_000_000 + i * 100_000 for i in range(2, 6)},
+    }
+    assert getAppGlobalState(client, appID)[b"owed"] == 0
+    # the escrow holds its minimum balance and the winning bid
+    assert getBalances(client, appAddr)[0] == 2 * 100_000 + 2_000_000
+
+    sellerAlgosBefore = getBalances(client, seller.getAddress())[0]
+    closeAuction(client, appID, seller)
+    sellerAlgosAfter = getBalances(client, seller.getAddress())[0]
+
+    assert getBalances(client, bidders[0].getAddress())[nftID] == 1
+    assert sellerAlgosAfter - sellerAlgosBefore == 2 * 100_000 + 2_000_000 - 3 * 1_000
+
+
+def test_pull_refund_forfeit(contractCache):
+    ledger = Ledger(timestamp=1_600_000_000)
+    client = SimulatedAlgodClient(ledger)
+
+    seller = ledger.createAccount()
+    bidders = [ledger.createAccount() for _ in range(3)]
+    appID, nftID = createPullRefundAuction(client, ledger, seller, bidders)
+
+    placeBid(client, appID, bidders[0], 1_000_000)
+    placeBid(client, appID, bidders[1], 1_100_000)
+
+    # the lead bidder can't close out, but an outbid bidder can and is refunded
+    with pytest.raises(Exception):
+        client.send_transaction(
+            transaction.ApplicationCloseOutTxn(
+                bidders[1].getAddress(), client.suggested_params(), appID
+            ).sign(bidders[1].getPrivateKey())
+        )
+    bidder0AlgosBefore = getBalances(client, bidders[0].getAddress())[0]
+    closeOutTxn = transaction.ApplicationCloseOutTxn(
+        bidders[0].getAddress(), client.suggested_params(), appID
+    )
+    closeOutTxn.fee = 2 * 1_000
+    client.send_transaction(closeOutTxn.sign(bidders[0].getPrivateKey()))
+    ledger.newBlock()
+    bidder0AlgosAfter = getBalances(client, bidders[0].getAddress())[0]
+    assert bidder0AlgosAfter - bidder0AlgosBefore == 1_000_000 - 2 * 1_000
+
+    # the lead bidder clears their state and forfeits their bid
+    placeBid(client, appID, bidders[2], 1_200_000)
+    client.send_transaction(
+        transaction.ApplicationClearStateTxn(
+            bidders[2].getAddress(), client.suggested_params(), appID
+        ).sign(bidders[2].getPrivateKey())
+    )
+    ledger.newBlock()
+
+    state = getAppGlobalState(client, appID)
+    assert state[b"owed"] == 1_100_000
+    assert not any(state[b"bid_account"])
+
+    sweepRefunds(client, appID, seller, [bidders[1].getAddress()])
+    ledger.advanceTime(60)
+    ledger.newBlock()
+
+    sellerAlgosBefore = getBalances(client, seller.getAddress())[0]
+    closeAuction(client, appID, seller)
+    sellerAlgosAfter = getBalances(client, seller.getAddress())[0]
+
+    # there is no winner, and the seller receives the forfeited bid
+    assert getBalances(client, seller.getAddress())[nftID] == 1
+    assert sellerAlgosAfter - sellerAlgosBefore == 2 * 100_000 + 1_200_000 - 3 * 1_000
+
+
+def test_settle_and_relist(contractCache):
+    ledger = Ledger(timestamp=1_600_000_000)
+    client = SimulatedAlgodClient(ledger)
+
+    seller = ledger.createAccount()
+    bidders = [ledger.createAccount() for _ in range(2)]
+    other = ledger.createAccount()
+    nftIDs = [createDummyAsset(client, 1, seller) for _ in range(2)]
+    for nftID in nftIDs:
+        for bidder in bidders:
+            optInToAsset(client, nftID, bidder)
+
+    appID = createAuctionApp(
+        client=client,
+        sender=seller,
+        seller=seller.getAddress(),
+        nftID=nftIDs[0],
+        startTime=ledger.now() + 10,
+        endTime=ledger.now() + 70,
+        reserve=1_000_000,
+        minBidIncrement=100_000,
+    )
+    setupAuctionApp(
+        client=client,
+        appID=appID,
+        funder=seller,
+        nftHolder=seller,
+        nftID=nftIDs[0],
+        nftAmount=1,
+    )
+    appAddr = get_application_address(appID)
+
+    ledger.advanceTime(15)
+    placeBid(client, appID, bidders[0], 1_000_000)
+    placeBid(client, appID, bidders[1], 1_200_000)
+
+    # an auction can't be settled while it is running
+    with pytest.raises(Exception):
+        settleAuction(client, appID, other)
+
+    ledger.advanceTime(60)
+    sellerAlgosBefore = getBalances(client, seller.getAddress())[0]
+    settleAuction(client, appID, other)
+
+    assert getBalances(client, bidders[1].getAddress())[nftIDs[0]] == 1
+    assert getBalances(client, seller.getAddress())[0] - sellerAlgosBefore == 1_200_000
+    # the escrow account keeps its funding
+    assert getBalances(client, appAddr) == {0: 2 * 100_000}
+
+    state = getAppGlobalState(client, appID)
+    assert (state[b"start"], state[b"end"]) == (0, 0)
+    assert not any(state[b"bid_account"])
+    assert state.get(b"bid_amount", 0) == 0
+
+    with pytest.raises(Exception):
+        settleAuction(client, appID, other)
+    # only the seller or creator can delete a settled auction
+    with pytest.raises(Exception):
+        closeAuction(client, appID, other)
+
+    relist = dict(
+        client=client,
+        appID=appID,
+        nftHolder=seller,
+        nftID=nftIDs[1],
+        nftAmount=1,
+        startTime=ledger.now() + 10,
+        endTime=ledger.now() + 70,
+        reserve=5_000_000,
+        minBidIncrement=100_000,
+    )
+    with pytest.raises(Exception):
+        relistAuction(sender=other, **relist)
+    relistAuction(sender=seller, **relist)
+
+    state = getAppGlobalState(client, appID)
+    assert state[b"nft_id"] == nftIDs[1]
+    assert state[b"start"] == relist["startTime"]
+    assert state[b"end"] == relist["endTime"]
+    assert state[b"reserve_amount"] == 5_000_000
+    assert getBalances(client, appAddr) == {0: 2 * 100_000, nftIDs[1]: 1}
+
+    # a relisted auction can't be relisted again until it is settled
+    with pytest.raises(Exception):
+        relistAuction(sender=seller, **relist)
+
+    ledger.advanceTime(15)
+    bidder0AlgosBefore = getBalances(client, bidders[0].getAddress())[0]
+    placeBid(client, appID, bidders[0], 1_000_000)
+    ledger.advanceTime(60)
+    settleAuction(client, appID, other)
+
+    # the reserve was not met
+    assert (
+        getBalances(client, bidders[0].getAddress())[0]
+        == bidder0AlgosBefore - 2 * 1_000
+    )
+    assert getBalances(client, seller.getAddress())[nftIDs[1]] == 1
+    assert getBalances(client, appAddr) == {0: 2 * 100_000}
+
+    sellerAlgosBefore = getBalances(client, seller.getAddress())[0]
+    closeAuction(client, appID, seller)
+    sellerAlgosAfter = getBalances(client, seller.getAddress())[0]
+
+    assert getBalances(client, appAddr)[0] == 0
+    assert sellerAlgosAfter - sellerAlgosBefore == 2 * 100_000 - 2 * 1_000
+
+
+def test_pull_refund_settle(contractCache):
+    ledger = Ledger(timestamp=1_600_000_000)
+    client = SimulatedAlgodClient(ledger)
+
+    seller = ledger.createAccount()
+    bidders = [ledger.createAccount() for _ in range(2)]
+    appID, nftID = createPullRefundAuction(client, ledger, seller, bidders)
+
+    placeBid(client, appID, bidders[0], 1_000_000)
+    placeBid(client, appID, bidders[1], 1_100_000)
+    ledger.advanceTime(60)
+    settleAuction(client, appID, seller)
+
+    assert getBalances(client, bidders[1].getAddress())[nftID] == 1
+    # the winning bid was paid to the seller, and the outbid bid is still owed
+    assert getRefundCredit(client, appID, bidders[1].getAddress()) == 0
+    assert getRefundCredit(client, appID, bidders[0].getAddress()) == 1_000_000
+    assert getAppGlobalState(client, appID)[b"owed"] == 1_000_000
+
+    with pytest.raises(Exception):
+        closeAuction(client, appID, seller)
+    assert claimRefund(client, appID, bidders[0]) == 1_000_000
+    closeAuction(client, appID, seller)
+
+
+def test_submit_bid_rejection_off_watcher_thread(contractCache, monkeypatch):
+    ledger = Ledger(timestamp=1_600_000_000)
+    client = SimulatedAlgodClient(ledger)
+
+    seller = ledger.createAccount()
+    bidder = ledger.createAccount()
+    nftID = createDummyAsset(client, 1, seller)
+    appID = createAuctionApp(
+        client=client,
+        sender=seller,
+        seller=seller.getAddress(),
+        nftID=nftID,
+        startTime=ledger.now() + 10,
+        endTime=ledger.now() + 70,
+        reserve=1_000_000,
+        minBidIncrement=100_000,
+    )
+
+    class ManualWatcher:
+        def __init__(self):
+            self.futures = []
+
+        def watch(self, txID):
+            future = Future()
+            self.futures.append(future)
+            return future
+
+    classifiedOn = []
+    classifyBidRejection = operations.classifyBidRejection
+
+    def recordThread(*args, **kwargs):
+        classifiedOn.append(threading.current_thread())
+        return classifyBidRejection(*args, **kwargs)
+
+    monkeypatch.setattr(operations, "classifyBidRejection", recordThread)
+
+    setupAuctionApp(
+        client=client,
+        appID=appID,
+        funder=seller,
+        nftHolder=seller,
+        nftID=nftID,
+        nftAmount=1,
+    )
+    ledger.advanceTime(15)
+
+    watcher = ManualWatcher()
+    result = submitBid(client, appID, bidder, 1_000_000, watcher)
+
+    # the watcher reports the bid as failed, as if it had left the pool, and
+    # its thread is not held up while the reason is worked out
+    watcher.futures[0].set_exception(Exception("txn dead"))
+    with pytest.raises(OutbidError):
+        result.result(timeout=10)
+
+    assert len(classifiedOn) == 1
+    assert classifiedOn[0] is not threading.current_thread()
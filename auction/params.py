@@ -0,0 +1,120 @@
+from typing import Optional
+from copy import copy
+import threading
+
+from algosdk.v2client.algod import AlgodClient
+from algosdk.future import transaction
+
+
+class SuggestedParamsProvider:
+    """Shares suggested transaction parameters between operations.
+
+    Fetching suggested params costs an RPC, and every operation needs them. This
+    provider fetches them once and hands out copies until the chain has moved
+    refreshRounds past their first valid round. A background thread follows new
+    rounds and refreshes the params ahead of time, so callers normally never wait
+    on algod. A single provider can be shared by any number of threads.
+
+    Args:
+        client: An algod client.
+        refreshRounds (optional): The number of rounds after which params are
+            refreshed. Defaults to 10.
+        safetyRounds (optional): Params are never handed out if fewer than this
+            many rounds remain in their validity window. Defaults to 10.
+    """
+
+    def __init__(
+        self, client: AlgodClient, refreshRounds: int = 10, safetyRounds: int = 10
+    ) -> None:
+        self.client = client
+        self.refreshRounds = refreshRounds
+        self.safetyRounds = safetyRounds
+
+        self.lock = threading.Lock()
+        self.params: Optional[transaction.SuggestedParams] = None
+        # the latest round seen by the provider
+        self.round = 0
+
+        self.startLock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def isUsable(self, params: Optional[transaction.SuggestedParams]) -> bool:
+        return (
+            params is not None
+            and self.round < params.first + self.refreshRounds
+            and self.round + self.safetyRounds < params.last
+        )
+
+    def refresh(self) -> transaction.SuggestedParams:
+        params = self.client.suggested_params()
+        with self.lock:
+            # params.first is the latest round known to the node
+            self.round = max(self.round, params.first)
+            if self.params is None or params.first >= self.params.first:
+                self.params = params
+            return self.params
+
+    def get(self) -> transaction.SuggestedParams:
+        """Get suggested params.
+
+        Returns:
+            A copy of the shared params, which the caller may modify.
+        """
+        self.start()
+
+        with self.lock:
+            params = self.params
+            usable = self.isUsable(params)
+
+        if not usable:
+            params = self.refresh()
+
+        return copy(params)
+
+    def observeRound(self, round: int) -> None:
+        """Let the provider know that the chain has reached a round."""
+        with self.lock:
+            self.round = max(self.round, round)
+
+    def follow(self) -> None:
+        while not self.stopped.is_set():
+            try:
+                status = self.client.status_after_block(self.round)
+                self.observeRound(status["last-round"])
+
+                with self.lock:
+                    usable = self.isUsable(self.params)
+
+                if not usable:
+                    self.refresh()
+            except Exception:
+                # try again later, get() falls back to fetching params itself
+                self.stopped.wait(1)
+
+    def start(self) -> None:
+        """Start refreshing params in the background. This is done automatically
+        the first time get() is called."""
+        with self.startLock:
+            if self.thread is not None:
+                return
+            # fetch the first params before anyone else looks for them
+            self.refresh()
+            self.thread = threading.Thread(
+                target=self.follow, name="SuggestedParamsProvider", daemon=True
+            )
+            self.thread.start()
+
+    def stop(self) -> None:
+        """Stop refreshing params in the background."""
+        self.stopped.set()
+
+
+def getSuggestedParams(
+    client: AlgodClient, paramsProvider: Optional[SuggestedParamsProvider] = None
+) -> transaction.SuggestedParams:
+    """Get suggested params from a provider if one is given, otherwise directly
+    from the client."""
+    if paramsProvider is not None:
+        return paramsProvider.get()
+    return client.suggested_params()
@@ -0,0 +1,86 @@
+from threading import Thread
+from time import sleep
+
+from algosdk.future import transaction
+
+from .params import SuggestedParamsProvider
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.round = 100
+        self.suggestedParamsCalls = 0
+
+    def suggested_params(self):
+        self.suggestedParamsCalls += 1
+        return transaction.SuggestedParams(
+            1000, self.round, self.round + 1000, "aGFzaA==", "test-v1"
+        )
+
+    def status_after_block(self, round):
+        sleep(0.01)
+        return {"last-round": self.round}
+
+
+def test_SuggestedParamsProvider_reuse():
+    client = FakeClient()
+    provider = SuggestedParamsProvider(client, refreshRounds=10)
+
+    first = provider.get()
+    second = provider.get()
+
+    assert client.suggestedParamsCalls == 1
+    assert first.first == second.first == 100
+    # each caller gets its own copy
+    assert first is not second
+
+    provider.stop()
+
+
+def test_SuggestedParamsProvider_refresh():
+    client = FakeClient()
+    provider = SuggestedParamsProvider(client, refreshRounds=10)
+    provider.stop()
+
+    provider.get()
+    client.round = 110
+    provider.observeRound(110)
+    params = provider.get()
+
+    assert client.suggestedParamsCalls == 2
+    assert params.first == 110
+
+
+def test_SuggestedParamsProvider_background_refresh():
+    client = FakeClient()
+    provider = SuggestedParamsProvider(client, refreshRounds=5)
+
+    provider.get()
+    client.round = 105
+
+    for _ in range(100):
+        if provider.params.first == 105:
+            break
+        sleep(0.01)
+
+    calls = client.suggestedParamsCalls
+    assert provider.get().first == 105
+    # the background thread refreshed the params, so get() did not have to
+    assert client.suggestedParamsCalls == calls == 2
+
+    provider.stop()
+
+
+def test_SuggestedParamsProvider_threads():
+    client = FakeClient()
+    provider = SuggestedParamsProvider(client)
+
+    threads = [Thread(target=provider.get) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert client.suggestedParamsCalls == 1
+
+    provider.stop()
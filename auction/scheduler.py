@@ -0,0 +1,334 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+import heapq
+import itertools
+import threading
+
+from algosdk.v2client.algod import AlgodClient
+
+from .account import Account
+from .blocks import getBlock
+from .operations import (
+    MAX_GROUP_SIZE,
+    AuctionSetup,
+    chunks,
+    setupAuctionApp,
+    setupAuctionApps,
+    closeAuctions,
+)
+from .params import SuggestedParamsProvider
+from .state import AuctionStateCache
+from .util import PendingTxnResponse
+
+# the most auctions closed by one call to closeAuctions
+CLOSE_BATCH_SIZE = 256
+
+
+class ScheduledAction:
+    def __init__(
+        self,
+        appID: int,
+        dueTime: int,
+        account: Account,
+        future: Future,
+        setup: Optional[AuctionSetup] = None,
+        deadline: Optional[int] = None,
+    ) -> None:
+        self.appID = appID
+        self.dueTime = dueTime
+        # the funder of a setup, or the closer of a close
+        self.account = account
+        self.future = future
+        # only set for setups
+        self.setup = setup
+        # the chain time at which a setup can no longer happen
+        self.deadline = deadline
+        self.attempts = 0
+
+
+class AuctionScheduler:
+    """Sets up and closes many auctions when they are due.
+
+    Every scheduled action is kept in a single heap ordered by the chain time
+    it is due at. Chain time is the timestamp of the latest block, which is
+    the time the auction contract checks against, so actions never run early
+    because of clock drift. A single background thread started with start()
+    reads each new block once and hands the actions that have become due to a
+    pool of workers. Setups are submitted in atomic groups and closes with
+    closeAuctions, so any number of auctions can be scheduled without a thread
+    per auction.
+
+    An action that fails is tried again in the next round, up to retries more
+    times. Every scheduled action gets a future that resolves once the action
+    has been confirmed, or to an Exception once it has failed for good.
+
+    Args:
+        client: An algod client.
+        concurrency (optional): The number of workers running actions at the
+            same time. Defaults to 8.
+        retries (optional): The number of times a failed action is retried.
+            Defaults to 3.
+        paramsProvider (optional): A provider of suggested params to share
+            between actions. If not given, params are fetched from the client.
+        stateCache (optional): A cache of auction state to read the state of
+            auctions from when they are closed. If not given, the state is
+            fetched from the client.
+    """
+
+    def __init__(
+        self,
+        client: AlgodClient,
+        concurrency: int = 8,
+        retries: int = 3,
+        paramsProvider: Optional[SuggestedParamsProvider] = None,
+        stateCache: Optional[AuctionStateCache] = None,
+    ) -> None:
+        self.client = client
+        self.concurrency = max(concurrency, 1)
+        self.retries = retries
+        self.paramsProvider = paramsProvider
+        self.stateCache = stateCache
+
+        self.lock = threading.Lock()
+        self.heap: List[Tuple[int, int, ScheduledAction]] = []
+        # breaks ties between actions due at the same time
+        self.counter = itertools.count()
+        # failed actions to run again once the next block is seen
+        self.retrying: List[ScheduledAction] = []
+        # the latest block seen by the scheduler and its timestamp
+        self.round = client.status()["last-round"]
+        self.timestamp = getBlock(client, self.round)["ts"]
+
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="AuctionScheduler"
+        )
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def push(self, action: ScheduledAction) -> None:
+        heapq.heappush(self.heap, (action.dueTime, next(self.counter), action))
+
+    def schedule(self, action: ScheduledAction) -> None:
+        with self.lock:
+            stopped = self.stopped.is_set()
+            if not stopped:
+                self.push(action)
+        if stopped:
+            action.future.set_exception(Exception("AuctionScheduler was stopped"))
+
+    def scheduleSetup(
+        self,
+        setup: AuctionSetup,
+        funder: Account,
+        startTime: int,
+        setupTime: int = 0,
+    ) -> "Future[None]":
+        """Schedule the setup of an auction. See setupAuctionApp.
+
+        Args:
+            setup: The auction to set up.
+            funder: The account providing the funding for the escrow account.
+            startTime: The start time of the auction. The setup fails if it has
+                not happened by then.
+            setupTime (optional): The chain time at which to set up the auction.
+                Defaults to as soon as possible.
+
+        Returns:
+            A future that resolves once the auction has been set up. It fails
+            at once if the scheduler has been stopped.
+        """
+        future: "Future[None]" = Future()
+        self.schedule(
+            ScheduledAction(
+                appID=setup.appID,
+                dueTime=setupTime,
+                account=funder,
+                future=future,
+                setup=setup,
+                deadline=startTime,
+            )
+        )
+        return future
+
+    def scheduleClose(
+        self, appID: int, endTime: int, closer: Account
+    ) -> "Future[PendingTxnResponse]":
+        """Schedule the close of an auction once it has ended. See closeAuction.
+
+        Args:
+            appID: The app ID of the auction.
+            endTime: The end time of the auction.
+            closer: The account initiating the close transaction.
+
+        Returns:
+            A future for the confirmed close transaction. It fails at once if
+            the scheduler has been stopped.
+        """
+        future: "Future[PendingTxnResponse]" = Future()
+        self.schedule(
+            ScheduledAction(appID=appID, dueTime=endTime, account=closer, future=future)
+        )
+        return future
+
+    def pending(self) -> int:
+        """Get the number of actions that have not been started yet."""
+        with self.lock:
+            return len(self.heap) + len(self.retrying)
+
+    def observeBlock(self, block: Dict[str, Any]) -> None:
+        """Move chain time to a block, as returned by blocks.getBlock, and run
+        the actions that are due by its timestamp."""
+        due: List[ScheduledAction] = []
+        with self.lock:
+            if self.stopped.is_set():
+                return
+            self.round = max(self.round, block["rnd"])
+            self.timestamp = max(self.timestamp, block["ts"])
+            for action in self.retrying:
+                self.push(action)
+            self.retrying = []
+            while len(self.heap) > 0 and self.heap[0][0] <= self.timestamp:
+                due.append(heapq.heappop(self.heap)[2])
+            timestamp = self.timestamp
+
+        if self.paramsProvider is not None:
+            self.paramsProvider.observeRound(block["rnd"])
+        if self.stateCache is not None:
+            self.stateCache.observeRound(block["rnd"])
+
+        setups: Dict[str, List[ScheduledAction]] = dict()
+        closes: Dict[str, List[ScheduledAction]] = dict()
+        for action in due:
+            if action.setup is None:
+                closes.setdefault(action.account.getAddress(), []).append(action)
+            elif action.deadline is not None and timestamp >= action.deadline:
+                action.future.set_exception(
+                    Exception(
+                        "Auction {} started before it was set up".format(action.appID)
+                    )
+                )
+            else:
+                setups.setdefault(action.account.getAddress(), []).append(action)
+
+        batches: List[Tuple[Callable[..., None], Sequence[ScheduledAction]]] = []
+        for actions in setups.values():
+            for chunk in chunks(actions, MAX_GROUP_SIZE // 3):
+                batches.append((self.runSetups, chunk))
+        for actions in closes.values():
+            for chunk in chunks(actions, CLOSE_BATCH_SIZE):
+                batches.append((self.runCloses, chunk))
+
+        with self.lock:
+            # stop() shuts down the executor under the lock, so it can't happen
+            # between this check and the submits
+            stopped = self.stopped.is_set()
+            if not stopped:
+                for run, chunk in batches:
+                    self.executor.submit(run, chunk)
+        if stopped:
+            for _, chunk in batches:
+                for action in chunk:
+                    action.future.set_exception(
+                        Exception("AuctionScheduler was stopped")
+                    )
+
+    def retry(self, action: ScheduledAction, error: Exception) -> None:
+        with self.lock:
+            if action.attempts <= self.retries and not self.stopped.is_set():
+                self.retrying.append(action)
+                return
+        action.future.set_exception(error)
+
+    def runSetups(self, actions: List[ScheduledAction]) -> None:
+        funder = actions[0].account
+        setups = [action.setup for action in actions if action.setup is not None]
+        try:
+            if len(actions) == 1:
+                actions[0].attempts += 1
+                setupAuctionApp(
+                    client=self.client,
+                    appID=setups[0].appID,
+                    funder=funder,
+                    nftHolder=setups[0].nftHolder,
+                    nftID=setups[0].nftID,
+                    nftAmount=setups[0].nftAmount,
+                    paramsProvider=self.paramsProvider,
+                )
+            else:
+                setupAuctionApps(
+                    client=self.client,
+                    funder=funder,
+                    setups=setups,
+                    paramsProvider=self.paramsProvider,
+                )
+        except Exception as e:
+            if len(actions) == 1:
+                self.retry(actions[0], e)
+                return
+            # the group was rejected as a whole, so set up each auction on its
+            # own to find the ones at fault
+            for action in actions:
+                self.runSetups([action])
+            return
+
+        for action in actions:
+            action.future.set_result(None)
+
+    def runCloses(self, actions: List[ScheduledAction]) -> None:
+        for action in actions:
+            action.attempts += 1
+        try:
+            results = closeAuctions(
+                client=self.client,
+                appIDs=[action.appID for action in actions],
+                closer=actions[0].account,
+                paramsProvider=self.paramsProvider,
+                stateCache=self.stateCache,
+                concurrency=self.concurrency,
+            )
+        except Exception as e:
+            for action in actions:
+                self.retry(action, e)
+            return
+
+        for action in actions:
+            result = results[action.appID]
+            if isinstance(result, Exception):
+                self.retry(action, result)
+            else:
+                action.future.set_result(result)
+
+    def follow(self) -> None:
+        while not self.stopped.is_set():
+            try:
+                status = self.client.status_after_block(self.round)
+                for round in range(self.round + 1, status["last-round"] + 1):
+                    if self.stopped.is_set():
+                        break
+                    self.observeBlock(getBlock(self.client, round))
+            except Exception:
+                # algod may be temporarily unavailable, try again
+                self.stopped.wait(1)
+
+    def start(self) -> None:
+        """Start following new blocks and running due actions in the
+        background."""
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(
+                target=self.follow, name="AuctionScheduler", daemon=True
+            )
+            self.thread.start()
+
+    def stop(self) -> None:
+        """Stop the scheduler. Actions that have not been started yet are
+        failed, and actions that are running finish without being retried."""
+        with self.lock:
+            self.stopped.set()
+            remaining = [action for _, _, action in self.heap] + self.retrying
+            self.heap = []
+            self.retrying = []
+            self.executor.shutdown(wait=False)
+        for action in remaining:
+            action.future.set_exception(Exception("AuctionScheduler was stopped"))
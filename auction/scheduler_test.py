@@ -0,0 +1,189 @@
+import pytest
+
+from algosdk.error import AlgodHTTPError
+
+from .blocks import getBlock
+from .operations import AuctionSetup, createAuctionApp, placeBid
+from .scheduler import AuctionScheduler
+from .testing.resources import createDummyAsset, optInToAsset
+from .testing.simulator import Ledger, SimulatedAlgodClient
+from .util import getBalances
+
+START_TIME = 1_600_000_000
+
+
+@pytest.fixture(autouse=True)
+def contractCache(tmp_path, monkeypatch):
+    monkeypatch.setenv("AUCTION_CONTRACT_CACHE", str(tmp_path))
+
+
+def createAuction(client, ledger, seller, startTime, endTime):
+    nftID = createDummyAsset(client, 1, seller)
+    appID = createAuctionApp(
+        client=client,
+        sender=seller,
+        seller=seller.getAddress(),
+        nftID=nftID,
+        startTime=startTime,
+        endTime=endTime,
+        reserve=1_000_000,
+        minBidIncrement=100_000,
+    )
+    return appID, nftID
+
+
+def test_schedule_auctions():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+
+    seller = ledger.createAccount()
+    bidder = ledger.createAccount()
+    closer = ledger.createAccount()
+
+    # more auctions than fit in one setup group, ending at different times
+    startTime = ledger.now() + 10
+    auctions = [
+        createAuction(client, ledger, seller, startTime, startTime + 60 + i * 10)
+        for i in range(7)
+    ]
+
+    scheduler = AuctionScheduler(client, concurrency=4)
+    setups = [
+        scheduler.scheduleSetup(
+            AuctionSetup(appID=appID, nftHolder=seller, nftID=nftID, nftAmount=1),
+            funder=seller,
+            startTime=startTime,
+        )
+        for appID, nftID in auctions
+    ]
+    closes = [
+        scheduler.scheduleClose(appID, startTime + 60 + i * 10, closer)
+        for i, (appID, _) in enumerate(auctions)
+    ]
+    scheduler.start()
+    try:
+        for future in setups:
+            assert future.result(timeout=10) is None
+        for appID, nftID in auctions:
+            assert getBalances(client, seller.getAddress())[nftID] == 0
+
+        appID, nftID = auctions[0]
+        optInToAsset(client, nftID, bidder)
+        ledger.advanceTime(15)
+        placeBid(client, appID, bidder, 1_000_000)
+
+        # only the first auction has ended
+        ledger.advanceTime(60)
+        closes[0].result(timeout=10)
+        assert not any(future.done() for future in closes[1:])
+        assert scheduler.pending() == len(auctions) - 1
+
+        ledger.advanceTime(60)
+        for future in closes[1:]:
+            assert future.result(timeout=10).confirmedRound is not None
+    finally:
+        scheduler.stop()
+
+    for appID, _ in auctions:
+        with pytest.raises(AlgodHTTPError):
+            client.application_info(appID)
+    assert getBalances(client, bidder.getAddress())[auctions[0][1]] == 1
+
+
+def test_setup_after_start():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+
+    seller = ledger.createAccount()
+    startTime = ledger.now() + 10
+    appID, nftID = createAuction(client, ledger, seller, startTime, startTime + 60)
+
+    scheduler = AuctionScheduler(client)
+    future = scheduler.scheduleSetup(
+        AuctionSetup(appID=appID, nftHolder=seller, nftID=nftID, nftAmount=1),
+        funder=seller,
+        startTime=startTime,
+        setupTime=startTime + 5,
+    )
+
+    # chain time only moves with blocks
+    ledger.advanceTime(20)
+    assert not future.done()
+
+    ledger.newBlock()
+    scheduler.observeBlock(getBlock(client, ledger.round))
+    with pytest.raises(Exception, match="started before it was set up"):
+        future.result(timeout=10)
+    assert getBalances(client, seller.getAddress())[nftID] == 1
+    scheduler.stop()
+
+
+def test_retries():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+
+    seller = ledger.createAccount()
+    closer = ledger.createAccount()
+    startTime = ledger.now() + 10
+    appID, _ = createAuction(client, ledger, seller, startTime, startTime + 60)
+
+    scheduler = AuctionScheduler(client, concurrency=1, retries=2)
+    # the auction is running, so closing it is rejected every time
+    future = scheduler.scheduleClose(appID, startTime, closer)
+    ledger.advanceTime(15)
+
+    attempts = 0
+    while not future.done() and attempts < 10:
+        ledger.newBlock()
+        scheduler.observeBlock(getBlock(client, ledger.round))
+        # wait for the workers to finish the attempt
+        scheduler.executor.submit(lambda: None).result(timeout=10)
+        attempts += 1
+
+    assert attempts == 3
+    with pytest.raises(Exception, match="has not ended"):
+        future.result()
+    assert scheduler.pending() == 0
+
+    other = scheduler.scheduleClose(appID, startTime + 60, closer)
+    scheduler.stop()
+    with pytest.raises(Exception, match="stopped"):
+        other.result()
+
+
+def test_stop_while_observing_block():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+
+    seller = ledger.createAccount()
+    closer = ledger.createAccount()
+    startTime = ledger.now() + 10
+    appID, nftID = createAuction(client, ledger, seller, startTime, startTime + 60)
+
+    class StoppingStateCache:
+        def observeRound(self, round):
+            scheduler.stop()
+
+    scheduler = AuctionScheduler(client, stateCache=StoppingStateCache())
+    future = scheduler.scheduleClose(appID, 0, closer)
+
+    # the scheduler is stopped after the close was taken from the heap, but
+    # before it was handed to the workers
+    ledger.newBlock()
+    scheduler.observeBlock(getBlock(client, ledger.round))
+    with pytest.raises(Exception, match="stopped"):
+        future.result(timeout=10)
+
+    # actions scheduled once the scheduler is stopped fail at once
+    late = [
+        scheduler.scheduleSetup(
+            AuctionSetup(appID=appID, nftHolder=seller, nftID=nftID, nftAmount=1),
+            funder=seller,
+            startTime=startTime,
+        ),
+        scheduler.scheduleClose(appID, startTime + 60, closer),
+    ]
+    for future in late:
+        with pytest.raises(Exception, match="stopped"):
+            future.result(timeout=0)
+    assert scheduler.pending() == 0
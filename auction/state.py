@@ -0,0 +1,393 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from base64 import b64decode, b64encode
+import threading
+
+from algosdk.v2client.algod import AlgodClient
+from algosdk import encoding
+
+from .blocks import getBlock
+from .util import PendingTxnResponse, getAppGlobalState
+
+State = Dict[bytes, Union[int, bytes]]
+
+# the action values of a state delta
+SET_BYTES_ACTION = 1
+SET_UINT_ACTION = 2
+DELETE_ACTION = 3
+
+CLOSE_OUT_ON_COMPLETE = 2
+DELETE_APPLICATION_ON_COMPLETE = 5
+
+
+def applyStateDelta(state: State, delta: Optional[List[Any]]) -> None:
+    """Apply a global or local state delta, in the JSON form returned by
+    pending_transaction_info, to decoded state."""
+    for pair in delta or []:
+        key = b64decode(pair["key"])
+        value = pair["value"]
+        action = value["action"]
+
+        if action == SET_BYTES_ACTION:
+            state[key] = b64decode(value.get("bytes", ""))
+        elif action == SET_UINT_ACTION:
+            state[key] = value.get("uint", 0)
+        elif action == DELETE_ACTION:
+            state.pop(key, None)
+        else:
+            raise Exception(f"Unexpected state delta action: {action}")
+
+
+def applyBlockStateDelta(state: State, delta: Optional[Dict[str, Any]]) -> None:
+    """Apply a global or local state delta, in the msgpack form stored in
+    blocks, to decoded state."""
+    for rawKey, value in (delta or {}).items():
+        if isinstance(rawKey, str):
+            key = rawKey.encode("utf-8", "surrogateescape")
+        else:
+            key = rawKey
+        action = value.get("at")
+
+        if action == SET_BYTES_ACTION:
+            state[key] = value.get("bs", b"")
+        elif action == SET_UINT_ACTION:
+            state[key] = value.get("ui", 0)
+        elif action == DELETE_ACTION:
+            state.pop(key, None)
+        else:
+            raise Exception(f"Unexpected state delta action: {action}")
+
+
+# the global state keys of the auction contract
+SELLER_KEY = b"seller"
+NFT_ID_KEY = b"nft_id"
+START_KEY = b"start"
+END_KEY = b"end"
+RESERVE_AMOUNT_KEY = b"reserve_amount"
+MIN_BID_INC_KEY = b"min_bid_inc"
+NUM_BIDS_KEY = b"num_bids"
+BID_AMOUNT_KEY = b"bid_amount"
+BID_ACCOUNT_KEY = b"bid_account"
+# only set by auctions with pull refunds
+OWED_KEY = b"owed"
+
+ZERO_ADDRESS = bytes(32)
+
+
+class AuctionState:
+    """The global state of an auction, with a typed attribute for each key.
+
+    Addresses are kept as 32 byte public keys, and are only encoded when the
+    sellerAddress and bidAccountAddress properties are read.
+
+    owed is the total credit owed to outbid bidders of an auction with pull
+    refunds, and None for an auction that refunds bids as they happen.
+    """
+
+    __slots__ = (
+        "seller",
+        "nftID",
+        "start",
+        "end",
+        "reserve",
+        "minBidIncrement",
+        "numBids",
+        "bidAmount",
+        "bidAccount",
+        "owed",
+    )
+
+    def __init__(
+        self,
+        seller: bytes = ZERO_ADDRESS,
+        nftID: int = 0,
+        start: int = 0,
+        end: int = 0,
+        reserve: int = 0,
+        minBidIncrement: int = 0,
+        numBids: int = 0,
+        bidAmount: int = 0,
+        bidAccount: bytes = ZERO_ADDRESS,
+        owed: Optional[int] = None,
+    ) -> None:
+        self.seller = seller
+        self.nftID = nftID
+        self.start = start
+        self.end = end
+        self.reserve = reserve
+        self.minBidIncrement = minBidIncrement
+        self.numBids = numBids
+        self.bidAmount = bidAmount
+        self.bidAccount = bidAccount
+        self.owed = owed
+
+    @property
+    def sellerAddress(self) -> str:
+        return encoding.encode_address(self.seller)
+
+    @property
+    def hasBid(self) -> bool:
+        return self.bidAccount != ZERO_ADDRESS and len(self.bidAccount) > 0
+
+    @property
+    def bidAccountAddress(self) -> Optional[str]:
+        """The address of the lead bidder, or None if there are no bids."""
+        if not self.hasBid:
+            return None
+        return encoding.encode_address(self.bidAccount)
+
+    @staticmethod
+    def fromState(state: State) -> "AuctionState":
+        """Convert decoded state, as returned by decodeState, to an
+        AuctionState."""
+        auction = AuctionState()
+        for key, value in state.items():
+            field = AUCTION_STATE_FIELDS.get(key)
+            if field is not None:
+                setattr(auction, field[0], value)
+        return auction
+
+    def toState(self) -> State:
+        """Convert to decoded state, in the form returned by decodeState. Keys
+        whose attribute is None, like owed for an auction without pull refunds,
+        are left out."""
+        state: State = dict()
+        for key, (name, _) in AUCTION_STATE_FIELDS.items():
+            value = getattr(self, name)
+            if value is not None:
+                state[key] = value
+        return state
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, AuctionState):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __repr__(self) -> str:
+        return "AuctionState({})".format(
+            ", ".join(
+                "{}={!r}".format(name, getattr(self, name)) for name in self.__slots__
+            )
+        )
+
+
+# the attribute name of each key, and whether its value is a byte slice
+AUCTION_STATE_FIELDS: Dict[bytes, Tuple[str, bool]] = {
+    SELLER_KEY: ("seller", True),
+    NFT_ID_KEY: ("nftID", False),
+    START_KEY: ("start", False),
+    END_KEY: ("end", False),
+    RESERVE_AMOUNT_KEY: ("reserve", False),
+    MIN_BID_INC_KEY: ("minBidIncrement", False),
+    NUM_BIDS_KEY: ("numBids", False),
+    BID_AMOUNT_KEY: ("bidAmount", False),
+    BID_ACCOUNT_KEY: ("bidAccount", True),
+    OWED_KEY: ("owed", False),
+}
+
+# the same fields, by base64 encoded key, so keys never need to be decoded
+AUCTION_STATE_FIELDS_B64: Dict[str, Tuple[str, bool]] = {
+    b64encode(key).decode(): field for key, field in AUCTION_STATE_FIELDS.items()
+}
+
+
+def decodeAuctionState(stateArray: List[Any]) -> AuctionState:
+    """Decode the global state of an auction, in the JSON form returned by
+    application_info.
+
+    Keys that are not part of the auction contract are ignored.
+    """
+    auction = AuctionState()
+    for pair in stateArray:
+        field = AUCTION_STATE_FIELDS_B64.get(pair["key"])
+        if field is None:
+            continue
+
+        name, isBytes = field
+        value = pair["value"]
+        if isBytes:
+            if value["type"] != 1:
+                raise Exception(f"Unexpected state type for {name}: {value['type']}")
+            setattr(auction, name, b64decode(value.get("bytes", "")))
+        else:
+            if value["type"] != 2:
+                raise Exception(f"Unexpected state type for {name}: {value['type']}")
+            setattr(auction, name, value.get("uint", 0))
+
+    return auction
+
+
+def getAuctionState(client: AlgodClient, appID: int) -> AuctionState:
+    """Get the global state of an auction from algod."""
+    appInfo = client.application_info(appID)
+    return decodeAuctionState(appInfo["params"]["global-state"])
+
+
+class CachedState:
+    def __init__(self, state: State, round: int) -> None:
+        self.state = state
+        # the last round at which this state is known to be accurate. Only
+        # loading the state and applying blocks move it forward
+        self.round = round
+        # the round of a confirmed transaction whose delta was applied ahead of
+        # the block stream, if any
+        self.responseRound: Optional[int] = None
+
+
+class AuctionStateCache:
+    """Keeps the decoded global state of a set of auctions.
+
+    Cached state is kept up to date from the blocks read by applyBlock or by
+    the background thread started with start(), and ahead of them from the
+    global state delta of confirmed transactions passed to applyResponse. A
+    delta is only applied ahead of the block stream when it is the first one
+    seen for the round right after the cached state; otherwise other changes
+    in that round or before it could be missed, so the auction is read again. State is only
+    fetched with application_info when an auction is not cached yet, or when its
+    state has not been confirmed for more than maxAge rounds. Without a
+    background thread, the cache only learns about new rounds from the
+    responses and blocks it is given.
+
+    Args:
+        client: An algod client.
+        appIDs (optional): Auctions to load into the cache right away.
+        maxAge (optional): The number of rounds that cached state can go without
+            being confirmed before it is considered stale. Defaults to 2.
+    """
+
+    def __init__(
+        self, client: AlgodClient, appIDs: Iterable[int] = (), maxAge: int = 2
+    ) -> None:
+        self.client = client
+        self.maxAge = maxAge
+
+        self.lock = threading.Lock()
+        self.entries: Dict[int, CachedState] = dict()
+        # the latest round known to the cache
+        self.round = client.status()["last-round"]
+        # the latest block applied by the background thread
+        self.blockRound = self.round
+
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+        for appID in appIDs:
+            self.load(appID)
+
+    def load(self, appID: int) -> State:
+        # the fetched state may be newer than this round, but since deltas set
+        # absolute values, replaying blocks on top of it converges to the same state
+        round = self.round
+        state = getAppGlobalState(self.client, appID)
+        with self.lock:
+            self.entries[appID] = CachedState(state, round)
+        return dict(state)
+
+    def get(self, appID: int) -> State:
+        """Get the global state of an auction.
+
+        Returns:
+            A copy of the cached state, which the caller may modify.
+        """
+        with self.lock:
+            entry = self.entries.get(appID)
+            if entry is not None and self.round - entry.round <= self.maxAge:
+                return dict(entry.state)
+
+        return self.load(appID)
+
+    def getAuctionState(self, appID: int) -> AuctionState:
+        """Get the global state of an auction as an AuctionState."""
+        return AuctionState.fromState(self.get(appID))
+
+    def invalidate(self, appID: int) -> None:
+        """Remove an auction from the cache, for instance because it has been
+        deleted or because a transaction against it failed."""
+        with self.lock:
+            self.entries.pop(appID, None)
+
+    def observeRound(self, round: int) -> None:
+        """Let the cache know that the chain has reached a round. Entries that
+        have not been confirmed since maxAge rounds before it become stale."""
+        with self.lock:
+            self.round = max(self.round, round)
+
+    def applyResponse(self, appID: int, response: PendingTxnResponse) -> None:
+        """Update cached state from a confirmed app call to an auction."""
+        with self.lock:
+            entry = self.entries.get(appID)
+            if entry is None or response.confirmedRound is None:
+                return
+            self.round = max(self.round, response.confirmedRound)
+            if response.confirmedRound <= entry.round:
+                # the block stream has already applied this transaction
+                return
+            if (
+                response.txn["txn"].get("apan", 0) == DELETE_APPLICATION_ON_COMPLETE
+                or response.confirmedRound != entry.round + 1
+                or entry.responseRound is not None
+            ):
+                # the order of this delta relative to other changes to the
+                # auction is not known, so read it again when it is next needed
+                del self.entries[appID]
+                return
+            applyStateDelta(entry.state, response.globalStateDelta)
+            # the block of this round still has to be applied, since it may
+            # change the auction before or after this transaction
+            entry.responseRound = response.confirmedRound
+
+    def applyBlock(self, block: Dict[str, Any]) -> None:
+        """Update cached state from a block, as returned by blocks.getBlock.
+
+        Blocks must be applied in order. Every cached auction that is not
+        changed by the block is known to be unchanged as of its round.
+        """
+        round = block["rnd"]
+        with self.lock:
+            for stib in block.get("txns", []):
+                txn = stib["txn"]
+                if txn.get("type") != "appl":
+                    continue
+
+                appID = txn.get("apid", 0)
+                entry = self.entries.get(appID)
+                if entry is None or entry.round >= round:
+                    continue
+
+                if txn.get("apan", 0) == DELETE_APPLICATION_ON_COMPLETE:
+                    del self.entries[appID]
+                    continue
+
+                applyBlockStateDelta(entry.state, stib.get("dt", {}).get("gd"))
+
+            for entry in self.entries.values():
+                entry.round = max(entry.round, round)
+                if entry.responseRound is not None and entry.responseRound <= round:
+                    entry.responseRound = None
+            self.round = max(self.round, round)
+            self.blockRound = max(self.blockRound, round)
+
+    def follow(self) -> None:
+        while not self.stopped.is_set():
+            try:
+                status = self.client.status_after_block(self.blockRound)
+                for round in range(self.blockRound + 1, status["last-round"] + 1):
+                    self.applyBlock(getBlock(self.client, round))
+            except Exception:
+                # try again later, stale entries are reloaded by get() meanwhile
+                self.stopped.wait(1)
+
+    def start(self) -> None:
+        """Start following new blocks in the background."""
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(
+                target=self.follow, name="AuctionStateCache", daemon=True
+            )
+            self.thread.start()
+
+    def stop(self) -> None:
+        """Stop following new blocks in the background."""
+        self.stopped.set()
@@ -0,0 +1,238 @@
+from base64 import b64encode
+
+import pytest
+
+from algosdk import encoding
+
+from .state import AuctionState, AuctionStateCache, decodeAuctionState
+from .util import PendingTxnResponse, decodeState
+
+
+def b64(value: bytes) -> str:
+    return b64encode(value).decode()
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.applicationInfoCalls = 0
+
+    def status(self):
+        return {"last-round": 10}
+
+    def application_info(self, appID):
+        self.applicationInfoCalls += 1
+        return {
+            "params": {
+                "global-state": [
+                    {"key": b64(b"num_bids"), "value": {"type": 2, "uint": 1}},
+                    {"key": b64(b"bid_account"), "value": {"type": 1, "bytes": ""}},
+                ]
+            }
+        }
+
+
+def test_AuctionStateCache_applyResponse():
+    client = FakeClient()
+    cache = AuctionStateCache(client, [1])
+
+    response = PendingTxnResponse(
+        {
+            "pool-error": "",
+            "txn": {"txn": {"apid": 1}},
+            "confirmed-round": 11,
+            "global-state-delta": [
+                {"key": b64(b"num_bids"), "value": {"action": 2, "uint": 2}},
+                {
+                    "key": b64(b"bid_account"),
+                    "value": {"action": 1, "bytes": b64(b"a")},
+                },
+            ],
+        }
+    )
+    cache.applyResponse(1, response)
+
+    assert cache.get(1) == {b"num_bids": 2, b"bid_account": b"a"}
+    assert client.applicationInfoCalls == 1
+
+
+def makeBidResponse(round, bidder, numBids):
+    return PendingTxnResponse(
+        {
+            "pool-error": "",
+            "txn": {"txn": {"apid": 1}},
+            "confirmed-round": round,
+            "global-state-delta": [
+                {"key": b64(b"num_bids"), "value": {"action": 2, "uint": numBids}},
+                {
+                    "key": b64(b"bid_account"),
+                    "value": {"action": 1, "bytes": b64(bidder)},
+                },
+            ],
+        }
+    )
+
+
+def test_AuctionStateCache_applyResponse_same_round():
+    client = FakeClient()
+    cache = AuctionStateCache(client, [1])
+
+    # two bids confirmed in the same round, whose responses arrive out of order
+    cache.applyResponse(1, makeBidResponse(11, b"b", 3))
+    assert cache.get(1) == {b"num_bids": 3, b"bid_account": b"b"}
+    cache.applyResponse(1, makeBidResponse(11, b"a", 2))
+
+    # the order of the bids is not known from their responses, so the state is
+    # read again
+    assert 1 not in cache.entries
+    cache.get(1)
+    assert client.applicationInfoCalls == 2
+
+
+def test_AuctionStateCache_applyResponse_block_wins():
+    client = FakeClient()
+    cache = AuctionStateCache(client, [1])
+
+    cache.applyResponse(1, makeBidResponse(11, b"a", 2))
+    # the block applies every change of the round, in order
+    cache.applyBlock(
+        {
+            "rnd": 11,
+            "txns": [
+                {
+                    "txn": {"type": "appl", "apid": 1},
+                    "dt": {"gd": {"num_bids": {"at": 2, "ui": 2}}},
+                },
+                {
+                    "txn": {"type": "appl", "apid": 1},
+                    "dt": {
+                        "gd": {
+                            "num_bids": {"at": 2, "ui": 3},
+                            "bid_account": {"at": 1, "bs": b"b"},
+                        }
+                    },
+                },
+            ],
+        }
+    )
+    assert cache.get(1) == {b"num_bids": 3, b"bid_account": b"b"}
+
+    # a response that skips rounds the cache has not seen is not applied
+    cache.applyResponse(1, makeBidResponse(13, b"c", 4))
+    assert 1 not in cache.entries
+    assert client.applicationInfoCalls == 1
+
+
+def test_AuctionStateCache_applyBlock():
+    client = FakeClient()
+    cache = AuctionStateCache(client, [1, 2], maxAge=2)
+
+    cache.applyBlock(
+        {
+            "rnd": 11,
+            "txns": [
+                {
+                    "txn": {"type": "appl", "apid": 1},
+                    "dt": {"gd": {"num_bids": {"at": 2, "ui": 5}}},
+                },
+                {"txn": {"type": "appl", "apid": 2, "apan": 5}},
+            ],
+        }
+    )
+    for round in range(12, 20):
+        cache.applyBlock({"rnd": round})
+
+    # following blocks keeps the state fresh without reloading it
+    assert cache.get(1) == {b"num_bids": 5, b"bid_account": b""}
+    assert client.applicationInfoCalls == 2
+
+    # the deleted auction is no longer cached
+    assert 2 not in cache.entries
+
+
+def test_AuctionStateCache_stale():
+    client = FakeClient()
+    cache = AuctionStateCache(client, [1], maxAge=2)
+
+    cache.get(1)
+    assert client.applicationInfoCalls == 1
+
+    cache.observeRound(13)
+    cache.get(1)
+    assert client.applicationInfoCalls == 2
+
+
+def test_decodeAuctionState():
+    seller = bytes(range(32))
+    bidder = bytes(range(1, 33))
+    stateArray = [
+        {"key": b64(b"seller"), "value": {"type": 1, "bytes": b64(seller)}},
+        {"key": b64(b"nft_id"), "value": {"type": 2, "uint": 5}},
+        {"key": b64(b"start"), "value": {"type": 2, "uint": 100}},
+        {"key": b64(b"end"), "value": {"type": 2, "uint": 200}},
+        {"key": b64(b"reserve_amount"), "value": {"type": 2, "uint": 1_000_000}},
+        {"key": b64(b"min_bid_inc"), "value": {"type": 2, "uint": 100_000}},
+        {"key": b64(b"num_bids"), "value": {"type": 2, "uint": 2}},
+        {"key": b64(b"bid_amount"), "value": {"type": 2, "uint": 1_100_000}},
+        {"key": b64(b"bid_account"), "value": {"type": 1, "bytes": b64(bidder)}},
+        {"key": b64(b"other"), "value": {"type": 2, "uint": 1}},
+    ]
+
+    auction = decodeAuctionState(stateArray)
+
+    assert auction == AuctionState(
+        seller=seller,
+        nftID=5,
+        start=100,
+        end=200,
+        reserve=1_000_000,
+        minBidIncrement=100_000,
+        numBids=2,
+        bidAmount=1_100_000,
+        bidAccount=bidder,
+    )
+    assert auction.sellerAddress == encoding.encode_address(seller)
+    assert auction.bidAccountAddress == encoding.encode_address(bidder)
+
+    decoded = decodeState(stateArray)
+    del decoded[b"other"]
+    assert auction.toState() == decoded
+    assert AuctionState.fromState(decoded) == auction
+
+    with pytest.raises(AttributeError):
+        auction.other = 1  # type: ignore
+
+
+def test_decodeAuctionState_no_bids():
+    auction = decodeAuctionState(
+        [
+            {"key": b64(b"nft_id"), "value": {"type": 2, "uint": 5}},
+            {"key": b64(b"bid_account"), "value": {"type": 1, "bytes": b64(bytes(32))}},
+        ]
+    )
+
+    assert auction.nftID == 5
+    assert auction.numBids == 0
+    assert not auction.hasBid
+    assert auction.bidAccountAddress is None
+
+    with pytest.raises(Exception):
+        decodeAuctionState([{"key": b64(b"nft_id"), "value": {"type": 1}}])
+
+
+def test_decodeAuctionState_owed():
+    pushed = decodeAuctionState(
+        [{"key": b64(b"nft_id"), "value": {"type": 2, "uint": 5}}]
+    )
+    assert pushed.owed is None
+    assert b"owed" not in pushed.toState()
+
+    pulled = decodeAuctionState(
+        [
+            {"key": b64(b"nft_id"), "value": {"type": 2, "uint": 5}},
+            {"key": b64(b"owed"), "value": {"type": 2, "uint": 1_000_000}},
+        ]
+    )
+    assert pulled.owed == 1_000_000
+    assert pulled.toState()[b"owed"] == 1_000_000
+    assert AuctionState.fromState(pulled.toState()) == pulled
+    assert AuctionState.fromState({b"owed": 0}).owed == 0
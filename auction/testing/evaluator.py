@@ -0,0 +1,1543 @@
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+from base64 import b32decode
+import hashlib
+
+from Cryptodome.Hash import keccak
+from nacl.signing import VerifyKey
+from nacl.exceptions import BadSignatureError
+
+from algosdk import encoding
+
+from ..assembler import OPS, OPS_BY_OPCODE, FIELD_TABLES
+from ..blocks import getTxnID
+
+StackValue = Union[int, bytes]
+
+MAX_UINT64 = 2 ** 64 - 1
+MAX_STACK_DEPTH = 1000
+MAX_BYTES_LENGTH = 4096
+SCRATCH_SIZE = 256
+
+MAX_LOGS = 32
+MAX_LOG_SIZE = 1024
+MAX_INNER_TXNS = 16
+
+MAX_KEY_LENGTH = 64
+MAX_KEY_VALUE_LENGTH = 128
+
+# the budget of each app call, which is pooled across the app calls in a group
+APP_CALL_BUDGET = 700
+
+MIN_TXN_FEE = 1_000
+MIN_BALANCE = 100_000
+MAX_TXN_LIFE = 1_000
+
+ZERO_ADDRESS = bytes(32)
+
+TYPE_ENUMS: Dict[str, int] = {
+    "pay": 1,
+    "keyreg": 2,
+    "acfg": 3,
+    "axfer": 4,
+    "afrz": 5,
+    "appl": 6,
+}
+
+# the transaction types that inner transactions can have
+INNER_TXN_TYPES = ("pay", "axfer", "acfg", "afrz")
+
+# the msgpack key and kind of each scalar transaction field
+TXN_FIELD_KEYS: Dict[str, Tuple[str, str]] = {
+    "Sender": ("snd", "addr"),
+    "Fee": ("fee", "int"),
+    "FirstValid": ("fv", "int"),
+    "LastValid": ("lv", "int"),
+    "Note": ("note", "bytes"),
+    "Lease": ("lx", "addr"),
+    "Receiver": ("rcv", "addr"),
+    "Amount": ("amt", "int"),
+    "CloseRemainderTo": ("close", "addr"),
+    "VotePK": ("votekey", "addr"),
+    "SelectionPK": ("selkey", "addr"),
+    "VoteFirst": ("votefst", "int"),
+    "VoteLast": ("votelst", "int"),
+    "VoteKeyDilution": ("votekd", "int"),
+    "Type": ("type", "str"),
+    "XferAsset": ("xaid", "int"),
+    "AssetAmount": ("aamt", "int"),
+    "AssetSender": ("asnd", "addr"),
+    "AssetReceiver": ("arcv", "addr"),
+    "AssetCloseTo": ("aclose", "addr"),
+    "ApplicationID": ("apid", "int"),
+    "OnCompletion": ("apan", "int"),
+    "ApprovalProgram": ("apap", "bytes"),
+    "ClearStateProgram": ("apsu", "bytes"),
+    "RekeyTo": ("rekey", "addr"),
+    "ConfigAsset": ("caid", "int"),
+    "ConfigAssetTotal": ("apar.t", "int"),
+    "ConfigAssetDecimals": ("apar.dc", "int"),
+    "ConfigAssetDefaultFrozen": ("apar.df", "bool"),
+    "ConfigAssetUnitName": ("apar.un", "str"),
+    "ConfigAssetName": ("apar.an", "str"),
+    "ConfigAssetURL": ("apar.au", "str"),
+    "ConfigAssetMetadataHash": ("apar.am", "bytes"),
+    "ConfigAssetManager": ("apar.m", "addr"),
+    "ConfigAssetReserve": ("apar.r", "addr"),
+    "ConfigAssetFreeze": ("apar.f", "addr"),
+    "ConfigAssetClawback": ("apar.c", "addr"),
+    "FreezeAsset": ("faid", "int"),
+    "FreezeAssetAccount": ("fadd", "addr"),
+    "FreezeAssetFrozen": ("afrz", "bool"),
+    "GlobalNumUint": ("apgs.nui", "int"),
+    "GlobalNumByteSlice": ("apgs.nbs", "int"),
+    "LocalNumUint": ("apls.nui", "int"),
+    "LocalNumByteSlice": ("apls.nbs", "int"),
+    "ExtraProgramPages": ("apep", "int"),
+    "Nonparticipation": ("nonpart", "bool"),
+}
+
+# the fields that an inner transaction can set with itxn_field
+INNER_TXN_FIELDS = (
+    "Sender",
+    "Fee",
+    "Receiver",
+    "Amount",
+    "CloseRemainderTo",
+    "Type",
+    "TypeEnum",
+    "XferAsset",
+    "AssetAmount",
+    "AssetSender",
+    "AssetReceiver",
+    "AssetCloseTo",
+    "ConfigAsset",
+    "ConfigAssetTotal",
+    "ConfigAssetDecimals",
+    "ConfigAssetDefaultFrozen",
+    "ConfigAssetUnitName",
+    "ConfigAssetName",
+    "ConfigAssetURL",
+    "ConfigAssetMetadataHash",
+    "ConfigAssetManager",
+    "ConfigAssetReserve",
+    "ConfigAssetFreeze",
+    "ConfigAssetClawback",
+    "FreezeAsset",
+    "FreezeAssetAccount",
+    "FreezeAssetFrozen",
+)
+
+
+class LogicError(Exception):
+    """A program failed. The message mirrors the error reported by algod."""
+
+    def __init__(self, message: str, pc: Optional[int] = None) -> None:
+        super().__init__(message if pc is None else "{} pc={}".format(message, pc))
+        self.pc = pc
+
+
+class DecodedOp(NamedTuple):
+    name: str
+    immediates: Tuple[Any, ...]
+    # the pc of the next instruction
+    next: int
+    cost: int
+
+
+class Program:
+    """A program decoded into its instructions, indexed by pc."""
+
+    def __init__(self, program: bytes) -> None:
+        self.bytes = program
+        self.version, self.start = decodeUvarint(program, 0)
+        self.ops: Dict[int, DecodedOp] = dict()
+
+        pc = self.start
+        while pc < len(program):
+            op = decodeOp(program, pc, self.version)
+            self.ops[pc] = op
+            pc = op.next
+
+
+PROGRAM_CACHE: Dict[bytes, Program] = dict()
+
+
+def getProgram(program: bytes) -> Program:
+    decoded = PROGRAM_CACHE.get(program)
+    if decoded is None:
+        decoded = Program(program)
+        PROGRAM_CACHE[program] = decoded
+    return decoded
+
+
+def decodeUvarint(program: bytes, pc: int) -> Tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        if pc >= len(program):
+            raise LogicError("could not decode varint", pc)
+        b = program[pc]
+        value |= (b & 0x7F) << shift
+        pc += 1
+        if b < 0x80:
+            return value, pc
+        shift += 7
+
+
+def decodeOp(program: bytes, pc: int, version: int) -> DecodedOp:
+    opcode = program[pc]
+    name = OPS_BY_OPCODE.get(opcode)
+    if name is None:
+        raise LogicError("invalid opcode {:#x}".format(opcode), pc)
+    spec = OPS[name]
+    if spec.version > version:
+        raise LogicError(
+            "{} opcode was introduced in TEAL v{}".format(name, spec.version), pc
+        )
+
+    immediates: List[Any] = []
+    cursor = pc + 1
+    for kind in spec.immediates:
+        if kind == "uint8":
+            if cursor >= len(program):
+                raise LogicError("{} expects an immediate".format(name), pc)
+            immediates.append(program[cursor])
+            cursor += 1
+        elif kind == "varuint":
+            value, cursor = decodeUvarint(program, cursor)
+            immediates.append(value)
+        elif kind == "bytes":
+            length, cursor = decodeUvarint(program, cursor)
+            immediates.append(program[cursor : cursor + length])
+            cursor += length
+        elif kind == "label":
+            if cursor + 2 > len(program):
+                raise LogicError("{} expects a branch offset".format(name), pc)
+            offset = int.from_bytes(program[cursor : cursor + 2], "big", signed=True)
+            cursor += 2
+            # branch offsets are relative to the end of the branch instruction
+            immediates.append(cursor + offset)
+        elif kind == "intcblock":
+            count, cursor = decodeUvarint(program, cursor)
+            ints: List[int] = []
+            for _ in range(count):
+                value, cursor = decodeUvarint(program, cursor)
+                ints.append(value)
+            immediates.append(tuple(ints))
+        elif kind == "bytecblock":
+            count, cursor = decodeUvarint(program, cursor)
+            byteValues: List[bytes] = []
+            for _ in range(count):
+                length, cursor = decodeUvarint(program, cursor)
+                byteValues.append(program[cursor : cursor + length])
+                cursor += length
+            immediates.append(tuple(byteValues))
+        else:
+            table = FIELD_TABLES[kind]
+            if cursor >= len(program) or program[cursor] >= len(table):
+                raise LogicError("invalid {} for {}".format(kind, name), pc)
+            immediates.append(table[program[cursor]])
+            cursor += 1
+
+    if cursor > len(program):
+        raise LogicError(
+            "{} immediates run past the end of the program".format(name), pc
+        )
+
+    return DecodedOp(name, tuple(immediates), cursor, spec.cost)
+
+
+def getAppAddress(appID: int) -> bytes:
+    return encoding.checksum(b"appID" + appID.to_bytes(8, "big"))
+
+
+def getRawTxnID(txn: Dict[str, Any]) -> bytes:
+    txID = getTxnID(txn)
+    return b32decode(txID + "=" * (-len(txID) % 8))
+
+
+def getTxnField(txn: Dict[str, Any], key: str) -> Any:
+    if "." in key:
+        outer, inner = key.split(".")
+        return txn.get(outer, {}).get(inner)
+    return txn.get(key)
+
+
+def setTxnField(txn: Dict[str, Any], key: str, value: Any) -> None:
+    if "." in key:
+        outer, inner = key.split(".")
+        txn.setdefault(outer, {})[inner] = value
+    else:
+        txn[key] = value
+
+
+class CostBudget:
+    """The opcode budget shared by all app calls in a group."""
+
+    def __init__(self, remaining: int) -> None:
+        self.remaining = remaining
+
+
+class LedgerView:
+    """The ledger state that programs can read and write.
+
+    The simulator implements this for the group being evaluated. Addresses are
+    32 byte public keys.
+    """
+
+    round: int
+    latestTimestamp: int
+
+    def balance(self, address: bytes) -> int:
+        raise NotImplementedError
+
+    def minBalance(self, address: bytes) -> int:
+        raise NotImplementedError
+
+    def assetHolding(self, address: bytes, assetID: int) -> Optional[Tuple[int, bool]]:
+        raise NotImplementedError
+
+    def assetParams(self, assetID: int) -> Optional[Dict[str, StackValue]]:
+        raise NotImplementedError
+
+    def appParams(self, appID: int) -> Optional[Dict[str, StackValue]]:
+        raise NotImplementedError
+
+    def globalState(self, appID: int) -> Optional[Dict[bytes, StackValue]]:
+        """Get the global state of an app, which the caller may modify if it is
+        the app being evaluated."""
+        raise NotImplementedError
+
+    def localState(
+        self, address: bytes, appID: int
+    ) -> Optional[Dict[bytes, StackValue]]:
+        """Get the local state of an account in an app, which the caller may
+        modify if it is the app being evaluated. None if the account has not
+        opted in."""
+        raise NotImplementedError
+
+    def defaultInnerFee(self) -> int:
+        raise NotImplementedError
+
+    def submitInner(self, appID: int, txn: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply an inner transaction sent by an app.
+
+        Returns:
+            The apply data of the transaction, in its block form.
+        """
+        raise NotImplementedError
+
+
+Tracer = Callable[["Evaluation", int, DecodedOp], None]
+
+
+class Evaluation:
+    """Runs an approval or clear state program for one app call in a group.
+
+    Args:
+        program: The program bytes.
+        ledger: The ledger state the program can access.
+        group: The transactions of the group, in their msgpack dictionary form.
+        applyData: The apply data of the group transactions evaluated so far.
+        groupIndex: The index of the app call in the group.
+        appID: The ID of the app being called. For an app create, this is the
+            ID the new app will have.
+        budget: The opcode budget shared by the group.
+        groupScratch (optional): The scratch space of the app calls evaluated
+            so far in the group, for gload.
+        tracer (optional): A function called before each instruction is
+            executed.
+    """
+
+    def __init__(
+        self,
+        program: bytes,
+        ledger: LedgerView,
+        group: List[Dict[str, Any]],
+        applyData: List[Dict[str, Any]],
+        groupIndex: int,
+        appID: int,
+        budget: CostBudget,
+        groupScratch: Optional[List[Optional[List[StackValue]]]] = None,
+        tracer: Optional[Tracer] = None,
+    ) -> None:
+        self.program = getProgram(program)
+        self.ledger = ledger
+        self.group = group
+        self.applyData = applyData
+        self.groupIndex = groupIndex
+        self.txn = group[groupIndex]
+        self.appID = appID
+        self.budget = budget
+        self.groupScratch = groupScratch or []
+        self.tracer = tracer
+
+        self.stack: List[StackValue] = []
+        self.scratch: List[StackValue] = [0] * SCRATCH_SIZE
+        self.callstack: List[int] = []
+        self.intc: Tuple[int, ...] = ()
+        self.bytec: Tuple[bytes, ...] = ()
+        self.pc = self.program.start
+        # the total cost of the instructions executed so far
+        self.cost = 0
+
+        self.logs: List[bytes] = []
+        self.innerTxns: List[Dict[str, Any]] = []
+        self.pendingInner: Optional[Dict[str, Any]] = None
+
+    def run(self) -> bool:
+        """Run the program.
+
+        Returns:
+            True if the program approved the transaction, False otherwise.
+
+        Raises:
+            LogicError: If the program failed.
+        """
+        program = self.program
+        ops = program.ops
+        end = len(program.bytes)
+        pc = program.start
+
+        while pc < end:
+            op = ops.get(pc)
+            if op is None:
+                raise LogicError("branch target is not an instruction", pc)
+
+            self.budget.remaining -= op.cost
+            if self.budget.remaining < 0:
+                raise LogicError("dynamic cost budget exceeded", pc)
+            self.cost += op.cost
+
+            if self.tracer is not None:
+                self.tracer(self, pc, op)
+
+            self.pc = pc
+            target = getattr(self, OP_HANDLERS[op.name])(op)
+            pc = op.next if target is None else target
+
+            if len(self.stack) > MAX_STACK_DEPTH:
+                raise LogicError("stack overflow", self.pc)
+
+        if len(self.stack) != 1:
+            raise LogicError(
+                "stack len is {} instead of 1".format(len(self.stack)), self.pc
+            )
+        result = self.stack[0]
+        if not isinstance(result, int):
+            raise LogicError("stack finished with bytes not int", self.pc)
+        return result != 0
+
+    # stack helpers
+
+    def fail(self, message: str) -> LogicError:
+        return LogicError(message, self.pc)
+
+    def pop(self) -> StackValue:
+        if len(self.stack) == 0:
+            raise self.fail("stack underflow")
+        return self.stack.pop()
+
+    def popInt(self) -> int:
+        value = self.pop()
+        if not isinstance(value, int):
+            raise self.fail("wanted type uint64 but got []byte")
+        return value
+
+    def popBytes(self) -> bytes:
+        value = self.pop()
+        if not isinstance(value, bytes):
+            raise self.fail("wanted type []byte but got uint64")
+        return value
+
+    def push(self, value: StackValue) -> None:
+        if isinstance(value, bytes) and len(value) > MAX_BYTES_LENGTH:
+            raise self.fail("byte array is too long")
+        self.stack.append(value)
+
+    def pushInt(self, value: int) -> None:
+        if value < 0:
+            raise self.fail("- would result negative")
+        if value > MAX_UINT64:
+            raise self.fail("overflowed")
+        self.stack.append(value)
+
+    def pushBool(self, value: bool) -> None:
+        self.stack.append(1 if value else 0)
+
+    # arithmetic and logic
+
+    def opErr(self, op: DecodedOp) -> None:
+        raise self.fail("err opcode executed")
+
+    def opSha256(self, op: DecodedOp) -> None:
+        self.push(hashlib.sha256(self.popBytes()).digest())
+
+    def opKeccak256(self, op: DecodedOp) -> None:
+        self.push(keccak.new(data=self.popBytes(), digest_bits=256).digest())
+
+    def opSha512_256(self, op: DecodedOp) -> None:
+        self.push(encoding.checksum(self.popBytes()))
+
+    def opEd25519verify(self, op: DecodedOp) -> None:
+        publicKey = self.popBytes()
+        signature = self.popBytes()
+        data = self.popBytes()
+        program = self.program.bytes
+        message = b"ProgData" + encoding.checksum(b"Program" + program) + data
+        try:
+            VerifyKey(publicKey).verify(message, signature)
+            self.pushBool(True)
+        except (BadSignatureError, ValueError):
+            self.pushBool(False)
+
+    def opUnsupported(self, op: DecodedOp) -> None:
+        raise self.fail("{} is not supported by the simulator".format(op.name))
+
+    def opPlus(self, op: DecodedOp) -> None:
+        b, a = self.popInt(), self.popInt()
+        if a + b > MAX_UINT64:
+            raise self.fail("+ overflowed")
+        self.stack.append(a + b)
+
+    def opMinus(self, op: DecodedOp) -> None:
+        b, a = self.popInt(), self.popInt()
+        if a < b:
+            raise self.fail("- would result negative")
+        self.stack.append(a - b)
+
+    def opDiv(self, op: DecodedOp) -> None:
+        b, a = self.popInt(), self.popInt()
+        if b == 0:
+            raise self.fail("/ 0")
+        self.stack.append(a // b)
+
+    def opMul(self, op: DecodedOp) -> None:
+        b, a = self.popInt(), self.popInt()
+        if a * b > MAX_UINT64:
+            raise self.fail("* overflowed")
+        self.stack.append(a * b)
+
+    def opMod(self, op: DecodedOp) -> None:
+        b, a = self.popInt(), self.popInt()
+        if b == 0:
+            raise self.fail("% 0")
+        self.stack.append(a % b)
+
+    def opLt(self, op: DecodedOp) -> None:
+        b, a = self.popInt(), self.popInt()
+        self.pushBool(a < b)
+
+    def opGt(self, op: DecodedOp) -> None:
+        b, a = self.popInt(), self.popInt()
+        self.pushBool(a > b)
+
+    def opLe(self, op: DecodedOp) -> None:
+        b, a = self.popInt(), self.popInt()
+        self.pushBool(a <= b)
+
+    def opGe(self, op: DecodedOp) -> None:
+        b, a = self.popInt(), self.popInt()
+        self.pushBool(a >= b)
+
+    def opAnd(self, op: DecodedOp) -> None:
+        b, a = self.popInt(), self.popInt()
+        self.pushBool(a != 0 and b != 0)
+
+    def opOr(self, op: DecodedOp) -> None:
+        b, a = self.popInt(), self.popInt()
+        self.pushBool(a != 0 or b != 0)
+
+    def opEq(self, op: DecodedOp) -> None:
+        b, a = self.pop(), self.pop()
+        if type(a) is not type(b):
+            raise self.fail("cannot compare uint64 to []byte")
+        self.pushBool(a == b)
+
+    def opNeq(self, op: DecodedOp) -> None:
+        b, a = self.pop(), self.pop()
+        if type(a) is not type(b):
+            raise self.fail("cannot compare uint64 to []byte")
+        self.pushBool(a != b)
+
+    def opNot(self, op: DecodedOp) -> None:
+        self.pushBool(self.popInt() == 0)
+
+    def opLen(self, op: DecodedOp) -> None:
+        self.stack.append(len(self.popBytes()))
+
+    def opItob(self, op: DecodedOp) -> None:
+        self.push(self.popInt().to_bytes(8, "big"))
+
+    def opBtoi(self, op: DecodedOp) -> None:
+        value = self.popBytes()
+        if len(value) > 8:
+            raise self.fail("btoi arg too long, got [{}]bytes".format(len(value)))
+        self.stack.append(int.from_bytes(value, "big"))
+
+    def opBitOr(self, op: DecodedOp) -> None:
+        b, a = self.popInt(), self.popInt()
+        self.stack.append(a | b)
+
+    def opBitAnd(self, op: DecodedOp) -> None:
+        b, a = self.popInt(), self.popInt()
+        self.stack.append(a & b)
+
+    def opBitXor(self, op: DecodedOp) -> None:
+        b, a = self.popInt(), self.popInt()
+        self.stack.append(a ^ b)
+
+    def opBitNot(self, op: DecodedOp) -> None:
+        self.stack.append(self.popInt() ^ MAX_UINT64)
+
+    def opMulw(self, op: DecodedOp) -> None:
+        b, a = self.popInt(), self.popInt()
+        product = a * b
+        self.stack.append(product >> 64)
+        self.stack.append(product & MAX_UINT64)
+
+    def opAddw(self, op: DecodedOp) -> None:
+        b, a = self.popInt(), self.popInt()
+        total = a + b
+        self.stack.append(total >> 64)
+        self.stack.append(total & MAX_UINT64)
+
+    def opDivmodw(self, op: DecodedOp) -> None:
+        divisorLow, divisorHigh = self.popInt(), self.popInt()
+        dividendLow, dividendHigh = self.popInt(), self.popInt()
+        divisor = (divisorHigh << 64) | divisorLow
+        dividend = (dividendHigh << 64) | dividendLow
+        if divisor == 0:
+            raise self.fail("/ 0")
+        quotient, remainder = divmod(dividend, divisor)
+        self.stack += [
+            quotient >> 64,
+            quotient & MAX_UINT64,
+            remainder >> 64,
+            remainder & MAX_UINT64,
+        ]
+
+    def opShl(self, op: DecodedOp) -> None:
+        b, a = self.popInt(), self.popInt()
+        if b > 63:
+            raise self.fail("shl arg too big, ({})".format(b))
+        self.stack.append((a << b) & MAX_UINT64)
+
+    def opShr(self, op: DecodedOp) -> None:
+        b, a = self.popInt(), self.popInt()
+        if b > 63:
+            raise self.fail("shr arg too big, ({})".format(b))
+        self.stack.append(a >> b)
+
+    def opSqrt(self, op: DecodedOp) -> None:
+        value = self.popInt()
+        root = int(value ** 0.5)
+        while root * root > value:
+            root -= 1
+        while (root + 1) * (root + 1) <= value:
+            root += 1
+        self.stack.append(root)
+
+    def opBitlen(self, op: DecodedOp) -> None:
+        value = self.pop()
+        if isinstance(value, int):
+            self.stack.append(value.bit_length())
+        else:
+            self.stack.append(int.from_bytes(value, "big").bit_length())
+
+    def opExp(self, op: DecodedOp) -> None:
+        b, a = self.popInt(), self.popInt()
+        if a == 0 and b == 0:
+            raise self.fail("0^0 is undefined")
+        self.pushInt(a ** b if a <= 1 or b < 64 else MAX_UINT64 + 1)
+
+    def opExpw(self, op: DecodedOp) -> None:
+        b, a = self.popInt(), self.popInt()
+        if a == 0 and b == 0:
+            raise self.fail("0^0 is undefined")
+        result = a ** b if a <= 1 or b < 128 else 2 ** 128
+        if result >= 2 ** 128:
+            raise self.fail("expw overflowed")
+        self.stack.append(result >> 64)
+        self.stack.append(result & MAX_UINT64)
+
+    # byte math
+
+    def popBigInt(self) -> int:
+        value = self.popBytes()
+        if len(value) > 64:
+            raise self.fail("math attempted on large byte-array")
+        return int.from_bytes(value, "big")
+
+    def pushBigInt(self, value: int) -> None:
+        self.push(value.to_bytes((value.bit_length() + 7) // 8, "big"))
+
+    def opBytesMath(self, op: DecodedOp) -> None:
+        b, a = self.popBigInt(), self.popBigInt()
+        name = op.name
+        if name == "b+":
+            self.pushBigInt(a + b)
+        elif name == "b-":
+            if a < b:
+                raise self.fail("byte math would have negative result")
+            self.pushBigInt(a - b)
+        elif name == "b*":
+            self.pushBigInt(a * b)
+        elif name in ("b/", "b%"):
+            if b == 0:
+                raise self.fail("division by zero")
+            self.pushBigInt(a // b if name == "b/" else a % b)
+        elif name == "b<":
+            self.pushBool(a < b)
+        elif name == "b>":
+            self.pushBool(a > b)
+        elif name == "b<=":
+            self.pushBool(a <= b)
+        elif name == "b>=":
+            self.pushBool(a >= b)
+        elif name == "b==":
+            self.pushBool(a == b)
+        else:
+            self.pushBool(a != b)
+
+    def opBytesBitwise(self, op: DecodedOp) -> None:
+        b, a = self.popBytes(), self.popBytes()
+        # the shorter value is zero padded on the left
+        length = max(len(a), len(b))
+        a, b = a.rjust(length, b"\x00"), b.rjust(length, b"\x00")
+        if op.name == "b|":
+            self.push(bytes(x | y for x, y in zip(a, b)))
+        elif op.name == "b&":
+            self.push(bytes(x & y for x, y in zip(a, b)))
+        else:
+            self.push(bytes(x ^ y for x, y in zip(a, b)))
+
+    def opBytesNot(self, op: DecodedOp) -> None:
+        self.push(bytes(x ^ 0xFF for x in self.popBytes()))
+
+    def opBzero(self, op: DecodedOp) -> None:
+        length = self.popInt()
+        if length > MAX_BYTES_LENGTH:
+            raise self.fail("bzero attempted to create a too large string")
+        self.push(bytes(length))
+
+    # constants
+
+    def opIntcblock(self, op: DecodedOp) -> None:
+        self.intc = op.immediates[0]
+
+    def opIntc(self, op: DecodedOp) -> None:
+        self.pushIntConstant(op.immediates[0])
+
+    def opIntcN(self, op: DecodedOp) -> None:
+        self.pushIntConstant(OPS[op.name].opcode - OPS["intc_0"].opcode)
+
+    def pushIntConstant(self, index: int) -> None:
+        if index >= len(self.intc):
+            raise self.fail("intc {} beyond {} constants".format(index, len(self.intc)))
+        self.stack.append(self.intc[index])
+
+    def opBytecblock(self, op: DecodedOp) -> None:
+        self.bytec = op.immediates[0]
+
+    def opBytec(self, op: DecodedOp) -> None:
+        self.pushByteConstant(op.immediates[0])
+
+    def opBytecN(self, op: DecodedOp) -> None:
+        self.pushByteConstant(OPS[op.name].opcode - OPS["bytec_0"].opcode)
+
+    def pushByteConstant(self, index: int) -> None:
+        if index >= len(self.bytec):
+            raise self.fail(
+                "bytec {} beyond {} constants".format(index, len(self.bytec))
+            )
+        self.stack.append(self.bytec[index])
+
+    def opPushbytes(self, op: DecodedOp) -> None:
+        self.stack.append(op.immediates[0])
+
+    def opPushint(self, op: DecodedOp) -> None:
+        self.stack.append(op.immediates[0])
+
+    def opArg(self, op: DecodedOp) -> None:
+        raise self.fail("{} not allowed in current mode".format(op.name))
+
+    # transaction fields
+
+    def txnFieldValue(
+        self,
+        txn: Dict[str, Any],
+        applyData: Optional[Dict[str, Any]],
+        groupIndex: int,
+        field: str,
+        arrayIndex: Optional[int] = None,
+    ) -> StackValue:
+        spec = TXN_FIELD_KEYS.get(field)
+        if spec is not None:
+            key, kind = spec
+            value = getTxnField(txn, key)
+            if kind == "int":
+                return value or 0
+            if kind == "bool":
+                return 1 if value else 0
+            if kind == "addr":
+                return value or ZERO_ADDRESS
+            if kind == "str":
+                return (value or "").encode("utf-8", "surrogateescape")
+            return value or b""
+
+        if field == "TypeEnum":
+            return TYPE_ENUMS.get(txn.get("type", ""), 0)
+        if field == "GroupIndex":
+            return groupIndex
+        if field == "TxID":
+            return getRawTxnID(txn)
+        if field == "NumAppArgs":
+            return len(txn.get("apaa", []))
+        if field == "NumAccounts":
+            return len(txn.get("apat", []))
+        if field == "NumAssets":
+            return len(txn.get("apas", []))
+        if field == "NumApplications":
+            return len(txn.get("apfa", []))
+        if field == "NumLogs":
+            return len((applyData or {}).get("dt", {}).get("lg", []))
+        if field == "CreatedAssetID":
+            return (applyData or {}).get("caid", 0)
+        if field == "CreatedApplicationID":
+            return (applyData or {}).get("apid", 0)
+
+        if field in ("ApplicationArgs", "Accounts", "Assets", "Applications", "Logs"):
+            if arrayIndex is None:
+                raise self.fail("{} requires an array index".format(field))
+            array: List[Any]
+            if field == "ApplicationArgs":
+                array = txn.get("apaa", [])
+            elif field == "Accounts":
+                array = [txn.get("snd", ZERO_ADDRESS)] + txn.get("apat", [])
+            elif field == "Assets":
+                array = txn.get("apas", [])
+            elif field == "Applications":
+                array = [txn.get("apid", 0)] + txn.get("apfa", [])
+            else:
+                array = (applyData or {}).get("dt", {}).get("lg", [])
+            if arrayIndex >= len(array):
+                raise self.fail(
+                    "invalid {} index {} of {}".format(field, arrayIndex, len(array))
+                )
+            return array[arrayIndex]
+
+        raise self.fail("invalid txn field {}".format(field))
+
+    def groupTxnValue(
+        self, groupIndex: int, field: str, arrayIndex: Optional[int] = None
+    ) -> StackValue:
+        if groupIndex >= len(self.group):
+            raise self.fail(
+                "gtxn lookup TxnGroup[{}] but it only has {}".format(
+                    groupIndex, len(self.group)
+                )
+            )
+        applyData = (
+            self.applyData[groupIndex] if groupIndex < len(self.applyData) else None
+        )
+        if field in ("Logs", "NumLogs", "CreatedAssetID", "CreatedApplicationID"):
+            if groupIndex >= self.groupIndex:
+                raise self.fail(
+                    "{} can only be read from earlier transactions".format(field)
+                )
+        return self.txnFieldValue(
+            self.group[groupIndex], applyData, groupIndex, field, arrayIndex
+        )
+
+    def opTxn(self, op: DecodedOp) -> None:
+        self.push(self.groupTxnValue(self.groupIndex, op.immediates[0]))
+
+    def opTxna(self, op: DecodedOp) -> None:
+        field, index = op.immediates
+        self.push(self.groupTxnValue(self.groupIndex, field, index))
+
+    def opTxnas(self, op: DecodedOp) -> None:
+        index = self.popInt()
+        self.push(self.groupTxnValue(self.groupIndex, op.immediates[0], index))
+
+    def opGtxn(self, op: DecodedOp) -> None:
+        groupIndex, field = op.immediates
+        self.push(self.groupTxnValue(groupIndex, field))
+
+    def opGtxna(self, op: DecodedOp) -> None:
+        groupIndex, field, index = op.immediates
+        self.push(self.groupTxnValue(groupIndex, field, index))
+
+    def opGtxnas(self, op: DecodedOp) -> None:
+        groupIndex, field = op.immediates
+        index = self.popInt()
+        self.push(self.groupTxnValue(groupIndex, field, index))
+
+    def opGtxns(self, op: DecodedOp) -> None:
+        groupIndex = self.popInt()
+        self.push(self.groupTxnValue(groupIndex, op.immediates[0]))
+
+    def opGtxnsa(self, op: DecodedOp) -> None:
+        field, index = op.immediates
+        groupIndex = self.popInt()
+        self.push(self.groupTxnValue(groupIndex, field, index))
+
+    def opGtxnsas(self, op: DecodedOp) -> None:
+        index = self.popInt()
+        groupIndex = self.popInt()
+        self.push(self.groupTxnValue(groupIndex, op.immediates[0], index))
+
+    def opGlobal(self, op: DecodedOp) -> None:
+        field = op.immediates[0]
+        value: StackValue
+        if field == "MinTxnFee":
+            value = MIN_TXN_FEE
+        elif field == "MinBalance":
+            value = MIN_BALANCE
+        elif field == "MaxTxnLife":
+            value = MAX_TXN_LIFE
+        elif field == "ZeroAddress":
+            value = ZERO_ADDRESS
+        elif field == "GroupSize":
+            value = len(self.group)
+        elif field == "LogicSigVersion":
+            value = 5
+        elif field == "Round":
+            value = self.ledger.round
+        elif field == "LatestTimestamp":
+            value = self.ledger.latestTimestamp
+        elif field == "CurrentApplicationID":
+            value = self.appID
+        elif field == "CreatorAddress":
+            params = self.ledger.appParams(self.appID)
+            value = ZERO_ADDRESS if params is None else params["AppCreator"]
+        elif field == "CurrentApplicationAddress":
+            value = getAppAddress(self.appID)
+        elif field == "GroupID":
+            value = self.txn.get("grp", ZERO_ADDRESS)
+        else:
+            raise self.fail("invalid global field {}".format(field))
+        self.push(value)
+
+    # scratch space
+
+    def opLoad(self, op: DecodedOp) -> None:
+        self.stack.append(self.scratch[op.immediates[0]])
+
+    def opStore(self, op: DecodedOp) -> None:
+        self.scratch[op.immediates[0]] = self.pop()
+
+    def opLoads(self, op: DecodedOp) -> None:
+        slot = self.popInt()
+        if slot >= SCRATCH_SIZE:
+            raise self.fail("invalid Scratch index {}".format(slot))
+        self.stack.append(self.scratch[slot])
+
+    def opStores(self, op: DecodedOp) -> None:
+        value = self.pop()
+        slot = self.popInt()
+        if slot >= SCRATCH_SIZE:
+            raise self.fail("invalid Scratch index {}".format(slot))
+        self.scratch[slot] = value
+
+    def loadGroupScratch(self, groupIndex: int, slot: int) -> StackValue:
+        if groupIndex >= self.groupIndex:
+            raise self.fail("can't use gload on non-app call txn or future txn")
+        scratch = (
+            self.groupScratch[groupIndex]
+            if groupIndex < len(self.groupScratch)
+            else None
+        )
+        if scratch is None:
+            raise self.fail("can't use gload on non-app call txn")
+        return scratch[slot]
+
+    def opGload(self, op: DecodedOp) -> None:
+        groupIndex, slot = op.immediates
+        self.stack.append(self.loadGroupScratch(groupIndex, slot))
+
+    def opGloads(self, op: DecodedOp) -> None:
+        groupIndex = self.popInt()
+        self.stack.append(self.loadGroupScratch(groupIndex, op.immediates[0]))
+
+    def createdID(self, groupIndex: int) -> int:
+        if groupIndex >= self.groupIndex:
+            raise self.fail(
+                "gaid can't get creatable ID of txn ahead of the current one"
+            )
+        applyData = self.applyData[groupIndex]
+        createdID = applyData.get("caid", 0) or applyData.get("apid", 0)
+        if createdID == 0:
+            raise self.fail("gaid can't get creatable ID of txn that didn't create one")
+        return createdID
+
+    def opGaid(self, op: DecodedOp) -> None:
+        self.stack.append(self.createdID(op.immediates[0]))
+
+    def opGaids(self, op: DecodedOp) -> None:
+        self.stack.append(self.createdID(self.popInt()))
+
+    # flow control
+
+    def opBnz(self, op: DecodedOp) -> Optional[int]:
+        return op.immediates[0] if self.popInt() != 0 else None
+
+    def opBz(self, op: DecodedOp) -> Optional[int]:
+        return op.immediates[0] if self.popInt() == 0 else None
+
+    def opB(self, op: DecodedOp) -> Optional[int]:
+        return op.immediates[0]
+
+    def opReturn(self, op: DecodedOp) -> Optional[int]:
+        result = self.popInt()
+        self.stack = [result]
+        return len(self.program.bytes)
+
+    def opAssert(self, op: DecodedOp) -> None:
+        if self.popInt() == 0:
+            raise self.fail("assert failed")
+
+    def opCallsub(self, op: DecodedOp) -> Optional[int]:
+        if len(self.callstack) >= MAX_STACK_DEPTH:
+            raise self.fail("callsub stack overflow")
+        self.callstack.append(op.next)
+        return op.immediates[0]
+
+    def opRetsub(self, op: DecodedOp) -> Optional[int]:
+        if len(self.callstack) == 0:
+            raise self.fail("retsub with empty callstack")
+        return self.callstack.pop()
+
+    # stack manipulation
+
+    def opPop(self, op: DecodedOp) -> None:
+        self.pop()
+
+    def opDup(self, op: DecodedOp) -> None:
+        value = self.pop()
+        self.stack += [value, value]
+
+    def opDup2(self, op: DecodedOp) -> None:
+        b, a = self.pop(), self.pop()
+        self.stack += [a, b, a, b]
+
+    def opDig(self, op: DecodedOp) -> None:
+        depth = op.immediates[0]
+        if depth >= len(self.stack):
+            raise self.fail(
+                "dig {} with stack size = {}".format(depth, len(self.stack))
+            )
+        self.stack.append(self.stack[-1 - depth])
+
+    def opSwap(self, op: DecodedOp) -> None:
+        b, a = self.pop(), self.pop()
+        self.stack += [b, a]
+
+    def opSelect(self, op: DecodedOp) -> None:
+        condition = self.popInt()
+        b, a = self.pop(), self.pop()
+        self.stack.append(b if condition != 0 else a)
+
+    def opCover(self, op: DecodedOp) -> None:
+        depth = op.immediates[0]
+        if depth >= len(self.stack):
+            raise self.fail(
+                "cover {} with stack size = {}".format(depth, len(self.stack))
+            )
+        value = self.stack.pop()
+        self.stack.insert(len(self.stack) - depth, value)
+
+    def opUncover(self, op: DecodedOp) -> None:
+        depth = op.immediates[0]
+        if depth >= len(self.stack):
+            raise self.fail(
+                "uncover {} with stack size = {}".format(depth, len(self.stack))
+            )
+        value = self.stack.pop(len(self.stack) - 1 - depth)
+        self.stack.append(value)
+
+    # byte arrays
+
+    def opConcat(self, op: DecodedOp) -> None:
+        b, a = self.popBytes(), self.popBytes()
+        self.push(a + b)
+
+    def substring(self, value: bytes, start: int, end: int) -> bytes:
+        if end < start:
+            raise self.fail("substring end before start")
+        if end > len(value):
+            raise self.fail("substring range beyond length of string")
+        return value[start:end]
+
+    def opSubstring(self, op: DecodedOp) -> None:
+        start, end = op.immediates
+        self.push(self.substring(self.popBytes(), start, end))
+
+    def opSubstring3(self, op: DecodedOp) -> None:
+        end, start = self.popInt(), self.popInt()
+        self.push(self.substring(self.popBytes(), start, end))
+
+    def extract(self, value: bytes, start: int, length: int) -> bytes:
+        if start + length > len(value):
+            raise self.fail("extract range beyond length of string")
+        return value[start : start + length]
+
+    def opExtract(self, op: DecodedOp) -> None:
+        start, length = op.immediates
+        value = self.popBytes()
+        if length == 0:
+            # a length of 0 means until the end of the array
+            if start > len(value):
+                raise self.fail("extract range beyond length of string")
+            length = len(value) - start
+        self.push(self.extract(value, start, length))
+
+    def opExtract3(self, op: DecodedOp) -> None:
+        length, start = self.popInt(), self.popInt()
+        self.push(self.extract(self.popBytes(), start, length))
+
+    def opExtractUint(self, op: DecodedOp) -> None:
+        size = {"extract_uint16": 2, "extract_uint32": 4, "extract_uint64": 8}[op.name]
+        start = self.popInt()
+        value = self.popBytes()
+        self.stack.append(int.from_bytes(self.extract(value, start, size), "big"))
+
+    def opGetbit(self, op: DecodedOp) -> None:
+        index = self.popInt()
+        target = self.pop()
+        if isinstance(target, int):
+            if index > 63:
+                raise self.fail("getbit index > 63 with Uint")
+            self.stack.append((target >> index) & 1)
+        else:
+            if index >= len(target) * 8:
+                raise self.fail("getbit index beyond byteslice")
+            self.stack.append((target[index // 8] >> (7 - index % 8)) & 1)
+
+    def opSetbit(self, op: DecodedOp) -> None:
+        bit = self.popInt()
+        index = self.popInt()
+        target = self.pop()
+        if bit > 1:
+            raise self.fail("setbit value > 1")
+        if isinstance(target, int):
+            if index > 63:
+                raise self.fail("setbit index > 63 with Uint")
+            mask = 1 << index
+            self.stack.append(target | mask if bit else target & ~mask)
+        else:
+            if index >= len(target) * 8:
+                raise self.fail("setbit index beyond byteslice")
+            updated = bytearray(target)
+            mask = 1 << (7 - index % 8)
+            if bit:
+                updated[index // 8] |= mask
+            else:
+                updated[index // 8] &= ~mask & 0xFF
+            self.stack.append(bytes(updated))
+
+    def opGetbyte(self, op: DecodedOp) -> None:
+        index = self.popInt()
+        value = self.popBytes()
+        if index >= len(value):
+            raise self.fail("getbyte index beyond array length")
+        self.stack.append(value[index])
+
+    def opSetbyte(self, op: DecodedOp) -> None:
+        byte = self.popInt()
+        index = self.popInt()
+        value = self.popBytes()
+        if index >= len(value):
+            raise self.fail("setbyte index beyond array length")
+        if byte > 0xFF:
+            raise self.fail("setbyte value > 255")
+        updated = bytearray(value)
+        updated[index] = byte
+        self.stack.append(bytes(updated))
+
+    # ledger access
+
+    def resolveAccount(self, ref: StackValue) -> bytes:
+        accounts = [self.txn.get("snd", ZERO_ADDRESS)] + self.txn.get("apat", [])
+        if isinstance(ref, int):
+            if ref >= len(accounts):
+                raise self.fail("invalid Account reference {}".format(ref))
+            return accounts[ref]
+
+        if ref in accounts or ref == getAppAddress(self.appID):
+            return ref
+        for appID in self.txn.get("apfa", []):
+            if ref == getAppAddress(appID):
+                return ref
+        raise self.fail(
+            "invalid Account reference {}".format(encoding.encode_address(ref))
+        )
+
+    def resolveAsset(self, ref: int) -> int:
+        assets = self.txn.get("apas", [])
+        if ref < len(assets):
+            return assets[ref]
+        if ref in assets:
+            return ref
+        raise self.fail("invalid Asset reference {}".format(ref))
+
+    def resolveApp(self, ref: int) -> int:
+        apps = self.txn.get("apfa", [])
+        if ref == 0:
+            return self.appID
+        if ref <= len(apps):
+            return apps[ref - 1]
+        if ref == self.appID or ref in apps:
+            return ref
+        raise self.fail("invalid App reference {}".format(ref))
+
+    def opBalance(self, op: DecodedOp) -> None:
+        address = self.resolveAccount(self.pop())
+        self.stack.append(self.ledger.balance(address))
+
+    def opMinBalance(self, op: DecodedOp) -> None:
+        address = self.resolveAccount(self.pop())
+        self.stack.append(self.ledger.minBalance(address))
+
+    def opAppOptedIn(self, op: DecodedOp) -> None:
+        appID = self.resolveApp(self.popInt())
+        address = self.resolveAccount(self.pop())
+        self.pushBool(self.ledger.localState(address, appID) is not None)
+
+    def opAppLocalGet(self, op: DecodedOp) -> None:
+        key = self.popBytes()
+        address = self.resolveAccount(self.pop())
+        state = self.ledger.localState(address, self.appID)
+        self.stack.append((state or {}).get(key, 0))
+
+    def opAppLocalGetEx(self, op: DecodedOp) -> None:
+        key = self.popBytes()
+        appID = self.resolveApp(self.popInt())
+        address = self.resolveAccount(self.pop())
+        state = self.ledger.localState(address, appID)
+        self.pushMaybe((state or {}).get(key))
+
+    def opAppGlobalGet(self, op: DecodedOp) -> None:
+        key = self.popBytes()
+        state = self.ledger.globalState(self.appID)
+        self.stack.append((state or {}).get(key, 0))
+
+    def opAppGlobalGetEx(self, op: DecodedOp) -> None:
+        key = self.popBytes()
+        appID = self.resolveApp(self.popInt())
+        state = self.ledger.globalState(appID)
+        self.pushMaybe((state or {}).get(key))
+
+    def pushMaybe(self, value: Optional[StackValue]) -> None:
+        self.stack.append(0 if value is None else value)
+        self.pushBool(value is not None)
+
+    def checkKeyValue(self, key: bytes, value: StackValue) -> None:
+        if len(key) > MAX_KEY_LENGTH:
+            raise self.fail("key too long: length was {}".format(len(key)))
+        if isinstance(value, bytes) and len(key) + len(value) > MAX_KEY_VALUE_LENGTH:
+            raise self.fail(
+                "key/value total too long for key {!r}".format(key.decode("latin-1"))
+            )
+
+    def opAppLocalPut(self, op: DecodedOp) -> None:
+        value = self.pop()
+        key = self.popBytes()
+        address = self.resolveAccount(self.pop())
+        self.checkKeyValue(key, value)
+        state = self.ledger.localState(address, self.appID)
+        if state is None:
+            raise self.fail(
+                "{} has not opted in to app {}".format(
+                    encoding.encode_address(address), self.appID
+                )
+            )
+        state[key] = value
+
+    def opAppLocalDel(self, op: DecodedOp) -> None:
+        key = self.popBytes()
+        address = self.resolveAccount(self.pop())
+        state = self.ledger.localState(address, self.appID)
+        if state is None:
+            raise self.fail(
+                "{} has not opted in to app {}".format(
+                    encoding.encode_address(address), self.appID
+                )
+            )
+        state.pop(key, None)
+
+    def opAppGlobalPut(self, op: DecodedOp) -> None:
+        value = self.pop()
+        key = self.popBytes()
+        self.checkKeyValue(key, value)
+        state = self.ledger.globalState(self.appID)
+        assert state is not None
+        state[key] = value
+
+    def opAppGlobalDel(self, op: DecodedOp) -> None:
+        key = self.popBytes()
+        state = self.ledger.globalState(self.appID)
+        assert state is not None
+        state.pop(key, None)
+
+    def opAssetHoldingGet(self, op: DecodedOp) -> None:
+        assetID = self.resolveAsset(self.popInt())
+        address = self.resolveAccount(self.pop())
+        holding = self.ledger.assetHolding(address, assetID)
+        if holding is None:
+            self.pushMaybe(None)
+        elif op.immediates[0] == "AssetBalance":
+            self.pushMaybe(holding[0])
+        else:
+            self.pushMaybe(1 if holding[1] else 0)
+
+    def opAssetParamsGet(self, op: DecodedOp) -> None:
+        assetID = self.resolveAsset(self.popInt())
+        params = self.ledger.assetParams(assetID)
+        self.pushMaybe(None if params is None else params[op.immediates[0]])
+
+    def opAppParamsGet(self, op: DecodedOp) -> None:
+        appID = self.resolveApp(self.popInt())
+        params = self.ledger.appParams(appID)
+        self.pushMaybe(None if params is None else params[op.immediates[0]])
+
+    def opLog(self, op: DecodedOp) -> None:
+        message = self.popBytes()
+        if len(self.logs) >= MAX_LOGS:
+            raise self.fail(
+                "too many log calls in program. up to {} is allowed".format(MAX_LOGS)
+            )
+        if sum(len(log) for log in self.logs) + len(message) > MAX_LOG_SIZE:
+            raise self.fail(
+                "program logs too large. {} bytes >  {} bytes limit".format(
+                    sum(len(log) for log in self.logs) + len(message), MAX_LOG_SIZE
+                )
+            )
+        self.logs.append(message)
+
+    # inner transactions
+
+    def opItxnBegin(self, op: DecodedOp) -> None:
+        if self.pendingInner is not None:
+            raise self.fail("itxn_begin without itxn_submit")
+        if len(self.innerTxns) >= MAX_INNER_TXNS:
+            raise self.fail("too many inner transactions")
+        self.pendingInner = {
+            "snd": getAppAddress(self.appID),
+            "fee": self.ledger.defaultInnerFee(),
+            "fv": self.txn.get("fv", 0),
+            "lv": self.txn.get("lv", 0),
+        }
+
+    def opItxnField(self, op: DecodedOp) -> None:
+        field = op.immediates[0]
+        value = self.pop()
+        if self.pendingInner is None:
+            raise self.fail("itxn_field without itxn_begin")
+        if field not in INNER_TXN_FIELDS:
+            raise self.fail("invalid itxn_field {}".format(field))
+
+        if field == "TypeEnum":
+            if not isinstance(value, int):
+                raise self.fail("TypeEnum must be a uint64")
+            types = {enum: name for name, enum in TYPE_ENUMS.items()}
+            typeName = types.get(value)
+            if typeName not in INNER_TXN_TYPES:
+                raise self.fail("{} is not a valid Type for itxn_field".format(value))
+            self.pendingInner["type"] = typeName
+            return
+
+        key, kind = TXN_FIELD_KEYS[field]
+        if kind in ("int", "bool"):
+            if not isinstance(value, int):
+                raise self.fail("{} must be a uint64".format(field))
+            setTxnField(
+                self.pendingInner, key, bool(value) if kind == "bool" else value
+            )
+            return
+
+        if not isinstance(value, bytes):
+            raise self.fail("{} must be a []byte".format(field))
+        if kind == "addr":
+            if len(value) != 32:
+                raise self.fail("{} must be 32 bytes".format(field))
+        elif kind == "str":
+            value = value.decode("utf-8", "surrogateescape")
+            if field == "Type" and value not in INNER_TXN_TYPES:
+                raise self.fail("{} is not a valid Type for itxn_field".format(value))
+        setTxnField(self.pendingInner, key, value)
+
+    def opItxnSubmit(self, op: DecodedOp) -> None:
+        txn = self.pendingInner
+        if txn is None:
+            raise self.fail("itxn_submit without itxn_begin")
+        if "type" not in txn:
+            raise self.fail("unknown tx type")
+        self.pendingInner = None
+
+        try:
+            applyData = self.ledger.submitInner(self.appID, txn)
+        except LogicError:
+            raise
+        except Exception as e:
+            raise self.fail(str(e))
+
+        self.innerTxns.append(dict(applyData, txn=txn))
+
+    def lastInner(self) -> Dict[str, Any]:
+        if len(self.innerTxns) == 0:
+            raise self.fail("no inner transaction available")
+        return self.innerTxns[-1]
+
+    def opItxn(self, op: DecodedOp) -> None:
+        inner = self.lastInner()
+        self.push(self.txnFieldValue(inner["txn"], inner, 0, op.immediates[0]))
+
+    def opItxna(self, op: DecodedOp) -> None:
+        field, index = op.immediates
+        inner = self.lastInner()
+        self.push(self.txnFieldValue(inner["txn"], inner, 0, field, index))
+
+
+OP_HANDLERS: Dict[str, str] = {
+    "err": "opErr",
+    "sha256": "opSha256",
+    "keccak256": "opKeccak256",
+    "sha512_256": "opSha512_256",
+    "ed25519verify": "opEd25519verify",
+    "ecdsa_verify": "opUnsupported",
+    "ecdsa_pk_decompress": "opUnsupported",
+    "ecdsa_pk_recover": "opUnsupported",
+    "+": "opPlus",
+    "-": "opMinus",
+    "/": "opDiv",
+    "*": "opMul",
+    "<": "opLt",
+    ">": "opGt",
+    "<=": "opLe",
+    ">=": "opGe",
+    "&&": "opAnd",
+    "||": "opOr",
+    "==": "opEq",
+    "!=": "opNeq",
+    "!": "opNot",
+    "len": "opLen",
+    "itob": "opItob",
+    "btoi": "opBtoi",
+    "%": "opMod",
+    "|": "opBitOr",
+    "&": "opBitAnd",
+    "^": "opBitXor",
+    "~": "opBitNot",
+    "mulw": "opMulw",
+    "addw": "opAddw",
+    "divmodw": "opDivmodw",
+    "intcblock": "opIntcblock",
+    "intc": "opIntc",
+    "intc_0": "opIntcN",
+    "intc_1": "opIntcN",
+    "intc_2": "opIntcN",
+    "intc_3": "opIntcN",
+    "bytecblock": "opBytecblock",
+    "bytec": "opBytec",
+    "bytec_0": "opBytecN",
+    "bytec_1": "opBytecN",
+    "bytec_2": "opBytecN",
+    "bytec_3": "opBytecN",
+    "arg": "opArg",
+    "arg_0": "opArg",
+    "arg_1": "opArg",
+    "arg_2": "opArg",
+    "arg_3": "opArg",
+    "args": "opArg",
+    "txn": "opTxn",
+    "global": "opGlobal",
+    "gtxn": "opGtxn",
+    "load": "opLoad",
+    "store": "opStore",
+    "txna": "opTxna",
+    "gtxna": "opGtxna",
+    "gtxns": "opGtxns",
+    "gtxnsa": "opGtxnsa",
+    "gload": "opGload",
+    "gloads": "opGloads",
+    "gaid": "opGaid",
+    "gaids": "opGaids",
+    "loads": "opLoads",
+    "stores": "opStores",
+    "bnz": "opBnz",
+    "bz": "opBz",
+    "b": "opB",
+    "return": "opReturn",
+    "assert": "opAssert",
+    "pop": "opPop",
+    "dup": "opDup",
+    "dup2": "opDup2",
+    "dig": "opDig",
+    "swap": "opSwap",
+    "select": "opSelect",
+    "cover": "opCover",
+    "uncover": "opUncover",
+    "concat": "opConcat",
+    "substring": "opSubstring",
+    "substring3": "opSubstring3",
+    "getbit": "opGetbit",
+    "setbit": "opSetbit",
+    "getbyte": "opGetbyte",
+    "setbyte": "opSetbyte",
+    "extract": "opExtract",
+    "extract3": "opExtract3",
+    "extract_uint16": "opExtractUint",
+    "extract_uint32": "opExtractUint",
+    "extract_uint64": "opExtractUint",
+    "balance": "opBalance",
+    "app_opted_in": "opAppOptedIn",
+    "app_local_get": "opAppLocalGet",
+    "app_local_get_ex": "opAppLocalGetEx",
+    "app_global_get": "opAppGlobalGet",
+    "app_global_get_ex": "opAppGlobalGetEx",
+    "app_local_put": "opAppLocalPut",
+    "app_global_put": "opAppGlobalPut",
+    "app_local_del": "opAppLocalDel",
+    "app_global_del": "opAppGlobalDel",
+    "asset_holding_get": "opAssetHoldingGet",
+    "asset_params_get": "opAssetParamsGet",
+    "app_params_get": "opAppParamsGet",
+    "min_balance": "opMinBalance",
+    "pushbytes": "opPushbytes",
+    "pushint": "opPushint",
+    "callsub": "opCallsub",
+    "retsub": "opRetsub",
+    "shl": "opShl",
+    "shr": "opShr",
+    "sqrt": "opSqrt",
+    "bitlen": "opBitlen",
+    "exp": "opExp",
+    "expw": "opExpw",
+    "b+": "opBytesMath",
+    "b-": "opBytesMath",
+    "b/": "opBytesMath",
+    "b*": "opBytesMath",
+    "b<": "opBytesMath",
+    "b>": "opBytesMath",
+    "b<=": "opBytesMath",
+    "b>=": "opBytesMath",
+    "b==": "opBytesMath",
+    "b!=": "opBytesMath",
+    "b%": "opBytesMath",
+    "b|": "opBytesBitwise",
+    "b&": "opBytesBitwise",
+    "b^": "opBytesBitwise",
+    "b~": "opBytesNot",
+    "bzero": "opBzero",
+    "log": "opLog",
+    "itxn_begin": "opItxnBegin",
+    "itxn_field": "opItxnField",
+    "itxn_submit": "opItxnSubmit",
+    "itxn": "opItxn",
+    "itxna": "opItxna",
+    "txnas": "opTxnas",
+    "gtxnas": "opGtxnas",
+    "gtxnsas": "opGtxnsas",
+}
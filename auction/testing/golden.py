@@ -0,0 +1,96 @@
+"""Golden output of algod's compile endpoint for the auction contracts.
+
+The local assembler must produce the same bytes as algod. To check that without
+a node, the TEAL of each contract and algod's compiled program for it are
+recorded under auction/testdata, and assembler_test assembles the recorded TEAL
+and compares the result to the recorded program.
+
+Record the golden files again after changing a contract, with a sandbox node
+running:
+
+    python -m auction.testing.golden
+
+Without a node, --local records the output of the local assembler instead.
+That only keeps the recorded TEAL up to date, so record them with algod again
+before relying on the comparison.
+"""
+
+from typing import Callable, Dict, Optional, Tuple
+from base64 import b64decode
+import os
+import sys
+
+from algosdk.v2client.algod import AlgodClient
+from pyteal import Expr, compileTeal, Mode
+
+from ..assembler import assemble
+from ..contracts import approval_program, multi_lot_approval_program
+from ..util import TEAL_VERSION
+from .setup import ALGOD_ADDRESS, ALGOD_TOKEN
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "testdata")
+
+GOLDEN_PROGRAMS: Dict[str, Callable[[], Expr]] = {
+    "approval": lambda: approval_program(),
+    "approval_pull_refunds": lambda: approval_program(pull_refunds=True),
+    "multi_lot_approval": lambda: multi_lot_approval_program(),
+}
+
+
+def getTeal(name: str) -> str:
+    return compileTeal(
+        GOLDEN_PROGRAMS[name](), mode=Mode.Application, version=TEAL_VERSION
+    )
+
+
+def getGoldenPaths(name: str) -> Tuple[str, str]:
+    base = os.path.join(GOLDEN_DIR, name)
+    return base + ".teal", base + ".tok"
+
+
+def loadGolden(name: str) -> Optional[Tuple[str, bytes]]:
+    """Load the recorded TEAL of a program and algod's compiled program for it.
+
+    Returns:
+        The TEAL source and the program, or None if they were never recorded.
+    """
+    tealPath, programPath = getGoldenPaths(name)
+    if not os.path.exists(tealPath) or not os.path.exists(programPath):
+        return None
+    with open(tealPath) as f:
+        teal = f.read()
+    with open(programPath, "rb") as f:
+        program = f.read()
+    return teal, program
+
+
+def recordGolden(client: Optional[AlgodClient], name: str) -> None:
+    """Compile a program with algod and record the result.
+
+    Args:
+        client: An Algod client. If None, the program is assembled in-process
+            instead.
+        name: The name of the program in GOLDEN_PROGRAMS.
+    """
+    teal = getTeal(name)
+    if client is None:
+        program = assemble(teal)
+    else:
+        program = b64decode(client.compile(teal)["result"])
+
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+    tealPath, programPath = getGoldenPaths(name)
+    with open(tealPath, "w") as f:
+        f.write(teal)
+    with open(programPath, "wb") as f:
+        f.write(program)
+
+
+if __name__ == "__main__":
+    client: Optional[AlgodClient] = None
+    if "--local" not in sys.argv[1:]:
+        # a plain client, since the simulator compiles with the local assembler
+        client = AlgodClient(ALGOD_TOKEN, ALGOD_ADDRESS)
+    for name in GOLDEN_PROGRAMS:
+        recordGolden(client, name)
+        print("Recorded", name)
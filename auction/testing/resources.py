@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from random import choice, randint
 
 from algosdk.v2client.algod import AlgodClient
@@ -6,18 +6,23 @@ from algosdk.future import transaction
 from algosdk import account
 
 from ..account import Account
+from ..params import SuggestedParamsProvider, getSuggestedParams
 from ..util import PendingTxnResponse, waitForTransaction
 from .setup import getGenesisAccounts
 
 
 def payAccount(
-    client: AlgodClient, sender: Account, to: str, amount: int
+    client: AlgodClient,
+    sender: Account,
+    to: str,
+    amount: int,
+    paramsProvider: Optional[SuggestedParamsProvider] = None,
 ) -> PendingTxnResponse:
     txn = transaction.PaymentTxn(
         sender=sender.getAddress(),
         receiver=to,
         amt=amount,
-        sp=client.suggested_params(),
+        sp=getSuggestedParams(client, paramsProvider),
     )
     signedTxn = txn.sign(sender.getPrivateKey())
 
@@ -29,16 +34,21 @@ FUNDING_AMOUNT = 100_000_000
 
 
 def fundAccount(
-    client: AlgodClient, address: str, amount: int = FUNDING_AMOUNT
+    client: AlgodClient,
+    address: str,
+    amount: int = FUNDING_AMOUNT,
+    paramsProvider: Optional[SuggestedParamsProvider] = None,
 ) -> PendingTxnResponse:
     fundingAccount = choice(getGenesisAccounts())
-    return payAccount(client, fundingAccount, address, amount)
+    return payAccount(client, fundingAccount, address, amount, paramsProvider)
 
 
 accountList: List[Account] = []
 
 
-def getTemporaryAccount(client: AlgodClient) -> Account:
+def getTemporaryAccount(
+    client: AlgodClient, paramsProvider: Optional[SuggestedParamsProvider] = None
+) -> Account:
     global accountList
 
     if len(accountList) == 0:
@@ -46,7 +56,7 @@ def getTemporaryAccount(client: AlgodClient) -> Account:
         accountList = [Account(sk) for sk in sks]
 
         genesisAccounts = getGenesisAccounts()
-        suggestedParams = client.suggested_params()
+        suggestedParams = getSuggestedParams(client, paramsProvider)
 
         txns: List[transaction.Transaction] = []
         for i, a in enumerate(accountList):
@@ -74,12 +84,15 @@ def getTemporaryAccount(client: AlgodClient) -> Account:
 
 
 def optInToAsset(
-    client: AlgodClient, assetID: int, account: Account
+    client: AlgodClient,
+    assetID: int,
+    account: Account,
+    paramsProvider: Optional[SuggestedParamsProvider] = None,
 ) -> PendingTxnResponse:
     txn = transaction.AssetOptInTxn(
         sender=account.getAddress(),
         index=assetID,
-        sp=client.suggested_params(),
+        sp=getSuggestedParams(client, paramsProvider),
     )
     signedTxn = txn.sign(account.getPrivateKey())
 
@@ -87,9 +100,14 @@ def optInToAsset(
     return waitForTransaction(client, signedTxn.get_txid())
 
 
-def createDummyAsset(client: AlgodClient, total: int, account: Account = None) -> int:
+def createDummyAsset(
+    client: AlgodClient,
+    total: int,
+    account: Account = None,
+    paramsProvider: Optional[SuggestedParamsProvider] = None,
+) -> int:
     if account is None:
-        account = getTemporaryAccount(client)
+        account = getTemporaryAccount(client, paramsProvider)
 
     randomNumber = randint(0, 999)
     # this random note reduces the likelihood of this transaction looking like a duplicate
@@ -108,7 +126,7 @@ def createDummyAsset(client: AlgodClient, total: int, account: Account = None) -
         asset_name=f"Dummy {randomNumber}",
         url=f"https://dummy.asset/{randomNumber}",
         note=randomNote,
-        sp=client.suggested_params(),
+        sp=getSuggestedParams(client, paramsProvider),
     )
     signedTxn = txn.sign(account.getPrivateKey())
 
@@ -1,15 +1,54 @@
 from typing import Optional, List
+import os
 
 from algosdk.v2client.algod import AlgodClient
 from algosdk.kmd import KMDClient
 
 from ..account import Account
+from ..transport import DEFAULT_POOL_SIZE, PooledAlgodClient
 
 ALGOD_ADDRESS = "http://localhost:4001"
 ALGOD_TOKEN = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"
 
 
-def getAlgodClient() -> AlgodClient:
+# set this environment variable to run against an in-process simulated ledger
+# instead of a sandbox node
+SIMULATOR_ENV_VAR = "AUCTION_SIMULATOR"
+
+simulatedClient: Optional[AlgodClient] = None
+
+
+def useSimulator() -> bool:
+    return os.environ.get(SIMULATOR_ENV_VAR, "") not in ("", "0")
+
+
+def getSimulatedAlgodClient() -> AlgodClient:
+    global simulatedClient
+
+    if simulatedClient is None:
+        from .simulator import SimulatedAlgodClient
+
+        simulatedClient = SimulatedAlgodClient()
+
+    return simulatedClient
+
+
+def getAlgodClient(
+    pooled: bool = False, poolSize: int = DEFAULT_POOL_SIZE
+) -> AlgodClient:
+    """Get a client for the sandbox algod.
+
+    Args:
+        pooled (optional): If True, the client keeps persistent connections to
+            algod instead of opening a new one for every request. Defaults to
+            False.
+        poolSize (optional): The maximum number of connections a pooled client
+            keeps open. Defaults to 10.
+    """
+    if useSimulator():
+        return getSimulatedAlgodClient()
+    if pooled:
+        return PooledAlgodClient(ALGOD_TOKEN, ALGOD_ADDRESS, poolSize=poolSize)
     return AlgodClient(ALGOD_TOKEN, ALGOD_ADDRESS)
 
 
@@ -30,6 +69,9 @@ kmdAccounts: Optional[List[Account]] = None
 def getGenesisAccounts() -> List[Account]:
     global kmdAccounts
 
+    if useSimulator():
+        return getSimulatedAlgodClient().ledger.genesisAccounts  # type: ignore
+
     if kmdAccounts is None:
         kmd = getKmdClient()
 
@@ -0,0 +1,1552 @@
+"""An in-process simulation of an algod node.
+
+The simulator keeps a ledger in memory, evaluates transactions and TEAL
+programs itself, and serves the algod REST API that the auction operations use,
+so tests and load tests can run complete auctions without a node and without
+waiting for real blocks. Block timestamps are under the control of the caller,
+which makes it possible to move an auction past its start and end times
+instantly.
+
+Example:
+    ledger = Ledger(timestamp=1_600_000_000)
+    client = SimulatedAlgodClient(ledger)
+    creator = ledger.createAccount()
+    ...
+    ledger.advanceTime(60)
+"""
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+from base64 import b64decode, b64encode
+from time import time
+import threading
+
+import msgpack
+from nacl.signing import VerifyKey
+from nacl.exceptions import BadSignatureError
+
+from algosdk.v2client.algod import AlgodClient
+from algosdk import account, encoding, error
+
+from ..account import Account
+from ..assembler import assemble
+from ..blocks import getTxnID
+from .evaluator import (
+    APP_CALL_BUDGET,
+    MAX_TXN_LIFE,
+    MIN_BALANCE,
+    MIN_TXN_FEE,
+    ZERO_ADDRESS,
+    CostBudget,
+    Evaluation,
+    LedgerView,
+    LogicError,
+    StackValue,
+    Tracer,
+    getAppAddress,
+    getRawTxnID,
+)
+
+GENESIS_ID = "simnet-v1"
+GENESIS_BALANCE = 1_000_000_000_000_000
+
+MAX_GROUP_SIZE = 16
+
+# the minimum balance requirements of apps
+APP_MIN_BALANCE = 100_000
+SCHEMA_ENTRY_MIN_BALANCE = 25_000
+SCHEMA_UINT_MIN_BALANCE = 3_500
+SCHEMA_BYTES_MIN_BALANCE = 25_000
+MAX_PROGRAM_PAGE = 2048
+
+# the values of OnCompletion
+NO_OP = 0
+OPT_IN = 1
+CLOSE_OUT = 2
+CLEAR_STATE = 3
+UPDATE_APPLICATION = 4
+DELETE_APPLICATION = 5
+
+# the values of a state delta action
+SET_BYTES_ACTION = 1
+SET_UINT_ACTION = 2
+DELETE_ACTION = 3
+
+# transaction fields that hold addresses, which algod's JSON encodes in base32
+ADDRESS_FIELDS = ("snd", "rcv", "close", "asnd", "arcv", "aclose", "rekey", "fadd")
+ASSET_ADDRESS_PARAMS = ("m", "r", "f", "c")
+
+
+class SimulationError(Exception):
+    """A transaction was rejected by the simulated ledger."""
+
+
+class AssetHolding:
+    def __init__(self, amount: int = 0, frozen: bool = False) -> None:
+        self.amount = amount
+        self.frozen = frozen
+
+
+class AssetData:
+    def __init__(self, creator: bytes, params: Dict[str, Any]) -> None:
+        self.creator = creator
+        # the asset parameters, in the form of the "apar" field of a transaction
+        self.params = params
+
+    def copy(self) -> "AssetData":
+        return AssetData(self.creator, dict(self.params))
+
+
+class AppData:
+    def __init__(
+        self,
+        creator: bytes,
+        approval: bytes,
+        clear: bytes,
+        globalSchema: Tuple[int, int],
+        localSchema: Tuple[int, int],
+        extraPages: int = 0,
+    ) -> None:
+        self.creator = creator
+        self.approval = approval
+        self.clear = clear
+        # the number of uints and byte slices of each schema
+        self.globalSchema = globalSchema
+        self.localSchema = localSchema
+        self.extraPages = extraPages
+        self.globalState: Dict[bytes, StackValue] = dict()
+
+    def copy(self) -> "AppData":
+        app = AppData(
+            self.creator,
+            self.approval,
+            self.clear,
+            self.globalSchema,
+            self.localSchema,
+            self.extraPages,
+        )
+        app.globalState = dict(self.globalState)
+        return app
+
+
+class AccountData:
+    def __init__(self, balance: int = 0) -> None:
+        self.balance = balance
+        self.authAddr: Optional[bytes] = None
+        self.assets: Dict[int, AssetHolding] = dict()
+        self.appLocals: Dict[int, Dict[bytes, StackValue]] = dict()
+
+        # totals over created apps and opted in apps, for the minimum balance
+        self.createdApps = 0
+        self.createdAppExtraPages = 0
+        self.createdAppSchema = (0, 0)
+        self.optedInSchema = (0, 0)
+
+    def copy(self) -> "AccountData":
+        data = AccountData(self.balance)
+        data.authAddr = self.authAddr
+        data.assets = {
+            assetID: AssetHolding(holding.amount, holding.frozen)
+            for assetID, holding in self.assets.items()
+        }
+        data.appLocals = {appID: dict(state) for appID, state in self.appLocals.items()}
+        data.createdApps = self.createdApps
+        data.createdAppExtraPages = self.createdAppExtraPages
+        data.createdAppSchema = self.createdAppSchema
+        data.optedInSchema = self.optedInSchema
+        return data
+
+    def isEmpty(self) -> bool:
+        return (
+            self.balance == 0
+            and len(self.assets) == 0
+            and len(self.appLocals) == 0
+            and self.createdApps == 0
+        )
+
+    def minBalance(self) -> int:
+        schemaUints = self.createdAppSchema[0] + self.optedInSchema[0]
+        schemaBytes = self.createdAppSchema[1] + self.optedInSchema[1]
+        return (
+            MIN_BALANCE
+            + MIN_BALANCE * len(self.assets)
+            + APP_MIN_BALANCE * (self.createdApps + self.createdAppExtraPages)
+            + APP_MIN_BALANCE * len(self.appLocals)
+            + (SCHEMA_ENTRY_MIN_BALANCE + SCHEMA_UINT_MIN_BALANCE) * schemaUints
+            + (SCHEMA_ENTRY_MIN_BALANCE + SCHEMA_BYTES_MIN_BALANCE) * schemaBytes
+        )
+
+
+def addSchema(a: Tuple[int, int], b: Tuple[int, int], sign: int = 1) -> Tuple[int, int]:
+    return a[0] + sign * b[0], a[1] + sign * b[1]
+
+
+class LedgerState:
+    """Accounts, assets and apps, as a copy-on-write layer over a base state.
+
+    Changes made to a layer are invisible to its base until commit() is called,
+    which is how a transaction group is applied atomically.
+    """
+
+    def __init__(self, base: Optional["LedgerState"] = None) -> None:
+        self.base = base
+        self.accounts: Dict[bytes, AccountData] = dict()
+        # None marks an asset or app that was deleted in this layer
+        self.assets: Dict[int, Optional[AssetData]] = dict()
+        self.apps: Dict[int, Optional[AppData]] = dict()
+        self.txnCounter = 1000 if base is None else base.txnCounter
+
+    def getAccount(self, address: bytes) -> Optional[AccountData]:
+        data = self.accounts.get(address)
+        if data is None and self.base is not None:
+            return self.base.getAccount(address)
+        return data
+
+    def account(self, address: bytes) -> AccountData:
+        """Get an account for modification."""
+        data = self.accounts.get(address)
+        if data is None:
+            base = self.base.getAccount(address) if self.base is not None else None
+            data = base.copy() if base is not None else AccountData()
+            self.accounts[address] = data
+        return data
+
+    def getAsset(self, assetID: int) -> Optional[AssetData]:
+        if assetID in self.assets:
+            return self.assets[assetID]
+        if self.base is not None:
+            return self.base.getAsset(assetID)
+        return None
+
+    def asset(self, assetID: int) -> AssetData:
+        """Get an existing asset for modification."""
+        data = self.assets.get(assetID)
+        if data is None:
+            base = self.getAsset(assetID)
+            if base is None:
+                raise SimulationError("asset {} does not exist".format(assetID))
+            data = base.copy()
+            self.assets[assetID] = data
+        return data
+
+    def getApp(self, appID: int) -> Optional[AppData]:
+        if appID in self.apps:
+            return self.apps[appID]
+        if self.base is not None:
+            return self.base.getApp(appID)
+        return None
+
+    def app(self, appID: int) -> AppData:
+        """Get an existing app for modification."""
+        data = self.apps.get(appID)
+        if data is None:
+            base = self.getApp(appID)
+            if base is None:
+                raise SimulationError("application {} does not exist".format(appID))
+            data = base.copy()
+            self.apps[appID] = data
+        return data
+
+    def commit(self) -> None:
+        """Apply the changes of this layer to its base."""
+        base = self.base
+        assert base is not None
+
+        base.txnCounter = self.txnCounter
+        for address, data in self.accounts.items():
+            if base.base is None and data.isEmpty():
+                base.accounts.pop(address, None)
+            else:
+                base.accounts[address] = data
+        for assetID, asset in self.assets.items():
+            if base.base is None and asset is None:
+                base.assets.pop(assetID, None)
+            else:
+                base.assets[assetID] = asset
+        for appID, app in self.apps.items():
+            if base.base is None and app is None:
+                base.apps.pop(appID, None)
+            else:
+                base.apps[appID] = app
+
+
+def encodeStateDelta(
+    before: Dict[bytes, StackValue], after: Dict[bytes, StackValue]
+) -> Dict[str, Dict[str, Any]]:
+    """Compute a state delta in the msgpack form stored in blocks."""
+    delta: Dict[str, Dict[str, Any]] = dict()
+    for key in set(before) | set(after):
+        if before.get(key) == after.get(key) and type(before.get(key)) is type(
+            after.get(key)
+        ):
+            continue
+        value = after.get(key)
+        # algod encodes state keys as strings
+        encodedKey = key.decode("utf-8", "surrogateescape")
+        if value is None:
+            delta[encodedKey] = {"at": DELETE_ACTION}
+        elif isinstance(value, int):
+            delta[encodedKey] = {"at": SET_UINT_ACTION, "ui": value}
+        else:
+            delta[encodedKey] = {"at": SET_BYTES_ACTION, "bs": value}
+    return delta
+
+
+class GroupEvaluation(LedgerView):
+    """Applies a transaction group to a ledger state layer."""
+
+    def __init__(
+        self,
+        state: LedgerState,
+        group: List[Dict[str, Any]],
+        round: int,
+        latestTimestamp: int,
+        tracer: Optional[Tracer] = None,
+    ) -> None:
+        self.state = state
+        self.group = group
+        self.txns = [signedTxn["txn"] for signedTxn in group]
+        self.round = round
+        self.latestTimestamp = latestTimestamp
+        self.tracer = tracer
+
+        self.applyData: List[Dict[str, Any]] = []
+        self.groupScratch: List[Optional[List[StackValue]]] = []
+        self.touched: Set[bytes] = set()
+
+        totalFees = sum(txn.get("fee", 0) for txn in self.txns)
+        if totalFees < MIN_TXN_FEE * len(self.txns):
+            raise SimulationError(
+                "txgroup had {} in fees, which is less than the minimum {} * {}".format(
+                    totalFees, len(self.txns), MIN_TXN_FEE
+                )
+            )
+        # fees paid in excess of the minimum can pay for inner transactions
+        self.feeCredit = totalFees - MIN_TXN_FEE * len(self.txns)
+
+        appCalls = sum(1 for txn in self.txns if txn.get("type") == "appl")
+        self.budget = CostBudget(APP_CALL_BUDGET * appCalls)
+
+        # the app call being evaluated, and the state it started with
+        self.currentAppID = 0
+        self.localBefore: Dict[bytes, Dict[bytes, StackValue]] = dict()
+
+    def run(self) -> List[Dict[str, Any]]:
+        """Apply every transaction in the group.
+
+        Returns:
+            The apply data of each transaction, in its block form.
+        """
+        for groupIndex, txn in enumerate(self.txns):
+            self.touched = set()
+            self.groupScratch.append(None)
+            try:
+                applyData = self.applyTxn(txn, groupIndex)
+                self.checkMinBalances()
+            except SimulationError as e:
+                raise SimulationError("transaction {}: {}".format(getTxnID(txn), e))
+            self.applyData.append(applyData)
+        return self.applyData
+
+    def checkMinBalances(self) -> None:
+        for address in self.touched:
+            data = self.state.getAccount(address)
+            if data is None or data.isEmpty():
+                continue
+            minBalance = data.minBalance()
+            if data.balance < minBalance:
+                raise SimulationError(
+                    "account {} balance {} below min {} ({} assets)".format(
+                        encoding.encode_address(address),
+                        data.balance,
+                        minBalance,
+                        len(data.assets),
+                    )
+                )
+
+    def debit(self, address: bytes, amount: int) -> None:
+        data = self.state.account(address)
+        if data.balance < amount:
+            raise SimulationError(
+                "overspend (account {}, balance {}, tried to spend {})".format(
+                    encoding.encode_address(address), data.balance, amount
+                )
+            )
+        data.balance -= amount
+        self.touched.add(address)
+
+    def credit(self, address: bytes, amount: int) -> None:
+        self.state.account(address).balance += amount
+        self.touched.add(address)
+
+    def applyTxn(self, txn: Dict[str, Any], groupIndex: int) -> Dict[str, Any]:
+        self.state.txnCounter += 1
+
+        sender = txn.get("snd", ZERO_ADDRESS)
+        self.debit(sender, txn.get("fee", 0))
+
+        if "rekey" in txn:
+            rekey = txn["rekey"]
+            self.state.account(sender).authAddr = None if rekey == sender else rekey
+
+        txnType = txn.get("type")
+        if txnType == "pay":
+            return self.applyPayment(txn)
+        if txnType == "axfer":
+            return self.applyAssetTransfer(txn)
+        if txnType == "acfg":
+            return self.applyAssetConfig(txn)
+        if txnType == "afrz":
+            return self.applyAssetFreeze(txn)
+        if txnType == "appl":
+            return self.applyAppCall(txn, groupIndex)
+        raise SimulationError(
+            "transaction type {} is not supported by the simulator".format(txnType)
+        )
+
+    def applyPayment(self, txn: Dict[str, Any]) -> Dict[str, Any]:
+        sender = txn.get("snd", ZERO_ADDRESS)
+        amount = txn.get("amt", 0)
+        self.debit(sender, amount)
+        self.credit(txn.get("rcv", ZERO_ADDRESS), amount)
+
+        applyData: Dict[str, Any] = dict()
+        closeTo = txn.get("close")
+        if closeTo is not None:
+            data = self.state.account(sender)
+            if len(data.assets) > 0:
+                raise SimulationError(
+                    "cannot close account {} with {} outstanding assets".format(
+                        encoding.encode_address(sender), len(data.assets)
+                    )
+                )
+            if len(data.appLocals) > 0 or data.createdApps > 0:
+                raise SimulationError(
+                    "cannot close account {} with apps".format(
+                        encoding.encode_address(sender)
+                    )
+                )
+            remainder = data.balance
+            self.debit(sender, remainder)
+            self.credit(closeTo, remainder)
+            applyData["ca"] = remainder
+        return applyData
+
+    def holding(self, address: bytes, assetID: int) -> AssetHolding:
+        holding = self.state.account(address).assets.get(assetID)
+        if holding is None:
+            raise SimulationError(
+                "asset {} missing from {}".format(
+                    assetID, encoding.encode_address(address)
+                )
+            )
+        return holding
+
+    def applyAssetTransfer(self, txn: Dict[str, Any]) -> Dict[str, Any]:
+        assetID = txn.get("xaid", 0)
+        asset = self.state.getAsset(assetID)
+        if asset is None:
+            raise SimulationError(
+                "asset {} does not exist or has been deleted".format(assetID)
+            )
+
+        sender = txn.get("snd", ZERO_ADDRESS)
+        receiver = txn.get("arcv", ZERO_ADDRESS)
+        amount = txn.get("aamt", 0)
+        source = sender
+
+        if "asnd" in txn:
+            if sender != asset.params.get("c"):
+                raise SimulationError(
+                    "clawback not allowed: sender {} != clawback".format(
+                        encoding.encode_address(sender)
+                    )
+                )
+            source = txn["asnd"]
+
+        data = self.state.account(sender)
+        if (
+            source == sender
+            and receiver == sender
+            and amount == 0
+            and assetID not in data.assets
+        ):
+            # opt in to the asset
+            data.assets[assetID] = AssetHolding(0, bool(asset.params.get("df")))
+            self.touched.add(sender)
+            return dict()
+
+        if amount > 0:
+            sourceHolding = self.holding(source, assetID)
+            # the clawback account can move frozen assets
+            if sourceHolding.frozen and source == sender:
+                raise SimulationError(
+                    "asset {} frozen in {}".format(
+                        assetID, encoding.encode_address(source)
+                    )
+                )
+            if sourceHolding.amount < amount:
+                raise SimulationError(
+                    "underflow on subtracting {} from sender amount {}".format(
+                        amount, sourceHolding.amount
+                    )
+                )
+            receiverHolding = self.state.account(receiver).assets.get(assetID)
+            if receiverHolding is None:
+                raise SimulationError(
+                    "receiver error: must optin, asset {} missing from {}".format(
+                        assetID, encoding.encode_address(receiver)
+                    )
+                )
+            if receiverHolding.frozen and source == sender:
+                raise SimulationError(
+                    "asset {} frozen in {}".format(
+                        assetID, encoding.encode_address(receiver)
+                    )
+                )
+            sourceHolding.amount -= amount
+            receiverHolding.amount += amount
+            self.touched.update((source, receiver))
+
+        applyData: Dict[str, Any] = dict()
+        closeTo = txn.get("aclose")
+        if closeTo is not None:
+            if sender == asset.creator:
+                raise SimulationError(
+                    "cannot close asset {} in allocating account".format(assetID)
+                )
+            holding = self.holding(sender, assetID)
+            closeHolding = self.state.account(closeTo).assets.get(assetID)
+            if closeHolding is None:
+                raise SimulationError(
+                    "asset {} missing from {}".format(
+                        assetID, encoding.encode_address(closeTo)
+                    )
+                )
+            closeHolding.amount += holding.amount
+            applyData["aca"] = holding.amount
+            del self.state.account(sender).assets[assetID]
+            self.touched.update((sender, closeTo))
+
+        return applyData
+
+    def applyAssetConfig(self, txn: Dict[str, Any]) -> Dict[str, Any]:
+        sender = txn.get("snd", ZERO_ADDRESS)
+        assetID = txn.get("caid", 0)
+        params = txn.get("apar")
+
+        if assetID == 0:
+            assetID = self.state.txnCounter
+            self.state.assets[assetID] = AssetData(sender, dict(params or {}))
+            total = (params or {}).get("t", 0)
+            self.state.account(sender).assets[assetID] = AssetHolding(total, False)
+            self.touched.add(sender)
+            return {"caid": assetID}
+
+        asset = self.state.asset(assetID)
+        if sender != asset.params.get("m"):
+            raise SimulationError(
+                "this transaction should be issued by the manager. It is issued by {}".format(
+                    encoding.encode_address(sender)
+                )
+            )
+
+        if params is None:
+            creator = self.state.account(asset.creator)
+            holding = creator.assets.get(assetID)
+            if holding is None or holding.amount != asset.params.get("t", 0):
+                raise SimulationError(
+                    "cannot destroy asset: creator is holding only {}/{}".format(
+                        0 if holding is None else holding.amount,
+                        asset.params.get("t", 0),
+                    )
+                )
+            del creator.assets[assetID]
+            self.state.assets[assetID] = None
+            self.touched.add(asset.creator)
+            return dict()
+
+        for key in ASSET_ADDRESS_PARAMS:
+            if key in params:
+                asset.params[key] = params[key]
+            else:
+                asset.params.pop(key, None)
+        return dict()
+
+    def applyAssetFreeze(self, txn: Dict[str, Any]) -> Dict[str, Any]:
+        sender = txn.get("snd", ZERO_ADDRESS)
+        assetID = txn.get("faid", 0)
+        asset = self.state.getAsset(assetID)
+        if asset is None or sender != asset.params.get("f"):
+            raise SimulationError(
+                "freeze not allowed: sender {} != freeze".format(
+                    encoding.encode_address(sender)
+                )
+            )
+        self.holding(txn.get("fadd", ZERO_ADDRESS), assetID).frozen = bool(
+            txn.get("afrz")
+        )
+        return dict()
+
+    def applyAppCall(self, txn: Dict[str, Any], groupIndex: int) -> Dict[str, Any]:
+        sender = txn.get("snd", ZERO_ADDRESS)
+        appID = txn.get("apid", 0)
+        onComplete = txn.get("apan", NO_OP)
+        applyData: Dict[str, Any] = dict()
+
+        if appID == 0:
+            appID = self.createApp(txn)
+            applyData["apid"] = appID
+
+        app = self.state.getApp(appID)
+        if app is None:
+            raise SimulationError("application {} does not exist".format(appID))
+
+        senderData = self.state.account(sender)
+        if onComplete == OPT_IN:
+            if appID in senderData.appLocals:
+                raise SimulationError(
+                    "account {} has already opted in to app {}".format(
+                        encoding.encode_address(sender), appID
+                    )
+                )
+            senderData.appLocals[appID] = dict()
+            senderData.optedInSchema = addSchema(
+                senderData.optedInSchema, app.localSchema
+            )
+            self.touched.add(sender)
+        elif onComplete in (CLOSE_OUT, CLEAR_STATE):
+            if appID not in senderData.appLocals:
+                raise SimulationError(
+                    "account {} is not opted in to app {}".format(
+                        encoding.encode_address(sender), appID
+                    )
+                )
+
+        self.currentAppID = appID
+        self.localBefore = dict()
+        globalBefore = dict(app.globalState)
+
+        evaluation = Evaluation(
+            program=app.clear if onComplete == CLEAR_STATE else app.approval,
+            ledger=self,
+            group=self.txns,
+            applyData=self.applyData,
+            groupIndex=groupIndex,
+            appID=appID,
+            budget=self.budget,
+            groupScratch=self.groupScratch,
+            tracer=self.tracer,
+        )
+
+        try:
+            approved = evaluation.run()
+        except LogicError as e:
+            if onComplete != CLEAR_STATE:
+                raise SimulationError("logic eval error: {}".format(e))
+            approved = False
+
+        if not approved and onComplete != CLEAR_STATE:
+            raise SimulationError("transaction rejected by ApprovalProgram")
+
+        self.groupScratch[groupIndex] = evaluation.scratch
+
+        if onComplete == CLEAR_STATE and not approved:
+            # the effects of a failed clear state program are discarded
+            self.state.app(appID).globalState = dict(globalBefore)
+            for address, before in self.localBefore.items():
+                self.state.account(address).appLocals[appID] = dict(before)
+        else:
+            self.checkSchema(self.state.app(appID).globalState, app.globalSchema)
+            for address in self.localBefore:
+                self.checkSchema(
+                    self.state.account(address).appLocals[appID], app.localSchema
+                )
+        globalAfter = self.state.app(appID).globalState
+
+        delta: Dict[str, Any] = dict()
+        globalDelta = encodeStateDelta(globalBefore, globalAfter)
+        if len(globalDelta) > 0:
+            delta["gd"] = globalDelta
+
+        accounts = [sender] + txn.get("apat", [])
+        localDelta: Dict[int, Any] = dict()
+        for address, before in self.localBefore.items():
+            after = self.state.account(address).appLocals.get(appID, {})
+            encoded = encodeStateDelta(before, after)
+            if len(encoded) > 0 and address in accounts:
+                localDelta[accounts.index(address)] = encoded
+        if len(localDelta) > 0:
+            delta["ld"] = localDelta
+
+        if len(evaluation.logs) > 0:
+            delta["lg"] = evaluation.logs
+        if len(evaluation.innerTxns) > 0:
+            delta["itx"] = evaluation.innerTxns
+        if len(delta) > 0:
+            applyData["dt"] = delta
+
+        if onComplete in (CLOSE_OUT, CLEAR_STATE):
+            senderData = self.state.account(sender)
+            del senderData.appLocals[appID]
+            senderData.optedInSchema = addSchema(
+                senderData.optedInSchema, app.localSchema, -1
+            )
+        elif onComplete == UPDATE_APPLICATION:
+            updated = self.state.app(appID)
+            updated.approval = txn.get("apap", b"")
+            updated.clear = txn.get("apsu", b"")
+        elif onComplete == DELETE_APPLICATION:
+            self.deleteApp(appID)
+
+        self.currentAppID = 0
+        return applyData
+
+    def checkSchema(
+        self, state: Dict[bytes, StackValue], schema: Tuple[int, int]
+    ) -> None:
+        uints = sum(1 for value in state.values() if isinstance(value, int))
+        byteSlices = len(state) - uints
+        if uints > schema[0]:
+            raise SimulationError(
+                "store integer count {} exceeds schema integer count {}".format(
+                    uints, schema[0]
+                )
+            )
+        if byteSlices > schema[1]:
+            raise SimulationError(
+                "store bytes count {} exceeds schema bytes count {}".format(
+                    byteSlices, schema[1]
+                )
+            )
+
+    def createApp(self, txn: Dict[str, Any]) -> int:
+        sender = txn.get("snd", ZERO_ADDRESS)
+        approval = txn.get("apap", b"")
+        clear = txn.get("apsu", b"")
+        extraPages = txn.get("apep", 0)
+        globalSchema = (
+            txn.get("apgs", {}).get("nui", 0),
+            txn.get("apgs", {}).get("nbs", 0),
+        )
+        localSchema = (
+            txn.get("apls", {}).get("nui", 0),
+            txn.get("apls", {}).get("nbs", 0),
+        )
+
+        if len(approval) == 0 or len(clear) == 0:
+            raise SimulationError("approval and clear state programs are required")
+        if len(approval) + len(clear) > MAX_PROGRAM_PAGE * (1 + extraPages):
+            raise SimulationError(
+                "app programs too long. max total len {} bytes".format(
+                    MAX_PROGRAM_PAGE * (1 + extraPages)
+                )
+            )
+        if sum(globalSchema) > 64 or sum(localSchema) > 16:
+            raise SimulationError("app schema is too large")
+
+        appID = self.state.txnCounter
+        self.state.apps[appID] = AppData(
+            sender, approval, clear, globalSchema, localSchema, extraPages
+        )
+
+        creator = self.state.account(sender)
+        creator.createdApps += 1
+        creator.createdAppExtraPages += extraPages
+        creator.createdAppSchema = addSchema(creator.createdAppSchema, globalSchema)
+        self.touched.add(sender)
+        return appID
+
+    def deleteApp(self, appID: int) -> None:
+        app = self.state.app(appID)
+        creator = self.state.account(app.creator)
+        creator.createdApps -= 1
+        creator.createdAppExtraPages -= app.extraPages
+        creator.createdAppSchema = addSchema(
+            creator.createdAppSchema, app.globalSchema, -1
+        )
+        self.state.apps[appID] = None
+        self.touched.add(app.creator)
+
+    # LedgerView
+
+    def balance(self, address: bytes) -> int:
+        data = self.state.getAccount(address)
+        return 0 if data is None else data.balance
+
+    def minBalance(self, address: bytes) -> int:
+        data = self.state.getAccount(address)
+        return MIN_BALANCE if data is None else data.minBalance()
+
+    def assetHolding(self, address: bytes, assetID: int) -> Optional[Tuple[int, bool]]:
+        data = self.state.getAccount(address)
+        holding = None if data is None else data.assets.get(assetID)
+        if holding is None:
+            return None
+        return holding.amount, holding.frozen
+
+    def assetParams(self, assetID: int) -> Optional[Dict[str, StackValue]]:
+        asset = self.state.getAsset(assetID)
+        if asset is None:
+            return None
+        params = asset.params
+        return {
+            "AssetTotal": params.get("t", 0),
+            "AssetDecimals": params.get("dc", 0),
+            "AssetDefaultFrozen": 1 if params.get("df") else 0,
+            "AssetUnitName": params.get("un", "").encode("utf-8", "surrogateescape"),
+            "AssetName": params.get("an", "").encode("utf-8", "surrogateescape"),
+            "AssetURL": params.get("au", "").encode("utf-8", "surrogateescape"),
+            "AssetMetadataHash": params.get("am", b""),
+            "AssetManager": params.get("m", ZERO_ADDRESS),
+            "AssetReserve": params.get("r", ZERO_ADDRESS),
+            "AssetFreeze": params.get("f", ZERO_ADDRESS),
+            "AssetClawback": params.get("c", ZERO_ADDRESS),
+            "AssetCreator": asset.creator,
+        }
+
+    def appParams(self, appID: int) -> Optional[Dict[str, StackValue]]:
+        app = self.state.getApp(appID)
+        if app is None:
+            return None
+        return {
+            "AppApprovalProgram": app.approval,
+            "AppClearStateProgram": app.clear,
+            "AppGlobalNumUint": app.globalSchema[0],
+            "AppGlobalNumByteSlice": app.globalSchema[1],
+            "AppLocalNumUint": app.localSchema[0],
+            "AppLocalNumByteSlice": app.localSchema[1],
+            "AppExtraProgramPages": app.extraPages,
+            "AppCreator": app.creator,
+            "AppAddress": getAppAddress(appID),
+        }
+
+    def globalState(self, appID: int) -> Optional[Dict[bytes, StackValue]]:
+        if appID == self.currentAppID:
+            return self.state.app(appID).globalState
+        app = self.state.getApp(appID)
+        return None if app is None else app.globalState
+
+    def localState(
+        self, address: bytes, appID: int
+    ) -> Optional[Dict[bytes, StackValue]]:
+        if appID != self.currentAppID:
+            data = self.state.getAccount(address)
+            return None if data is None else data.appLocals.get(appID)
+
+        state = self.state.account(address).appLocals.get(appID)
+        if state is not None and address not in self.localBefore:
+            self.localBefore[address] = dict(state)
+        return state
+
+    def defaultInnerFee(self) -> int:
+        return max(MIN_TXN_FEE - self.feeCredit, 0)
+
+    def submitInner(self, appID: int, txn: Dict[str, Any]) -> Dict[str, Any]:
+        appAddress = getAppAddress(appID)
+        sender = txn.get("snd")
+        senderData = self.state.getAccount(sender) if sender is not None else None
+        authAddr = None if senderData is None else senderData.authAddr
+        if sender != appAddress and authAddr != appAddress:
+            raise SimulationError(
+                "unauthorized: inner transaction sender {} is not the app account".format(
+                    encoding.encode_address(sender) if sender else ""
+                )
+            )
+
+        fee = txn.get("fee", 0)
+        self.feeCredit += fee - MIN_TXN_FEE
+        if self.feeCredit < 0:
+            raise SimulationError("fee too small")
+
+        previousAppID = self.currentAppID
+        previousLocalBefore = self.localBefore
+        try:
+            return self.applyTxn(txn, 0)
+        finally:
+            self.currentAppID = previousAppID
+            self.localBefore = previousLocalBefore
+
+
+class TxnRecord:
+    def __init__(
+        self,
+        signedTxn: Dict[str, Any],
+        applyData: Dict[str, Any],
+        round: Optional[int] = None,
+    ) -> None:
+        self.signedTxn = signedTxn
+        self.applyData = applyData
+        # None while the transaction is in the pool
+        self.round = round
+
+
+class Ledger:
+    """A simulated Algorand ledger.
+
+    Time is measured in block timestamps. By default, block timestamps follow
+    the wall clock, and advanceTime() moves them ahead of it. If a starting
+    timestamp is given, time stands still until advanceTime() or setTime() is
+    called, which makes simulations fully deterministic.
+
+    Args:
+        timestamp (optional): The timestamp of the genesis block. If not
+            given, block timestamps follow the wall clock.
+        devMode (optional): If True, the default, every transaction group is
+            confirmed in a new block as soon as it is submitted. Otherwise,
+            submitted groups wait in the transaction pool until the next block
+            is made by newBlock() or by a client waiting for a new round.
+        idleBlockInterval (optional): How long, in seconds, a client waiting for
+            a new round blocks when no transactions are pending before an empty
+            block is made. Defaults to 0.05.
+        tracer (optional): A function called before every instruction of every
+            program that is evaluated.
+    """
+
+    def __init__(
+        self,
+        timestamp: Optional[int] = None,
+        devMode: bool = True,
+        idleBlockInterval: float = 0.05,
+        tracer: Optional[Tracer] = None,
+    ) -> None:
+        self.devMode = devMode
+        self.idleBlockInterval = idleBlockInterval
+        self.tracer = tracer
+
+        self.genesisID = GENESIS_ID
+        self.genesisHash = encoding.checksum(GENESIS_ID.encode())
+
+        self.lock = threading.RLock()
+        self.newBlockCondition = threading.Condition(self.lock)
+
+        self.frozenTime = timestamp
+        self.timeOffset = 0
+
+        self.state = LedgerState()
+        self.pending = LedgerState(self.state)
+        self.pendingTxIDs: List[str] = []
+        self.txns: Dict[str, TxnRecord] = dict()
+
+        self.round = 0
+        self.lastBlockTime = time()
+        self.blocks: Dict[int, Dict[str, Any]] = {
+            0: {
+                "rnd": 0,
+                "ts": self.now(),
+                "gen": self.genesisID,
+                "gh": self.genesisHash,
+            }
+        }
+
+        self.genesisAccounts = [self.createAccount(GENESIS_BALANCE) for _ in range(3)]
+
+    # time
+
+    def now(self) -> int:
+        if self.frozenTime is not None:
+            return self.frozenTime
+        return int(time()) + self.timeOffset
+
+    def advanceTime(self, seconds: int) -> None:
+        """Move time forward. The next block will have a later timestamp."""
+        with self.lock:
+            if self.frozenTime is not None:
+                self.frozenTime += seconds
+            else:
+                self.timeOffset += seconds
+
+    def setTime(self, timestamp: int) -> None:
+        """Set the time of the next block and stop following the wall clock."""
+        with self.lock:
+            self.frozenTime = timestamp
+
+    @property
+    def latestTimestamp(self) -> int:
+        return self.blocks[self.round]["ts"]
+
+    # accounts
+
+    def createAccount(self, balance: int = 100_000_000) -> Account:
+        """Create an account that is funded from the start, without a
+        transaction."""
+        privateKey, address = account.generate_account()
+        with self.lock:
+            self.state.account(encoding.decode_address(address)).balance += balance
+        return Account(privateKey)
+
+    # blocks
+
+    def newBlock(self) -> int:
+        """Confirm all pending transactions in a new block.
+
+        Returns:
+            The round of the new block.
+        """
+        with self.lock:
+            self.pending.commit()
+            self.pending = LedgerState(self.state)
+
+            round = self.round + 1
+            block: Dict[str, Any] = {
+                "rnd": round,
+                "ts": max(self.now(), self.latestTimestamp),
+                "gen": self.genesisID,
+                "gh": self.genesisHash,
+                "tc": self.state.txnCounter,
+            }
+
+            stibs: List[Dict[str, Any]] = []
+            for txID in self.pendingTxIDs:
+                record = self.txns[txID]
+                record.round = round
+                stibs.append(self.encodeBlockTxn(record))
+            if len(stibs) > 0:
+                block["txns"] = stibs
+            self.pendingTxIDs = []
+
+            self.blocks[round] = block
+            self.round = round
+            self.lastBlockTime = time()
+            self.newBlockCondition.notify_all()
+            return round
+
+    def encodeBlockTxn(self, record: TxnRecord) -> Dict[str, Any]:
+        signedTxn = record.signedTxn
+        txn = {
+            key: value
+            for key, value in signedTxn["txn"].items()
+            if key not in ("gen", "gh")
+        }
+        stib: Dict[str, Any] = {
+            key: value for key, value in signedTxn.items() if key != "txn"
+        }
+        stib["txn"] = txn
+        if "gen" in signedTxn["txn"]:
+            stib["hgi"] = True
+        stib.update(record.applyData)
+        return stib
+
+    def waitForBlockAfter(self, round: int) -> None:
+        with self.lock:
+            if self.round <= round and len(self.pendingTxIDs) == 0:
+                self.newBlockCondition.wait(self.idleBlockInterval)
+            if self.round <= round:
+                self.newBlock()
+
+    # transactions
+
+    def submit(self, signedTxns: List[Dict[str, Any]]) -> str:
+        """Submit a transaction group.
+
+        Returns:
+            The ID of the first transaction.
+
+        Raises:
+            SimulationError: If the group was rejected.
+        """
+        with self.lock:
+            if self.devMode and self.now() > self.latestTimestamp:
+                # time has passed since the last block, which the chain would
+                # have recorded in blocks of its own
+                self.newBlock()
+
+            state = LedgerState(self.pending)
+            try:
+                txIDs = self.checkGroup(signedTxns)
+                evaluation = GroupEvaluation(
+                    state,
+                    signedTxns,
+                    self.round + 1,
+                    self.latestTimestamp,
+                    self.tracer,
+                )
+                applyData = evaluation.run()
+            except SimulationError as e:
+                raise SimulationError("TransactionPool.Remember: {}".format(e))
+
+            state.commit()
+            for txID, signedTxn, data in zip(txIDs, signedTxns, applyData):
+                self.txns[txID] = TxnRecord(signedTxn, data)
+                self.pendingTxIDs.append(txID)
+
+            if self.devMode:
+                self.newBlock()
+
+            return txIDs[0]
+
+    def checkGroup(self, signedTxns: List[Dict[str, Any]]) -> List[str]:
+        if len(signedTxns) == 0:
+            raise SimulationError("empty transaction group")
+        if len(signedTxns) > MAX_GROUP_SIZE:
+            raise SimulationError(
+                "group size {} exceeds maximum {}".format(
+                    len(signedTxns), MAX_GROUP_SIZE
+                )
+            )
+
+        txIDs: List[str] = []
+        digests: List[bytes] = []
+        for signedTxn in signedTxns:
+            txn = signedTxn.get("txn")
+            if txn is None:
+                raise SimulationError("missing transaction")
+            txID = getTxnID(txn)
+            txIDs.append(txID)
+
+            if txID in self.txns:
+                raise SimulationError("transaction already in ledger: {}".format(txID))
+
+            self.checkSignature(txID, signedTxn)
+
+            if txn.get("gh") != self.genesisHash:
+                raise SimulationError(
+                    "transaction {}: genesis hash mismatch".format(txID)
+                )
+            if "gen" in txn and txn["gen"] != self.genesisID:
+                raise SimulationError(
+                    "transaction {}: genesis ID mismatch: {}".format(txID, txn["gen"])
+                )
+
+            nextRound = self.round + 1
+            firstValid, lastValid = txn.get("fv", 0), txn.get("lv", 0)
+            if not firstValid <= nextRound <= lastValid:
+                raise SimulationError(
+                    "transaction {}: txn dead: round {} outside of {}--{}".format(
+                        txID, nextRound, firstValid, lastValid
+                    )
+                )
+            if lastValid - firstValid > MAX_TXN_LIFE:
+                raise SimulationError(
+                    "transaction {}: transaction window size excessive".format(txID)
+                )
+
+            withoutGroup = {key: value for key, value in txn.items() if key != "grp"}
+            digests.append(getRawTxnID(withoutGroup))
+
+        groupIDs = set(signedTxn["txn"].get("grp") for signedTxn in signedTxns)
+        if len(signedTxns) > 1 or groupIDs != {None}:
+            expected = encoding.checksum(
+                b"TG" + b64decode(encoding.msgpack_encode({"txlist": digests}))
+            )
+            if groupIDs != {expected}:
+                raise SimulationError("transaction group has an incorrect group ID")
+
+        return txIDs
+
+    def checkSignature(self, txID: str, signedTxn: Dict[str, Any]) -> None:
+        txn = signedTxn["txn"]
+        if "sig" not in signedTxn:
+            raise SimulationError(
+                "transaction {}: only single signatures are supported by the simulator".format(
+                    txID
+                )
+            )
+
+        sender = txn.get("snd", ZERO_ADDRESS)
+        data = self.pending.getAccount(sender)
+        authAddr = data.authAddr if data is not None else None
+        signer = signedTxn.get("sgnr", sender)
+        if signer != (authAddr or sender):
+            raise SimulationError(
+                "transaction {}: should have been authorized by {} but was actually authorized by {}".format(
+                    txID,
+                    encoding.encode_address(authAddr or sender),
+                    encoding.encode_address(signer),
+                )
+            )
+
+        message = b"TX" + b64decode(encoding.msgpack_encode(txn))
+        try:
+            VerifyKey(signer).verify(message, signedTxn["sig"])
+        except (BadSignatureError, ValueError):
+            raise SimulationError(
+                "transaction {}: signature validation failed".format(txID)
+            )
+
+
+def jsonValue(value: Any) -> Any:
+    """Encode a value from the msgpack form of a block in algod's JSON form."""
+    if isinstance(value, bytes):
+        return b64encode(value).decode()
+    if isinstance(value, dict):
+        return {str(key): jsonValue(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [jsonValue(item) for item in value]
+    return value
+
+
+def jsonTxn(txn: Dict[str, Any]) -> Dict[str, Any]:
+    encoded = jsonValue(txn)
+    for key in ADDRESS_FIELDS:
+        if key in txn:
+            encoded[key] = encoding.encode_address(txn[key])
+    if "apat" in txn:
+        encoded["apat"] = [encoding.encode_address(a) for a in txn["apat"]]
+    if "apar" in txn:
+        for key in ASSET_ADDRESS_PARAMS:
+            if key in txn["apar"]:
+                encoded["apar"][key] = encoding.encode_address(txn["apar"][key])
+    return encoded
+
+
+def jsonStateDelta(delta: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    encoded: List[Dict[str, Any]] = []
+    for key, value in delta.items():
+        jsonDelta: Dict[str, Any] = {"action": value["at"]}
+        if "bs" in value:
+            jsonDelta["bytes"] = b64encode(value["bs"]).decode()
+        if "ui" in value:
+            jsonDelta["uint"] = value["ui"]
+        encoded.append(
+            {
+                "key": b64encode(key.encode("utf-8", "surrogateescape")).decode(),
+                "value": jsonDelta,
+            }
+        )
+    return encoded
+
+
+def jsonApplyData(txn: Dict[str, Any], applyData: Dict[str, Any]) -> Dict[str, Any]:
+    """Encode the apply data of a transaction in the form of algod's pending
+    transaction response."""
+    response: Dict[str, Any] = {
+        "pool-error": "",
+        "sender-rewards": 0,
+        "receiver-rewards": 0,
+        "close-rewards": 0,
+    }
+    if "apid" in applyData:
+        response["application-index"] = applyData["apid"]
+    if "caid" in applyData:
+        response["asset-index"] = applyData["caid"]
+    if "ca" in applyData:
+        response["closing-amount"] = applyData["ca"]
+    if "aca" in applyData:
+        response["asset-closing-amount"] = applyData["aca"]
+
+    delta = applyData.get("dt", {})
+    if "gd" in delta:
+        response["global-state-delta"] = jsonStateDelta(delta["gd"])
+    if "ld" in delta:
+        accounts = [txn.get("snd", ZERO_ADDRESS)] + txn.get("apat", [])
+        response["local-state-delta"] = [
+            {
+                "address": encoding.encode_address(accounts[index]),
+                "delta": jsonStateDelta(localDelta),
+            }
+            for index, localDelta in delta["ld"].items()
+        ]
+    if "lg" in delta:
+        response["logs"] = [b64encode(log).decode() for log in delta["lg"]]
+    if "itx" in delta:
+        response["inner-txns"] = [
+            dict(
+                jsonApplyData(inner["txn"], inner),
+                txn={"txn": jsonTxn(inner["txn"])},
+            )
+            for inner in delta["itx"]
+        ]
+    return response
+
+
+class SimulatedAlgodClient(AlgodClient):
+    """An algod client backed by a simulated ledger instead of a node.
+
+    It can be passed as the client argument of every operation in
+    auction.operations.
+
+    Args:
+        ledger (optional): The ledger to use. Defaults to a new Ledger.
+    """
+
+    def __init__(self, ledger: Optional[Ledger] = None) -> None:
+        super().__init__("", "http://simulator")
+        self.ledger = ledger if ledger is not None else Ledger()
+
+    def algod_request(
+        self,
+        method,
+        requrl,
+        params=None,
+        data=None,
+        headers=None,
+        response_format="json",
+    ):
+        parts = requrl.strip("/").split("/")
+        ledger = self.ledger
+
+        with ledger.lock:
+            if method == "GET" and parts == ["health"]:
+                return None
+
+            if method == "GET" and parts == ["versions"]:
+                return {
+                    "genesis_id": ledger.genesisID,
+                    "genesis_hash_b64": b64encode(ledger.genesisHash).decode(),
+                    "versions": ["v2"],
+                    "build": {},
+                }
+
+            if method == "GET" and parts == ["status"]:
+                return self.status_response()
+
+            if method == "GET" and parts[:2] == ["status", "wait-for-block-after"]:
+                round = int(parts[2])
+
+        if method == "GET" and parts[:2] == ["status", "wait-for-block-after"]:
+            # wait outside of the lock so other clients can submit transactions
+            ledger.waitForBlockAfter(round)
+            with ledger.lock:
+                return self.status_response()
+
+        with ledger.lock:
+            if method == "GET" and parts == ["transactions", "params"]:
+                return {
+                    "consensus-version": "simulator",
+                    "fee": 0,
+                    "genesis-hash": b64encode(ledger.genesisHash).decode(),
+                    "genesis-id": ledger.genesisID,
+                    "last-round": ledger.round,
+                    "min-fee": MIN_TXN_FEE,
+                }
+
+            if method == "POST" and parts == ["transactions"]:
+                return {"txId": self.submit(data)}
+
+            if method == "GET" and parts == ["transactions", "pending"]:
+                return self.pool_response(response_format)
+
+            if method == "GET" and parts[:2] == ["transactions", "pending"]:
+                self.checkJSON(response_format)
+                return self.pending_response(parts[2])
+
+            if method == "GET" and parts[0] == "accounts" and len(parts) == 2:
+                return self.account_response(parts[1])
+
+            if method == "GET" and parts[0] == "applications" and len(parts) == 2:
+                return self.application_response(int(parts[1]))
+
+            if method == "GET" and parts[0] == "assets" and len(parts) == 2:
+                return self.asset_response(int(parts[1]))
+
+            if method == "GET" and parts[0] == "blocks" and len(parts) == 2:
+                return self.block_response(int(parts[1]), response_format)
+
+            if method == "POST" and parts == ["teal", "compile"]:
+                try:
+                    program = assemble(data.decode("utf-8"))
+                except Exception as e:
+                    raise error.AlgodHTTPError(str(e), 400)
+                return {
+                    "hash": encoding.encode_address(
+                        encoding.checksum(b"Program" + program)
+                    ),
+                    "result": b64encode(program).decode(),
+                }
+
+        raise error.AlgodHTTPError(
+            "{} {} is not supported by the simulator".format(method, requrl), 404
+        )
+
+    def checkJSON(self, response_format: str) -> None:
+        if response_format != "json":
+            raise error.AlgodHTTPError(
+                "format {} is not supported by the simulator".format(response_format),
+                400,
+            )
+
+    def status_response(self) -> Dict[str, Any]:
+        ledger = self.ledger
+        return {
+            "catchup-time": 0,
+            "last-round": ledger.round,
+            "last-version": "simulator",
+            "next-version": "simulator",
+            "next-version-round": ledger.round + 1,
+            "next-version-supported": True,
+            "stopped-at-unsupported-round": False,
+            "time-since-last-round": int((time() - ledger.lastBlockTime) * 1e9),
+        }
+
+    def submit(self, data: bytes) -> str:
+        unpacker = msgpack.Unpacker(
+            raw=False, strict_map_key=False, unicode_errors="surrogateescape"
+        )
+        unpacker.feed(data)
+        try:
+            signedTxns = list(unpacker)
+        except Exception as e:
+            raise error.AlgodHTTPError(
+                "could not decode transactions: {}".format(e), 400
+            )
+
+        try:
+            return self.ledger.submit(signedTxns)
+        except SimulationError as e:
+            raise error.AlgodHTTPError(str(e), 400)
+
+    def pool_response(self, response_format: str) -> Any:
+        # transactions are only pending until the next block
+        signedTxns = [
+            self.ledger.txns[txID].signedTxn for txID in self.ledger.pendingTxIDs
+        ]
+        if response_format == "msgpack":
+            return msgpack.packb(
+                {
+                    "top-transactions": signedTxns,
+                    "total-transactions": len(signedTxns),
+                },
+                use_bin_type=True,
+                unicode_errors="surrogateescape",
+            )
+        return {
+            "top-transactions": [
+                dict(
+                    jsonValue({k: v for k, v in signedTxn.items() if k != "txn"}),
+                    txn=jsonTxn(signedTxn["txn"]),
+                )
+                for signedTxn in signedTxns
+            ],
+            "total-transactions": len(signedTxns),
+        }
+
+    def pending_response(self, txID: str) -> Dict[str, Any]:
+        record = self.ledger.txns.get(txID)
+        if record is None:
+            raise error.AlgodHTTPError("txn does not exist", 404)
+
+        signedTxn = record.signedTxn
+        response = jsonApplyData(signedTxn["txn"], record.applyData)
+        response["txn"] = dict(
+            jsonValue({k: v for k, v in signedTxn.items() if k != "txn"}),
+            txn=jsonTxn(signedTxn["txn"]),
+        )
+        if record.round is not None:
+            response["confirmed-round"] = record.round
+        return response
+
+    def account_response(self, address: str) -> Dict[str, Any]:
+        ledger = self.ledger
+        try:
+            publicKey = encoding.decode_address(address)
+        except Exception:
+            raise error.AlgodHTTPError("failed to parse the address", 400)
+
+        data = ledger.state.getAccount(publicKey) or AccountData()
+        response: Dict[str, Any] = {
+            "address": address,
+            "amount": data.balance,
+            "amount-without-pending-rewards": data.balance,
+            "min-balance": data.minBalance() if not data.isEmpty() else 0,
+            "pending-rewards": 0,
+            "reward-base": 0,
+            "rewards": 0,
+            "round": ledger.round,
+            "status": "Offline",
+            "assets": [
+                {
+                    "amount": holding.amount,
+                    "asset-id": assetID,
+                    "creator": encoding.encode_address(
+                        self.asset_creator(assetID) or ZERO_ADDRESS
+                    ),
+                    "is-frozen": holding.frozen,
+                }
+                for assetID, holding in data.assets.items()
+            ],
+            "apps-local-state": [
+                {
+                    "id": appID,
+                    "key-value": self.state_response(state),
+                }
+                for appID, state in data.appLocals.items()
+            ],
+            "created-apps": [
+                self.application_response(appID)
+                for appID, app in ledger.state.apps.items()
+                if app is not None and app.creator == publicKey
+            ],
+            "created-assets": [
+                self.asset_response(assetID)
+                for assetID, asset in ledger.state.assets.items()
+                if asset is not None and asset.creator == publicKey
+            ],
+            "total-apps-opted-in": len(data.appLocals),
+            "total-assets-opted-in": len(data.assets),
+            "total-created-apps": data.createdApps,
+        }
+        if data.authAddr is not None:
+            response["auth-addr"] = encoding.encode_address(data.authAddr)
+        return response
+
+    def asset_creator(self, assetID: int) -> Optional[bytes]:
+        asset = self.ledger.state.getAsset(assetID)
+        return None if asset is None else asset.creator
+
+    def state_response(self, state: Dict[bytes, StackValue]) -> List[Dict[str, Any]]:
+        encoded: List[Dict[str, Any]] = []
+        for key, value in state.items():
+            if isinstance(value, int):
+                tealValue: Dict[str, Any] = {"type": 2, "bytes": "", "uint": value}
+            else:
+                tealValue = {"type": 1, "bytes": b64encode(value).decode(), "uint": 0}
+            encoded.append({"key": b64encode(key).decode(), "value": tealValue})
+        return encoded
+
+    def application_response(self, appID: int) -> Dict[str, Any]:
+        app = self.ledger.state.getApp(appID)
+        if app is None:
+            raise error.AlgodHTTPError("application does not exist", 404)
+        return {
+            "id": appID,
+            "params": {
+                "creator": encoding.encode_address(app.creator),
+                "approval-program": b64encode(app.approval).decode(),
+                "clear-state-program": b64encode(app.clear).decode(),
+                "extra-program-pages": app.extraPages,
+                "global-state": self.state_response(app.globalState),
+                "global-state-schema": {
+                    "num-uint": app.globalSchema[0],
+                    "num-byte-slice": app.globalSchema[1],
+                },
+                "local-state-schema": {
+                    "num-uint": app.localSchema[0],
+                    "num-byte-slice": app.localSchema[1],
+                },
+            },
+        }
+
+    def asset_response(self, assetID: int) -> Dict[str, Any]:
+        asset = self.ledger.state.getAsset(assetID)
+        if asset is None:
+            raise error.AlgodHTTPError("asset does not exist", 404)
+        params = asset.params
+        response: Dict[str, Any] = {
+            "creator": encoding.encode_address(asset.creator),
+            "total": params.get("t", 0),
+            "decimals": params.get("dc", 0),
+            "default-frozen": bool(params.get("df")),
+            "unit-name": params.get("un", ""),
+            "name": params.get("an", ""),
+            "url": params.get("au", ""),
+        }
+        if "am" in params:
+            response["metadata-hash"] = b64encode(params["am"]).decode()
+        for key, name in zip(
+            ASSET_ADDRESS_PARAMS, ("manager", "reserve", "freeze", "clawback")
+        ):
+            if key in params:
+                response[name] = encoding.encode_address(params[key])
+        return {"index": assetID, "params": response}
+
+    def block_response(self, round: int, response_format: str) -> Any:
+        block = self.ledger.blocks.get(round)
+        if block is None:
+            raise error.AlgodHTTPError(
+                "failed to retrieve information from the ledger", 404
+            )
+        if response_format == "msgpack":
+            return msgpack.packb(
+                {"block": block}, use_bin_type=True, unicode_errors="surrogateescape"
+            )
+        return {"block": jsonValue(block)}
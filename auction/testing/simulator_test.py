@@ -0,0 +1,184 @@
+import pytest
+
+from algosdk import encoding
+from algosdk.error import AlgodHTTPError
+from algosdk.future import transaction
+from algosdk.logic import get_application_address
+
+from ..assembler import assemble
+from ..blocks import getBlock, getBlockTxnIDs
+from ..operations import createAuctionApp, setupAuctionApp, placeBid, closeAuction
+from ..state import AuctionStateCache
+from ..util import getAppGlobalState, getBalances, getLastBlockTimestamp
+from .resources import createDummyAsset, optInToAsset
+from .simulator import Ledger, SimulatedAlgodClient
+
+START_TIME = 1_600_000_000
+
+
+@pytest.fixture(autouse=True)
+def contractCache(tmp_path, monkeypatch):
+    monkeypatch.setenv("AUCTION_CONTRACT_CACHE", str(tmp_path))
+
+
+def createAuction(client, ledger, reserve=1_000_000, increment=100_000):
+    creator = ledger.createAccount()
+    seller = ledger.createAccount()
+
+    nftID = createDummyAsset(client, 1, seller)
+
+    appID = createAuctionApp(
+        client=client,
+        sender=creator,
+        seller=seller.getAddress(),
+        nftID=nftID,
+        startTime=START_TIME + 10,
+        endTime=START_TIME + 70,
+        reserve=reserve,
+        minBidIncrement=increment,
+    )
+
+    setupAuctionApp(
+        client=client,
+        appID=appID,
+        funder=creator,
+        nftHolder=seller,
+        nftID=nftID,
+        nftAmount=1,
+    )
+
+    return appID, nftID, seller
+
+
+def test_auction_lifecycle():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+
+    appID, nftID, seller = createAuction(client, ledger)
+    appAddress = get_application_address(appID)
+
+    assert getBalances(client, appAddress) == {0: 2 * 100_000, nftID: 1}
+
+    bidder1 = ledger.createAccount()
+    bidder2 = ledger.createAccount()
+
+    with pytest.raises(Exception):
+        placeBid(client=client, appID=appID, bidder=bidder1, bidAmount=1_000_000)
+
+    ledger.advanceTime(15)
+
+    placeBid(client=client, appID=appID, bidder=bidder1, bidAmount=1_000_000)
+    bidder1AlgosBefore = getBalances(client, bidder1.getAddress())[0]
+
+    with pytest.raises(Exception):
+        placeBid(client=client, appID=appID, bidder=bidder2, bidAmount=1_001_000)
+
+    placeBid(client=client, appID=appID, bidder=bidder2, bidAmount=1_100_000)
+
+    state = getAppGlobalState(client, appID)
+    assert state[b"num_bids"] == 2
+    assert state[b"bid_amount"] == 1_100_000
+    assert state[b"bid_account"] == encoding.decode_address(bidder2.getAddress())
+
+    bidder1AlgosAfter = getBalances(client, bidder1.getAddress())[0]
+    assert bidder1AlgosAfter - bidder1AlgosBefore == 1_000_000
+
+    optInToAsset(client, nftID, bidder2)
+
+    ledger.advanceTime(60)
+    _, lastRoundTime = getLastBlockTimestamp(client)
+    assert lastRoundTime == START_TIME + 15
+
+    ledger.newBlock()
+    _, lastRoundTime = getLastBlockTimestamp(client)
+    assert lastRoundTime == START_TIME + 75
+
+    sellerAlgosBefore = getBalances(client, seller.getAddress())[0]
+    closeAuction(client, appID, seller)
+
+    assert getBalances(client, appAddress) == {0: 0}
+    assert getBalances(client, bidder2.getAddress())[nftID] == 1
+    sellerAlgosAfter = getBalances(client, seller.getAddress())[0]
+    assert sellerAlgosAfter > sellerAlgosBefore + 1_100_000
+
+    with pytest.raises(AlgodHTTPError):
+        client.application_info(appID)
+
+
+def test_rejected_group_is_atomic():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+
+    appID, _, _ = createAuction(client, ledger)
+
+    # the auction has not started yet
+    bidder = ledger.createAccount()
+    before = getBalances(client, bidder.getAddress())
+    round = client.status()["last-round"]
+
+    with pytest.raises(Exception) as e:
+        placeBid(client=client, appID=appID, bidder=bidder, bidAmount=1_000_000)
+
+    assert "logic eval error: assert failed" in str(e.value)
+    assert getBalances(client, bidder.getAddress()) == before
+    assert client.status()["last-round"] == round
+
+
+def test_blocks_match_state():
+    ledger = Ledger(timestamp=START_TIME)
+    client = SimulatedAlgodClient(ledger)
+
+    appID, _, _ = createAuction(client, ledger)
+    ledger.advanceTime(15)
+
+    stateCache = AuctionStateCache(client, [appID])
+    round = client.status()["last-round"]
+
+    bidder = ledger.createAccount()
+    placeBid(client=client, appID=appID, bidder=bidder, bidAmount=1_000_000)
+
+    txIDs = []
+    for r in range(round + 1, client.status()["last-round"] + 1):
+        block = getBlock(client, r)
+        txIDs += getBlockTxnIDs(block)
+        stateCache.applyBlock(block)
+
+    assert len(txIDs) == 2
+    assert stateCache.get(appID) == getAppGlobalState(client, appID)
+
+
+def test_pool_mode():
+    ledger = Ledger(timestamp=START_TIME, devMode=False)
+    client = SimulatedAlgodClient(ledger)
+
+    sender = ledger.genesisAccounts[0]
+    receiver = ledger.createAccount(0)
+
+    txn = transaction.PaymentTxn(
+        sender=sender.getAddress(),
+        receiver=receiver.getAddress(),
+        amt=1_000_000,
+        sp=client.suggested_params(),
+    )
+    signedTxn = txn.sign(sender.getPrivateKey())
+    txID = client.send_transaction(signedTxn)
+
+    assert "confirmed-round" not in client.pending_transaction_info(txID)
+
+    with pytest.raises(AlgodHTTPError) as e:
+        client.send_transaction(signedTxn)
+    assert "already in ledger" in str(e.value)
+
+    status = client.status_after_block(0)
+    assert status["last-round"] == 1
+    assert client.pending_transaction_info(txID)["confirmed-round"] == 1
+    assert getBalances(client, receiver.getAddress()) == {0: 1_000_000}
+
+
+def test_compile():
+    client = SimulatedAlgodClient()
+
+    response = client.compile("#pragma version 5\nint 1\nreturn")
+
+    assert response["result"] == "BYEBQw=="
+    assert assemble("#pragma version 5\nint 1\nreturn") == b"\x05\x81\x01\x43"
@@ -0,0 +1,254 @@
+from typing import Any, Callable, Dict, List, Optional, TypeVar, cast
+from functools import wraps
+from time import perf_counter, time
+import json
+import threading
+
+from algosdk.v2client.algod import AlgodClient
+from algosdk import error
+
+
+class Span:
+    """A timed unit of work: either an operation or a single algod request.
+
+    Attributes:
+        name: For an operation, its function name, e.g. "placeBid". For an
+            RPC, its method and path, e.g. "GET /applications/5".
+        kind: Either "operation" or "rpc".
+        startTime: The UNIX time at which the span started.
+        duration: The number of seconds the span took, once it has finished.
+        outcome: "ok" if the work succeeded, otherwise the name of the
+            exception that ended it, with the HTTP status code for algod errors.
+        attributes: Details about the span. RPC spans have "method", "path",
+            "requestBytes", and "responseBytes", the size of the response body
+            as read by the transport, whatever the response format.
+        children: The spans started while this one was active.
+    """
+
+    def __init__(
+        self, name: str, kind: str, parent: Optional["Span"] = None, **attributes
+    ) -> None:
+        self.name = name
+        self.kind = kind
+        self.parent = parent
+        self.attributes: Dict[str, Any] = attributes
+        self.children: List["Span"] = []
+
+        self.startTime = time()
+        self.start = perf_counter()
+        self.duration: Optional[float] = None
+        self.outcome: Optional[str] = None
+
+    def finish(self, exception: Optional[BaseException] = None) -> None:
+        self.duration = perf_counter() - self.start
+        if exception is None:
+            self.outcome = "ok"
+        elif isinstance(exception, error.AlgodHTTPError):
+            self.outcome = "{} {}".format(type(exception).__name__, exception.code)
+        else:
+            self.outcome = type(exception).__name__
+
+    def rpcs(self) -> List["Span"]:
+        """Get all RPC spans under this span, in the order they started."""
+        spans: List["Span"] = []
+        for child in self.children:
+            if child.kind == "rpc":
+                spans.append(child)
+            spans += child.rpcs()
+        return spans
+
+    def __repr__(self) -> str:
+        return "Span({!r}, {!r}, duration={!r}, outcome={!r})".format(
+            self.name, self.kind, self.duration, self.outcome
+        )
+
+
+class SpanExporter:
+    """Receives finished spans. Subclass this to send spans to a tracing
+    backend."""
+
+    def export(self, span: Span) -> None:
+        """Called once for every finished span that has no parent, with all of
+        its children attached."""
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps every exported span in a list."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.spans: List[Span] = []
+
+    def export(self, span: Span) -> None:
+        with self.lock:
+            self.spans.append(span)
+
+    def clear(self) -> List[Span]:
+        """Remove and return all exported spans."""
+        with self.lock:
+            spans = self.spans
+            self.spans = []
+        return spans
+
+
+class Tracer:
+    """Records spans and hands them to an exporter.
+
+    Spans started on a thread while another span is active on that thread
+    become its children, so RPCs are grouped under the operation that issued
+    them.
+
+    Args:
+        exporter (optional): The exporter for finished spans. Defaults to one
+            that discards them.
+    """
+
+    def __init__(self, exporter: Optional[SpanExporter] = None) -> None:
+        self.exporter = exporter if exporter is not None else SpanExporter()
+        self.local = threading.local()
+
+    def current(self) -> Optional[Span]:
+        return getattr(self.local, "span", None)
+
+    def startSpan(self, name: str, kind: str, **attributes) -> Span:
+        parent = self.current()
+        span = Span(name, kind, parent, **attributes)
+        if parent is not None:
+            parent.children.append(span)
+        self.local.span = span
+        return span
+
+    def endSpan(self, span: Span, exception: Optional[BaseException] = None) -> None:
+        span.finish(exception)
+        self.local.span = span.parent
+        if span.parent is None:
+            self.exporter.export(span)
+
+
+# the RPC span of the request being made on each thread, whatever the tracer, so
+# the transport that reads the response can report its size
+activeRpc = threading.local()
+
+
+def recordResponseBytes(size: int) -> None:
+    """Record the size of the body of a response to the request being traced on
+    the current thread. Called by transports once they have read a response,
+    before it is decoded."""
+    span: Optional[Span] = getattr(activeRpc, "span", None)
+    if span is not None:
+        span.attributes["responseBytes"] = size
+
+
+def measuredRequest(
+    client: AlgodClient,
+    method,
+    requrl,
+    params=None,
+    data=None,
+    headers=None,
+    response_format="json",
+):
+    """Make a request with a client so that the size of the response is
+    recorded, see recordResponseBytes.
+
+    The standard AlgodClient decodes JSON straight from the socket, so for it
+    the body is read as raw bytes and decoded here. Other clients are expected
+    to record the size themselves, like PooledAlgodClient does.
+    """
+    if type(client) is not AlgodClient:
+        return client.algod_request(
+            method, requrl, params, data, headers, response_format
+        )
+
+    # any format other than JSON returns the body as it was read
+    body = client.algod_request(method, requrl, params, data, headers, "raw")
+    recordResponseBytes(len(body))
+    if response_format != "json":
+        return body
+    try:
+        return json.loads(body)
+    except Exception as e:
+        raise error.AlgodResponseError(
+            "Failed to parse JSON response from algod"
+        ) from e
+
+
+class TracingAlgodClient(AlgodClient):
+    """An algod client that records a span for every request made through it.
+
+    Args:
+        client: The client that makes the requests.
+        tracer: The tracer to record spans with.
+    """
+
+    def __init__(self, client: AlgodClient, tracer: Tracer) -> None:
+        super().__init__(client.algod_token, client.algod_address, client.headers)
+        self.client = client
+        self.tracer = tracer
+
+    def algod_request(
+        self,
+        method,
+        requrl,
+        params=None,
+        data=None,
+        headers=None,
+        response_format="json",
+    ):
+        span = self.tracer.startSpan(
+            "{} {}".format(method, requrl),
+            "rpc",
+            method=method,
+            path=requrl,
+            requestBytes=len(data) if data is not None else 0,
+        )
+        outer = getattr(activeRpc, "span", None)
+        activeRpc.span = span
+        try:
+            response = measuredRequest(
+                self.client, method, requrl, params, data, headers, response_format
+            )
+        except BaseException as e:
+            self.tracer.endSpan(span, e)
+            raise
+        finally:
+            activeRpc.span = outer
+
+        if "responseBytes" not in span.attributes and isinstance(response, bytes):
+            span.attributes["responseBytes"] = len(response)
+        self.tracer.endSpan(span)
+        return response
+
+
+def getTracer(client: Any) -> Optional[Tracer]:
+    """Get the tracer of a client, or None if its requests are not traced."""
+    return getattr(client, "tracer", None)
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def traced(function: F) -> F:
+    """Record a span for every call to a function that takes an algod client as
+    its first argument, or as a keyword argument named client. Calls made with
+    a client that is not traced are not affected."""
+    name = function.__name__
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        client = kwargs["client"] if "client" in kwargs else args[0]
+        tracer = getTracer(client)
+        if tracer is None:
+            return function(*args, **kwargs)
+
+        span = tracer.startSpan(name, "operation")
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as e:
+            tracer.endSpan(span, e)
+            raise
+        tracer.endSpan(span)
+        return result
+
+    return cast(F, wrapper)
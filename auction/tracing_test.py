@@ -0,0 +1,121 @@
+import pytest
+
+from algosdk.v2client.algod import AlgodClient
+from algosdk.error import AlgodHTTPError
+
+from .operations import createAuctionApp, setupAuctionApp, placeBid
+from .tracing import InMemorySpanExporter, Tracer, TracingAlgodClient, traced
+from .testing.resources import createDummyAsset
+from .testing.simulator import Ledger, SimulatedAlgodClient
+from .transport import PooledAlgodClient
+from .transport_test import TOKEN, server  # noqa: F401
+
+START_TIME = 1_600_000_000
+
+
+@pytest.fixture(autouse=True)
+def contractCache(tmp_path, monkeypatch):
+    monkeypatch.setenv("AUCTION_CONTRACT_CACHE", str(tmp_path))
+
+
+def test_rpc_spans():
+    exporter = InMemorySpanExporter()
+    client = TracingAlgodClient(SimulatedAlgodClient(), Tracer(exporter))
+
+    client.status()
+    with pytest.raises(AlgodHTTPError):
+        client.application_info(1)
+
+    spans = exporter.clear()
+    assert [span.name for span in spans] == ["GET /status", "GET /applications/1"]
+    assert [span.outcome for span in spans] == ["ok", "AlgodHTTPError 404"]
+    assert all(span.kind == "rpc" and span.duration >= 0 for span in spans)
+
+
+@pytest.mark.parametrize("pooled", [False, True])
+def test_response_bytes(server, pooled):  # noqa: F811
+    exporter = InMemorySpanExporter()
+    inner = (
+        PooledAlgodClient(TOKEN, server.address)
+        if pooled
+        else AlgodClient(TOKEN, server.address)
+    )
+    client = TracingAlgodClient(inner, Tracer(exporter))
+
+    assert client.status() == {"last-round": 7}
+    assert client.send_raw_transaction("YWJj") == "abc"
+
+    spans = exporter.clear()
+    assert [span.attributes["responseBytes"] for span in spans] == [
+        len(b'{"last-round": 7}'),
+        len(b'{"txId": "abc"}'),
+    ]
+
+
+def test_operation_spans():
+    ledger = Ledger(timestamp=START_TIME)
+    exporter = InMemorySpanExporter()
+    client = TracingAlgodClient(SimulatedAlgodClient(ledger), Tracer(exporter))
+
+    creator = ledger.createAccount()
+    seller = ledger.createAccount()
+    bidder = ledger.createAccount()
+    nftID = createDummyAsset(client, 1, seller)
+
+    appID = createAuctionApp(
+        client=client,
+        sender=creator,
+        seller=seller.getAddress(),
+        nftID=nftID,
+        startTime=START_TIME + 10,
+        endTime=START_TIME + 70,
+        reserve=1_000_000,
+        minBidIncrement=100_000,
+    )
+    setupAuctionApp(
+        client=client,
+        appID=appID,
+        funder=creator,
+        nftHolder=seller,
+        nftID=nftID,
+        nftAmount=1,
+    )
+    ledger.advanceTime(15)
+    exporter.clear()
+
+    placeBid(client=client, appID=appID, bidder=bidder, bidAmount=1_000_000)
+
+    spans = exporter.clear()
+    assert len(spans) == 1
+    span = spans[0]
+    assert span.name == "placeBid"
+    assert span.kind == "operation"
+    assert span.outcome == "ok"
+
+    assert [child.name for child in span.children] == [
+        "GET /applications/{}".format(appID),
+        "GET /transactions/params",
+        "POST /transactions",
+        "waitForTransaction",
+    ]
+    send = span.children[2]
+    assert send.attributes["method"] == "POST"
+    assert send.attributes["requestBytes"] > 0
+
+    wait = span.children[3]
+    assert wait.kind == "operation"
+    assert [child.name for child in wait.children][0] == "GET /status"
+    assert len(span.rpcs()) == 3 + len(wait.children)
+
+
+def test_untraced_client():
+    calls = []
+
+    @traced
+    def operation(client, value):
+        calls.append(value)
+        return value
+
+    assert operation(SimulatedAlgodClient(), 1) == 1
+    assert operation(client=object(), value=2) == 2
+    assert calls == [1, 2]
@@ -0,0 +1,237 @@
+from typing import List, Optional, Union
+from urllib import parse
+import http.client
+import json
+import threading
+
+from algosdk.v2client.algod import AlgodClient, api_version_path_prefix
+from algosdk import constants, error
+
+from .tracing import recordResponseBytes
+
+Connection = Union[http.client.HTTPConnection, http.client.HTTPSConnection]
+
+DEFAULT_POOL_SIZE = 10
+
+# errors that mean a kept alive connection was closed by the other side
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+    ConnectionAbortedError,
+)
+
+
+class ConnectionPool:
+    """A thread safe pool of persistent HTTP connections to a single host.
+
+    Connections are opened on demand, up to maxSize at a time. Callers that need
+    a connection while all of them are in use wait for one to be released.
+
+    Args:
+        address: The scheme, host and optional port of the server, e.g.
+            "http://localhost:4001".
+        maxSize (optional): The maximum number of open connections. Defaults to
+            10.
+        timeout (optional): The socket timeout of each connection, in seconds.
+            Defaults to no timeout.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        maxSize: int = DEFAULT_POOL_SIZE,
+        timeout: Optional[float] = None,
+    ) -> None:
+        if maxSize < 1:
+            raise Exception("Pool size must be at least 1, got {}".format(maxSize))
+
+        url = parse.urlsplit(address)
+        if url.scheme not in ("http", "https"):
+            raise Exception("Unsupported algod address: {}".format(address))
+
+        self.scheme = url.scheme
+        self.host = url.hostname
+        self.port = url.port
+        # any path in the address is a prefix of every request
+        self.basePath = url.path.rstrip("/")
+        self.maxSize = maxSize
+        self.timeout = timeout
+
+        self.condition = threading.Condition()
+        self.idle: List[Connection] = []
+        self.size = 0
+        # once closed, connections are no longer kept when they are released
+        self.closed = False
+
+    def connect(self) -> Connection:
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(
+                self.host, self.port, timeout=self.timeout
+            )
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def acquire(self) -> Connection:
+        """Get a connection for a single request.
+
+        The connection must be given back with release() once its response has
+        been read, or discard() if it is no longer usable.
+        """
+        with self.condition:
+            while len(self.idle) == 0 and self.size >= self.maxSize:
+                self.condition.wait()
+
+            if len(self.idle) > 0:
+                # the most recently used connection is the least likely to have
+                # been closed by the server
+                return self.idle.pop()
+
+            self.size += 1
+
+        return self.connect()
+
+    def release(self, connection: Connection) -> None:
+        with self.condition:
+            if not self.closed:
+                self.idle.append(connection)
+                self.condition.notify()
+                return
+        self.discard(connection)
+
+    def discard(self, connection: Connection) -> None:
+        connection.close()
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    def close(self) -> None:
+        """Close all idle connections. Connections in use are closed when they
+        are released, and so are connections opened by later requests."""
+        with self.condition:
+            self.closed = True
+            idle = self.idle
+            self.idle = []
+            self.size -= len(idle)
+            self.condition.notify_all()
+        for connection in idle:
+            connection.close()
+
+
+class PooledAlgodClient(AlgodClient):
+    """An algod client that reuses persistent connections.
+
+    The standard AlgodClient opens a new connection for every request. This
+    client keeps connections alive in a ConnectionPool, so polling loops like
+    waitForTransaction do not pay for TCP setup on every request. A single
+    client can be shared by any number of threads.
+
+    Args:
+        algod_token: The algod API token.
+        algod_address: The address of algod, e.g. "http://localhost:4001".
+        headers (optional): Extra headers to send with every request.
+        poolSize (optional): The maximum number of open connections. Defaults to
+            10.
+        timeout (optional): The socket timeout of each connection, in seconds.
+            Defaults to no timeout.
+    """
+
+    def __init__(
+        self,
+        algod_token: str,
+        algod_address: str,
+        headers=None,
+        poolSize: int = DEFAULT_POOL_SIZE,
+        timeout: Optional[float] = None,
+    ) -> None:
+        super().__init__(algod_token, algod_address, headers)
+        self.pool = ConnectionPool(algod_address, poolSize, timeout)
+
+    def close(self) -> None:
+        """Close the idle connections of the client."""
+        self.pool.close()
+
+    def algod_request(
+        self,
+        method,
+        requrl,
+        params=None,
+        data=None,
+        headers=None,
+        response_format="json",
+    ):
+        header = {}
+
+        if self.headers:
+            header.update(self.headers)
+
+        if headers:
+            header.update(headers)
+
+        if requrl not in constants.no_auth:
+            header.update({constants.algod_auth_header: self.algod_token})
+
+        if requrl not in constants.unversioned_paths:
+            requrl = api_version_path_prefix + requrl
+        if params:
+            requrl = requrl + "?" + parse.urlencode(params)
+
+        status, body = self.send(method, self.pool.basePath + requrl, data, header)
+        recordResponseBytes(len(body))
+
+        if status >= 400:
+            message = body.decode("utf-8")
+            try:
+                message = json.loads(message)["message"]
+            except Exception:
+                pass
+            raise error.AlgodHTTPError(message, status)
+
+        if response_format == "json":
+            try:
+                return json.loads(body)
+            except Exception as e:
+                raise error.AlgodResponseError(
+                    "Failed to parse JSON response from algod"
+                ) from e
+        return body
+
+    def send(self, method, path, data, headers):
+        # a request on a connection from the pool is retried once on a new
+        # connection if the server had already closed it
+        for attempt in range(2):
+            connection = self.pool.acquire()
+            reused = connection.sock is not None
+            retryable = reused and attempt == 0
+
+            try:
+                connection.request(method, path, body=data, headers=headers)
+            except STALE_CONNECTION_ERRORS:
+                self.pool.discard(connection)
+                if retryable:
+                    continue
+                raise
+            except BaseException:
+                self.pool.discard(connection)
+                raise
+
+            try:
+                response = connection.getresponse()
+                body = response.read()
+            except STALE_CONNECTION_ERRORS:
+                self.pool.discard(connection)
+                # the request may have been processed, so only retry reads
+                if retryable and method == "GET":
+                    continue
+                raise
+            except BaseException:
+                self.pool.discard(connection)
+                raise
+
+            if response.will_close:
+                self.pool.discard(connection)
+            else:
+                self.pool.release(connection)
+            return response.status, body
+
+        raise Exception("Unreachable")
@@ -0,0 +1,155 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep
+import json
+import threading
+
+import pytest
+
+from algosdk.error import AlgodHTTPError
+
+from .transport import PooledAlgodClient
+
+TOKEN = "a" * 64
+
+
+class FakeAlgod(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), FakeAlgodHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.active = 0
+        self.maxActive = 0
+        # if set, every connection is closed after this many requests
+        self.requestsPerConnection = None
+
+    @property
+    def address(self) -> str:
+        return "http://127.0.0.1:{}".format(self.server_address[1])
+
+
+class FakeAlgodHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.requests = 0
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def respond(self, status, body):
+        encoded = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+        self.requests += 1
+        limit = self.server.requestsPerConnection
+        if limit is not None and self.requests >= limit:
+            # close without telling the client, like an idle timeout would
+            self.close_connection = True
+
+    def do_GET(self):
+        if self.headers.get("X-Algo-API-Token") != TOKEN:
+            self.respond(401, {"message": "Invalid API Token"})
+        elif self.path == "/v2/status":
+            self.respond(200, {"last-round": 7})
+        elif self.path == "/v2/status/wait-for-block-after/7":
+            with self.server.lock:
+                self.server.active += 1
+                self.server.maxActive = max(self.server.maxActive, self.server.active)
+            sleep(0.05)
+            with self.server.lock:
+                self.server.active -= 1
+            self.respond(200, {"last-round": 8})
+        else:
+            self.respond(404, {"message": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        body = self.rfile.read(length)
+        self.respond(200, {"txId": body.decode()})
+
+
+@pytest.fixture
+def server():
+    server = FakeAlgod()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_reuses_connections(server):
+    client = PooledAlgodClient(TOKEN, server.address)
+
+    for _ in range(5):
+        assert client.status()["last-round"] == 7
+    assert client.algod_request("POST", "/transactions", data=b"abc") == {"txId": "abc"}
+
+    assert server.connections == 1
+    client.close()
+
+
+def test_errors(server):
+    client = PooledAlgodClient(TOKEN, server.address)
+
+    with pytest.raises(AlgodHTTPError) as e:
+        client.application_info(1)
+    assert e.value.code == 404
+    assert str(e.value) == "not found"
+
+    with pytest.raises(AlgodHTTPError) as e:
+        PooledAlgodClient("wrong", server.address).status()
+    assert e.value.code == 401
+
+    # the connection is still usable after an error response
+    assert client.status()["last-round"] == 7
+    assert server.connections == 2
+
+
+def test_pool_size(server):
+    client = PooledAlgodClient(TOKEN, server.address, poolSize=2)
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda _: client.status_after_block(7), range(8)))
+
+    assert all(result["last-round"] == 8 for result in results)
+    assert server.maxActive == 2
+    assert server.connections == 2
+
+
+def test_reconnects_after_close(server):
+    server.requestsPerConnection = 1
+    client = PooledAlgodClient(TOKEN, server.address)
+
+    for _ in range(3):
+        assert client.status()["last-round"] == 7
+        # give the server time to close the connection
+        sleep(0.05)
+
+    assert server.connections == 3
+
+
+def test_close_while_in_use(server):
+    client = PooledAlgodClient(TOKEN, server.address)
+    pool = client.pool
+
+    inUse = pool.acquire()
+    assert client.status()["last-round"] == 7
+    assert pool.size == 2
+
+    client.close()
+    assert (len(pool.idle), pool.size) == (0, 1)
+
+    # a connection released after the pool was closed is not kept
+    pool.release(inUse)
+    assert (len(pool.idle), pool.size) == (0, 0)
@@ -1,4 +1,4 @@
-from typing import List, Tuple, Dict, Any, Optional, Union
+from typing import List, Tuple, Dict, Any, Iterable, Optional, Union, Sequence
 from base64 import b64decode
 
 from algosdk.v2client.algod import AlgodClient
@@ -7,6 +7,12 @@ from algosdk import encoding
 from pyteal import compileTeal, Mode, Expr
 
 from .account import Account
+from .assembler import assemble
+from .blocks import getBlock, getBlockTxnIDs, getPoolTxnIDs
+from .cache import ProgramCache
+from .tracing import traced
+
+TEAL_VERSION = 5
 
 
 class PendingTxnResponse:
@@ -28,6 +34,7 @@ class PendingTxnResponse:
         self.logs: List[bytes] = [b64decode(l) for l in response.get("logs", [])]
 
 
+@traced
 def waitForTransaction(
     client: AlgodClient, txID: str, timeout: int = 10
 ) -> PendingTxnResponse:
@@ -53,10 +60,127 @@ def waitForTransaction(
     )
 
 
-def fullyCompileContract(client: AlgodClient, contract: Expr) -> bytes:
-    teal = compileTeal(contract, mode=Mode.Application, version=5)
-    response = client.compile(teal)
-    return b64decode(response["result"])
+@traced
+def waitForTransactions(
+    client: AlgodClient,
+    txIDs: Sequence[str],
+    timeout: Union[int, Dict[str, int]] = 10,
+) -> List[Union[PendingTxnResponse, Exception]]:
+    """Wait for many transactions to be confirmed at once.
+
+    This waits for each new round once, reads its block, and matches the IDs of
+    the transactions in it against all transactions that are still
+    outstanding. After each new round, the transaction pool is listed with a
+    single request, and only outstanding transactions that are neither in a
+    block nor in the pool are looked up on their own, so a transaction that was
+    evicted from the pool is reported with its pool error right away instead of
+    after its timeout.
+
+    Args:
+        client: An algod client.
+        txIDs: The IDs of the transactions to wait for.
+        timeout (optional): The number of rounds to wait for each transaction.
+            Either a single value for all transactions, or a dictionary from
+            transaction ID to its timeout. Transactions missing from the
+            dictionary use the default of 10 rounds.
+
+    Returns:
+        A list with one entry for each transaction ID, in the same order. Each
+        entry is either the PendingTxnResponse of the confirmed transaction, or
+        the Exception describing why it could not be confirmed.
+    """
+    lastStatus = client.status()
+    lastRound = lastStatus["last-round"]
+    startRound = lastRound
+
+    def getTimeout(txID: str) -> int:
+        if isinstance(timeout, int):
+            return timeout
+        return timeout.get(txID, 10)
+
+    results: Dict[str, Union[PendingTxnResponse, Exception]] = dict()
+
+    def check(txID: str) -> None:
+        pending_txn = client.pending_transaction_info(txID)
+
+        if pending_txn.get("confirmed-round", 0) > 0:
+            results[txID] = PendingTxnResponse(pending_txn)
+        elif pending_txn["pool-error"]:
+            results[txID] = Exception(
+                "Pool error: {}".format(pending_txn["pool-error"])
+            )
+
+    def checkMissing(txIDs: Iterable[str]) -> None:
+        # a transaction that has left the pool without being seen in a block was
+        # either confirmed in a round not read yet, or rejected
+        inPool = getPoolTxnIDs(client)
+        for txID in txIDs:
+            if txID not in inPool:
+                check(txID)
+
+    unique = list(dict.fromkeys(txIDs))
+
+    # some transactions may have been confirmed or rejected before this was called
+    checkMissing(unique)
+
+    while True:
+        for txID in unique:
+            if txID not in results and lastRound >= startRound + getTimeout(txID):
+                # one last look to report a pool error instead of a timeout
+                check(txID)
+                if txID not in results:
+                    results[txID] = Exception(
+                        "Transaction {} not confirmed after {} rounds".format(
+                            txID, getTimeout(txID)
+                        )
+                    )
+
+        outstanding = set(txID for txID in unique if txID not in results)
+        if len(outstanding) == 0:
+            break
+
+        lastStatus = client.status_after_block(lastRound)
+        newRound = max(lastStatus["last-round"], lastRound + 1)
+
+        for round in range(lastRound + 1, newRound + 1):
+            for txID in getBlockTxnIDs(getBlock(client, round)):
+                if txID in outstanding and txID not in results:
+                    check(txID)
+
+        remaining = [
+            txID for txID in unique if txID in outstanding and txID not in results
+        ]
+        if len(remaining) > 0:
+            checkMissing(remaining)
+
+        lastRound = newRound
+
+    return [results[txID] for txID in txIDs]
+
+
+def fullyCompileContract(
+    client: Optional[AlgodClient],
+    contract: Expr,
+    cache: Optional[ProgramCache] = None,
+) -> bytes:
+    teal = compileTeal(contract, mode=Mode.Application, version=TEAL_VERSION)
+
+    if cache is not None:
+        program = cache.get(teal, TEAL_VERSION)
+        if program is not None:
+            return program
+
+    if client is None:
+        # assemble locally, which produces the same bytes as algod's compile endpoint
+        program = assemble(teal)
+    else:
+        response = client.compile(teal)
+        program = b64decode(response["result"])
+
+    if cache is not None:
+        cache.put(teal, TEAL_VERSION, program)
+
+    return program
 
 
 def decodeState(stateArray: List[Any]) -> Dict[bytes, Union[int, bytes]]:
@@ -0,0 +1,132 @@
+from typing import Dict, List
+from base64 import b64decode
+
+import msgpack
+
+from algosdk import account
+from algosdk.future import transaction
+
+from .blocks import getBlockTxn, getTxnID
+from .util import waitForTransactions
+
+GENESIS_HASH = "SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI="
+
+
+def makeSignedTxn(note: bytes) -> transaction.SignedTransaction:
+    sk, addr = account.generate_account()
+    sp = transaction.SuggestedParams(1000, 1, 1001, GENESIS_HASH, "test-v1")
+    txn = transaction.PaymentTxn(addr, sp, addr, 1, note=note)
+    return txn.sign(sk)
+
+
+def toBlockEntry(signedTxn: transaction.SignedTransaction) -> Dict:
+    stib = signedTxn.dictify()
+    stib["txn"] = dict(stib["txn"])
+    del stib["txn"]["gen"]
+    del stib["txn"]["gh"]
+    stib["hgi"] = True
+    return stib
+
+
+class FakeClient:
+    def __init__(
+        self,
+        blocks: Dict[int, List[transaction.SignedTransaction]],
+        pool: List[transaction.SignedTransaction],
+    ):
+        self.round = 1
+        self.blocks = blocks
+        # the transactions submitted to the node, which are in its pool until
+        # they are confirmed, rejected or evicted
+        self.pool = pool
+        self.confirmed: Dict[str, int] = dict()
+        # transactions rejected right away, and evicted from round 3
+        self.rejected: List[str] = []
+        self.evicted: List[str] = []
+        self.calls: Dict[str, int] = dict()
+
+    def count(self, method: str) -> None:
+        self.calls[method] = self.calls.get(method, 0) + 1
+
+    def status(self):
+        self.count("status")
+        return {"last-round": self.round}
+
+    def status_after_block(self, round):
+        self.count("status_after_block")
+        self.round = round + 1
+        for txn in self.blocks.get(self.round, []):
+            self.confirmed[txn.get_txid()] = self.round
+        return {"last-round": self.round}
+
+    def block_info(self, round, response_format="json"):
+        self.count("block_info")
+        assert response_format == "msgpack"
+        block = {
+            "rnd": round,
+            "gen": "test-v1",
+            "gh": b64decode(GENESIS_HASH),
+            "txns": [toBlockEntry(txn) for txn in self.blocks.get(round, [])],
+        }
+        return msgpack.packb({"block": block}, use_bin_type=True)
+
+    def poolError(self, txID):
+        if txID in self.rejected:
+            return "overspend"
+        if txID in self.evicted and self.round >= 3:
+            return "txn dead"
+        return ""
+
+    def pending_transactions(self, max_txns=0, response_format="json"):
+        self.count("pending_transactions")
+        assert response_format == "msgpack"
+        pending = [
+            signedTxn.dictify()
+            for signedTxn in self.pool
+            if signedTxn.get_txid() not in self.confirmed
+            and self.poolError(signedTxn.get_txid()) == ""
+        ]
+        return msgpack.packb(
+            {"top-transactions": pending, "total-transactions": len(pending)},
+            use_bin_type=True,
+        )
+
+    def pending_transaction_info(self, txID):
+        self.count("pending_transaction_info")
+        response = {"pool-error": self.poolError(txID), "txn": {}}
+        if txID in self.confirmed:
+            response["confirmed-round"] = self.confirmed[txID]
+        return response
+
+
+def test_getTxnID():
+    signedTxn = makeSignedTxn(b"note")
+    block = {"gen": "test-v1", "gh": b64decode(GENESIS_HASH)}
+
+    txn = getBlockTxn(block, toBlockEntry(signedTxn))
+
+    assert getTxnID(txn) == signedTxn.get_txid()
+
+
+def test_waitForTransactions():
+    txns = [makeSignedTxn(bytes([i])) for i in range(8)]
+    client = FakeClient({2: txns[:3], 4: txns[3:5]}, txns)
+    client.rejected.append(txns[6].get_txid())
+    client.evicted.append(txns[7].get_txid())
+    txIDs = [txn.get_txid() for txn in txns]
+
+    results = waitForTransactions(client, txIDs, {txIDs[5]: 3})
+
+    assert [r.confirmedRound for r in results[:5]] == [2, 2, 2, 4, 4]
+    assert "not confirmed after 3 rounds" in str(results[5])
+    assert "Pool error: overspend" in str(results[6])
+    assert "Pool error: txn dead" in str(results[7])
+
+    # one block and one listing of the pool per round, plus one at first
+    assert client.calls["block_info"] == client.calls["status_after_block"] == 3
+    assert client.calls["pending_transactions"] == 1 + 3
+    # transactions are only looked up on their own once they have left the
+    # pool: the rejected one at first, 3 confirmed in round 2, the evicted one in
+    # round 3, 2 confirmed in round 4, and one last look at the one that timed
+    # out
+    assert client.calls["pending_transaction_info"] == 1 + 3 + 1 + 2 + 1
@@ -0,0 +1,196 @@
+from typing import Dict, Optional
+from concurrent.futures import Future
+import threading
+
+from algosdk.v2client.algod import AlgodClient
+
+from .blocks import getBlock, getBlockTxnIDs
+from .util import PendingTxnResponse
+
+
+class PendingTxn:
+    def __init__(self, future: "Future[PendingTxnResponse]", timeout: int) -> None:
+        self.future = future
+        self.timeout = timeout
+        # the round after which the transaction times out, set once it is first checked
+        self.deadline: Optional[int] = None
+
+
+class ConfirmationWatcher:
+    """Waits for transactions to be confirmed in the background.
+
+    Every watched transaction gets a future that resolves to its
+    PendingTxnResponse once it is confirmed, or to an Exception if it is
+    rejected by the transaction pool or not confirmed in time. A single
+    background thread waits for each new round once, reads its block, and
+    matches it against all watched transactions, so any number of
+    transactions can be in flight at once.
+
+    Args:
+        client: An algod client.
+        timeout (optional): The default number of rounds to wait for each
+            transaction. Defaults to 10.
+    """
+
+    def __init__(self, client: AlgodClient, timeout: int = 10) -> None:
+        self.client = client
+        self.timeout = timeout
+
+        self.lock = threading.Lock()
+        self.pending: Dict[str, PendingTxn] = dict()
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def watch(
+        self, txID: str, timeout: Optional[int] = None
+    ) -> "Future[PendingTxnResponse]":
+        """Start watching a submitted transaction.
+
+        Args:
+            txID: The ID of the transaction.
+            timeout (optional): The number of rounds to wait for the
+                transaction. Defaults to the timeout of the watcher.
+
+        Returns:
+            A future for the confirmed transaction. It fails at once if the
+            watcher has been stopped.
+        """
+        future: "Future[PendingTxnResponse]" = Future()
+        with self.lock:
+            if self.stopped.is_set():
+                future.set_exception(Exception("ConfirmationWatcher was stopped"))
+                return future
+
+            existing = self.pending.get(txID)
+            if existing is not None:
+                return existing.future
+
+            self.pending[txID] = PendingTxn(
+                future, timeout if timeout is not None else self.timeout
+            )
+
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.run, name="ConfirmationWatcher", daemon=True
+                )
+                self.thread.start()
+
+        self.wakeup.set()
+        return future
+
+    def stop(self) -> None:
+        """Stop watching. Transactions that are still pending are failed."""
+        with self.lock:
+            # transactions watched from now on are failed by watch, and those
+            # watched before are failed by the background thread as it exits
+            self.stopped.set()
+        self.wakeup.set()
+
+    def resolve(
+        self,
+        txID: str,
+        error: Optional[Exception] = None,
+        response: Optional[PendingTxnResponse] = None,
+    ) -> None:
+        with self.lock:
+            pendingTxn = self.pending.pop(txID, None)
+        if pendingTxn is None or pendingTxn.future.done():
+            return
+        if error is not None:
+            pendingTxn.future.set_exception(error)
+        else:
+            pendingTxn.future.set_result(response)
+
+    def check(self, txID: str) -> bool:
+        try:
+            pending_txn = self.client.pending_transaction_info(txID)
+        except Exception as e:
+            self.resolve(txID, error=e)
+            return True
+
+        if pending_txn.get("confirmed-round", 0) > 0:
+            self.resolve(txID, response=PendingTxnResponse(pending_txn))
+            return True
+
+        if pending_txn["pool-error"]:
+            self.resolve(
+                txID,
+                error=Exception("Pool error: {}".format(pending_txn["pool-error"])),
+            )
+            return True
+
+        return False
+
+    def run(self) -> None:
+        lastRound: Optional[int] = None
+
+        while not self.stopped.is_set():
+            if lastRound is None:
+                try:
+                    lastRound = self.client.status()["last-round"]
+                except Exception:
+                    # algod may be temporarily unavailable, try again
+                    self.stopped.wait(1)
+                    continue
+
+            with self.lock:
+                new = [
+                    (txID, pendingTxn)
+                    for txID, pendingTxn in self.pending.items()
+                    if pendingTxn.deadline is None
+                ]
+                for _, pendingTxn in new:
+                    pendingTxn.deadline = lastRound + pendingTxn.timeout
+                outstanding = len(self.pending)
+
+            # new transactions may have been confirmed before they were watched
+            for txID, _ in new:
+                self.check(txID)
+
+            if outstanding == 0:
+                self.wakeup.wait()
+                self.wakeup.clear()
+                # the chain has moved on while nothing was being watched
+                lastRound = None
+                continue
+
+            try:
+                lastStatus = self.client.status_after_block(lastRound)
+                newRound = max(lastStatus["last-round"], lastRound + 1)
+
+                for round in range(lastRound + 1, newRound + 1):
+                    txIDs = getBlockTxnIDs(getBlock(self.client, round))
+                    with self.lock:
+                        confirmed = [txID for txID in txIDs if txID in self.pending]
+                    for txID in confirmed:
+                        self.check(txID)
+
+                lastRound = newRound
+            except Exception:
+                # algod may be temporarily unavailable, try again
+                self.stopped.wait(1)
+                continue
+
+            with self.lock:
+                expired = [
+                    txID
+                    for txID, pendingTxn in self.pending.items()
+                    if pendingTxn.deadline is not None
+                    and pendingTxn.deadline <= lastRound
+                ]
+
+            for txID in expired:
+                # one last look to report a pool error instead of a timeout
+                if not self.check(txID):
+                    self.resolve(
+                        txID,
+                        error=Exception(
+                            "Transaction {} not confirmed in time".format(txID)
+                        ),
+                    )
+
+        with self.lock:
+            remaining = list(self.pending.keys())
+        for txID in remaining:
+            self.resolve(txID, error=Exception("ConfirmationWatcher was stopped"))
@@ -0,0 +1,85 @@
+from typing import Dict, List
+from base64 import b64decode
+from time import sleep
+
+import msgpack
+import pytest
+
+from algosdk import account
+from algosdk.future import transaction
+
+from .watcher import ConfirmationWatcher
+
+GENESIS_HASH = "SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI="
+
+
+def makeSignedTxn(note: bytes) -> transaction.SignedTransaction:
+    sk, addr = account.generate_account()
+    sp = transaction.SuggestedParams(1000, 1, 1001, GENESIS_HASH, "test-v1")
+    return transaction.PaymentTxn(addr, sp, addr, 1, note=note).sign(sk)
+
+
+class FakeClient:
+    def __init__(self, blocks: Dict[int, List[transaction.SignedTransaction]]):
+        self.round = 1
+        self.blocks = blocks
+        self.confirmed: Dict[str, int] = dict()
+
+    def status(self):
+        return {"last-round": self.round}
+
+    def status_after_block(self, round):
+        sleep(0.01)
+        self.round = round + 1
+        for txn in self.blocks.get(self.round, []):
+            self.confirmed[txn.get_txid()] = self.round
+        return {"last-round": self.round}
+
+    def block_info(self, round, response_format="json"):
+        txns = []
+        for signedTxn in self.blocks.get(round, []):
+            stib = signedTxn.dictify()
+            stib["txn"] = {
+                k: v for k, v in stib["txn"].items() if k not in ("gen", "gh")
+            }
+            stib["hgi"] = True
+            txns.append(stib)
+        block = {"rnd": round, "gen": "test-v1", "gh": b64decode(GENESIS_HASH)}
+        block["txns"] = txns
+        return msgpack.packb({"block": block}, use_bin_type=True)
+
+    def pending_transaction_info(self, txID):
+        response = {"pool-error": "", "txn": {}}
+        if txID == "rejected":
+            response["pool-error"] = "overspend"
+        if txID in self.confirmed:
+            response["confirmed-round"] = self.confirmed[txID]
+        return response
+
+
+def test_ConfirmationWatcher():
+    txns = [makeSignedTxn(bytes([i])) for i in range(3)]
+    client = FakeClient({3: [txns[0]], 5: [txns[1]]})
+    watcher = ConfirmationWatcher(client, timeout=10)
+
+    first = watcher.watch(txns[0].get_txid())
+    second = watcher.watch(txns[1].get_txid())
+    rejected = watcher.watch("rejected")
+    late = watcher.watch(txns[2].get_txid(), timeout=2)
+
+    assert first.result(timeout=5).confirmedRound == 3
+    assert second.result(timeout=5).confirmedRound == 5
+
+    with pytest.raises(Exception, match="Pool error: overspend"):
+        rejected.result(timeout=5)
+
+    with pytest.raises(Exception, match="not confirmed in time"):
+        late.result(timeout=5)
+
+    watcher.stop()
+
+    # transactions watched once the watcher is stopped fail at once
+    stopped = watcher.watch(txns[0].get_txid())
+    with pytest.raises(Exception, match="stopped"):
+        stopped.result(timeout=0)
+    assert watcher.pending == {}